@@ -11,6 +11,7 @@ from bokeh.models.annotations import Label, LabelSet
 from bokeh.models.tickers import SingleIntervalTicker
 from bokeh.core.property.numeric import Interval
 from bokeh.palettes import Reds
+import derived_vars as dv
 
 # Set paths to work across Mac/Windows/Linux platforms
 cur_path = os.path.split(os.path.abspath(__file__))[0]
@@ -47,9 +48,9 @@ df2 = pd.read_csv(data_path2, header=2,
                          'L_ref_T340': np.float64,
                          'D_ref_T340': np.float64},
                   skiprows=0)
-df2['DebtGDP_base'] = (df2['D_base'] / df2['Y_base']) * 100
-df2['DebtGDP_ref_G033'] = (df2['D_ref_G033'] / df2['Y_ref_G033']) * 100
-df2['DebtGDP_ref_T340'] = (df2['D_ref_T340'] / df2['Y_ref_T340']) * 100
+# Debt-to-GDP ratios and percent changes from baseline are computed on
+# demand from the formulas in derived_vars.py
+ogusa_frame = dv.DerivedFrame(df2, dv.ogusa_formulas)
 
 # Read data from ogusa_avg_hhdist_data.csv
 df3 = pd.read_csv(data_path3, header=2,
@@ -397,21 +398,15 @@ if __name__ == "__main__":
     fig_path2 = os.path.join(images_dir,
                              'tseries_pubdebt_gdp_G033_T340.html')
     pubdebt_gdp_G033_T340_tseries = \
-        gen_tseries_dy(frcst_var_list2, legend_label_list2, df2, color_list2,
-                       marker_list2, start_year=2021, end_year=2055,
+        gen_tseries_dy(frcst_var_list2, legend_label_list2,
+                       ogusa_frame.frame(['year'] + frcst_var_list2),
+                       color_list2, marker_list2, start_year=2021,
+                       end_year=2055,
                        note_text_list=note_text_list2,
                        fig_title_str=fig_title2, fig_path=fig_path2)
     show(pubdebt_gdp_G033_T340_tseries)
 
     # Plot macro aggregates percent changes from OG-USA gov't spending cut
-    df2['Y_pctchg_G033'] = ((df2['Y_ref_G033'] - df2['Y_base']) /
-                            df2['Y_base']) * 100
-    df2['C_pctchg_G033'] = ((df2['C_ref_G033'] - df2['C_base']) /
-                            df2['C_base']) * 100
-    df2['K_pctchg_G033'] = ((df2['K_ref_G033'] - df2['K_base']) /
-                            df2['K_base']) * 100
-    df2['L_pctchg_G033'] = ((df2['L_ref_G033'] - df2['L_base']) /
-                            df2['L_base']) * 100
     frcst_var_list3 = ['Y_pctchg_G033', 'C_pctchg_G033', 'K_pctchg_G033',
                        'L_pctchg_G033']
     color_list3 = ['blue', 'orange', 'green', 'red']
@@ -433,21 +428,14 @@ if __name__ == "__main__":
     fig_path3 = os.path.join(images_dir,
                              'MacroAgg_PctChange_G033.html')
     MacroAgg_PctChange_G033 = \
-        gen_tseries_macro(frcst_var_list3, legend_label_list3, df2,
+        gen_tseries_macro(frcst_var_list3, legend_label_list3,
+                          ogusa_frame.frame(['year'] + frcst_var_list3),
                           color_list3, marker_list3, start_year=2021,
                           end_year=2055, note_text_list=note_text_list3,
                           fig_title_str=fig_title3, fig_path=fig_path3)
     show(MacroAgg_PctChange_G033)
 
     # Plot macro aggregates percent changes from OG-USA tax increase
-    df2['Y_pctchg_T340'] = ((df2['Y_ref_T340'] - df2['Y_base']) /
-                            df2['Y_base']) * 100
-    df2['C_pctchg_T340'] = ((df2['C_ref_T340'] - df2['C_base']) /
-                            df2['C_base']) * 100
-    df2['K_pctchg_T340'] = ((df2['K_ref_G033'] - df2['K_base']) /
-                            df2['K_base']) * 100
-    df2['L_pctchg_T340'] = ((df2['L_ref_T340'] - df2['L_base']) /
-                            df2['L_base']) * 100
     frcst_var_list4 = ['Y_pctchg_T340', 'C_pctchg_T340', 'K_pctchg_T340',
                        'L_pctchg_T340']
     color_list4 = ['blue', 'orange', 'green', 'red']
@@ -469,7 +457,8 @@ if __name__ == "__main__":
     fig_path4 = os.path.join(images_dir,
                              'MacroAgg_PctChange_T340.html')
     MacroAgg_PctChange_T340 = \
-        gen_tseries_macro(frcst_var_list4, legend_label_list4, df2,
+        gen_tseries_macro(frcst_var_list4, legend_label_list4,
+                          ogusa_frame.frame(['year'] + frcst_var_list4),
                           color_list4, marker_list4, start_year=2021,
                           end_year=2055, note_text_list=note_text_list4,
                           fig_title_str=fig_title4, fig_path=fig_path4)
@@ -0,0 +1,453 @@
+'''
+This module is a benchmark suite for the data, statistics, and figure code
+of this repository. It times every case below on synthetic data from
+synth_party_data.py at a range of sizes, from the size of the actual data
+(93 rows of deficit_party_data.csv, 16 CBO forecast vintages) up to a
+panel of 10^6 rows and 1,000 vintages:
+
+* load_csv, load_excel: reading the party data with read_party_data() and
+  pandas.read_excel
+* classify: party_control.control_codes()
+* summary_table: party_stats.party_cube()
+* seat_regressions: party_stats.seat_regressions()
+* gen_tseries, gen_scatter, gen_tseries_frcst: the figure builders
+* html_tseries, html_frcst: HTML serialization of a built figure with
+  bokeh.embed.file_html
+
+Every case is timed repeat times (fewer if a case takes longer than
+max_time seconds) at each size, and the results are saved as a JSON
+baseline with the environment, the run times, and the throughput (rows or
+vintages per second). Two baselines are compared size by size, and the
+scaling of each case is summarized by the slope of log(time) on log(size).
+If a user runs this module as a script, it will run the suite, e.g.
+
+    python benchmark_party.py --out benchmarks/baseline.json
+    python benchmark_party.py --quick --compare benchmarks/baseline.json
+'''
+
+# Import packages
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import bokeh
+from bokeh.embed import file_html
+from bokeh.resources import CDN
+import party_control as pc
+import party_stats as ps
+import synth_party_data as spd
+
+# Set paths to work across Mac/Windows/Linux platforms
+cur_path = os.path.split(os.path.abspath(__file__))[0]
+
+# Default sizes: rows of the party panel and CBO forecast vintages
+row_size_list = [93, 10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+quick_row_size_list = [93, 10 ** 3, 10 ** 4]
+vintage_size_list = [16, 100, 1000]
+quick_vintage_size_list = [16, 100]
+# Cases that are slow to set up or produce very large documents are capped
+excel_max_rows = 10 ** 4
+figure_max_rows = 10 ** 5
+default_repeat = 5
+default_max_time = 2.0
+min_sample_time = 0.02
+slowdown_ratio = 1.5
+# The party-control builders take one list of notes per panel
+panel_note_list = [[], [], []]
+
+
+'''
+-------------------------------------------------------------------------------
+Benchmark cases
+-------------------------------------------------------------------------------
+'''
+
+
+class BenchData(object):
+    """
+    Synthetic data and data files of every size, generated once and shared
+    across the cases of a run.
+    """
+    def __init__(self, tmp_dir, seed=0):
+        self.tmp_dir = tmp_dir
+        self.seed = seed
+        self.party_dict = {}
+        self.frcst_dict = {}
+        self.file_dict = {}
+
+    def party(self, n_rows):
+        if n_rows not in self.party_dict:
+            self.party_dict[n_rows] = spd.synth_party_data(n_rows,
+                                                           seed=self.seed)
+        return self.party_dict[n_rows]
+
+    def frcst(self, n_vintages):
+        if n_vintages not in self.frcst_dict:
+            self.frcst_dict[n_vintages] = \
+                spd.synth_frcst_data(n_vintages, seed=self.seed)
+        return self.frcst_dict[n_vintages]
+
+    def party_file(self, n_rows, ext):
+        key = (n_rows, ext)
+        if key not in self.file_dict:
+            file_path = os.path.join(self.tmp_dir,
+                                     'party_' + str(n_rows) + ext)
+            if ext == '.csv':
+                spd.write_party_csv(self.party(n_rows), file_path)
+            else:
+                spd.write_party_excel(self.party(n_rows), file_path)
+            self.file_dict[key] = file_path
+        return self.file_dict[key]
+
+
+def setup_load_csv(data, n_rows):
+    file_path = data.party_file(n_rows, '.csv')
+    return lambda: pc.read_party_data(file_path)
+
+
+def setup_load_excel(data, n_rows):
+    file_path = data.party_file(n_rows, '.xlsx')
+    return lambda: pd.read_excel(file_path, skiprows=3,
+                                 dtype=pc.party_dtype_dict)
+
+
+def setup_classify(data, n_rows):
+    main_df = data.party(n_rows)
+    return lambda: pc.control_codes(main_df)
+
+
+def setup_summary_table(data, n_rows):
+    main_df = data.party(n_rows)
+    return lambda: ps.party_cube(main_df)
+
+
+def setup_seat_regressions(data, n_rows):
+    main_df = data.party(n_rows)
+    return lambda: ps.seat_regressions(main_df)
+
+
+def setup_gen_tseries(data, n_rows):
+    from tseries_def_rev_spnd_gdp import gen_tseries
+    main_df = data.party(n_rows)
+    return lambda: gen_tseries(yvar_str='deficit_gdp', start_year=1947,
+                               main_df=main_df, note_text_list=panel_note_list)
+
+
+def setup_gen_scatter(data, n_rows):
+    from scatter_def_rev_spnd_party import gen_scatter
+    main_df = data.party(n_rows)
+    return lambda: gen_scatter(yvar_str='deficit_gdp',
+                               xvar_str='dem_senateseats', start_year=1947,
+                               main_df=main_df, note_text_list=panel_note_list)
+
+
+def setup_gen_tseries_frcst(data, n_vintages):
+    from tseries_pubdebt_gdp_frcsts import gen_tseries_frcst
+    frcst_df, vintage_list, label_list = data.frcst(n_vintages)
+    return lambda: gen_tseries_frcst(vintage_list, label_list, df=frcst_df,
+                                     main_start_year=1915,
+                                     main_end_year=2050)
+
+
+def setup_html_tseries(data, n_rows):
+    fig = setup_gen_tseries(data, n_rows)()
+    return lambda: file_html(fig, CDN)
+
+
+def setup_html_frcst(data, n_vintages):
+    fig = setup_gen_tseries_frcst(data, n_vintages)()
+    return lambda: file_html(fig, CDN)
+
+
+# Every case: (name, category, size unit, setup function, maximum size)
+case_list = [
+    ('load_csv', 'load', 'rows', setup_load_csv, None),
+    ('load_excel', 'load', 'rows', setup_load_excel, excel_max_rows),
+    ('classify', 'classify', 'rows', setup_classify, None),
+    ('summary_table', 'table', 'rows', setup_summary_table, None),
+    ('seat_regressions', 'table', 'rows', setup_seat_regressions, None),
+    ('gen_tseries', 'build', 'rows', setup_gen_tseries, figure_max_rows),
+    ('gen_scatter', 'build', 'rows', setup_gen_scatter, figure_max_rows),
+    ('gen_tseries_frcst', 'build', 'vintages', setup_gen_tseries_frcst,
+     None),
+    ('html_tseries', 'serialize', 'rows', setup_html_tseries,
+     figure_max_rows),
+    ('html_frcst', 'serialize', 'vintages', setup_html_frcst, None)]
+case_name_list = [case[0] for case in case_list]
+
+
+'''
+-------------------------------------------------------------------------------
+Timing, baselines, and comparisons
+-------------------------------------------------------------------------------
+'''
+
+
+def time_call(func, repeat=default_repeat, max_time=default_max_time,
+              min_sample=min_sample_time):
+    """
+    This function times repeated calls of a function. Calls that take less
+    than min_sample seconds are timed in loops of calls (as in timeit), so
+    that every sample lasts at least min_sample seconds. It stops early once
+    the samples have taken max_time seconds in total (after at least one
+    sample).
+
+    Args:
+        func (function): function of no arguments
+        repeat (int): maximum number of samples
+        max_time (float): time budget of the samples in seconds
+        min_sample (float): minimum length of a sample in seconds
+
+    Returns:
+        time_list (list): run time of one call in each sample in seconds
+    """
+    start = time.perf_counter()
+    func()
+    first_time = time.perf_counter() - start
+    n_loops = max(1, int(np.ceil(min_sample / max(first_time, 1e-9))))
+    if n_loops == 1:
+        time_list = [first_time]
+    else:
+        time_list = []
+    while len(time_list) < repeat and sum(time_list) * n_loops < max_time:
+        start = time.perf_counter()
+        for k in range(n_loops):
+            func()
+        time_list.append((time.perf_counter() - start) / n_loops)
+
+    return time_list
+
+
+def environment_dict():
+    """
+    This function describes the machine, the Python packages, and the git
+    commit of a benchmark run.
+
+    Returns:
+        env_dict (dict): environment description
+    """
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=cur_path,
+            capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import statsmodels
+    env_dict = {'python': platform.python_version(),
+                'platform': platform.platform(),
+                'machine': platform.machine(),
+                'processor': platform.processor(),
+                'cpu_count': os.cpu_count(),
+                'numpy': np.__version__,
+                'pandas': pd.__version__,
+                'bokeh': bokeh.__version__,
+                'statsmodels': statsmodels.__version__,
+                'git_commit': commit}
+
+    return env_dict
+
+
+def run_suite(case_names=case_name_list, row_sizes=row_size_list,
+              vintage_sizes=vintage_size_list, repeat=default_repeat,
+              max_time=default_max_time, seed=0, verbose=True):
+    """
+    This function runs the benchmark cases at every size.
+
+    Args:
+        case_names (list): names of the cases to run, from case_name_list
+        row_sizes (list): numbers of rows of the synthetic party panel
+        vintage_sizes (list): numbers of synthetic CBO forecast vintages
+        repeat (int): maximum number of timed calls per case and size
+        max_time (float): time budget per case and size in seconds
+        seed (int): seed of the synthetic data
+        verbose (bool): =True prints every result as it is measured
+
+    Returns:
+        bench_dict (dict): baseline with 'created', 'environment', and
+            'results' keys
+    """
+    result_list = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data = BenchData(tmp_dir, seed)
+        for name, category, unit, setup, max_size in case_list:
+            if name not in case_names:
+                continue
+            size_list = row_sizes if unit == 'rows' else vintage_sizes
+            for size in size_list:
+                if max_size is not None and size > max_size:
+                    continue
+                func = setup(data, size)
+                time_list = time_call(func, repeat, max_time)
+                median = statistics.median(time_list)
+                result_dict = {'case': name, 'category': category,
+                               'unit': unit, 'size': size,
+                               'times': time_list, 'min': min(time_list),
+                               'median': median,
+                               'throughput': size / median}
+                result_list.append(result_dict)
+                if verbose:
+                    print('{:<18} {:>9,} {:<8} median {:>10.4f} s  '
+                          '{:>14,.0f} {}/s'.format(
+                              name, size, unit, median, size / median, unit))
+    bench_dict = {'created': dt.datetime.now().isoformat(timespec='seconds'),
+                  'environment': environment_dict(),
+                  'results': result_list}
+
+    return bench_dict
+
+
+def write_baseline(bench_dict, file_path):
+    """
+    This function writes a benchmark run to a JSON baseline file.
+
+    Args:
+        bench_dict (dict): output of run_suite()
+        file_path (string): path of the JSON file
+
+    Returns:
+        None
+    """
+    out_dir = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(out_dir, exist_ok=True)
+    with open(file_path, 'w', encoding='utf-8') as file:
+        json.dump(bench_dict, file, indent=1)
+        file.write('\n')
+
+
+def read_baseline(file_path):
+    """
+    This function reads a JSON baseline file written by write_baseline().
+
+    Args:
+        file_path (string): path of the JSON file
+
+    Returns:
+        bench_dict (dict): benchmark run
+    """
+    with open(file_path, 'r', encoding='utf-8') as file:
+        bench_dict = json.load(file)
+
+    return bench_dict
+
+
+def results_df(bench_dict):
+    """
+    This function returns the results of a benchmark run as a DataFrame.
+
+    Args:
+        bench_dict (dict): output of run_suite() or read_baseline()
+
+    Returns:
+        res_df (DataFrame): 'min', 'median', and 'throughput' columns
+            indexed by (case, size)
+    """
+    res_df = pd.DataFrame(bench_dict['results'])
+    res_df = res_df.set_index(['case', 'size'])[
+        ['unit', 'min', 'median', 'throughput']]
+
+    return res_df
+
+
+def scaling_exponents(bench_dict):
+    """
+    This function summarizes the scaling curve of each case by the slope of
+    the least squares line of log(median time) on log(size). A slope near 1
+    is linear scaling, and a slope near 0 means that fixed costs dominate.
+
+    Args:
+        bench_dict (dict): output of run_suite() or read_baseline()
+
+    Returns:
+        exp_ser (Series): scaling exponent indexed by case
+    """
+    res_df = results_df(bench_dict).reset_index()
+    exp_dict = {}
+    for name, case_df in res_df.groupby('case', sort=False):
+        if len(case_df) < 2:
+            continue
+        exp_dict[name] = np.polyfit(np.log(case_df['size']),
+                                    np.log(case_df['median']), 1)[0]
+    exp_ser = pd.Series(exp_dict, name='exponent')
+
+    return exp_ser
+
+
+def compare_baselines(new_dict, old_dict, threshold=slowdown_ratio):
+    """
+    This function compares the minimum times of two benchmark runs at every
+    case and size that both runs measured. The minimum is less sensitive to
+    other load on the machine than the median.
+
+    Args:
+        new_dict (dict): current benchmark run
+        old_dict (dict): baseline benchmark run
+        threshold (float): ratio of new to old minimum time above which a
+            result is flagged as a slowdown
+
+    Returns:
+        cmp_df (DataFrame): 'old', 'new', and 'ratio' minimum times and a
+            'slowdown' flag indexed by (case, size)
+    """
+    new_df = results_df(new_dict)
+    old_df = results_df(old_dict)
+    cmp_df = pd.DataFrame({'old': old_df['min'],
+                           'new': new_df['min']}).dropna()
+    cmp_df['ratio'] = cmp_df['new'] / cmp_df['old']
+    cmp_df['slowdown'] = cmp_df['ratio'] > threshold
+
+    return cmp_df
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    parser = argparse.ArgumentParser(
+        description='Benchmark the data, statistics, and figure code on ' +
+        'synthetic data.')
+    parser.add_argument('cases', nargs='*', default=case_name_list,
+                        help='cases to run (default: all of ' +
+                        ', '.join(case_name_list) + ')')
+    parser.add_argument('--quick', action='store_true',
+                        help='run the small sizes only')
+    parser.add_argument('--repeat', type=int, default=default_repeat,
+                        help='maximum number of timed calls per size')
+    parser.add_argument('--max-time', type=float, default=default_max_time,
+                        help='time budget per case and size in seconds')
+    parser.add_argument('--out', default=None,
+                        help='path of the JSON baseline to write')
+    parser.add_argument('--compare', default=None,
+                        help='path of a JSON baseline to compare with')
+    args = parser.parse_args()
+    unknown_list = [name for name in args.cases
+                    if name not in case_name_list]
+    if unknown_list:
+        parser.error('unknown cases: ' + ', '.join(unknown_list))
+    if args.quick:
+        row_sizes, vintage_sizes = quick_row_size_list, quick_vintage_size_list
+    else:
+        row_sizes, vintage_sizes = row_size_list, vintage_size_list
+
+    bench_dict = run_suite(args.cases, row_sizes, vintage_sizes, args.repeat,
+                           args.max_time)
+    print('')
+    print('Scaling exponents (slope of log time on log size):')
+    print(scaling_exponents(bench_dict).round(2).to_string())
+    if args.out is not None:
+        write_baseline(bench_dict, args.out)
+        print('Wrote ' + args.out)
+    if args.compare is not None:
+        cmp_df = compare_baselines(bench_dict, read_baseline(args.compare))
+        print('')
+        print('Minimum times compared with ' + args.compare + ':')
+        print(cmp_df.round(4).to_string())
+        if cmp_df['slowdown'].any():
+            sys.exit(1)
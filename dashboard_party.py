@@ -0,0 +1,410 @@
+'''
+This module creates one dashboard document that replaces the three party
+control time series (tseries_*_gdp_party.html) and the six seat scatter plots
+(scatter_*gdp_*seats.html) that tseries_def_rev_spnd_gdp.py and
+scatter_def_rev_spnd_party.py write as separate files. The nine files each
+embed their own copy of deficit_party_data.csv. The dashboard ships the data
+once, in one ColumnDataSource that backs both the time series and the seat
+scatter plot, so that selecting years in one figure selects them in the
+other. Selectors switch the variable (deficits, receipts, or non-interest
+spending), the chamber of the seat axis (Senate or House), and the party
+control definition, and a slider sets the window of years. If a user runs
+this module as a script, it will create the dashboard and print its size
+next to the total size of the nine files it replaces.
+'''
+
+# Import packages
+import gzip
+import json
+import numpy as np
+import os
+from bokeh.io import output_file, save
+from bokeh.plotting import figure, show
+from bokeh.events import DocumentReady
+from bokeh.layouts import column, row
+from bokeh.models import (BoxSelectTool, ColumnDataSource, CDSView,
+                          CustomJS, Div, HoverTool, IndexFilter, RangeSlider,
+                          Select, Title)
+from bokeh.models.tickers import SingleIntervalTicker
+import party_control as pc
+from party_interactive import tool_str_dict, update_js
+
+# Set paths to work across Mac/Windows/Linux platforms
+cur_path = os.path.split(os.path.abspath(__file__))[0]
+images_dir = os.path.join(cur_path, 'images')
+
+# The nine separate HTML files that the dashboard replaces
+replaced_file_list = ['tseries_deficit_gdp_party.html',
+                      'tseries_receipts_gdp_party.html',
+                      'tseries_nonintspend_gdp_party.html',
+                      'scatter_defgdp_senateseats.html',
+                      'scatter_defgdp_houseseats.html',
+                      'scatter_revgdp_senateseats.html',
+                      'scatter_revgdp_houseseats.html',
+                      'scatter_spendgdp_senateseats.html',
+                      'scatter_spendgdp_houseseats.html']
+
+yvar_str_list = ['deficit_gdp', 'receipts_gdp', 'spend_nonint_gdp']
+yvar_title_dict = {'deficit_gdp': ('U.S. Federal Surplus (+) or Deficit (-) ' +
+                                   'as Percent of GDP'),
+                   'receipts_gdp': 'U.S. Federal Receipts as Percent of GDP',
+                   'spend_nonint_gdp': ('U.S. Federal Noninterest Spending ' +
+                                        'as Percent of GDP')}
+seat_dict = {'dem_senateseats': {'label': 'Democrat Senate seats',
+                                 'mid_line': 50, 'tick_interval': 2},
+             'dem_houseseats': {'label': 'Democrat House seats',
+                                'mid_line': 217.5, 'tick_interval': 10}}
+
+# Switches the variable and seat columns of the glyphs, tooltips, axis
+# labels, and titles before the shared update of party_interactive.py
+dashboard_js = '''
+const yvar = var_select.value;
+const xvar = seat_select.value;
+const tool_str = tool_str_dict[yvar];
+const glyph_keys = ['glyph', 'selection_glyph', 'nonselection_glyph',
+                    'hover_glyph', 'muted_glyph'];
+for (const rend of ts_renderers) {
+    for (const key of glyph_keys) {
+        if (rend[key] != null) {
+            rend[key].y = {field: yvar};
+        }
+    }
+}
+for (const rend of sc_renderers) {
+    for (const key of glyph_keys) {
+        if (rend[key] != null) {
+            rend[key].x = {field: xvar};
+            rend[key].y = {field: yvar};
+        }
+    }
+}
+for (const hover of hovers) {
+    hover.tooltips = hover.tooltips.map(function (tip) {
+        return tip[1].endsWith('{0.0}%') ?
+            [tool_str, '@' + yvar + '{0.0}%'] : tip;
+    });
+}
+const seat = seat_dict[xvar];
+mid_line.glyph.x0 = seat.mid_line;
+mid_line.glyph.x1 = seat.mid_line;
+sc_x_axis.axis_label = seat.label;
+sc_x_axis.ticker.interval = seat.tick_interval;
+sc_x_grid.ticker.interval = seat.tick_interval;
+ts_fig.title.text = yvar_title_dict[yvar] + ' by Party Control';
+sc_fig.title.text = yvar_title_dict[yvar] + ' by ' + seat.label;
+const x_range = sc_fig.x_range;
+const y_range = sc_fig.y_range;
+'''
+
+# Sets the time series years to the window after the shared update (the
+# two figures share the y-axis range)
+ts_range_js = '''
+ts_fig.x_range.start = year0 - 1;
+ts_fig.x_range.end = year1 + 1;
+'''
+
+
+def gen_dashboard_cds(main_df):
+    """
+    This function creates the one ColumnDataSource behind the dashboard. It
+    holds the three y-axis variables, both seat columns, the tooltip
+    columns, and one control code column per definition (see
+    party_control.control_codes()), as compact binary-encodable types.
+
+    Args:
+        main_df (DataFrame): party data, e.g. party_control.read_party_data()
+
+    Returns:
+        main_cds (ColumnDataSource): data source of both figures
+    """
+    code_mat = pc.control_codes(main_df)
+    data_dict = {'year': main_df['year'].to_numpy(dtype=np.int16),
+                 'president': main_df['president'].to_numpy(),
+                 'president_party': main_df['president_party'].to_numpy()}
+    for yvar in yvar_str_list:
+        data_dict[yvar] = main_df[yvar].to_numpy(dtype=np.float32)
+    for seat_var in ['rep_houseseats', 'dem_houseseats', 'rep_senateseats',
+                     'dem_senateseats']:
+        data_dict[seat_var] = main_df[seat_var].to_numpy(dtype=np.int16)
+    for k, cntrl in enumerate(pc.cntrl_str_list):
+        data_dict['cntrl_' + cntrl] = code_mat[k]
+    main_cds = ColumnDataSource(data_dict)
+
+    return main_cds
+
+
+def style_fig(fig):
+    """
+    This function sets the font sizes of a dashboard figure.
+    """
+    fig.title.text_font_size = '15.5pt'
+    fig.xaxis.axis_label_text_font_size = '12pt'
+    fig.xaxis.major_label_text_font_size = '12pt'
+    fig.yaxis.axis_label_text_font_size = '12pt'
+    fig.yaxis.major_label_text_font_size = '12pt'
+
+
+def style_legend(fig, location):
+    """
+    This function sets the location, border, and muting of a dashboard
+    figure legend.
+    """
+    fig.legend.location = location
+    fig.legend.border_line_width = 2
+    fig.legend.border_line_color = 'black'
+    fig.legend.border_line_alpha = 1
+    fig.legend.label_text_font_size = '4mm'
+    fig.legend.click_policy = 'mute'
+
+
+def gen_dashboard(yvar_str='deficit_gdp', xvar_str='dem_senateseats',
+                  start_year='min', main_df=None, recession_df=None,
+                  cntrl_str='all', note_text_list=[[], [], []],
+                  fig_title_str='', fig_path=''):
+    """
+    This function creates the party-control dashboard: the time series and
+    seat scatter plot of one variable by party control, drawn from one
+    shared ColumnDataSource with linked selection, with selectors for the
+    variable, seat chamber, and control definition, a year slider, and a
+    summary table of the variable by party control in the window.
+
+    Args:
+        yvar_str (string): initial variable, either 'deficit_gdp',
+            'receipts_gdp', or 'spend_nonint_gdp'
+        xvar_str (string): initial seat axis, either 'dem_senateseats' or
+            'dem_houseseats'
+        start_year (int or 'min'): initial first year of the window
+        main_df (DataFrame or None): party data, read with
+            party_control.read_party_data() if None
+        recession_df (DataFrame or None): recession dates, read with
+            party_control.read_recession_data() if None
+        cntrl_str (string): initial control definition
+        note_text_list (list): one list of note lines per control definition
+        fig_title_str (string): title of the HTML page
+        fig_path (string): path of the output HTML file
+
+    Returns:
+        layout (Bokeh layout): widgets, figures, and summary table
+    """
+    if main_df is None:
+        main_df = pc.read_party_data()
+    if recession_df is None:
+        recession_df = pc.read_recession_data()
+    min_year = int(main_df['year'].min())
+    max_year = int(main_df['year'].max())
+    if start_year == 'min':
+        start_year = min_year
+    else:
+        start_year = int(start_year)
+    window_df = main_df[main_df['year'] >= start_year]
+    buffer_pct = 0.075
+    min_yvar = window_df[yvar_str].min()
+    max_yvar = window_df[yvar_str].max()
+    y_buffer = (max_yvar - min_yvar) * buffer_pct
+    min_seats = window_df[xvar_str].min()
+    max_seats = window_df[xvar_str].max()
+    x_buffer = (max_seats - min_seats) * buffer_pct
+    main_cds = gen_dashboard_cds(main_df)
+    seat = seat_dict[xvar_str]
+
+    # Output to HTML file
+    output_file(fig_path, title=fig_title_str)
+
+    tool_list = ['box_select', 'lasso_select', 'tap', 'reset']
+    ts_fig = figure(title=yvar_title_dict[yvar_str] + ' by Party Control',
+                    plot_height=500, plot_width=1100, x_axis_label='Year',
+                    x_range=(start_year - 1, max_year + 1),
+                    y_axis_label='Percent of Gross Domestic Product',
+                    y_range=(min_yvar - y_buffer, max_yvar + y_buffer),
+                    tools=tool_list)
+    sc_fig = figure(title=(yvar_title_dict[yvar_str] + ' by ' +
+                           seat['label']),
+                    plot_height=500, plot_width=1100,
+                    x_axis_label=seat['label'],
+                    x_range=(min_seats - x_buffer, max_seats + x_buffer),
+                    y_axis_label='Percent of Gross Domestic Product',
+                    y_range=ts_fig.y_range, tools=tool_list)
+    for fig in [ts_fig, sc_fig]:
+        style_fig(fig)
+    ts_fig.xaxis.ticker = SingleIntervalTicker(interval=10,
+                                               num_minor_ticks=2)
+    ts_fig.xgrid.ticker = SingleIntervalTicker(interval=10)
+    sc_x_ticker = SingleIntervalTicker(interval=seat['tick_interval'],
+                                       num_minor_ticks=2)
+    sc_fig.xaxis.ticker = sc_x_ticker
+    sc_fig.xgrid.ticker = SingleIntervalTicker(
+        interval=seat['tick_interval'])
+
+    # Create recession bars for every recession in the data years
+    peak_year = recession_df['Peak'].dt.year.to_numpy()
+    trough_year = recession_df['Trough'].dt.year.to_numpy()
+    in_data = trough_year >= min_year
+    recession_cds = ColumnDataSource(dict(
+        left=peak_year[in_data],
+        right=np.where(peak_year == trough_year, trough_year + 1,
+                       trough_year)[in_data]))
+    ts_fig.quad(left='left', right='right', bottom=-100, top=100,
+                source=recession_cds, fill_color='gray', fill_alpha=0.4,
+                line_width=0, legend_label='Recession')
+    ts_line = ts_fig.line(x='year', y=yvar_str, source=main_cds,
+                          color='#423D3C', line_width=2)
+
+    # Party control markers in both figures share one set of index filters
+    cntrl_k = pc.cntrl_str_list.index(cntrl_str)
+    in_window = main_df['year'].to_numpy() >= start_year
+    code_arr = pc.control_codes(main_df)[cntrl_k]
+    filter_list = []
+    ts_rend_list = [ts_line]
+    sc_rend_list = []
+    for p, party in enumerate(pc.party_str_list):
+        idx_filter = IndexFilter(
+            indices=np.flatnonzero(in_window & (code_arr == p)).tolist())
+        filter_list.append(idx_filter)
+        for fig, x_field, rend_list in [(ts_fig, 'year', ts_rend_list),
+                                        (sc_fig, xvar_str, sc_rend_list)]:
+            rend_list.append(fig.circle(
+                x=x_field, y=yvar_str, source=main_cds,
+                view=CDSView(source=main_cds, filters=[idx_filter]), size=10,
+                line_width=1, line_color='black',
+                fill_color=pc.party_color_list[p], alpha=0.7,
+                muted_alpha=0.2, nonselection_alpha=0.15,
+                legend_label=pc.party_label_list[p]))
+    mid_line = sc_fig.segment(x0=seat['mid_line'], y0=-40,
+                              x1=seat['mid_line'], y1=40, color='black',
+                              line_dash='6 2', line_width=2)
+
+    # Add information on hover over the party control markers
+    tooltips = [('Year', '@year'),
+                (tool_str_dict[yvar_str], '@' + yvar_str + '{0.0}' + '%'),
+                ('President', '@president'),
+                ('White House', '@president_party'),
+                ('Rep. House Seats', '@rep_houseseats'),
+                ('Dem. House Seats', '@dem_houseseats'),
+                ('Rep. Senate Seats', '@rep_senateseats'),
+                ('Dem. Senate Seats', '@dem_senateseats')]
+    hover_list = [HoverTool(tooltips=tooltips, renderers=ts_rend_list[1:]),
+                  HoverTool(tooltips=tooltips, renderers=sc_rend_list)]
+    ts_fig.add_tools(hover_list[0])
+    sc_fig.add_tools(hover_list[1])
+    for fig in [ts_fig, sc_fig]:
+        fig.toolbar.active_drag = fig.select_one({'type': BoxSelectTool})
+    style_legend(ts_fig, 'bottom_left')
+    style_legend(sc_fig, 'bottom_right')
+
+    # Add notes below the scatter plot, one caption per line of the longest
+    # note
+    n_captions = max([len(note_list) for note_list in note_text_list] + [0])
+    caption_list = []
+    for j in range(n_captions):
+        note_list = note_text_list[cntrl_k]
+        caption = Title(text=note_list[j] if j < len(note_list) else '',
+                        align='left', text_font_size='4mm',
+                        text_font_style='italic')
+        sc_fig.add_layout(caption, 'below')
+        caption_list.append(caption)
+
+    var_select = Select(title='Variable', value=yvar_str,
+                        options=[(yvar, tool_str_dict[yvar])
+                                 for yvar in yvar_str_list], width=250)
+    seat_select = Select(title='Seats', value=xvar_str,
+                         options=[(seat_var, seat_dict[seat_var]['label'])
+                                  for seat_var in seat_dict], width=250)
+    select = Select(title='Party control definition', value=cntrl_str,
+                    options=list(zip(pc.cntrl_str_list,
+                                     pc.panel_title_list)),
+                    width=400)
+    slider = RangeSlider(start=min_year, end=max_year, step=1,
+                         value=(start_year, max_year), title='Years',
+                         width=400)
+    div = Div(width=600)
+    callback = CustomJS(
+        args=dict(source=main_cds, filters=filter_list, slider=slider,
+                  select=select, var_select=var_select,
+                  seat_select=seat_select, ts_fig=ts_fig, sc_fig=sc_fig,
+                  ts_renderers=ts_rend_list, sc_renderers=sc_rend_list,
+                  hovers=hover_list, mid_line=mid_line,
+                  sc_x_axis=sc_fig.xaxis[0], sc_x_grid=sc_fig.xgrid[0],
+                  div=div, captions=caption_list),
+        code=('const tool_str_dict = ' + json.dumps(tool_str_dict) + ';\n' +
+              'const yvar_title_dict = ' + json.dumps(yvar_title_dict) +
+              ';\n' +
+              'const seat_dict = ' + json.dumps(seat_dict) + ';\n' +
+              'const cntrl_list = ' + json.dumps(pc.cntrl_str_list) + ';\n' +
+              'const party_label_list = ' +
+              json.dumps(pc.party_label_list) + ';\n' +
+              'const party_color_list = ' +
+              json.dumps(pc.party_color_list) + ';\n' +
+              'const note_text_list = ' + json.dumps(note_text_list) +
+              ';\n' +
+              'const x_buffer_pct = ' + str(buffer_pct) + ';\n' +
+              'const y_buffer_pct = ' + str(buffer_pct) + ';\n' +
+              dashboard_js + update_js + ts_range_js))
+    for widget in [var_select, seat_select, select]:
+        widget.js_on_change('value', callback)
+    slider.js_on_change('value', callback)
+    ts_fig.js_on_event(DocumentReady, callback)
+
+    layout = column(row(var_select, seat_select, select, slider), ts_fig,
+                    sc_fig, div)
+
+    return layout
+
+
+def file_sizes(file_path_list):
+    """
+    This function returns the total raw and gzip-compressed sizes of a list
+    of files.
+
+    Args:
+        file_path_list (list): paths of the files
+
+    Returns:
+        raw_bytes (int): total size of the files in bytes
+        gz_bytes (int): total size of the gzip-compressed files in bytes
+    """
+    raw_bytes = 0
+    gz_bytes = 0
+    for file_path in file_path_list:
+        with open(file_path, 'rb') as file:
+            file_bytes = file.read()
+        raw_bytes += len(file_bytes)
+        gz_bytes += len(gzip.compress(file_bytes, mtime=0))
+
+    return raw_bytes, gz_bytes
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    source_note = \
+        [
+            ('Source: Federal Reserve Economic Data (FRED, ' +
+             'FYFSGDA188S, FYONDA188S, FYOIDA188S, FYFRGDA188S); United ' +
+             'States House of Representa-'),
+            ('   tives History, Art, & Archives, "Party Divisions of ' +
+             'the House of Representatives, 1789 to present"; United ' +
+             'States Senate, Art & History,'),
+            ('   Party Division; Richard W. Evans (@rickecon).')
+        ]
+    note_text_list = [source_note, source_note, source_note]
+
+    fig_title = ('U.S. Federal Deficits, Receipts, and Spending by Party ' +
+                 'Control')
+    fig_path = os.path.join(images_dir, 'dashboard_party.html')
+    dashboard_party = gen_dashboard(start_year=1947,
+                                    note_text_list=note_text_list,
+                                    fig_title_str=fig_title,
+                                    fig_path=fig_path)
+    save(dashboard_party)
+
+    replaced_path_list = [os.path.join(images_dir, file_name)
+                          for file_name in replaced_file_list]
+    old_raw, old_gz = file_sizes(replaced_path_list)
+    new_raw, new_gz = file_sizes([fig_path])
+    print('Nine separate files: ' + '{:,}'.format(old_raw) + ' bytes (' +
+          '{:,}'.format(old_gz) + ' gzip)')
+    print('Dashboard: ' + '{:,}'.format(new_raw) + ' bytes (' +
+          '{:,}'.format(new_gz) + ' gzip), ' +
+          '{:.1f}'.format(100 * (1 - new_raw / old_raw)) + '% smaller')
+    show(dashboard_party)
@@ -0,0 +1,342 @@
+'''
+This module declares the derived variables of the datasets of this
+repository once, as formulas of other columns, and evaluates them lazily:
+
+* FormulaSet: a set of formulas (name, input columns, vectorized function)
+  with their dependencies, e.g. spend_nonint_gdp = spend_tot_gdp -
+  spend_int_gdp or DebtGDP_base = 100 * D_base / Y_base
+* DerivedFrame: the base columns of a DataFrame together with a FormulaSet.
+  A derived column is computed on its first access, from whole columns at
+  once, and memoized. Changing a base column (or some of its cells) bumps
+  its version, which invalidates exactly the memoized columns that depend on
+  it, directly or through other derived columns. frame() returns a
+  DataFrame of only the columns a table or figure needs.
+
+The formulas of deficit_party_data.csv (party_formulas), of the OG-USA
+aggregate data of OGplots.py (ogusa_formulas), and of outlays.csv
+(outlays_formulas) are declared at the bottom of this module. If a user
+runs this module as a script, it will print the formulas and check the
+derived columns stored in the data files against them.
+'''
+
+# Import packages
+import numpy as np
+import pandas as pd
+
+
+class FormulaSet:
+    """
+    This class holds formulas of derived variables. Each formula computes
+    one column from whole input columns (pandas Series aligned on the index
+    of the data), which may be base columns or other derived columns.
+    """
+
+    def __init__(self):
+        self.formula_dict = {}
+
+    def declare(self, name, input_list, func, descr=''):
+        """
+        This method declares the formula of a derived variable.
+
+        Args:
+            name (string): name of the derived variable
+            input_list (list): names of the input columns, in the order of
+                the arguments of func
+            func (function): vectorized function of the input Series
+            descr (string): description of the variable
+
+        Returns:
+            None
+        """
+        if name in input_list:
+            raise ValueError('formula ' + name + ' depends on itself')
+        self.formula_dict[name] = (list(input_list), func, descr)
+        try:
+            self.order()
+        except ValueError:
+            del self.formula_dict[name]
+            raise
+
+    def __contains__(self, name):
+        return name in self.formula_dict
+
+    def __iter__(self):
+        return iter(self.formula_dict)
+
+    def __len__(self):
+        return len(self.formula_dict)
+
+    def inputs(self, name):
+        """
+        This method returns the direct inputs of a derived variable.
+        """
+        return self.formula_dict[name][0]
+
+    def base_inputs(self, name):
+        """
+        This method returns the base columns (inputs that are not derived)
+        on which a derived variable depends, directly or through other
+        derived variables, sorted by name.
+        """
+        base_set = set()
+        stack = [name]
+        while stack:
+            for input_name in self.formula_dict[stack.pop()][0]:
+                if input_name in self.formula_dict:
+                    stack.append(input_name)
+                else:
+                    base_set.add(input_name)
+
+        return sorted(base_set)
+
+    def order(self):
+        """
+        This method returns the derived variables in an order in which
+        every variable comes after the derived variables it depends on, and
+        raises a ValueError if the formulas have a cycle.
+        """
+        order_list = []
+        state_dict = {}
+
+        def visit(name, path):
+            if state_dict.get(name) == 'done':
+                return
+            if state_dict.get(name) == 'open':
+                raise ValueError('cycle of formulas: ' +
+                                 ' -> '.join(path + [name]))
+            state_dict[name] = 'open'
+            for input_name in self.formula_dict[name][0]:
+                if input_name in self.formula_dict:
+                    visit(input_name, path + [name])
+            state_dict[name] = 'done'
+            order_list.append(name)
+
+        for name in self.formula_dict:
+            visit(name, [])
+
+        return order_list
+
+    def dependents(self, name_list):
+        """
+        This method returns the derived variables that depend on any of the
+        columns in name_list, directly or indirectly.
+        """
+        dep_set = set()
+        for name in self.order():
+            if any([input_name in name_list or input_name in dep_set
+                    for input_name in self.formula_dict[name][0]]):
+                dep_set.add(name)
+
+        return dep_set
+
+
+class DerivedFrame:
+    """
+    This class holds the base columns of a DataFrame and evaluates the
+    derived columns of a FormulaSet lazily with memoization. Base columns
+    of the DataFrame that share a name with a formula are dropped, so that
+    the formula is the only definition of the variable. The DataFrame passed
+    in is never modified; a base column is copied on its first change.
+
+    Args:
+        df (DataFrame): base data
+        formulas (FormulaSet): formulas of the derived columns
+    """
+
+    def __init__(self, df, formulas):
+        self.formulas = formulas
+        self.index = df.index
+        self.base_dict = {col: df[col] for col in df.columns
+                          if col not in formulas}
+        self.version_dict = {col: 0 for col in self.base_dict}
+        self.owned_set = set()
+        self.memo_dict = {}
+        self.stats_dict = {'evaluations': 0, 'hits': 0}
+
+    @property
+    def columns(self):
+        """
+        This property returns the names of the base columns and of the
+        derived columns that can be computed from them.
+        """
+        derived_list = [name for name in self.formulas.order()
+                        if all([col in self.base_dict for col in
+                                self.formulas.base_inputs(name)])]
+
+        return list(self.base_dict) + derived_list
+
+    def __contains__(self, name):
+        return name in self.base_dict or name in self.formulas
+
+    def __len__(self):
+        return len(self.index)
+
+    def version_key(self, name):
+        """
+        This method returns the versions of the base columns on which a
+        derived column depends.
+        """
+        return tuple([self.version_dict[col]
+                      for col in self.formulas.base_inputs(name)])
+
+    def is_current(self, name):
+        """
+        This method returns whether a derived column is memoized and none of
+        its inputs changed since it was computed.
+        """
+        return (name in self.memo_dict and
+                self.memo_dict[name][1] == self.version_key(name))
+
+    def __getitem__(self, name):
+        if name in self.base_dict:
+            return self.base_dict[name]
+        if name not in self.formulas:
+            raise KeyError(name)
+        for col in self.formulas.base_inputs(name):
+            if col not in self.base_dict:
+                raise KeyError('input ' + col + ' of ' + name +
+                               ' is not in the data')
+        if self.is_current(name):
+            self.stats_dict['hits'] += 1
+            return self.memo_dict[name][0]
+        input_list, func, _ = self.formulas.formula_dict[name]
+        values = func(*[self[input_name] for input_name in input_list])
+        if not isinstance(values, pd.Series):
+            values = pd.Series(values, index=self.index)
+        values = values.rename(name)
+        self.memo_dict[name] = (values, self.version_key(name))
+        self.stats_dict['evaluations'] += 1
+
+        return values
+
+    def __setitem__(self, name, values):
+        if name in self.formulas:
+            raise KeyError(name + ' is derived; set its inputs instead')
+        if isinstance(values, pd.Series):
+            values = values.reindex(self.index)
+        else:
+            values = pd.Series(values, index=self.index)
+        self.base_dict[name] = values.rename(name)
+        self.owned_set.add(name)
+        self.version_dict[name] = self.version_dict.get(name, -1) + 1
+
+    def set_values(self, name, label_list, value_list):
+        """
+        This method changes some cells of a base column, which invalidates
+        the derived columns that depend on it.
+
+        Args:
+            name (string): name of the base column
+            label_list (list): index labels of the cells
+            value_list (list): new values of the cells
+
+        Returns:
+            None
+        """
+        if name not in self.base_dict:
+            raise KeyError(name + ' is not a base column')
+        if name not in self.owned_set:
+            self.base_dict[name] = self.base_dict[name].copy()
+            self.owned_set.add(name)
+        self.base_dict[name].loc[label_list] = value_list
+        self.version_dict[name] += 1
+
+    def frame(self, var_list=None):
+        """
+        This method returns a DataFrame of some base and derived columns,
+        evaluating only the derived columns requested.
+
+        Args:
+            var_list (list): names of the columns, all columns if None
+
+        Returns:
+            var_df (DataFrame): the columns of var_list
+        """
+        if var_list is None:
+            var_list = self.columns
+        var_df = pd.DataFrame({name: self[name] for name in var_list},
+                              index=self.index)
+
+        return var_df
+
+
+def ratio(scale=100.0):
+    """
+    This function returns the formula function scale * num / den.
+    """
+    def func(num, den):
+        return scale * num / den
+
+    return func
+
+
+def pct_change(ref, base):
+    """
+    This function is the formula function of the percent change of a reform
+    value from its baseline value.
+    """
+    return 100.0 * (ref - base) / base
+
+
+'''
+------------------------------------------------------------------------
+Formulas of the datasets of this repository
+------------------------------------------------------------------------
+'''
+
+# deficit_party_data.csv (the stored spend_nonint_gdp column is computed in
+# the same way, see its header)
+party_formulas = FormulaSet()
+party_formulas.declare('spend_nonint_gdp', ['spend_tot_gdp', 'spend_int_gdp'],
+                       lambda tot, int_: tot - int_,
+                       'Non-interest outlays as percent of GDP')
+
+# ogusa_aggr_data.csv of OGplots.py
+ogusa_scen_list = ['base', 'ref_G033', 'ref_T340']
+ogusa_var_list = ['Y', 'C', 'K', 'L']
+ogusa_formulas = FormulaSet()
+for scen in ogusa_scen_list:
+    ogusa_formulas.declare('DebtGDP_' + scen, ['D_' + scen, 'Y_' + scen],
+                           ratio(), 'Debt as percent of GDP, ' + scen)
+for scen in ogusa_scen_list[1:]:
+    for var in ogusa_var_list:
+        ogusa_formulas.declare(
+            var + '_pctchg_' + scen[4:], [var + '_' + scen, var + '_base'],
+            pct_change, var + ' percent change from baseline, ' + scen)
+
+# outlays.csv (its percent-of-GDP ratios stay base columns because the file
+# has no GDP levels)
+outlays_formulas = FormulaSet()
+outlays_formulas.declare('mand_outlays_pct_tot_nonint',
+                         ['mand_outlays_lev', 'tot_nonint_outlays_lev'],
+                         ratio(), 'Mandatory outlays as percent of total ' +
+                         'non-interest outlays')
+outlays_formulas.declare('mand_outlays_pct_tot',
+                         ['mand_outlays_lev', 'tot_outlays_lev'], ratio(),
+                         'Mandatory outlays as percent of total outlays')
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    import os
+    cur_path = os.path.split(os.path.abspath(__file__))[0]
+    data_dir = os.path.join(cur_path, 'data')
+    party_df = pd.read_csv(os.path.join(data_dir, 'deficit_party_data.csv'),
+                           skiprows=3)
+    outlays_df = pd.read_csv(os.path.join(data_dir, 'outlays.csv'),
+                             skiprows=12)
+    for label, formulas, file_df in [('deficit_party_data.csv',
+                                      party_formulas, party_df),
+                                     ('outlays.csv', outlays_formulas,
+                                      outlays_df)]:
+        derived_frame = DerivedFrame(file_df, formulas)
+        print(label)
+        for name in formulas.order():
+            max_diff = np.nanmax(np.abs(derived_frame[name].to_numpy() -
+                                        file_df[name].to_numpy()))
+            print('  ' + name + ' = f(' + ', '.join(formulas.inputs(name)) +
+                  '): max abs. difference from the file ' +
+                  '{:.2e}'.format(max_diff))
+    print('ogusa_aggr_data.csv: ' + ', '.join(ogusa_formulas.order()))
@@ -0,0 +1,534 @@
+'''
+This module runs a small local HTTP service that exposes the figure builders
+of this repository as endpoints returning Bokeh figure JSON (the output of
+bokeh.embed.json_item, which a web page renders with
+Bokeh.embed.embed_item). Analysts can request ad-hoc variants of the figures
+with different years, variables, and scenarios without editing scripts.
+
+Endpoints (all GET, query parameters in brackets):
+
+* /tseries [yvar, start_year]: gen_tseries() party-control time series
+* /scatter [yvar, xvar, start_year]: gen_scatter() seat scatter plot
+* /frcst [vars, main_start_year, main_end_year, full_start_year,
+  full_end_year]: gen_tseries_frcst() CBO debt forecast vintages
+* /ogplots/debt [data, vars, start_year, end_year]: OGplots gen_tseries_dy()
+* /ogplots/macro [reform, vars, start_year, end_year]: OGplots
+  gen_tseries_macro() percent changes from baseline
+* /stats: cache statistics
+
+The service keeps one in-memory cache of the input data, an LRU cache of
+rendered figures keyed by the endpoint and its normalized query parameters,
+and answers If-None-Match requests for unchanged figures with 304 Not
+Modified. Figures are rendered in a thread pool (or a process pool), so a
+slow build does not block other requests, and concurrent requests for the
+same figure share one rendering. The service only listens on the local
+loopback interface. If a user runs this module as a script, it will start
+the service.
+'''
+
+# Import packages
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import hashlib
+import json
+import threading
+import urllib.parse
+from bokeh.embed import json_item
+import party_control as pc
+
+# Default service settings
+default_host = '127.0.0.1'
+default_port = 8050
+default_cache_size = 256
+max_header_bytes = 16384
+
+party_yvar_list = ['deficit_gdp', 'receipts_gdp', 'spend_nonint_gdp']
+seat_xvar_list = ['dem_senateseats', 'dem_houseseats']
+ogusa_var_list = ['Y', 'C', 'K', 'L']
+ogusa_reform_list = ['G033', 'T340']
+marker_cycle = ['circle', 'triangle', 'square', 'square_pin', 'diamond',
+                'inverted_triangle']
+color_cycle = ['blue', 'red', 'green', 'orange', '#C584DB', 'black']
+
+'''
+-------------------------------------------------------------------------------
+Shared in-memory data cache
+-------------------------------------------------------------------------------
+'''
+data_cache = {}
+data_cache_lock = threading.Lock()
+
+
+def load_ogusa_aggr():
+    """
+    This function returns the OG-USA aggregate data of OGplots.py with the
+    debt-to-GDP ratios and the percent changes of every aggregate from the
+    baseline under each reform (the formulas of derived_vars.py).
+    """
+    import OGplots
+
+    return OGplots.ogusa_frame.frame()
+
+
+def load_cbo_frcst():
+    """
+    This function returns the CBO debt forecast vintages data.
+    """
+    import tseries_pubdebt_gdp_frcsts
+
+    return tseries_pubdebt_gdp_frcsts.main_df
+
+
+def load_cbo_ogusa():
+    """
+    This function returns the CBO March 2021 and OG-USA debt forecasts data.
+    """
+    import OGplots
+
+    return OGplots.df1
+
+
+data_loader_dict = {'party': pc.read_party_data,
+                    'recession': pc.read_recession_data,
+                    'cbo_frcst': load_cbo_frcst,
+                    'cbo_ogusa': load_cbo_ogusa,
+                    'ogusa_aggr': load_ogusa_aggr}
+
+
+def get_data(name):
+    """
+    This function returns a DataFrame from the shared data cache, reading it
+    from the data/ folder the first time it is requested. Every builder gets
+    the same DataFrame object, so the data are read once per process.
+
+    Args:
+        name (string): key of data_loader_dict
+
+    Returns:
+        df (DataFrame): cached data
+    """
+    with data_cache_lock:
+        if name not in data_cache:
+            data_cache[name] = data_loader_dict[name]()
+
+        return data_cache[name]
+
+
+'''
+-------------------------------------------------------------------------------
+Figure builders behind each endpoint
+-------------------------------------------------------------------------------
+'''
+
+
+def year_param(param_dict, key, default):
+    """
+    This function parses a year query parameter, which is either an integer
+    or one of the strings 'min' and 'max'.
+    """
+    value = param_dict.get(key, default)
+    if value in ['min', 'max']:
+        return value
+
+    return int(value)
+
+
+def list_param(param_dict, key, default_list, allowed_list=None):
+    """
+    This function parses a comma-separated list query parameter and checks
+    its entries against a list of allowed values.
+    """
+    if key in param_dict:
+        value_list = [value for value in param_dict[key].split(',') if value]
+    else:
+        value_list = list(default_list)
+    if allowed_list is not None:
+        for value in value_list:
+            if value not in allowed_list:
+                raise ValueError('invalid ' + key + ' value: ' + value)
+
+    return value_list
+
+
+def choice_param(param_dict, key, default, allowed_list):
+    """
+    This function parses a query parameter that must be one of a list of
+    allowed values.
+    """
+    value = param_dict.get(key, default)
+    if value not in allowed_list:
+        raise ValueError('invalid ' + key + ' value: ' + value)
+
+    return value
+
+
+def build_tseries(param_dict):
+    """
+    This function builds the gen_tseries() figure for a query.
+    """
+    from tseries_def_rev_spnd_gdp import gen_tseries
+    norm_dict = {'yvar': choice_param(param_dict, 'yvar', 'deficit_gdp',
+                                      party_yvar_list),
+                 'start_year': year_param(param_dict, 'start_year', 'min')}
+    build = lambda: gen_tseries(
+        yvar_str=norm_dict['yvar'], start_year=norm_dict['start_year'],
+        main_df=get_data('party'), recession_df=get_data('recession'),
+        note_text_list=[[], [], []], fig_title_str=param_dict.get('title', ''))
+
+    return norm_dict, build
+
+
+def build_scatter(param_dict):
+    """
+    This function builds the gen_scatter() figure for a query.
+    """
+    from scatter_def_rev_spnd_party import gen_scatter
+    norm_dict = {'yvar': choice_param(param_dict, 'yvar', 'deficit_gdp',
+                                      party_yvar_list),
+                 'xvar': choice_param(param_dict, 'xvar', 'dem_senateseats',
+                                      seat_xvar_list),
+                 'start_year': year_param(param_dict, 'start_year', 'min')}
+    build = lambda: gen_scatter(
+        yvar_str=norm_dict['yvar'], xvar_str=norm_dict['xvar'],
+        start_year=norm_dict['start_year'], main_df=get_data('party'),
+        note_text_list=[[], [], []], fig_title_str=param_dict.get('title', ''))
+
+    return norm_dict, build
+
+
+def build_frcst(param_dict):
+    """
+    This function builds the gen_tseries_frcst() figure for a query.
+    """
+    from tseries_pubdebt_gdp_frcsts import gen_tseries_frcst
+    df = get_data('cbo_frcst')
+    vintage_list = [col for col in df.columns
+                    if col != 'year' and not col.endswith('_frcst')]
+    norm_dict = {'vars': list_param(param_dict, 'vars', vintage_list,
+                                    vintage_list)}
+    if len(norm_dict['vars']) < 2:
+        raise ValueError('vars must list at least two forecast vintages')
+    for key in ['main_start_year', 'full_start_year']:
+        norm_dict[key] = year_param(param_dict, key, 'min')
+    for key in ['main_end_year', 'full_end_year']:
+        norm_dict[key] = year_param(param_dict, key, 'max')
+    legend_label_list = [var[:3].capitalize() + '. ' + var[4:]
+                         for var in norm_dict['vars']]
+    build = lambda: gen_tseries_frcst(
+        norm_dict['vars'], legend_label_list, df=df,
+        main_start_year=norm_dict['main_start_year'],
+        main_end_year=norm_dict['main_end_year'],
+        full_start_year=norm_dict['full_start_year'],
+        full_end_year=norm_dict['full_end_year'],
+        fig_title_str=param_dict.get('title', ''))
+
+    return norm_dict, build
+
+
+def build_ogplots_debt(param_dict):
+    """
+    This function builds the OGplots gen_tseries_dy() debt-to-GDP figure for
+    a query, from either the CBO/OG-USA forecasts (data=cbo_ogusa) or the
+    OG-USA baseline and reform paths (data=ogusa_aggr).
+    """
+    from OGplots import gen_tseries_dy
+    data_name = choice_param(param_dict, 'data', 'cbo_ogusa',
+                             ['cbo_ogusa', 'ogusa_aggr'])
+    if data_name == 'cbo_ogusa':
+        var_list = ['mar_2021', 'ogusa']
+    else:
+        var_list = ['DebtGDP_base', 'DebtGDP_ref_G033', 'DebtGDP_ref_T340']
+    norm_dict = {'data': data_name,
+                 'vars': list_param(param_dict, 'vars', var_list, var_list),
+                 'start_year': year_param(param_dict, 'start_year', 2021),
+                 'end_year': year_param(param_dict, 'end_year', 'max')}
+    n_vars = len(norm_dict['vars'])
+    build = lambda: gen_tseries_dy(
+        norm_dict['vars'], norm_dict['vars'], get_data(data_name),
+        color_cycle[:n_vars], marker_cycle[:n_vars],
+        start_year=norm_dict['start_year'], end_year=norm_dict['end_year'],
+        fig_title_str=param_dict.get('title', ''))
+
+    return norm_dict, build
+
+
+def build_ogplots_macro(param_dict):
+    """
+    This function builds the OGplots gen_tseries_macro() figure of the
+    percent changes of macroeconomic aggregates under a reform for a query.
+    """
+    from OGplots import gen_tseries_macro
+    norm_dict = {'reform': choice_param(param_dict, 'reform', 'G033',
+                                        ogusa_reform_list),
+                 'vars': list_param(param_dict, 'vars', ogusa_var_list,
+                                    ogusa_var_list),
+                 'start_year': year_param(param_dict, 'start_year', 2021),
+                 'end_year': year_param(param_dict, 'end_year', 'max')}
+    col_list = [var + '_pctchg_' + norm_dict['reform']
+                for var in norm_dict['vars']]
+    n_vars = len(col_list)
+    build = lambda: gen_tseries_macro(
+        col_list, norm_dict['vars'], get_data('ogusa_aggr'),
+        color_cycle[:n_vars], marker_cycle[:n_vars],
+        start_year=norm_dict['start_year'], end_year=norm_dict['end_year'],
+        fig_title_str=param_dict.get('title', ''))
+
+    return norm_dict, build
+
+
+route_dict = {'/tseries': build_tseries,
+              '/scatter': build_scatter,
+              '/frcst': build_frcst,
+              '/ogplots/debt': build_ogplots_debt,
+              '/ogplots/macro': build_ogplots_macro}
+
+
+def normalize_query(route, param_dict):
+    """
+    This function validates the query parameters of a figure request and
+    returns the cache key, which lists the parameters with their defaults
+    filled in, so that equivalent queries share one cache entry.
+
+    Args:
+        route (string): endpoint path, key of route_dict
+        param_dict (dict): query parameters
+
+    Returns:
+        cache_key (string): canonical JSON of the route and parameters
+    """
+    norm_dict, build = route_dict[route](param_dict)
+    norm_dict['title'] = param_dict.get('title', '')
+    cache_key = json.dumps([route, norm_dict], sort_keys=True)
+
+    return cache_key
+
+
+def render_figure(route, param_items):
+    """
+    This function builds a figure and serializes it to JSON. It runs in a
+    worker thread or process, so its arguments are plain data.
+
+    Args:
+        route (string): endpoint path, key of route_dict
+        param_items (tuple): (key, value) query parameter pairs
+
+    Returns:
+        body (bytes): UTF-8 JSON of bokeh.embed.json_item(figure)
+    """
+    norm_dict, build = route_dict[route](dict(param_items))
+    body = json.dumps(json_item(build())).encode('utf-8')
+
+    return body
+
+
+'''
+-------------------------------------------------------------------------------
+Asynchronous HTTP service
+-------------------------------------------------------------------------------
+'''
+
+
+class FigureService:
+    """
+    This class holds the state of the figure service: the executor that
+    renders figures, the LRU cache of rendered figures, the renderings in
+    progress, and the cache statistics.
+    """
+
+    def __init__(self, cache_size=default_cache_size, n_workers=None,
+                 use_processes=False):
+        if use_processes:
+            self.executor = \
+                concurrent.futures.ProcessPoolExecutor(max_workers=n_workers)
+        else:
+            self.executor = \
+                concurrent.futures.ThreadPoolExecutor(max_workers=n_workers)
+        self.cache_size = cache_size
+        self.fig_cache = collections.OrderedDict()
+        self.pending_dict = {}
+        self.stats_dict = {'requests': 0, 'hits': 0, 'misses': 0,
+                           'shared': 0, 'not_modified': 0, 'errors': 0}
+
+    async def get_figure(self, route, param_dict):
+        """
+        This method returns the (etag, body) of a figure from the LRU cache
+        or renders it in the executor. Concurrent requests for a figure that
+        is being rendered wait for the same rendering.
+        """
+        cache_key = normalize_query(route, param_dict)
+        if cache_key in self.fig_cache:
+            self.fig_cache.move_to_end(cache_key)
+            self.stats_dict['hits'] += 1
+            return self.fig_cache[cache_key]
+        if cache_key in self.pending_dict:
+            self.stats_dict['shared'] += 1
+            return await asyncio.shield(self.pending_dict[cache_key])
+
+        self.stats_dict['misses'] += 1
+        task = asyncio.ensure_future(self.render(cache_key, route,
+                                                 param_dict))
+        self.pending_dict[cache_key] = task
+        task.add_done_callback(
+            lambda done_task: self.pending_dict.pop(cache_key, None))
+
+        return await asyncio.shield(task)
+
+    async def render(self, cache_key, route, param_dict):
+        """
+        This method renders a figure in the executor, computes its ETag, and
+        stores it in the LRU cache, evicting the least recently used figures
+        beyond the cache size.
+        """
+        loop = asyncio.get_running_loop()
+        body = await loop.run_in_executor(self.executor, render_figure, route,
+                                          tuple(sorted(param_dict.items())))
+        etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self.fig_cache[cache_key] = (etag, body)
+        while len(self.fig_cache) > self.cache_size:
+            self.fig_cache.popitem(last=False)
+
+        return etag, body
+
+    async def handle_request(self, method, target, header_dict):
+        """
+        This method answers one request and returns the response status,
+        extra headers, and body.
+        """
+        self.stats_dict['requests'] += 1
+        url = urllib.parse.urlsplit(target)
+        param_dict = dict(urllib.parse.parse_qsl(url.query))
+        if method not in ['GET', 'HEAD']:
+            return 405, {'Allow': 'GET, HEAD'}, b''
+        if url.path == '/stats':
+            stats_dict = dict(self.stats_dict,
+                              cached_figures=len(self.fig_cache),
+                              cached_data=sorted(data_cache))
+            return 200, {}, json.dumps(stats_dict).encode('utf-8')
+        if url.path not in route_dict:
+            body = json.dumps({'error': 'unknown endpoint',
+                               'endpoints': sorted(route_dict)})
+            return 404, {}, body.encode('utf-8')
+        try:
+            etag, body = await self.get_figure(url.path, param_dict)
+        except (KeyError, ValueError) as err:
+            self.stats_dict['errors'] += 1
+            body = json.dumps({'error': str(err)}).encode('utf-8')
+            return 400, {}, body
+        extra_dict = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        match_list = [tag.strip() for tag in
+                      header_dict.get('if-none-match', '').split(',')]
+        if etag in match_list or '*' in match_list:
+            self.stats_dict['not_modified'] += 1
+            return 304, extra_dict, b''
+
+        return 200, extra_dict, body
+
+    async def handle_connection(self, reader, writer):
+        """
+        This method serves the HTTP/1.1 requests of one connection, keeping
+        it open between requests unless the client asks to close it.
+        """
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError,
+                        asyncio.LimitOverrunError, ConnectionError):
+                    break
+                line_list = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = line_list[0].split(' ')
+                except ValueError:
+                    break
+                header_dict = {}
+                for line in line_list[1:]:
+                    if ':' in line:
+                        key, value = line.split(':', 1)
+                        header_dict[key.strip().lower()] = value.strip()
+                status, extra_dict, body = \
+                    await self.handle_request(method, target, header_dict)
+                keep_alive = \
+                    (header_dict.get('connection', '').lower() != 'close' and
+                     version == 'HTTP/1.1')
+                writer.write(response_head(status, extra_dict, len(body),
+                                           keep_alive))
+                if method != 'HEAD' and status != 304:
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+
+status_text_dict = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request',
+                    404: 'Not Found', 405: 'Method Not Allowed'}
+
+
+def response_head(status, extra_dict, n_bytes, keep_alive):
+    """
+    This function formats the status line and headers of a response.
+    """
+    header_dict = {'Content-Type': 'application/json',
+                   'Content-Length': str(n_bytes if status != 304 else 0),
+                   'Access-Control-Allow-Origin': '*',
+                   'Connection': 'keep-alive' if keep_alive else 'close'}
+    header_dict.update(extra_dict)
+    head = ('HTTP/1.1 ' + str(status) + ' ' + status_text_dict[status] +
+            '\r\n' + ''.join([key + ': ' + value + '\r\n'
+                              for key, value in header_dict.items()]) +
+            '\r\n')
+
+    return head.encode('latin-1')
+
+
+async def serve(host=default_host, port=default_port,
+                cache_size=default_cache_size, n_workers=None,
+                use_processes=False):
+    """
+    This function starts the figure service and serves until it is
+    cancelled.
+
+    Args:
+        host (string): interface to listen on (local loopback by default)
+        port (int): port to listen on
+        cache_size (int): maximum number of rendered figures in the LRU cache
+        n_workers (int or None): number of rendering threads or processes
+        use_processes (bool): =True renders in a process pool instead of a
+            thread pool
+
+    Returns:
+        None
+    """
+    service = FigureService(cache_size, n_workers, use_processes)
+    server = await asyncio.start_server(service.handle_connection, host, port,
+                                        limit=max_header_bytes)
+    print('Serving figure JSON on http://' + host + ':' + str(port) +
+          ' (endpoints: ' + ', '.join(sorted(route_dict)) + ')')
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.executor.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    parser = argparse.ArgumentParser(
+        description='Serve the DeficitParty figures as Bokeh JSON.')
+    parser.add_argument('--host', default=default_host)
+    parser.add_argument('--port', type=int, default=default_port)
+    parser.add_argument('--cache-size', type=int, default=default_cache_size)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--processes', action='store_true',
+                        help='render figures in a process pool')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.cache_size,
+                          args.workers, args.processes))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,784 @@
+'''
+This module refreshes the FRED series behind deficit_party_data.csv. The
+header of that file names the FRED sources of its budget columns
+(FYFSGDA188S, FYFRGDA188S, FYOIGDA188S, FYONGDA188S), and refreshing them
+used to be a manual copy-paste. The refresh:
+
+* fetches every configured series concurrently with asyncio (a bounded
+  number of requests in flight, with timeouts and retries), from the
+  fredgraph.csv download of FRED or any server that answers the same URLs
+* keeps an on-disk cache of the series in data/fred_cache/ with the ETag and
+  Last-Modified validators of each download, and sends conditional requests
+  (If-None-Match, If-Modified-Since), so an unchanged series costs a 304 Not
+  Modified response and no transfer
+* merges all cached series into one wide dataset, fred_series.csv in the
+  cache directory (one row per year, one column per series)
+* updates the columns of deficit_party_data.csv that map to a series and
+  recomputes only the derived columns whose inputs changed (e.g.,
+  spend_nonint_gdp = spend_tot_gdp - spend_int_gdp). Only the changed cells
+  are rewritten, so the rest of the file, including its three header lines,
+  stays byte-for-byte identical.
+
+The series list defaults to the four series of deficit_party_data.csv and
+can be replaced by a CSV file with columns 'series_id' and 'column' (an
+empty column caches and merges the series without writing it to
+deficit_party_data.csv). For testing, the refresh runs against a local stub
+HTTP server (stub_server()) that serves series with ETags. If a user runs
+this module as a script, it will refresh the data from FRED, or with --stub
+it will run the refresh against a stub server with many series on a
+temporary copy of the data and print the statistics of each run.
+'''
+
+# Import packages
+import argparse
+import asyncio
+import csv
+import datetime
+import email.utils
+import hashlib
+import io
+import json
+import os
+import shutil
+import ssl
+import tempfile
+import time
+import urllib.parse
+import numpy as np
+import pandas as pd
+import derived_vars as dv
+import party_control as pc
+
+# Default FRED download URL, cache directory, and series of
+# deficit_party_data.csv as (series_id, column) pairs
+fred_base_url = 'https://fred.stlouisfed.org/graph/fredgraph.csv'
+cache_dir = os.path.join(pc.data_dir, 'fred_cache')
+fred_series_list = [('FYFSGDA188S', 'deficit_gdp'),
+                    ('FYFRGDA188S', 'receipts_gdp'),
+                    ('FYOIGDA188S', 'spend_int_gdp'),
+                    ('FYONGDA188S', 'spend_tot_gdp')]
+
+# Derived columns of deficit_party_data.csv: name -> (input columns,
+# function of the input values), from the formulas of derived_vars.py
+derived_dict = {name: dv.party_formulas.formula_dict[name][:2]
+                for name in dv.party_formulas.order()}
+
+# Decimals of the values written to deficit_party_data.csv
+n_decimals = 5
+n_header_lines = 4
+
+
+'''
+------------------------------------------------------------------------
+HTTP client
+------------------------------------------------------------------------
+'''
+
+
+def decode_chunked(body):
+    """
+    This function decodes a body sent with chunked transfer encoding.
+
+    Args:
+        body (bytes): chunked body
+
+    Returns:
+        data (bytes): decoded body
+    """
+    data = b''
+    pos = 0
+    while True:
+        end = body.index(b'\r\n', pos)
+        size = int(body[pos:end].split(b';')[0], 16)
+        if size == 0:
+            break
+        data += body[end + 2:end + 2 + size]
+        pos = end + 4 + size
+
+    return data
+
+
+async def http_get(url, header_dict=None, timeout=30.0, max_redirects=3):
+    """
+    This function sends one HTTP/1.1 GET request with asyncio streams and
+    returns the response, following redirects. It needs only the standard
+    library (http and https URLs).
+
+    Args:
+        url (string): URL of the request
+        header_dict (dict): extra request headers
+        timeout (float): seconds allowed for the connection and response
+        max_redirects (int): number of redirects followed
+
+    Returns:
+        status (int): HTTP status of the response
+        resp_header_dict (dict): response headers with lower case names
+        body (bytes): response body
+    """
+    parts = urllib.parse.urlsplit(url)
+    is_https = parts.scheme == 'https'
+    port = parts.port or (443 if is_https else 80)
+    target = (parts.path or '/') + ('?' + parts.query if parts.query else '')
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(
+            parts.hostname, port,
+            ssl=ssl.create_default_context() if is_https else None),
+        timeout)
+    try:
+        req_dict = {'Host': parts.netloc, 'User-Agent': 'DeficitParty',
+                    'Accept-Encoding': 'identity', 'Connection': 'close'}
+        req_dict.update(header_dict or {})
+        head = ('GET ' + target + ' HTTP/1.1\r\n' +
+                ''.join([key + ': ' + value + '\r\n'
+                         for key, value in req_dict.items()]) + '\r\n')
+        writer.write(head.encode('latin-1'))
+        await writer.drain()
+        raw = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    head, _, body = raw.partition(b'\r\n\r\n')
+    line_list = head.decode('latin-1').split('\r\n')
+    status = int(line_list[0].split(' ')[1])
+    resp_header_dict = {}
+    for line in line_list[1:]:
+        if ':' in line:
+            key, value = line.split(':', 1)
+            resp_header_dict[key.strip().lower()] = value.strip()
+    if 'chunked' in resp_header_dict.get('transfer-encoding', ''):
+        body = decode_chunked(body)
+    elif 'content-length' in resp_header_dict:
+        body = body[:int(resp_header_dict['content-length'])]
+    if (status in (301, 302, 303, 307, 308) and max_redirects > 0 and
+            'location' in resp_header_dict):
+        return await http_get(
+            urllib.parse.urljoin(url, resp_header_dict['location']),
+            header_dict, timeout, max_redirects - 1)
+
+    return status, resp_header_dict, body
+
+
+'''
+------------------------------------------------------------------------
+On-disk cache and concurrent refresh
+------------------------------------------------------------------------
+'''
+
+
+class SeriesCache:
+    """
+    This class stores downloaded series in a directory: the body of each
+    series in <series_id>.csv and the validators of all downloads in
+    index.json.
+
+    Args:
+        path (string): cache directory, created if needed
+    """
+
+    def __init__(self, path=cache_dir):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.index_path = os.path.join(path, 'index.json')
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as file:
+                self.index_dict = json.load(file)
+        else:
+            self.index_dict = {}
+
+    def body_path(self, series_id):
+        """
+        This method returns the path of the cached body of a series.
+        """
+        return os.path.join(self.path, series_id + '.csv')
+
+    def has(self, series_id):
+        """
+        This method returns whether a series is in the cache.
+        """
+        return (series_id in self.index_dict and
+                os.path.exists(self.body_path(series_id)))
+
+    def validators(self, series_id):
+        """
+        This method returns the conditional request headers of a cached
+        series (empty if the series is not cached).
+        """
+        header_dict = {}
+        if self.has(series_id):
+            meta_dict = self.index_dict[series_id]
+            if meta_dict.get('etag'):
+                header_dict['If-None-Match'] = meta_dict['etag']
+            if meta_dict.get('last_modified'):
+                header_dict['If-Modified-Since'] = \
+                    meta_dict['last_modified']
+
+        return header_dict
+
+    def read(self, series_id):
+        """
+        This method returns the cached body of a series as text.
+        """
+        with open(self.body_path(series_id), encoding='utf-8') as file:
+            return file.read()
+
+    def write(self, series_id, text, resp_header_dict):
+        """
+        This method stores the body and validators of a download. It
+        returns whether the body differs from the cached one.
+        """
+        sha1 = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        changed = (not self.has(series_id) or
+                   self.index_dict[series_id].get('sha1') != sha1)
+        if changed:
+            with open(self.body_path(series_id), 'w', encoding='utf-8',
+                      newline='') as file:
+                file.write(text)
+        self.index_dict[series_id] = {
+            'etag': resp_header_dict.get('etag'),
+            'last_modified': resp_header_dict.get('last-modified'),
+            'sha1': sha1,
+            'fetched': datetime.datetime.now(
+                datetime.timezone.utc).isoformat(timespec='seconds')}
+
+        return changed
+
+    def save_index(self):
+        """
+        This method writes the validators of all series to index.json.
+        """
+        with open(self.index_path, 'w') as file:
+            json.dump(self.index_dict, file, indent=1, sort_keys=True)
+
+
+async def fetch_series(series_id, cache, base_url=fred_base_url,
+                       semaphore=None, timeout=30.0, n_retries=2):
+    """
+    This function downloads one series with a conditional request and
+    stores it in the cache. Failed requests are retried after 0.5, 1, ...
+    seconds.
+
+    Args:
+        series_id (string): FRED series ID
+        cache (SeriesCache): on-disk cache
+        base_url (string): URL of the fredgraph.csv download
+        semaphore (asyncio.Semaphore): limit of the requests in flight
+        timeout (float): seconds allowed per request
+        n_retries (int): number of retries of a failed request
+
+    Returns:
+        status_str (string): 'fetched' (new or changed body), 'unchanged'
+            (200 with the cached body), 'not_modified' (304), or 'error'
+        n_bytes (int): bytes of body transferred
+        err_str (string): error message, None unless status_str is 'error'
+    """
+    url = base_url + '?' + urllib.parse.urlencode({'id': series_id})
+    err_str = None
+    for attempt in range(n_retries + 1):
+        if attempt > 0:
+            await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+        try:
+            if semaphore is None:
+                resp = await http_get(url, cache.validators(series_id),
+                                      timeout)
+            else:
+                async with semaphore:
+                    resp = await http_get(url, cache.validators(series_id),
+                                          timeout)
+        except (OSError, asyncio.TimeoutError, ValueError,
+                IndexError) as err:
+            err_str = type(err).__name__ + ': ' + str(err)
+            continue
+        status, resp_header_dict, body = resp
+        if status == 304 and cache.has(series_id):
+            return 'not_modified', 0, None
+        if status == 200:
+            changed = cache.write(series_id, body.decode('utf-8'),
+                                  resp_header_dict)
+            return ('fetched' if changed else 'unchanged'), len(body), None
+        err_str = 'HTTP status ' + str(status)
+        if status < 500:
+            break
+
+    return 'error', 0, err_str
+
+
+async def refresh_series(series_id_list, cache, base_url=fred_base_url,
+                         max_concurrency=16, timeout=30.0, n_retries=2):
+    """
+    This function downloads many series concurrently and writes the cache
+    index once all requests are done.
+
+    Args:
+        series_id_list (list): FRED series IDs
+        cache (SeriesCache): on-disk cache
+        base_url (string): URL of the fredgraph.csv download
+        max_concurrency (int): maximum number of requests in flight
+        timeout (float): seconds allowed per request
+        n_retries (int): number of retries of a failed request
+
+    Returns:
+        result_df (DataFrame): columns 'status', 'n_bytes', and 'error'
+            indexed by series_id
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    result_list = await asyncio.gather(
+        *[fetch_series(series_id, cache, base_url, semaphore, timeout,
+                       n_retries)
+          for series_id in series_id_list])
+    cache.save_index()
+    result_df = pd.DataFrame(result_list,
+                             columns=['status', 'n_bytes', 'error'],
+                             index=pd.Index(series_id_list,
+                                            name='series_id'))
+
+    return result_df
+
+
+'''
+------------------------------------------------------------------------
+Merging the series into the datasets
+------------------------------------------------------------------------
+'''
+
+
+def read_series_config(config_path):
+    """
+    This function reads a list of series from a CSV file with columns
+    'series_id' and 'column' (the column of deficit_party_data.csv the
+    series updates, empty for none).
+
+    Args:
+        config_path (string): path of the CSV file
+
+    Returns:
+        series_list (list): (series_id, column or None) pairs
+    """
+    config_df = pd.read_csv(config_path, dtype=str, keep_default_na=False)
+    if 'column' not in config_df.columns:
+        config_df['column'] = ''
+    series_list = [(row.series_id.strip(), row.column.strip() or None)
+                   for row in config_df.itertuples()]
+
+    return series_list
+
+
+def parse_fred_csv(text):
+    """
+    This function parses a fredgraph.csv download into annual values. The
+    values of a series with more than one observation per year are
+    averaged; FRED's missing value '.' is NaN.
+
+    Args:
+        text (string): body of the download, a date column and a value
+            column
+
+    Returns:
+        value_ser (Series): values indexed by year
+    """
+    series_df = pd.read_csv(io.StringIO(text), na_values=['.'])
+    year = pd.to_datetime(series_df.iloc[:, 0]).dt.year
+    value_ser = pd.to_numeric(series_df.iloc[:, 1], errors='coerce')
+    value_ser = value_ser.groupby(year.to_numpy()).mean()
+    value_ser.index.name = 'year'
+
+    return value_ser
+
+
+def merge_cache(cache, series_id_list):
+    """
+    This function merges the cached series into one wide DataFrame and
+    writes it to fred_series.csv in the cache directory.
+
+    Args:
+        cache (SeriesCache): on-disk cache
+        series_id_list (list): FRED series IDs
+
+    Returns:
+        wide_df (DataFrame): one column per cached series indexed by year
+    """
+    ser_dict = {series_id: parse_fred_csv(cache.read(series_id))
+                for series_id in series_id_list if cache.has(series_id)}
+    wide_df = pd.DataFrame(ser_dict).sort_index()
+    wide_df.index.name = 'year'
+    wide_df.to_csv(os.path.join(cache.path, 'fred_series.csv'))
+
+    return wide_df
+
+
+def format_value(value):
+    """
+    This function formats a value as in deficit_party_data.csv: rounded to
+    n_decimals decimals without trailing zeros, empty if missing.
+    """
+    if np.isnan(value):
+        return ''
+    value_str = ('{:.' + str(n_decimals) + 'f}').format(value)
+    value_str = value_str.rstrip('0').rstrip('.')
+    if value_str == '-0':
+        value_str = '0'
+
+    return value_str
+
+
+def parse_value(value_str):
+    """
+    This function parses a cell of deficit_party_data.csv as a float.
+    """
+    try:
+        return float(value_str)
+    except ValueError:
+        return np.nan
+
+
+def update_party_data(wide_df, series_list=fred_series_list,
+                      data_path=pc.party_data_path, derived=derived_dict,
+                      write=True):
+    """
+    This function writes the values of the series that map to a column of
+    deficit_party_data.csv into that column for the years in the file, and
+    recomputes the derived columns of which an input changed in the years it
+    changed. Only the lines of the file with a changed cell are rewritten,
+    so all other bytes stay the same. A value changes if it differs from the
+    file's value after rounding to n_decimals decimals.
+
+    Args:
+        wide_df (DataFrame): series values indexed by year, e.g. the output
+            of merge_cache()
+        series_list (list): (series_id, column or None) pairs
+        data_path (string): path of the deficit_party_data.csv file
+        derived (dict): derived columns, name -> (input columns, function)
+        write (bool): whether to write the file (False for a dry run)
+
+    Returns:
+        change_df (DataFrame): one row per changed cell with columns 'year',
+            'column', 'old', 'new', and 'derived'
+        extra_year_list (list): years of the series not in the file
+    """
+    with open(data_path, encoding='utf-8', newline='') as file:
+        line_list = file.read().splitlines(keepends=True)
+    col_list = next(csv.reader([line_list[n_header_lines - 1].strip()]))
+    body_list = line_list[n_header_lines:]
+    row_list = [next(csv.reader([line.rstrip('\r\n')]))
+                for line in body_list]
+    year_list = [int(row[0]) for row in row_list]
+    year_pos_dict = {year: pos for pos, year in enumerate(year_list)}
+    col_pos_dict = {col: pos for pos, col in enumerate(col_list)}
+    change_list = []
+    changed_dict = {}
+    extra_year_set = set()
+
+    def set_cell(pos, col, value, is_derived):
+        new_str = format_value(value)
+        old_str = row_list[pos][col_pos_dict[col]]
+        if (format_value(parse_value(old_str)) != new_str and
+                not (old_str.strip() == '' and new_str == '')):
+            row_list[pos][col_pos_dict[col]] = new_str
+            change_list.append([year_list[pos], col, old_str, new_str,
+                                is_derived])
+            changed_dict.setdefault(col, set()).add(pos)
+
+    for series_id, col in series_list:
+        if col is None or series_id not in wide_df.columns:
+            continue
+        if col not in col_pos_dict:
+            raise KeyError('column ' + col + ' of series ' + series_id +
+                           ' is not in ' + data_path)
+        for year, value in wide_df[series_id].dropna().items():
+            if int(year) in year_pos_dict:
+                set_cell(year_pos_dict[int(year)], col, value, False)
+            else:
+                extra_year_set.add(int(year))
+    for col, (input_list, func) in derived.items():
+        pos_set = set()
+        for input_col in input_list:
+            pos_set |= changed_dict.get(input_col, set())
+        for pos in sorted(pos_set):
+            input_arr = [parse_value(row_list[pos][col_pos_dict[input_col]])
+                         for input_col in input_list]
+            set_cell(pos, col, func(*input_arr), True)
+    if write and change_list:
+        pos_set = set().union(*changed_dict.values())
+        for pos in pos_set:
+            line = body_list[pos]
+            ending = line[len(line.rstrip('\r\n')):]
+            out = io.StringIO()
+            csv.writer(out, lineterminator='').writerow(row_list[pos])
+            body_list[pos] = out.getvalue() + ending
+        with open(data_path, 'w', encoding='utf-8', newline='') as file:
+            file.write(''.join(line_list[:n_header_lines] + body_list))
+    change_df = pd.DataFrame(change_list, columns=['year', 'column', 'old',
+                                                   'new', 'derived'])
+
+    return change_df, sorted(extra_year_set)
+
+
+def refresh(series_list=fred_series_list, base_url=fred_base_url,
+            cache_path=cache_dir, data_path=pc.party_data_path,
+            max_concurrency=16, timeout=30.0, n_retries=2, write=True):
+    """
+    This function runs the whole refresh: the concurrent conditional
+    downloads, the merge of the cache, and the update of
+    deficit_party_data.csv.
+
+    Args:
+        series_list (list): (series_id, column or None) pairs
+        base_url (string): URL of the fredgraph.csv download
+        cache_path (string): cache directory
+        data_path (string): path of the deficit_party_data.csv file
+        max_concurrency (int): maximum number of requests in flight
+        timeout (float): seconds allowed per request
+        n_retries (int): number of retries of a failed request
+        write (bool): whether to write deficit_party_data.csv
+
+    Returns:
+        result_df (DataFrame): download result of each series
+        change_df (DataFrame): changed cells of deficit_party_data.csv
+        extra_year_list (list): years of the series not in the file
+    """
+    cache = SeriesCache(cache_path)
+    series_id_list = [series_id for series_id, _ in series_list]
+    result_df = asyncio.run(refresh_series(
+        series_id_list, cache, base_url, max_concurrency, timeout,
+        n_retries))
+    wide_df = merge_cache(cache, series_id_list)
+    change_df, extra_year_list = update_party_data(
+        wide_df, series_list, data_path, write=write)
+
+    return result_df, change_df, extra_year_list
+
+
+'''
+------------------------------------------------------------------------
+Local stub server for testing
+------------------------------------------------------------------------
+'''
+
+
+def series_text(value_ser):
+    """
+    This function formats annual values as a fredgraph.csv download.
+
+    Args:
+        value_ser (Series): values indexed by year
+
+    Returns:
+        text (string): CSV text with columns DATE and the series values
+    """
+    line_list = ['DATE,' + str(value_ser.name)]
+    for year, value in value_ser.items():
+        line_list.append('{:d}-01-01,{}'.format(
+            int(year), '.' if np.isnan(value) else repr(float(value))))
+
+    return '\n'.join(line_list) + '\n'
+
+
+def stub_series(main_df, n_series=200, seed=0):
+    """
+    This function returns the bodies of a stub server: the four series of
+    deficit_party_data.csv from its current values and n_series - 4 random
+    walks named SYNTH0004, SYNTH0005, ....
+
+    Args:
+        main_df (DataFrame): data, e.g. the output of read_party_data()
+        n_series (int): total number of series
+        seed (int): seed of the random walks
+
+    Returns:
+        text_dict (dict): series ID -> fredgraph.csv text
+    """
+    rng = np.random.default_rng(seed)
+    year_vec = main_df['year'].to_numpy()
+    text_dict = {}
+    for series_id, col in fred_series_list:
+        value_ser = pd.Series(main_df[col].to_numpy(dtype=np.float64),
+                              index=year_vec, name=series_id).dropna()
+        text_dict[series_id] = series_text(value_ser)
+    for k in range(len(text_dict), n_series):
+        series_id = 'SYNTH{:04d}'.format(k)
+        value_ser = pd.Series(
+            np.round(np.cumsum(rng.normal(size=len(year_vec))), 5),
+            index=year_vec, name=series_id)
+        text_dict[series_id] = series_text(value_ser)
+
+    return text_dict
+
+
+async def stub_server(text_dict, host='127.0.0.1', port=0, latency=0.0):
+    """
+    This function starts a local HTTP server that answers
+    /graph/fredgraph.csv?id=<series_id> with the bodies of text_dict, with
+    ETag and Last-Modified headers and 304 responses to matching conditional
+    requests. Changing text_dict changes the served series (and their
+    ETags).
+
+    Args:
+        text_dict (dict): series ID -> fredgraph.csv text
+        host (string): interface to listen on
+        port (int): port to listen on, 0 for any free port
+        latency (float): seconds each response is delayed, to mimic a
+            remote server
+
+    Returns:
+        server (asyncio.Server): running server, its URL is
+            'http://<host>:<port>/graph/fredgraph.csv'
+        stats_dict (dict): counts of the 'requests', 'not_modified'
+            responses, and 'bytes' of body sent
+    """
+    stats_dict = {'requests': 0, 'not_modified': 0, 'bytes': 0}
+    last_modified = email.utils.formatdate(usegmt=True)
+
+    async def handle_connection(reader, writer):
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        line_list = head.decode('latin-1').split('\r\n')
+        header_dict = {}
+        for line in line_list[1:]:
+            if ':' in line:
+                key, value = line.split(':', 1)
+                header_dict[key.strip().lower()] = value.strip()
+        url = urllib.parse.urlsplit(line_list[0].split(' ')[1])
+        series_id = urllib.parse.parse_qs(url.query).get('id', [''])[0]
+        stats_dict['requests'] += 1
+        await asyncio.sleep(latency)
+        if (url.path != '/graph/fredgraph.csv' or
+                series_id not in text_dict):
+            status, body, extra_dict = 404, b'Not Found', {}
+        else:
+            body = text_dict[series_id].encode('utf-8')
+            etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+            extra_dict = {'ETag': etag, 'Last-Modified': last_modified}
+            if header_dict.get('if-none-match') == etag:
+                status, body = 304, b''
+                stats_dict['not_modified'] += 1
+            else:
+                status = 200
+        stats_dict['bytes'] += len(body)
+        status_str = {200: 'OK', 304: 'Not Modified',
+                      404: 'Not Found'}[status]
+        extra_dict.update({'Content-Type': 'text/csv',
+                           'Content-Length': str(len(body)),
+                           'Connection': 'close'})
+        writer.write(('HTTP/1.1 ' + str(status) + ' ' + status_str +
+                      '\r\n' + ''.join([key + ': ' + value + '\r\n'
+                                        for key, value in
+                                        extra_dict.items()]) +
+                      '\r\n').encode('latin-1') + body)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle_connection, host, port)
+
+    return server, stats_dict
+
+
+def run_stub_demo(n_series=200, latency=0.05, max_concurrency=16):
+    """
+    This function runs the refresh against a stub server on a temporary
+    copy of deficit_party_data.csv: a first run that downloads all series, a
+    second run that only gets 304 responses, and a third run after one
+    series changed at the stub. It prints the statistics of each run.
+
+    Args:
+        n_series (int): number of series served by the stub
+        latency (float): seconds each stub response is delayed
+        max_concurrency (int): maximum number of requests in flight
+    """
+    main_df = pc.read_party_data()
+    text_dict = stub_series(main_df, n_series)
+    tmp_dir = tempfile.mkdtemp(prefix='fred_refresh_')
+    data_path = os.path.join(tmp_dir, 'deficit_party_data.csv')
+    shutil.copyfile(pc.party_data_path, data_path)
+    series_list = (fred_series_list +
+                   [(series_id, None) for series_id in text_dict
+                    if series_id.startswith('SYNTH')])
+    series_id_list = [series_id for series_id, _ in series_list]
+    cache = SeriesCache(os.path.join(tmp_dir, 'fred_cache'))
+
+    async def run_all():
+        server, stats_dict = await stub_server(text_dict, latency=latency)
+        port = server.sockets[0].getsockname()[1]
+        base_url = 'http://127.0.0.1:' + str(port) + '/graph/fredgraph.csv'
+        for run, label in enumerate(['cold cache', 'warm cache',
+                                     'one series changed']):
+            if run == 2:
+                value_ser = parse_fred_csv(text_dict['FYOIGDA188S'])
+                value_ser.name = 'FYOIGDA188S'
+                value_ser.iloc[-1] += 0.25
+                text_dict['FYOIGDA188S'] = series_text(value_ser)
+            n_bytes = stats_dict['bytes']
+            start = time.perf_counter()
+            result_df = await refresh_series(series_id_list, cache,
+                                             base_url, max_concurrency)
+            seconds = time.perf_counter() - start
+            wide_df = merge_cache(cache, series_id_list)
+            change_df, _ = update_party_data(wide_df, series_list,
+                                             data_path)
+            print('Run ' + str(run + 1) + ' (' + label + '): ' +
+                  '{:.2f}'.format(seconds) + ' s, ' +
+                  str(stats_dict['bytes'] - n_bytes) + ' bytes, ' +
+                  str(result_df['status'].value_counts().to_dict()) +
+                  ', ' + str(len(change_df)) + ' cells changed')
+            if len(change_df) > 0:
+                print(change_df.to_string(index=False))
+        print('Serial fetching would take at least ' +
+              '{:.2f}'.format(len(series_id_list) * latency) +
+              ' s per run at this latency')
+        server.close()
+        await server.wait_closed()
+
+    try:
+        asyncio.run(run_all())
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    parser = argparse.ArgumentParser(
+        description='Refresh the FRED series of deficit_party_data.csv')
+    parser.add_argument('--config', default=None,
+                        help='CSV file of series (series_id, column)')
+    parser.add_argument('--base-url', default=fred_base_url,
+                        help='URL of the fredgraph.csv download')
+    parser.add_argument('--cache-dir', default=cache_dir)
+    parser.add_argument('--data', default=pc.party_data_path,
+                        help='path of deficit_party_data.csv')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--retries', type=int, default=2)
+    parser.add_argument('--dry-run', action='store_true',
+                        help='report changes without writing the data')
+    parser.add_argument('--stub', action='store_true',
+                        help='run against a local stub server instead')
+    parser.add_argument('--stub-series', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='seconds of delay per stub response')
+    args = parser.parse_args()
+    if args.stub:
+        run_stub_demo(args.stub_series, args.latency, args.concurrency)
+    else:
+        if args.config is None:
+            series_list = fred_series_list
+        else:
+            series_list = read_series_config(args.config)
+        result_df, change_df, extra_year_list = refresh(
+            series_list, args.base_url, args.cache_dir, args.data,
+            args.concurrency, args.timeout, args.retries,
+            not args.dry_run)
+        print(result_df['status'].value_counts().to_string())
+        error_df = result_df[result_df['status'] == 'error']
+        if len(error_df) > 0:
+            print(error_df['error'].to_string())
+        print(str(len(change_df)) + ' cells changed' +
+              (' (dry run)' if args.dry_run else ''))
+        if len(change_df) > 0:
+            print(change_df.to_string(index=False))
+        if extra_year_list:
+            print('Years of the series not in the data: ' +
+                  ', '.join([str(year) for year in extra_year_list]))
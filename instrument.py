@@ -0,0 +1,479 @@
+'''
+This module is an opt-in instrumentation layer that shows where the time of
+a figure or table build goes. It records, for every stage, the wall-clock
+time, the CPU time, the peak resident set size (RSS) of the process, and, for
+stages that return a Bokeh model, the number of models and the number of
+bytes of its serialized JSON. The stages are:
+
+* load: pandas.read_csv and pandas.read_excel calls
+* classify: party_control.control_codes and control_masks calls
+* cds: ColumnDataSource construction
+* build: every gen_* figure builder that a script defines or imports
+* serialize: HTML serialization in bokeh.embed.file_html (which output_file,
+  save, and show use)
+* regression: statsmodels OLS fits
+* table: checkpoints of table_def_gdp_party.py (masks and statistics, table
+  output, t-tests, regressions, robust standard errors, and Welch tests)
+
+Nothing is recorded unless the layer is enabled, so the checkpoint() calls
+in the scripts cost one attribute lookup otherwise. The records export as
+JSON and as a Chrome trace (open it in chrome://tracing or
+https://ui.perfetto.dev). If a user runs this module as a script, it will run
+the listed scripts with the layer enabled, e.g.
+
+    python instrument.py --out build_profile table_def_gdp_party.py
+        tseries_def_rev_spnd_gdp.py
+
+which writes build_profile.json and build_profile.trace.json. Figures that
+the scripts show are serialized in memory instead of written to images/ and
+opened in a browser, unless --show is given.
+'''
+
+# Import packages
+import argparse
+import contextlib
+import functools
+import json
+import os
+import platform
+import sys
+import threading
+import time
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Set paths to work across Mac/Windows/Linux platforms
+cur_path = os.path.split(os.path.abspath(__file__))[0]
+
+'''
+-------------------------------------------------------------------------------
+Recorder state
+-------------------------------------------------------------------------------
+'''
+enabled = False
+record_list = []
+stack_local = threading.local()
+checkpoint_dict = {}
+start_wall = time.perf_counter()
+patched_list = []
+
+
+def peak_rss_mb():
+    """
+    This function returns the peak resident set size of the process so far
+    in megabytes (None where the resource module is not available, e.g. on
+    Windows).
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    if sys.platform == 'darwin':
+        return peak / 1024 ** 2
+
+    return peak / 1024
+
+
+def enable():
+    """
+    This function turns the recording on and clears earlier records.
+    """
+    global enabled, start_wall
+    enabled = True
+    start_wall = time.perf_counter()
+    del record_list[:]
+    checkpoint_dict.clear()
+
+
+def disable():
+    """
+    This function turns the recording off.
+    """
+    global enabled
+    enabled = False
+
+
+def model_stats(model):
+    """
+    This function returns the number of Bokeh models that a model references
+    (including itself) and the number of bytes of its serialized JSON.
+
+    Args:
+        model (Bokeh Model): figure, layout, or Tabs object
+
+    Returns:
+        stats_dict (dict): 'models' and 'bytes'
+    """
+    from bokeh.embed.util import OutputDocumentFor
+    # Serialize in a temporary document, so that the model is left as it was
+    # for the script to show or save
+    with OutputDocumentFor([model], always_new=True) as doc:
+        n_bytes = len(json.dumps(doc.to_json()).encode('utf-8'))
+    stats_dict = {'models': len(model.references()), 'bytes': n_bytes}
+
+    return stats_dict
+
+
+@contextlib.contextmanager
+def stage(name, category='stage', **meta):
+    """
+    This context manager records one stage. Stages nest; every record keeps
+    the name of its parent stage. The yielded dictionary can be given a
+    'model' entry (a Bokeh model), whose model count and serialized bytes
+    are recorded after the timing ends.
+
+    Args:
+        name (string): name of the stage
+        category (string): stage category, e.g. 'load' or 'build'
+        meta (dict): extra values to record with the stage
+
+    Yields:
+        info_dict (dict): values to add to the record
+    """
+    if not enabled:
+        yield {}
+        return
+    stack = getattr(stack_local, 'stack', None)
+    if stack is None:
+        stack = stack_local.stack = []
+    parent = stack[-1] if stack else None
+    stack.append(name)
+    info_dict = dict(meta)
+    rss_before = peak_rss_mb()
+    wall0 = time.perf_counter()
+    cpu0 = time.process_time()
+    try:
+        yield info_dict
+    finally:
+        wall1 = time.perf_counter()
+        cpu1 = time.process_time()
+        stack.pop()
+        rss_after = peak_rss_mb()
+        record = {'name': name, 'category': category, 'parent': parent,
+                  'depth': len(stack), 'thread': threading.get_ident(),
+                  'start_s': wall0 - start_wall, 'wall_s': wall1 - wall0,
+                  'cpu_s': cpu1 - cpu0, 'peak_rss_mb': rss_after,
+                  'peak_rss_growth_mb': (None if rss_after is None else
+                                         rss_after - rss_before)}
+        model = info_dict.pop('model', None)
+        record.update(info_dict)
+        if model is not None:
+            record.update(model_stats(model))
+        record_list.append(record)
+
+
+def checkpoint(name, category='table'):
+    """
+    This function ends the stage that the previous checkpoint of the same
+    category started (if any) and starts a new stage, so that a flat script
+    can mark its sections with one line each. checkpoint(None) ends the last
+    stage of the category.
+
+    Args:
+        name (string or None): name of the new stage
+        category (string): stage category
+
+    Returns:
+        None
+    """
+    if not enabled:
+        return
+    open_stage = checkpoint_dict.pop(category, None)
+    if open_stage is not None:
+        open_stage.__exit__(None, None, None)
+    if name is not None:
+        new_stage = stage(name, category)
+        new_stage.__enter__()
+        checkpoint_dict[category] = new_stage
+
+
+def wrap(func, name, category):
+    """
+    This function returns a wrapper of a function that records each call as
+    a stage. A Bokeh model that the function returns is measured.
+
+    Args:
+        func (callable): function to wrap
+        name (string): name of the stage
+        category (string): stage category
+
+    Returns:
+        wrapper (callable): instrumented function
+    """
+    if getattr(func, '_instrumented', False):
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not enabled:
+            return func(*args, **kwargs)
+        with stage(name, category) as info_dict:
+            result = func(*args, **kwargs)
+            if category == 'build' and hasattr(result, 'references'):
+                info_dict['model'] = result
+        return result
+
+    wrapper._instrumented = True
+
+    return wrapper
+
+
+def patch(owner, attr, name, category):
+    """
+    This function replaces owner.attr by its instrumented wrapper.
+    """
+    func = getattr(owner, attr)
+    if getattr(func, '_instrumented', False):
+        return
+    setattr(owner, attr, wrap(func, name, category))
+    patched_list.append((owner, attr, func))
+
+
+def patch_all():
+    """
+    This function instruments the library calls behind the stages: CSV and
+    Excel parsing, party-control classification, ColumnDataSource
+    construction, HTML serialization, and OLS fits, as well as the gen_*
+    builders of the modules of this repository that are already imported.
+    """
+    import pandas as pd
+    import bokeh.embed
+    from bokeh.models import ColumnDataSource
+    import party_control
+    patch(pd, 'read_csv', 'pandas.read_csv', 'load')
+    patch(pd, 'read_excel', 'pandas.read_excel', 'load')
+    patch(party_control, 'control_codes', 'party_control.control_codes',
+          'classify')
+    patch(party_control, 'control_masks', 'party_control.control_masks',
+          'classify')
+    patch(ColumnDataSource, '__init__', 'ColumnDataSource', 'cds')
+    patch(bokeh.embed, 'file_html', 'bokeh.embed.file_html', 'serialize')
+    try:
+        from statsmodels.regression.linear_model import OLS
+        patch(OLS, 'fit', 'statsmodels OLS.fit', 'regression')
+    except ImportError:
+        pass
+    for module in list(sys.modules.values()):
+        module_file = getattr(module, '__file__', None) or ''
+        if os.path.dirname(os.path.abspath(module_file)) != cur_path:
+            continue
+        for attr, value in list(vars(module).items()):
+            if attr.startswith('gen_') and callable(value):
+                patch(module, attr, module.__name__ + '.' + attr, 'build')
+
+
+def unpatch_all():
+    """
+    This function restores every function that patch_all() replaced.
+    """
+    while patched_list:
+        owner, attr, func = patched_list.pop()
+        setattr(owner, attr, func)
+
+
+class BuilderNamespace(dict):
+    """
+    This class is the local namespace of a script run by run_script(). It
+    stores every name in the script's global namespace too, and wraps the
+    gen_* builder functions that the script defines as they are defined.
+    """
+
+    def __init__(self, global_dict, script_name):
+        super().__init__()
+        self.global_dict = global_dict
+        self.script_name = script_name
+
+    def __getitem__(self, key):
+        return self.global_dict[key]
+
+    def __setitem__(self, key, value):
+        if key.startswith('gen_') and callable(value):
+            value = wrap(value, self.script_name + '.' + key, 'build')
+        self.global_dict[key] = value
+
+    def __delitem__(self, key):
+        del self.global_dict[key]
+
+    def __contains__(self, key):
+        return key in self.global_dict
+
+
+def run_script(script_path, show=False):
+    """
+    This function runs a script of this repository as if it were called from
+    the command line, recording the whole run and each of its stages. Unless
+    show is True, the figures the script shows are serialized in memory
+    instead of being written to disk and opened in a browser.
+
+    Args:
+        script_path (string): path of the script
+        show (bool): =True lets the script write and open its figures
+
+    Returns:
+        None
+    """
+    import bokeh.io
+    import bokeh.plotting
+    from bokeh.resources import CDN
+    import bokeh.embed
+
+    def serialize_only(obj, *args, **kwargs):
+        bokeh.embed.file_html(obj, CDN)
+
+    script_name = os.path.splitext(os.path.basename(script_path))[0]
+    orig_show_list = [bokeh.io.show, bokeh.plotting.show]
+    if not show:
+        bokeh.io.show = bokeh.plotting.show = serialize_only
+    with open(script_path, encoding='utf-8') as file:
+        code = compile(file.read(), script_path, 'exec')
+    global_dict = {'__name__': '__main__', '__file__': script_path,
+                   '__builtins__': __builtins__}
+    orig_argv = sys.argv
+    sys.argv = [script_path]
+    try:
+        with stage(script_name, 'script'):
+            exec(code, global_dict, BuilderNamespace(global_dict,
+                                                     script_name))
+            checkpoint(None)
+    finally:
+        sys.argv = orig_argv
+        bokeh.io.show, bokeh.plotting.show = orig_show_list
+
+
+'''
+-------------------------------------------------------------------------------
+Exports
+-------------------------------------------------------------------------------
+'''
+
+
+def summary(records=None):
+    """
+    This function totals the records by stage name.
+
+    Args:
+        records (list or None): stage records (all records if None)
+
+    Returns:
+        summary_list (list): one dictionary per stage name with the number
+            of calls, total wall and CPU seconds, and the largest peak RSS
+            and serialized bytes, sorted by total wall time
+    """
+    if records is None:
+        records = record_list
+    summary_dict = {}
+    for record in records:
+        total = summary_dict.setdefault(
+            record['name'], {'name': record['name'],
+                             'category': record['category'], 'calls': 0,
+                             'wall_s': 0.0, 'cpu_s': 0.0,
+                             'peak_rss_mb': None, 'max_bytes': None})
+        total['calls'] += 1
+        total['wall_s'] += record['wall_s']
+        total['cpu_s'] += record['cpu_s']
+        for key, rec_key in [('peak_rss_mb', 'peak_rss_mb'),
+                             ('max_bytes', 'bytes')]:
+            if record.get(rec_key) is not None:
+                total[key] = max(total[key] or 0, record[rec_key])
+    summary_list = sorted(summary_dict.values(),
+                          key=lambda total: -total['wall_s'])
+
+    return summary_list
+
+
+def write_json(file_path, records=None):
+    """
+    This function writes the stage records, their summary by stage name, and
+    the Python and platform versions to a JSON file.
+
+    Args:
+        file_path (string): path of the JSON file
+        records (list or None): stage records (all records if None)
+
+    Returns:
+        None
+    """
+    if records is None:
+        records = record_list
+    out_dict = {'python': platform.python_version(),
+                'platform': platform.platform(),
+                'records': records, 'summary': summary(records)}
+    with open(file_path, 'w', encoding='utf-8') as file:
+        json.dump(out_dict, file, indent=1)
+
+
+def write_chrome_trace(file_path, records=None):
+    """
+    This function writes the stage records in the Chrome trace event format
+    (complete 'X' events in microseconds), which chrome://tracing and the
+    Perfetto UI display as a flame chart.
+
+    Args:
+        file_path (string): path of the trace file
+        records (list or None): stage records (all records if None)
+
+    Returns:
+        None
+    """
+    if records is None:
+        records = record_list
+    event_list = []
+    for record in records:
+        arg_dict = {key: value for key, value in record.items()
+                    if key not in ['name', 'category', 'thread', 'start_s',
+                                   'wall_s', 'depth', 'parent']}
+        event_list.append({'name': record['name'],
+                           'cat': record['category'], 'ph': 'X',
+                           'ts': round(record['start_s'] * 1e6, 1),
+                           'dur': round(record['wall_s'] * 1e6, 1),
+                           'pid': os.getpid(), 'tid': record['thread'],
+                           'args': arg_dict})
+    with open(file_path, 'w', encoding='utf-8') as file:
+        json.dump({'traceEvents': event_list, 'displayTimeUnit': 'ms'},
+                  file)
+
+
+def print_summary(records=None):
+    """
+    This function prints the summary of the stage records as a table.
+    """
+    print('{:<48}{:>6}{:>10}{:>10}{:>10}{:>12}'.format(
+        'Stage', 'Calls', 'Wall s', 'CPU s', 'RSS MB', 'Max bytes'))
+    for total in summary(records):
+        rss_str = ('' if total['peak_rss_mb'] is None else
+                   '{:.0f}'.format(total['peak_rss_mb']))
+        bytes_str = ('' if total['max_bytes'] is None else
+                     '{:,}'.format(total['max_bytes']))
+        print('{:<48}{:>6}{:>10.3f}{:>10.3f}{:>10}{:>12}'.format(
+            total['name'][:47], total['calls'], total['wall_s'],
+            total['cpu_s'], rss_str, bytes_str))
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    parser = argparse.ArgumentParser(
+        description='Run scripts with stage timing and payload records.')
+    parser.add_argument('scripts', nargs='+', help='scripts to run')
+    parser.add_argument('--out', default='build_profile',
+                        help='output path prefix of the JSON and trace files')
+    parser.add_argument('--show', action='store_true',
+                        help='let the scripts write and open their figures')
+    args = parser.parse_args()
+    sys.path.insert(0, cur_path)
+    # Scripts that import instrument for checkpoints share this module
+    sys.modules['instrument'] = sys.modules[__name__]
+    enable()
+    patch_all()
+    for script in args.scripts:
+        script_path = os.path.abspath(script)
+        # Modules that a script imports are instrumented once imported
+        run_script(script_path, show=args.show)
+        patch_all()
+    write_json(args.out + '.json')
+    write_chrome_trace(args.out + '.trace.json')
+    print_summary()
+    print('Wrote ' + args.out + '.json and ' + args.out + '.trace.json')
@@ -0,0 +1,287 @@
+'''
+This module makes the three-panel party-control documents of gen_tseries()
+and gen_scatter() (full, Senate, and House control in Tabs/Panel objects)
+lighter to load. By default, all three figures are serialized into the page
+and rendered on page load, although only one of them is visible. The
+lazy_tabs() function rewrites the Tabs of a built document in one of two
+modes:
+
+* 'shared': the three panels share one figure. The party-control circles of
+  every panel are drawn from the full-sample data source through index
+  filters, and clicking a tab swaps the filter indices and notes of the
+  shared figure instead of showing another figure.
+* 'fetch': only the active panel's figure is kept in the page. Every other
+  panel's figure is written as a compact JSON file and replaced by an empty
+  placeholder, into which the figure is embedded the first time its tab is
+  opened.
+
+The 'fetch' JSON files are loaded by the browser, so the page and its panel
+folder must be served over HTTP rather than opened as local files. If a user
+runs this module as a script, it will print the payload sizes of the
+party-control documents in both modes.
+'''
+
+# Import packages
+import json
+import os
+import numpy as np
+from bokeh.document import Document
+from bokeh.embed import json_item
+from bokeh.layouts import column
+from bokeh.models import (CDSView, CustomJS, Div, GlyphRenderer, IndexFilter,
+                          Spacer, Tabs, Title)
+from bokeh.models.widgets import Panel
+from payload_minimize import minimize_payload
+
+# Set paths to work across Mac/Windows/Linux platforms
+cur_path = os.path.split(os.path.abspath(__file__))[0]
+panel_dir = os.path.join(cur_path, 'site', 'panels')
+
+shared_js = '''
+const k = cb_obj.active;
+for (let r = 0; r < filters.length; r++) {
+    filters[r].indices = indices[k][r];
+}
+for (let c = 0; c < captions.length; c++) {
+    captions[c].text = notes[k][c];
+}
+if (renderers.length > 0) {
+    renderers[0].data_source.change.emit();
+}
+'''
+
+fetch_js = '''
+const k = cb_obj.active;
+if (urls[k] === null) {
+    return;
+}
+const el = document.getElementById(target_ids[k]);
+if (el === null || el.dataset.loading !== undefined) {
+    return;
+}
+el.dataset.loading = 'true';
+fetch(urls[k]).then(function (response) {
+    if (!response.ok) {
+        throw new Error(urls[k] + ': ' + response.status);
+    }
+    return response.json();
+}).then(function (item) {
+    el.innerHTML = '';
+    return Bokeh.embed.embed_item(item, target_ids[k]);
+}).catch(function (err) {
+    delete el.dataset.loading;
+    el.textContent = 'This panel could not be loaded (' + err + ').';
+});
+'''
+
+
+def caption_list(fig):
+    """
+    This function returns the note captions that the builders add below a
+    figure as Title objects.
+    """
+    return [layout for layout in fig.below if isinstance(layout, Title)]
+
+
+def shared_tabs(tabs, key_col='year'):
+    """
+    This function rewrites a party-control Tabs object so that its panels
+    share the figure of the first panel. In every panel, the glyph renderers
+    whose data source holds a subset of the rows of the figure's largest data
+    source are pointed to the largest source with an IndexFilter, whose
+    indices are swapped when the active tab changes, together with the text
+    of the note captions.
+
+    Args:
+        tabs (Tabs): output of gen_tseries() or gen_scatter()
+        key_col (string): column that identifies the rows of the sources
+
+    Returns:
+        layout (Bokeh layout): tab headers above the shared figure
+    """
+    fig_list = [panel.child for panel in tabs.tabs]
+    rend_mat = [[rend for rend in fig.renderers
+                 if isinstance(rend, GlyphRenderer)] for fig in fig_list]
+    for rend_list in rend_mat[1:]:
+        if ([type(rend.glyph) for rend in rend_list] !=
+                [type(rend.glyph) for rend in rend_mat[0]]):
+            raise ValueError('The panels of the Tabs do not draw the same ' +
+                             'glyphs, so they cannot share one figure.')
+
+    # The largest source of the first figure holds the full sample
+    src_list = [rend.data_source for rend in rend_mat[0]]
+    main_src = max(src_list, key=lambda src: len(src.data.get(key_col, [])))
+    main_keys = np.asarray(main_src.data[key_col])
+    key_order = np.argsort(main_keys, kind='stable')
+
+    # Renderers of the first figure whose sources differ across panels and
+    # hold a subset of the rows of the full sample
+    filter_list = []
+    filter_rend_list = []
+    index_mat = [[] for fig in fig_list]
+    for r, rend in enumerate(rend_mat[0]):
+        panel_src_list = [rend_list[r].data_source for rend_list in rend_mat]
+        if all(src is panel_src_list[0] for src in panel_src_list):
+            continue
+        if any(key_col not in src.data for src in panel_src_list):
+            continue
+        idx_list = []
+        for src in panel_src_list:
+            keys = np.asarray(src.data[key_col])
+            pos = np.searchsorted(main_keys, keys, sorter=key_order)
+            pos = key_order[np.minimum(pos, main_keys.size - 1)]
+            if not np.array_equal(main_keys[pos], keys):
+                break
+            idx_list.append(pos.astype(np.int32).tolist())
+        else:
+            filt = IndexFilter(indices=idx_list[0])
+            rend.data_source = main_src
+            rend.view = CDSView(source=main_src, filters=[filt])
+            filter_list.append(filt)
+            filter_rend_list.append(rend)
+            for k, idx in enumerate(idx_list):
+                index_mat[k].append(idx)
+
+    # One caption per note line, padded to the panel with the most notes
+    note_mat = [[caption.text for caption in caption_list(fig)]
+                for fig in fig_list]
+    n_notes = max(len(note_list) for note_list in note_mat)
+    shared_fig = fig_list[0]
+    captions = caption_list(shared_fig)
+    for c in range(len(captions), n_notes):
+        caption = Title(text='', align='left', text_font_size='4mm',
+                        text_font_style='italic')
+        shared_fig.add_layout(caption, 'below')
+        captions.append(caption)
+    note_mat = [note_list + [''] * (n_notes - len(note_list))
+                for note_list in note_mat]
+    active = tabs.active
+    for filt, idx in zip(filter_list, index_mat[active]):
+        filt.indices = idx
+    for caption, note_text in zip(captions, note_mat[active]):
+        caption.text = note_text
+
+    header_tabs = Tabs(tabs=[Panel(child=Spacer(height=0), title=panel.title)
+                             for panel in tabs.tabs], active=active)
+    header_tabs.js_on_change('active', CustomJS(
+        args={'renderers': filter_rend_list, 'filters': filter_list,
+              'indices': index_mat, 'captions': captions,
+              'notes': note_mat},
+        code=shared_js))
+    layout = column(header_tabs, shared_fig)
+
+    return layout
+
+
+def fetch_tabs(tabs, name, out_dir=panel_dir, url_prefix='panels/'):
+    """
+    This function rewrites a Tabs object in place so that only the active
+    panel's child is in the page. The child of every other panel is written
+    to out_dir as <name>.panel<k>.json (the output of
+    bokeh.embed.json_item) and replaced by a placeholder Div of the same
+    size, into which the browser embeds the figure the first time the panel
+    is opened.
+
+    Args:
+        tabs (Tabs): e.g. the output of gen_tseries() or gen_scatter()
+        name (string): file name prefix of the panel files
+        out_dir (string): folder that the panel files are written to
+        url_prefix (string): url of out_dir relative to the HTML page
+
+    Returns:
+        tabs (Tabs): the rewritten Tabs object
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    # The panels share data sources, so they are serialized from one
+    # document that holds the whole Tabs object
+    temp_doc = None
+    if tabs.document is None:
+        temp_doc = Document()
+        temp_doc.add_root(tabs)
+    url_list = []
+    target_id_list = []
+    for k, panel in enumerate(tabs.tabs):
+        target_id = 'lazy-' + name + '-panel' + str(k)
+        target_id_list.append(target_id)
+        if k == tabs.active:
+            url_list.append(None)
+            continue
+        child = panel.child
+        child_item = json_item(child)
+        file_name = name + '.panel' + str(k) + '.json'
+        with open(os.path.join(out_dir, file_name), 'w',
+                  encoding='utf-8') as file:
+            json.dump(child_item, file, separators=(',', ':'))
+        url_list.append(url_prefix + file_name)
+        panel.child = Div(text='<div id="' + target_id + '"></div>',
+                          width=getattr(child, 'plot_width', None),
+                          height=getattr(child, 'plot_height', None))
+    if temp_doc is not None:
+        temp_doc.remove_root(tabs)
+    tabs.js_on_change('active', CustomJS(
+        args={'urls': url_list, 'target_ids': target_id_list},
+        code=fetch_js))
+
+    return tabs
+
+
+def lazy_tabs(tabs, mode='shared', name='tabs', out_dir=panel_dir,
+              url_prefix='panels/', minimize=True):
+    """
+    This function returns a party-control Tabs document in the 'shared' or
+    'fetch' lazy-panel mode.
+
+    Args:
+        tabs (Tabs): output of gen_tseries() or gen_scatter()
+        mode (string): either 'shared' or 'fetch'
+        name (string): file name prefix of the panel files ('fetch' mode)
+        out_dir (string): folder of the panel files ('fetch' mode)
+        url_prefix (string): url of out_dir relative to the HTML page
+        minimize (bool): =True shrinks the data payload with
+            payload_minimize.minimize_payload() first
+
+    Returns:
+        layout (Bokeh layout): document to show or embed in place of tabs
+    """
+    if mode == 'shared':
+        layout = shared_tabs(tabs)
+    elif mode == 'fetch':
+        if minimize:
+            minimize_payload(tabs)
+        layout = fetch_tabs(tabs, name, out_dir, url_prefix)
+    else:
+        raise ValueError('mode must be either "shared" or "fetch"')
+    if minimize and mode == 'shared':
+        minimize_payload(layout)
+
+    return layout
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    import tempfile
+    from payload_minimize import payload_bytes
+    from tseries_def_rev_spnd_gdp import gen_tseries
+    from scatter_def_rev_spnd_party import gen_scatter
+
+    note_text_list = [['Note one'], ['Note one', 'Note two'], []]
+    builder_list = \
+        [('gen_tseries', lambda: gen_tseries(
+            yvar_str='deficit_gdp', start_year=1947,
+            note_text_list=note_text_list)),
+         ('gen_scatter', lambda: gen_scatter(
+             yvar_str='deficit_gdp', xvar_str='dem_senateseats',
+             start_year=1947, note_text_list=note_text_list))]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, build in builder_list:
+            size_str = (name + ': all panels ' +
+                        '{:,}'.format(payload_bytes(build())))
+            size_str += ('; shared ' + '{:,}'.format(
+                payload_bytes(lazy_tabs(build(), 'shared', minimize=False))))
+            size_str += ('; fetch ' + '{:,}'.format(
+                payload_bytes(lazy_tabs(build(), 'fetch', name, tmp_dir,
+                                        minimize=False))))
+            size_str += ' bytes'
+            print(size_str)
@@ -0,0 +1,548 @@
+'''
+This module ingests monthly receipts and outlays by line item in the layout
+of the Monthly Treasury Statement (MTS) and resamples them to calendar and
+fiscal years, so that deficits can be attributed to party control changes
+within a year (e.g., January inaugurations or the 2001 Senate switch).
+
+The input is a long CSV file with one row per month and line item and the
+columns:
+
+* record_date: last day of the month (YYYY-MM-DD)
+* category: either 'receipts' or 'outlays'
+* line_item: name of the line item
+* amount: amount of the month in millions of dollars
+
+read_mts() stores a file compactly in an MTSData object (one float64 matrix
+of line items by months, with the months as integer month numbers), which
+saves to and loads from a .npz file. Fiscal years run from October through
+September since fiscal year 1977 and from July through June before, and
+the transition quarter (July-September 1976) belongs to no fiscal year.
+
+The day-level control timeline is built from the presidential terms,
+the terms of the Congresses in deficit_party_data.csv, and the known
+mid-Congress changes of the Senate majority. Every month and year is
+classified by the party that held the White House, the Senate, and the
+House for the majority of its days, with the shares of its days under
+every type of control, so that mts_party_data() feeds the party-control
+tables (party_stats.py) and time series figures (gen_tseries()). If a user
+runs this module as a script, it will ingest a synthetic MTS file from
+synth_party_data.py, check its fiscal-year totals against
+deficit_party_data.csv, and print the party-control summary of the fiscal
+years.
+'''
+
+# Import packages
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import party_control as pc
+
+category_list = ['receipts', 'outlays']
+interest_item = 'Interest on Treasury Debt Securities (Gross)'
+# Month numbers count months from January 1970 (numpy datetime64[M])
+tq_first_month = (1976 - 1970) * 12 + 6
+tq_last_month = (1976 - 1970) * 12 + 8
+
+# Presidential terms: (first day, president, party)
+presidency_list = [
+    ('1923-08-02', 'Coolidge', 'Republican'),
+    ('1929-03-04', 'Hoover', 'Republican'),
+    ('1933-03-04', 'Roosevelt', 'Democrat'),
+    ('1945-04-12', 'Truman', 'Democrat'),
+    ('1953-01-20', 'Eisenhower', 'Republican'),
+    ('1961-01-20', 'Kennedy', 'Democrat'),
+    ('1963-11-22', 'Johnson', 'Democrat'),
+    ('1969-01-20', 'Nixon', 'Republican'),
+    ('1974-08-09', 'Ford', 'Republican'),
+    ('1977-01-20', 'Carter', 'Democrat'),
+    ('1981-01-20', 'Reagan', 'Republican'),
+    ('1989-01-20', 'Bush', 'Republican'),
+    ('1993-01-20', 'Clinton', 'Democrat'),
+    ('2001-01-20', 'Bush', 'Republican'),
+    ('2009-01-20', 'Obama', 'Democrat'),
+    ('2017-01-20', 'Trump', 'Republican'),
+    ('2021-01-20', 'Biden', 'Democrat')]
+
+# Changes of a chamber majority within a Congress: (first day, majority
+# column, new value). In 2001 the 50-50 Senate passed from Vice President
+# Gore's to Vice President Cheney's tie-breaking vote and then to the
+# Democrats when Senator Jeffords left the Republican caucus. In 2021 the
+# Democrats took the majority when the Georgia senators and Vice President
+# Harris were sworn in.
+chamber_switch_list = [
+    ('2001-01-20', 'dem_senate_maj', 0),
+    ('2001-06-06', 'dem_senate_maj', 1),
+    ('2021-01-03', 'dem_senate_maj', 0),
+    ('2021-01-20', 'dem_senate_maj', 1)]
+timeline_var_list = ['dem_whitehouse', 'dem_senate_maj', 'dem_house_maj']
+
+
+'''
+-------------------------------------------------------------------------------
+Monthly data and period arithmetic
+-------------------------------------------------------------------------------
+'''
+
+
+def calendar_year(month):
+    """
+    This function returns the calendar year of month numbers.
+    """
+    return 1970 + np.floor_divide(month, 12)
+
+
+def fiscal_year(month):
+    """
+    This function returns the federal fiscal year of month numbers: the
+    fiscal year ends in September since fiscal year 1977 and in June before.
+    The months of the transition quarter (July-September 1976) get 0.
+
+    Args:
+        month (array_like): month numbers (months since January 1970)
+
+    Returns:
+        fy (array_like): fiscal year of every month
+    """
+    month = np.asarray(month)
+    year = calendar_year(month)
+    month_of_year = np.mod(month, 12) + 1
+    fy = np.where(month > tq_last_month, year + (month_of_year >= 10),
+                  year + (month_of_year >= 7))
+    fy = np.where((month >= tq_first_month) & (month <= tq_last_month), 0,
+                  fy)
+
+    return fy
+
+
+def month_number(date):
+    """
+    This function returns the month numbers of dates or date strings.
+    """
+    return np.asarray(date, dtype='datetime64[M]').astype(np.int64)
+
+
+class MTSData(object):
+    """
+    Monthly amounts of many line items in one (line item, month) float64
+    matrix. Missing months are NaN.
+    """
+    def __init__(self, item_list, category_vec, first_month, amount_mat):
+        self.item_list = list(item_list)
+        self.category_vec = np.asarray(category_vec, dtype=np.int8)
+        self.first_month = int(first_month)
+        self.amount_mat = np.asarray(amount_mat, dtype=np.float64)
+
+    @property
+    def months(self):
+        return self.first_month + np.arange(self.amount_mat.shape[1])
+
+    def save(self, file_path):
+        """
+        This method saves the data to a compressed .npz file.
+        """
+        np.savez_compressed(file_path, item_list=np.array(self.item_list),
+                            category_vec=self.category_vec,
+                            first_month=self.first_month,
+                            amount_mat=self.amount_mat)
+
+    @classmethod
+    def load(cls, file_path):
+        """
+        This method loads data saved with save().
+        """
+        with np.load(file_path) as npz:
+            return cls(npz['item_list'].tolist(), npz['category_vec'],
+                       int(npz['first_month']), npz['amount_mat'])
+
+    def category_total(self, category):
+        """
+        This method returns the monthly sum of the line items of a category
+        (NaN in months without any of its line items).
+        """
+        cat_mat = self.amount_mat[self.category_vec ==
+                                  category_list.index(category)]
+        total = np.nansum(cat_mat, axis=0)
+        total[np.isnan(cat_mat).all(axis=0)] = np.nan
+        return total
+
+    def item(self, line_item):
+        """
+        This method returns the monthly amounts of one line item.
+        """
+        return self.amount_mat[self.item_list.index(line_item)]
+
+
+def read_mts(file_path):
+    """
+    This function reads a long MTS CSV file into an MTSData object. Rows
+    with the same line item and month are summed.
+
+    Args:
+        file_path (string): path of the CSV file
+
+    Returns:
+        mts (MTSData): monthly amounts by line item
+    """
+    mts_df = pd.read_csv(file_path, usecols=['record_date', 'category',
+                                             'line_item', 'amount'],
+                         dtype={'record_date': 'str', 'category': 'category',
+                                'line_item': 'category',
+                                'amount': np.float64})
+    month = month_number(mts_df['record_date'].to_numpy(dtype='str'))
+    item_cat = mts_df['line_item'].cat
+    item_list = list(item_cat.categories)
+    item_code = item_cat.codes.to_numpy()
+    cat_code = pd.Categorical(mts_df['category'],
+                              categories=category_list).codes
+    if (cat_code < 0).any():
+        raise ValueError('category must be one of ' + str(category_list))
+    category_vec = np.zeros(len(item_list), dtype=np.int8)
+    category_vec[item_code] = cat_code
+    first_month = month.min()
+    n_months = month.max() - first_month + 1
+    amount_mat = np.zeros((len(item_list), n_months))
+    observed = np.zeros((len(item_list), n_months), dtype=bool)
+    np.add.at(amount_mat, (item_code, month - first_month),
+              mts_df['amount'].to_numpy())
+    observed[item_code, month - first_month] = True
+    amount_mat[~observed] = np.nan
+    mts = MTSData(item_list, category_vec, first_month, amount_mat)
+
+    return mts
+
+
+def period_sums(values, months, freq='FY', full_only=True):
+    """
+    This function sums monthly values to calendar ('CY') or fiscal ('FY')
+    years with one reduction over the sorted month axis. Missing months
+    count as zero, and a year with no observed month is NaN.
+
+    Args:
+        values (array_like): (..., months) monthly values
+        months (array_like): month numbers of the last axis, increasing
+        freq (string): either 'CY' or 'FY'
+        full_only (bool): =True drops years with fewer than 12 months
+
+    Returns:
+        year_vec (array_like): years of the sums
+        sum_arr (array_like): (..., years) sums
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if freq == 'CY':
+        year = calendar_year(months)
+    elif freq == 'FY':
+        year = fiscal_year(months)
+    else:
+        raise ValueError('freq must be either "CY" or "FY"')
+    start = np.flatnonzero(np.r_[True, year[1:] != year[:-1]])
+    year_vec = year[start]
+    n_months = np.diff(np.r_[start, year.size])
+    observed = np.add.reduceat(~np.isnan(values), start, axis=-1)
+    sum_arr = np.add.reduceat(np.nan_to_num(values), start, axis=-1)
+    sum_arr = np.where(observed > 0, sum_arr, np.nan)
+    keep = year_vec != 0
+    if full_only:
+        keep &= n_months == 12
+    year_vec = year_vec[keep]
+    sum_arr = sum_arr[..., keep]
+
+    return year_vec, sum_arr
+
+
+def resample_items(mts, freq='FY', full_only=True):
+    """
+    This function sums every line item of MTS data to calendar or fiscal
+    years.
+
+    Args:
+        mts (MTSData): output of read_mts()
+        freq (string): either 'CY' or 'FY'
+        full_only (bool): =True drops years with fewer than 12 months
+
+    Returns:
+        item_df (DataFrame): one column per line item indexed by year
+    """
+    year_vec, sum_mat = period_sums(mts.amount_mat, mts.months, freq,
+                                    full_only)
+    item_df = pd.DataFrame(sum_mat.T, index=pd.Index(year_vec, name='year'),
+                           columns=mts.item_list)
+
+    return item_df
+
+
+'''
+-------------------------------------------------------------------------------
+Day-level party control timeline
+-------------------------------------------------------------------------------
+'''
+
+
+def congress_start(congress_number):
+    """
+    This function returns the first day of the terms of Congresses: March 4
+    through the 73rd Congress and January 3 since the 74th (20th Amendment).
+    """
+    congress_number = np.asarray(congress_number)
+    year = (1789 + 2 * (congress_number - 1)).astype('str')
+    day = np.where(congress_number <= 73, '-03-04', '-01-03')
+    return np.char.add(year, day).astype('datetime64[D]')
+
+
+def control_timeline(main_df=None):
+    """
+    This function returns the day-level party control timeline: one row per
+    period of constant control, starting on the first day of the earliest
+    Congress in main_df. The chamber majorities of a Congress are those of
+    its last year in main_df, changed by chamber_switch_list.
+
+    Args:
+        main_df (DataFrame): one row per year with 'congress_number' and the
+            majority columns, the output of read_party_data() if None
+
+    Returns:
+        timeline_df (DataFrame): columns 'start' (datetime64[D]),
+            'president', 'president_party', and timeline_var_list
+    """
+    if main_df is None:
+        main_df = pc.read_party_data()
+    cong_df = main_df.groupby('congress_number')[
+        ['dem_senate_maj', 'dem_house_maj']].last()
+    cong_start = congress_start(cong_df.index.to_numpy())
+    pres_start = np.array([term[0] for term in presidency_list],
+                          dtype='datetime64[D]')
+    switch_start = np.array([switch[0] for switch in chamber_switch_list],
+                            dtype='datetime64[D]')
+    start = np.unique(np.r_[cong_start, pres_start, switch_start])
+    start = start[start >= cong_start[0]]
+    pres_pos = np.searchsorted(pres_start, start, side='right') - 1
+    cong_pos = np.searchsorted(cong_start, start, side='right') - 1
+    timeline_df = pd.DataFrame({'start': start})
+    timeline_df['president'] = \
+        np.array([term[1] for term in presidency_list])[pres_pos]
+    timeline_df['president_party'] = \
+        np.array([term[2] for term in presidency_list])[pres_pos]
+    timeline_df['dem_whitehouse'] = \
+        (timeline_df['president_party'] == 'Democrat').astype(np.int64)
+    for maj_var in ['dem_senate_maj', 'dem_house_maj']:
+        timeline_df[maj_var] = cong_df[maj_var].to_numpy()[cong_pos]
+    # A switch holds until the next switch of the chamber or the next
+    # Congress
+    for k, (first_day, maj_var, value) in enumerate(chamber_switch_list):
+        first_day = np.datetime64(first_day, 'D')
+        end_list = [np.datetime64(switch[0], 'D')
+                    for switch in chamber_switch_list[k + 1:]
+                    if switch[1] == maj_var]
+        end_list += list(cong_start[cong_start > first_day][:1])
+        end = min(end_list) if end_list else np.datetime64('9999-12-31')
+        in_switch = (start >= first_day) & (start < end)
+        timeline_df.loc[in_switch, maj_var] = value
+
+    return timeline_df
+
+
+def day_states(timeline_df, days):
+    """
+    This function returns the timeline row of every day (-1 before the
+    timeline starts).
+    """
+    return np.searchsorted(timeline_df['start'].to_numpy(), days,
+                           side='right') - 1
+
+
+def month_shares(timeline_df, months, cntrl_list=pc.cntrl_str_list):
+    """
+    This function returns the share of the days of every month with a
+    Democrat president, Senate majority, and House majority, and the share
+    of its days under Republican, Democrat, and split control for every
+    definition of party control. Days before the timeline count for none.
+
+    Args:
+        timeline_df (DataFrame): output of control_timeline()
+        months (array_like): month numbers, increasing by one
+        cntrl_list (list): control definitions, keys of cntrl_maj_dict
+
+    Returns:
+        var_share (array_like): (len(timeline_var_list), months) shares
+        cntrl_share (array_like): (len(cntrl_list), 3, months) shares
+        known_share (array_like): (months,) share of days in the timeline
+    """
+    months = np.asarray(months)
+    month_start = months.astype('datetime64[M]').astype('datetime64[D]')
+    days = np.arange(month_start[0],
+                     (months[-1] + 1).astype('datetime64[M]').astype(
+                         'datetime64[D]'))
+    day_offsets = (month_start - month_start[0]).astype(np.int64)
+    n_days = np.diff(np.r_[day_offsets, days.size])
+    pos = day_states(timeline_df, days)
+    known = pos >= 0
+    pos = np.maximum(pos, 0)
+    var_mat = timeline_df[timeline_var_list].to_numpy()[pos].T * known
+    var_share = np.add.reduceat(var_mat, day_offsets, axis=1) / n_days
+    code_mat = pc.control_codes(timeline_df, cntrl_list)[:, pos]
+    code_mat = np.where(known, code_mat, -1)
+    onehot = (code_mat[:, None, :] ==
+              np.arange(len(pc.party_str_list))[None, :, None])
+    cntrl_share = np.add.reduceat(onehot, day_offsets, axis=2) / n_days
+    known_share = np.add.reduceat(known, day_offsets) / n_days
+
+    return var_share, cntrl_share, known_share
+
+
+'''
+-------------------------------------------------------------------------------
+Party-control data from monthly data
+-------------------------------------------------------------------------------
+'''
+
+
+def mts_party_data(mts, freq='FY', main_df=None, timeline_df=None, gdp=None,
+                   interest=interest_item, cntrl_list=pc.cntrl_str_list):
+    """
+    This function returns yearly (freq='CY' or 'FY') or monthly
+    (freq='M') totals of MTS data with the party control columns of
+    deficit_party_data.csv, so that the result can be passed to
+    party_stats.party_cube() or gen_tseries(). The White House, Senate, and
+    House columns hold the party that held each for the majority of the
+    days of the period, the seat columns are those of the calendar year
+    of the period in main_df, and the share_<cntrl>_<party> columns hold
+    the share of the days of the period under each type of control.
+
+    Args:
+        mts (MTSData): output of read_mts()
+        freq (string): 'CY', 'FY', or 'M'
+        main_df (DataFrame): output of read_party_data() (read if None)
+        timeline_df (DataFrame): output of control_timeline() (built from
+            main_df if None)
+        gdp (Series): nominal GDP in millions of dollars indexed by year of
+            freq; if given, the result also has the ratio columns of
+            deficit_party_data.csv ('deficit_gdp', 'receipts_gdp', etc.)
+        interest (string): line item of the net interest outlays
+        cntrl_list (list): control definitions, keys of cntrl_maj_dict
+
+    Returns:
+        party_df (DataFrame): one row per period with 'year' (and 'month'
+            for freq='M'), 'receipts', 'outlays', 'spend_int',
+            'spend_nonint', and 'deficit' totals in millions of dollars and
+            the party control columns
+    """
+    if main_df is None:
+        main_df = pc.read_party_data()
+    if timeline_df is None:
+        timeline_df = control_timeline(main_df)
+    months = mts.months
+    receipts = mts.category_total('receipts')
+    outlays = mts.category_total('outlays')
+    if interest in mts.item_list:
+        spend_int = mts.item(interest)
+    else:
+        spend_int = np.full(months.size, np.nan)
+    value_mat = np.vstack([receipts, outlays, spend_int])
+    var_share, cntrl_share, known_share = month_shares(timeline_df, months,
+                                                      cntrl_list)
+    n_days = np.diff(np.r_[months, months[-1] + 1].astype('datetime64[M]')
+                     .astype('datetime64[D]').astype(np.int64))
+    if freq == 'M':
+        year_vec = months
+    else:
+        # Day-weighted shares of the years
+        year_vec, value_mat = period_sums(value_mat, months, freq)
+        day_sums = period_sums(np.vstack([n_days, var_share * n_days,
+                                          known_share * n_days]),
+                               months, freq)[1]
+        cntrl_sums = period_sums(
+            (cntrl_share * n_days).reshape(-1, months.size), months,
+            freq)[1]
+        var_share = day_sums[1:4] / day_sums[0]
+        known_share = day_sums[4] / day_sums[0]
+        cntrl_share = cntrl_sums.reshape(len(cntrl_list), 3, -1) / day_sums[0]
+    party_df = pd.DataFrame({'receipts': value_mat[0],
+                             'outlays': value_mat[1],
+                             'spend_int': value_mat[2]})
+    party_df['spend_nonint'] = party_df['outlays'] - party_df['spend_int']
+    party_df['deficit'] = party_df['receipts'] - party_df['outlays']
+    if freq == 'M':
+        party_df.insert(0, 'year', calendar_year(year_vec))
+        party_df.insert(1, 'month', np.mod(year_vec, 12) + 1)
+        seat_year = party_df['year'].to_numpy()
+    else:
+        party_df.insert(0, 'year', year_vec)
+        seat_year = year_vec
+    if gdp is not None:
+        gdp_vec = pd.Series(gdp).reindex(party_df['year']).to_numpy()
+        for var, ratio_var in [('deficit', 'deficit_gdp'),
+                               ('receipts', 'receipts_gdp'),
+                               ('spend_int', 'spend_int_gdp'),
+                               ('spend_nonint', 'spend_nonint_gdp'),
+                               ('outlays', 'spend_tot_gdp')]:
+            party_df[ratio_var] = 100 * party_df[var].to_numpy() / gdp_vec
+
+    # Majority-of-days control columns and the seats of main_df
+    for k, var in enumerate(timeline_var_list):
+        party_df[var] = (var_share[k] > 0.5).astype(np.int64)
+    party_df['president_party'] = np.where(
+        known_share > 0.5,
+        np.where(party_df['dem_whitehouse'] == 1, 'Democrat', 'Republican'),
+        'None')
+    seat_col_list = [col for col in main_df.columns
+                     if col.endswith('seats') or col == 'congress_number']
+    seat_df = main_df.set_index('year')[seat_col_list].reindex(seat_year)
+    for col in seat_col_list:
+        party_df[col] = seat_df[col].to_numpy()
+    for c, cntrl in enumerate(cntrl_list):
+        for p, party in enumerate(pc.party_str_list):
+            party_df['share_' + cntrl + '_' + party] = cntrl_share[c, p]
+
+    return party_df
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    import party_stats as ps
+    import synth_party_data as spd
+
+    parser = argparse.ArgumentParser(
+        description='Ingest a synthetic Monthly Treasury Statement file.')
+    parser.add_argument('--items', type=int, default=300,
+                        help='number of line items (default: 300)')
+    args = parser.parse_args()
+
+    main_df = pc.read_party_data()
+    mts_df, gdp = spd.synth_mts_data(args.items, base_df=main_df)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, 'mts.csv')
+        npz_path = os.path.join(tmp_dir, 'mts.npz')
+        mts_df.to_csv(csv_path, index=False)
+        start = time.perf_counter()
+        mts = read_mts(csv_path)
+        read_time = time.perf_counter() - start
+        mts.save(npz_path)
+        start = time.perf_counter()
+        mts = MTSData.load(npz_path)
+        load_time = time.perf_counter() - start
+        csv_mb = os.path.getsize(csv_path) / 1e6
+        npz_mb = os.path.getsize(npz_path) / 1e6
+    print('{:,} rows, {} line items, {} months: CSV {:.1f} MB read in '
+          '{:.2f} s, npz {:.1f} MB loaded in {:.3f} s'.format(
+              len(mts_df), len(mts.item_list), mts.amount_mat.shape[1],
+              csv_mb, read_time, npz_mb, load_time))
+    start = time.perf_counter()
+    fy_df = mts_party_data(mts, 'FY', main_df, gdp=gdp)
+    month_df = mts_party_data(mts, 'M', main_df)
+    print('Fiscal-year and monthly party data in ' +
+          '{:.3f}'.format(time.perf_counter() - start) + ' s')
+    check_df = fy_df.set_index('year')[['receipts_gdp', 'spend_tot_gdp']]
+    base_df = main_df.set_index('year')[['receipts_gdp', 'spend_tot_gdp']]
+    diff = (check_df - base_df.reindex(check_df.index)).abs().max().max()
+    print('Largest difference of the fiscal-year ratios from ' +
+          'deficit_party_data.csv: ' + '{:.2e}'.format(diff))
+    print(fy_df.loc[fy_df['year'].between(2000, 2003),
+                    ['year', 'deficit_gdp', 'dem_senate_maj',
+                     'share_whsen_rep', 'share_whsen_dem',
+                     'share_whsen_spl']].round(3).to_string(index=False))
+    print(ps.party_cube(fy_df, var_list=['deficit_gdp', 'receipts_gdp'])
+          .loc['whsen'].round(3))
@@ -0,0 +1,481 @@
+'''
+This module scans the regressions of the party-control analysis for a
+structural break at every candidate break year, to see whether the
+relationship between the budget and party control shifted in some era
+(e.g., the 1980s or 2008):
+
+* the party-difference regressions of each variable on a constant and
+  Democrat and split control dummies (the difference of the means of the
+  summary table) under each definition of party control
+* the seat regressions of party_stats.seat_regressions() of each variable
+  on Democrat held Senate or House seats within the Republican and Democrat
+  control years
+
+For every candidate break year, the Chow test compares the regression on
+the whole sample with separate regressions before and from that year. The
+sup-F or Quandt likelihood ratio (QLR) test takes the largest Chow
+statistic over the break years that leave at least 15 percent of the
+observations on each side. All segment regressions of all specifications
+come from cumulative sums of the cross-product matrices over the years, so
+the whole scan costs about as much as one regression per specification.
+gen_break_tseries() draws the Chow statistics by break year in the styling
+of the time series of tseries_def_rev_spnd_gdp.py. If a user runs this
+module as a script, it will print the QLR tests of 1947-2020 and create
+the figures.
+'''
+
+# Import packages
+import os
+import numpy as np
+import pandas as pd
+from scipy.stats import f as fdist
+from bokeh.io import output_file
+from bokeh.plotting import figure, show
+from bokeh.models import HoverTool, ColumnDataSource, Span, Title
+from bokeh.models.tickers import SingleIntervalTicker
+from bokeh.models.widgets import Tabs, Panel
+import party_control as pc
+import party_stats as ps
+
+# Set paths to work across Mac/Windows/Linux platforms
+cur_path = os.path.split(os.path.abspath(__file__))[0]
+images_dir = os.path.join(cur_path, 'images')
+
+# Asymptotic critical values of the QLR statistic (in F form) with 15
+# percent trimming by number of restrictions (Andrews, 1993, as tabulated in
+# Stock and Watson, Introduction to Econometrics, Table 14.5)
+qlr_crit_dict = {1: (7.12, 8.68, 12.16), 2: (5.00, 5.86, 7.78),
+                 3: (4.09, 4.71, 6.02)}
+qlr_level_list = ['10%', '5%', '1%']
+
+# Index names of the specifications of a scan
+spec_name_list = ['family', 'group', 'yvar', 'xvar']
+
+
+def cumulative_cross_products(y_mat, x_arr, valid_mat):
+    """
+    This function returns the cumulative sums over the periods of the cross
+    products of the regressions of many specifications, from which the
+    regression of any range of periods follows by differencing.
+
+    Args:
+        y_mat (array_like): (S, T) dependent variables of S specifications
+        x_arr (array_like): (S, T, K) regressors, including the constant
+        valid_mat (array_like): (S, T) boolean sample of each specification
+
+    Returns:
+        cum_dict (dict): arrays 'n' (S, T + 1), 'xx' (S, T + 1, K, K), 'xy'
+            (S, T + 1, K), and 'yy' (S, T + 1), the sums over the first t
+            periods at position t
+    """
+    weight_mat = valid_mat.astype(np.float64)
+    y_mat = np.where(valid_mat, y_mat, 0.0)
+    x_arr = np.where(valid_mat[:, :, None], x_arr, 0.0)
+    sum_dict = {'n': weight_mat,
+                'xx': x_arr[:, :, :, None] * x_arr[:, :, None, :],
+                'xy': x_arr * y_mat[:, :, None],
+                'yy': y_mat ** 2}
+    cum_dict = {}
+    for key, sum_arr in sum_dict.items():
+        cum_arr = np.zeros((sum_arr.shape[0], sum_arr.shape[1] + 1) +
+                           sum_arr.shape[2:])
+        np.cumsum(sum_arr, axis=1, out=cum_arr[:, 1:])
+        cum_dict[key] = cum_arr
+
+    return cum_dict
+
+
+def segment_ssr(cum_dict, lo_vec, hi_vec):
+    """
+    This function computes the sums of squared residuals of the regressions
+    of every specification on many ranges of periods at once.
+
+    Args:
+        cum_dict (dict): output of cumulative_cross_products()
+        lo_vec (array_like): (B,) first period of each range
+        hi_vec (array_like): (B,) period after the last of each range
+
+    Returns:
+        ssr_mat (array_like): (S, B) sums of squared residuals, NaN where
+            the regressors of a range are collinear
+        n_mat (array_like): (S, B) numbers of observations
+    """
+    n_mat = cum_dict['n'][:, hi_vec] - cum_dict['n'][:, lo_vec]
+    xx_arr = cum_dict['xx'][:, hi_vec] - cum_dict['xx'][:, lo_vec]
+    xy_arr = cum_dict['xy'][:, hi_vec] - cum_dict['xy'][:, lo_vec]
+    yy_mat = cum_dict['yy'][:, hi_vec] - cum_dict['yy'][:, lo_vec]
+    n_k = xx_arr.shape[-1]
+    full_rank = np.linalg.matrix_rank(xx_arr) == n_k
+    eye = np.eye(n_k)
+    xx_arr = np.where(full_rank[:, :, None, None], xx_arr, eye)
+    coef_arr = np.linalg.solve(xx_arr, xy_arr[..., None])[..., 0]
+    ssr_mat = yy_mat - (coef_arr * xy_arr).sum(axis=-1)
+    ssr_mat = np.where(full_rank, np.maximum(ssr_mat, 0.0), np.nan)
+
+    return ssr_mat, n_mat
+
+
+def break_scan(y_mat, x_arr, valid_mat, year_vec, trim=0.15):
+    """
+    This function computes the Chow test of a break at every candidate
+    break year and the QLR test of every specification. All regressors,
+    including the constant, may break. The regressors and the dependent
+    variable are centered on their sample means first, which keeps the
+    cumulative sums accurate.
+
+    Args:
+        y_mat (array_like): (S, T) dependent variables of S specifications
+        x_arr (array_like): (S, T, K) regressors, the first the constant
+        valid_mat (array_like): (S, T) boolean sample of each specification
+            (missing values are dropped)
+        year_vec (array_like): (T,) consecutive years of the periods
+        trim (float): least share of the observations on each side of a
+            break year of the QLR test
+
+    Returns:
+        scan_dict (dict): (S, T) arrays 'chow_f', 'chow_p', 'n_before', and
+            'n_after' of the break at each year (the second regime starts in
+            that year, NaN where a segment is collinear), a boolean array
+            'qlr_range' of the break years of the QLR test, and (S,) arrays
+            'qlr_f', 'qlr_year', and 'n' of each specification
+    """
+    y_mat = np.asarray(y_mat, dtype=np.float64)
+    x_arr = np.array(x_arr, dtype=np.float64)
+    valid_mat = (np.asarray(valid_mat, dtype=bool) & ~np.isnan(y_mat) &
+                 ~np.isnan(x_arr).any(axis=2))
+    n_s, n_t, n_k = x_arr.shape
+    weight_mat = valid_mat.astype(np.float64)
+    n_vec = weight_mat.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y_mean = np.nansum(np.where(valid_mat, y_mat, 0.0), axis=1) / n_vec
+        x_mean = (np.where(valid_mat[:, :, None], x_arr, 0.0).sum(axis=1) /
+                  n_vec[:, None])
+    x_mean[:, 0] = 0.0
+    y_mat = y_mat - np.nan_to_num(y_mean)[:, None]
+    x_arr = x_arr - np.nan_to_num(x_mean)[:, None, :]
+    cum_dict = cumulative_cross_products(y_mat, x_arr, valid_mat)
+    ssr_full, _ = segment_ssr(cum_dict, np.array([0]), np.array([n_t]))
+    tau_vec = np.arange(n_t)
+    ssr_before, n_before = segment_ssr(cum_dict, np.zeros(n_t, dtype=int),
+                                       tau_vec)
+    ssr_after, n_after = segment_ssr(cum_dict, tau_vec,
+                                     np.full(n_t, n_t, dtype=int))
+    ssr_split = ssr_before + ssr_after
+    df_resid = n_vec[:, None] - 2 * n_k
+    with np.errstate(divide='ignore', invalid='ignore'):
+        chow_f = (((ssr_full - ssr_split) / n_k) / (ssr_split / df_resid))
+    chow_f = np.where((n_before >= n_k) & (n_after >= n_k) &
+                      (df_resid > 0), chow_f, np.nan)
+    chow_p = fdist.sf(chow_f, n_k, df_resid)
+    min_obs = np.ceil(trim * n_vec)[:, None]
+    qlr_range = ((n_before >= min_obs) & (n_after >= min_obs) &
+                 ~np.isnan(chow_f))
+    qlr_mat = np.where(qlr_range, chow_f, -np.inf)
+    arg_vec = qlr_mat.argmax(axis=1)
+    qlr_f = qlr_mat[np.arange(n_s), arg_vec]
+    has_range = qlr_range.any(axis=1)
+    scan_dict = {'chow_f': chow_f, 'chow_p': chow_p,
+                 'n_before': n_before.astype(np.int64),
+                 'n_after': n_after.astype(np.int64),
+                 'qlr_range': qlr_range,
+                 'qlr_f': np.where(has_range, qlr_f, np.nan),
+                 'qlr_year': np.where(has_range, np.asarray(year_vec)[arg_vec],
+                                      -1),
+                 'n': n_vec.astype(np.int64)}
+
+    return scan_dict
+
+
+def party_design(window_df, yvar_list=ps.var_str_list,
+                 cntrl_list=pc.cntrl_str_list):
+    """
+    This function returns the specifications of the party-difference
+    regressions: each variable on a constant and Democrat and split control
+    dummies under each definition of party control.
+
+    Args:
+        window_df (DataFrame): data, one row per year in order of the years
+        yvar_list (list): names of the dependent variables
+        cntrl_list (list): control definitions, keys of cntrl_maj_dict
+
+    Returns:
+        spec_list (list): (family, group, yvar, xvar) of each specification
+        y_mat (array_like): (S, T) dependent variables
+        x_arr (array_like): (S, T, 3) regressors
+        valid_mat (array_like): (S, T) samples
+    """
+    code_mat = pc.control_codes(window_df, cntrl_list)
+    val_mat = window_df[yvar_list].to_numpy(dtype=np.float64).T
+    spec_list = []
+    y_list = []
+    x_list = []
+    valid_list = []
+    for c, cntrl in enumerate(cntrl_list):
+        x_mat = np.column_stack([np.ones(len(window_df)),
+                                 code_mat[c] == 1,
+                                 code_mat[c] == 2]).astype(np.float64)
+        for k, yvar in enumerate(yvar_list):
+            spec_list.append(('party', cntrl, yvar, 'control'))
+            y_list.append(val_mat[k])
+            x_list.append(x_mat)
+            valid_list.append(code_mat[c] >= 0)
+
+    return spec_list, np.array(y_list), np.array(x_list), np.array(valid_list)
+
+
+def seat_design(window_df, yvar_list=ps.var_str_list,
+                xvar_list=ps.seat_var_list, cntrl_str='whsen'):
+    """
+    This function returns the specifications of the seat regressions of
+    party_stats.seat_regressions(): each variable on a constant and a seat
+    variable within the Republican and Democrat control years.
+
+    Args:
+        window_df (DataFrame): data, one row per year in order of the years
+        yvar_list (list): names of the dependent variables
+        xvar_list (list): names of the seat regressors
+        cntrl_str (string): definition of party control
+
+    Returns:
+        spec_list (list): (family, group, yvar, xvar) of each specification
+        y_mat (array_like): (S, T) dependent variables
+        x_arr (array_like): (S, T, 2) regressors
+        valid_mat (array_like): (S, T) samples
+    """
+    code_vec = pc.control_codes(window_df, [cntrl_str])[0]
+    const_vec = np.ones(len(window_df))
+    spec_list = []
+    y_list = []
+    x_list = []
+    valid_list = []
+    for p, party in enumerate(pc.party_str_list[:2]):
+        for yvar in yvar_list:
+            for xvar in xvar_list:
+                spec_list.append(('seat_' + cntrl_str, party, yvar, xvar))
+                y_list.append(window_df[yvar].to_numpy(dtype=np.float64))
+                x_list.append(np.column_stack(
+                    [const_vec, window_df[xvar].to_numpy(dtype=np.float64)]))
+                valid_list.append(code_vec == p)
+
+    return spec_list, np.array(y_list), np.array(x_list), np.array(valid_list)
+
+
+def break_tables(main_df, start_year=1947, end_year=2020, trim=0.15,
+                 yvar_list=ps.var_str_list, cntrl_str='whsen'):
+    """
+    This function scans the party-difference regressions of every
+    definition of party control and the seat regressions of one definition
+    for breaks.
+
+    Args:
+        main_df (DataFrame): data, e.g. the output of read_party_data()
+        start_year (int): first year of the sample
+        end_year (int): last year of the sample
+        trim (float): least share of the observations on each side of a
+            break year of the QLR test
+        yvar_list (list): names of the dependent variables
+        cntrl_str (string): definition of party control of the seat
+            regressions
+
+    Returns:
+        chow_df (DataFrame): Chow F statistics indexed by break year, one
+            column per specification (columns MultiIndex of spec_name_list)
+        pval_df (DataFrame): p-values of the Chow statistics, same layout
+        qlr_df (DataFrame): columns 'n', 'k', 'qlr_f', 'qlr_year', the
+            critical values of qlr_level_list, and 'reject_5%' indexed by
+            specification
+    """
+    window_df = ps.year_window(main_df, start_year, end_year)
+    year_vec = window_df['year'].to_numpy()
+    if np.any(np.diff(year_vec) != 1):
+        raise ValueError('the years of the data must be consecutive')
+    chow_dict = {}
+    pval_dict = {}
+    qlr_list = []
+    for spec_list, y_mat, x_arr, valid_mat in [
+            party_design(window_df, yvar_list),
+            seat_design(window_df, yvar_list, cntrl_str=cntrl_str)]:
+        scan_dict = break_scan(y_mat, x_arr, valid_mat, year_vec, trim)
+        n_k = x_arr.shape[2]
+        crit_tuple = qlr_crit_dict.get(n_k, (np.nan,) * 3)
+        for s, spec in enumerate(spec_list):
+            chow_dict[spec] = np.where(scan_dict['qlr_range'][s],
+                                       scan_dict['chow_f'][s], np.nan)
+            pval_dict[spec] = np.where(scan_dict['qlr_range'][s],
+                                       scan_dict['chow_p'][s], np.nan)
+            qlr_list.append([scan_dict['n'][s], n_k, scan_dict['qlr_f'][s],
+                             scan_dict['qlr_year'][s]] + list(crit_tuple) +
+                            [scan_dict['qlr_f'][s] > crit_tuple[1]])
+    column_index = pd.MultiIndex.from_tuples(list(chow_dict),
+                                             names=spec_name_list)
+    year_index = pd.Index(year_vec, name='year')
+    chow_df = pd.DataFrame(np.column_stack(list(chow_dict.values())),
+                           index=year_index, columns=column_index)
+    pval_df = pd.DataFrame(np.column_stack(list(pval_dict.values())),
+                           index=year_index, columns=column_index)
+    qlr_df = pd.DataFrame(
+        qlr_list, index=column_index,
+        columns=['n', 'k', 'qlr_f', 'qlr_year'] + qlr_level_list +
+        ['reject_5%'])
+
+    return chow_df, pval_df, qlr_df
+
+
+def gen_break_tseries(chow_df, qlr_df, panel_list, recession_df=None,
+                      note_text_list=[], fig_title_str='', fig_path=''):
+    """
+    This function creates a time-series plot of the Chow statistics of a
+    break at each year, one panel per group of specifications, with the 5
+    percent critical value of the QLR test, in the styling of gen_tseries()
+    of tseries_def_rev_spnd_gdp.py.
+
+    Args:
+        chow_df (DataFrame): Chow statistics, output of break_tables()
+        qlr_df (DataFrame): QLR tests, output of break_tables()
+        panel_list (list): (panel title, [(spec, legend label, color),
+            ...]) of each panel, where the specifications of a panel have
+            the same number of regressors
+        recession_df (DataFrame): NBER recessions, read_recession_data() if
+            None
+        note_text_list (list): lists of notes below each panel
+        fig_title_str (string): title of the figure
+        fig_path (string): path of the HTML file
+
+    Returns:
+        tabs (Tabs): one panel per entry of panel_list
+    """
+    if recession_df is None:
+        recession_df = pc.read_recession_data()
+    year_vec = chow_df.index.to_numpy()
+    min_year = year_vec.min()
+    max_year = year_vec.max()
+    output_file(fig_path, title=fig_title_str)
+    tab_list = []
+    for k, (panel_title, line_list) in enumerate(panel_list):
+        spec_list = [line[0] for line in line_list]
+        max_f = max(np.nanmax(chow_df[spec_list].to_numpy()),
+                    qlr_df.loc[spec_list[0], '5%'])
+        fig = figure(title=fig_title_str,
+                     plot_height=650,
+                     plot_width=1100,
+                     x_axis_label='Break year (first year of second regime)',
+                     x_range=(min_year - 1, max_year + 1),
+                     y_axis_label='Chow F statistic',
+                     y_range=(0, max_f * 1.1),
+                     toolbar_location=None)
+
+        # Set title font size and axes font sizes
+        fig.title.text_font_size = '15.5pt'
+        fig.xaxis.axis_label_text_font_size = '12pt'
+        fig.xaxis.major_label_text_font_size = '12pt'
+        fig.yaxis.axis_label_text_font_size = '12pt'
+        fig.yaxis.major_label_text_font_size = '12pt'
+
+        # Modify tick intervals for X-axis
+        fig.xaxis.ticker = SingleIntervalTicker(interval=10,
+                                                num_minor_ticks=2)
+        fig.xgrid.ticker = SingleIntervalTicker(interval=10)
+
+        # Create recession bars
+        for peak, trough in zip(recession_df['Peak'], recession_df['Trough']):
+            peak_year = peak.year
+            trough_year = max(trough.year, peak_year + 1)
+            if peak_year >= min_year and peak_year <= max_year:
+                fig.patch(x=[peak_year, trough_year, trough_year, peak_year],
+                          y=[0, 0, max_f * 1.1, max_f * 1.1],
+                          fill_color='gray', fill_alpha=0.4, line_width=0,
+                          legend_label='Recession')
+
+        # Plot the Chow statistics of each specification
+        for spec, legend_label, color in line_list:
+            cds = ColumnDataSource(
+                {'year': year_vec, 'chow_f': chow_df[spec].to_numpy(),
+                 'label': [legend_label] * len(year_vec)})
+            fig.line(x='year', y='chow_f', source=cds, color=color,
+                     line_width=2, legend_label=legend_label,
+                     muted_alpha=0.2)
+            fig.circle(x='year', y='chow_f', source=cds, size=7,
+                       line_width=1, line_color='black', fill_color=color,
+                       alpha=0.7, muted_alpha=0.2, legend_label=legend_label)
+        fig.add_layout(Span(location=qlr_df.loc[spec_list[0], '5%'],
+                            dimension='width', line_color='black',
+                            line_dash='dashed', line_width=2))
+
+        # Add information on hover
+        tooltips = [('Break year', '@year'), ('Regression', '@label'),
+                    ('Chow F', '@chow_f{0.00}')]
+        fig.add_tools(HoverTool(tooltips=tooltips))
+
+        # Turn off scrolling
+        fig.toolbar.active_drag = None
+
+        # Add legend
+        fig.legend.location = 'top_left'
+        fig.legend.border_line_width = 2
+        fig.legend.border_line_color = 'black'
+        fig.legend.border_line_alpha = 1
+        fig.legend.label_text_font_size = '4mm'
+
+        # Set legend muting click policy
+        fig.legend.click_policy = 'mute'
+
+        # Add notes below image
+        for note_text in (note_text_list[k] if note_text_list else []):
+            caption = Title(text=note_text, align='left',
+                            text_font_size='4mm', text_font_style='italic')
+            fig.add_layout(caption, 'below')
+
+        tab_list.append(Panel(child=fig, title=panel_title))
+
+    tabs = Tabs(tabs=tab_list)
+
+    return tabs
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    main_df = pc.read_party_data()
+    chow_df, pval_df, qlr_df = break_tables(main_df)
+    with pd.option_context('display.width', 120, 'display.max_columns', 12):
+        print('QLR (sup-F) tests of a break, 1947-2020')
+        print(qlr_df.round(3))
+
+    yvar_label_dict = {'deficit_gdp': 'Deficit / GDP',
+                       'spend_nonint_gdp': 'NonInt Spend / GDP',
+                       'receipts_gdp': 'Receipts / GDP'}
+    color_list = ['red', 'blue', 'green']
+    note_text = ('Note: Dashed line is the 5 percent critical value of the ' +
+                 'QLR (sup-F) test with 15 percent trimming. Only break ' +
+                 'years within the trimmed range are shown.')
+    panel_list = [
+        (pc.panel_title_list[c],
+         [(('party', cntrl, yvar, 'control'), yvar_label_dict[yvar],
+           color_list[k]) for k, yvar in enumerate(ps.var_str_list)])
+        for c, cntrl in enumerate(pc.cntrl_str_list)]
+    fig_path = os.path.join(images_dir, 'tseries_breaks_party.html')
+    party_tabs = gen_break_tseries(
+        chow_df, qlr_df, panel_list,
+        note_text_list=[[note_text]] * len(panel_list),
+        fig_title_str=('Chow Tests of a Break in the Party Differences ' +
+                       'by Break Year, 1947-2020'),
+        fig_path=fig_path)
+    show(party_tabs)
+
+    panel_list = [
+        (party_title + ' control (WH + Sen), ' + seat_title,
+         [(('seat_whsen', party, yvar, xvar), yvar_label_dict[yvar],
+           color_list[k]) for k, yvar in enumerate(ps.var_str_list)])
+        for party, party_title in [('rep', 'Republican'),
+                                   ('dem', 'Democrat')]
+        for xvar, seat_title in [('dem_senateseats', 'Senate seats'),
+                                 ('dem_houseseats', 'House seats')]]
+    fig_path = os.path.join(images_dir, 'tseries_breaks_seats.html')
+    seat_tabs = gen_break_tseries(
+        chow_df, qlr_df, panel_list,
+        note_text_list=[[note_text]] * len(panel_list),
+        fig_title_str=('Chow Tests of a Break in the Seat Regressions ' +
+                       'by Break Year, 1947-2020'),
+        fig_path=fig_path)
+    show(seat_tabs)
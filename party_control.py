@@ -0,0 +1,177 @@
+'''
+This module reads deficit_party_data.csv and classifies every year by party
+control of the federal government under the three definitions used in the
+tables and figures of this repository:
+
+* Full control (all): White House + Senate + House of Representatives
+* Senate control (whsen): White House + Senate
+* House control (whhou): White House + House of Representatives
+
+Control is coded as 0 = Republican control, 1 = Democrat control, 2 = split
+control, and -1 = not classified (a president of neither party).
+'''
+
+# Import packages
+import numpy as np
+import pandas as pd
+import os
+
+# Set paths to work across Mac/Windows/Linux platforms
+cur_path = os.path.split(os.path.abspath(__file__))[0]
+data_dir = os.path.join(cur_path, 'data')
+party_data_path = os.path.join(data_dir, 'deficit_party_data.csv')
+recession_data_path = os.path.join(data_dir, 'recession_data.csv')
+
+# Column types of deficit_party_data.csv
+party_dtype_dict = {'year': np.int64,
+                    'deficit_gdp': np.float64,
+                    'receipts_gdp': np.float64,
+                    'spend_int_gdp': np.float64,
+                    'spend_nonint_gdp': np.float64,
+                    'spend_tot_gdp': np.float64,
+                    'president': 'str',
+                    'president_party': 'str',
+                    'congress_number': np.int64,
+                    'congress_session': np.int64,
+                    'dem_whitehouse': np.int64,
+                    'dem_senateseats': np.int64,
+                    'rep_senateseats': np.int64,
+                    'other_senateseats': np.int64,
+                    'dem_senate_maj': np.int64,
+                    'total_senateseats': np.int64,
+                    'dem_houseseats': np.int64,
+                    'rep_houseseats': np.int64,
+                    'other_houseseats': np.int64,
+                    'dem_house_maj': np.int64,
+                    'total_houseseats': np.int64}
+
+# Party control definitions: the chamber majority columns that must match
+# the party of the president for one-party control
+cntrl_str_list = ['all', 'whsen', 'whhou']
+cntrl_maj_dict = {'all': ['dem_senate_maj', 'dem_house_maj'],
+                  'whsen': ['dem_senate_maj'],
+                  'whhou': ['dem_house_maj']}
+party_str_list = ['rep', 'dem', 'spl']
+party_label_list = ['Republican control', 'Democrat control',
+                    'Split control']
+party_color_list = ['red', 'blue', 'green']
+panel_title_list = \
+    ['Full control: (White House + Senate + House of Reps.)',
+     'Senate control: (White House + Senate)',
+     'House control: (White House + House of Reps.)']
+
+
+def read_party_data(data_path=party_data_path):
+    """
+    This function reads deficit_party_data.csv into a DataFrame with the
+    column types used throughout this repository.
+
+    Args:
+        data_path (string): path of the deficit_party_data.csv file
+
+    Returns:
+        main_df (DataFrame): one row per year
+    """
+    main_df = pd.read_csv(data_path, dtype=party_dtype_dict, skiprows=3)
+
+    return main_df
+
+
+def read_recession_data(data_path=recession_data_path):
+    """
+    This function reads the NBER recession peak and trough dates in
+    recession_data.csv.
+
+    Args:
+        data_path (string): path of the recession_data.csv file
+
+    Returns:
+        recession_df (DataFrame): one row per recession with datetime
+            'Peak' and 'Trough' columns
+    """
+    recession_df = pd.read_csv(data_path, parse_dates=['Peak', 'Trough'])
+
+    return recession_df
+
+
+def control_codes(main_df, cntrl_list=cntrl_str_list,
+                  pres_party_var='president_party'):
+    """
+    This function classifies every row of a DataFrame by party control under
+    each definition in one vectorized pass. For a definition, a row is
+    Republican (Democrat) control if the president is Republican (Democrat)
+    and Republicans (Democrats) hold the majority in every chamber of the
+    definition, and split control if the president's party does not hold
+    the majority in at least one of those chambers.
+
+    Args:
+        main_df (DataFrame): data with president party and chamber majority
+            columns, e.g. the output of read_party_data()
+        cntrl_list (list): control definitions, keys of cntrl_maj_dict
+        pres_party_var (string): name of the president party column
+
+    Returns:
+        code_mat (array_like): (len(cntrl_list), len(main_df)) int8 array of
+            control codes (0 = Rep., 1 = Dem., 2 = split, -1 = none)
+    """
+    maj_dict = {maj_var: main_df[maj_var].to_numpy() == 1
+                for cntrl in cntrl_list for maj_var in cntrl_maj_dict[cntrl]}
+    code_mat = majority_codes(main_df[pres_party_var].to_numpy(), maj_dict,
+                              cntrl_list)
+
+    return code_mat
+
+
+def majority_codes(pres_party, maj_dict, cntrl_list=cntrl_str_list):
+    """
+    This function classifies party control from arrays of the president's
+    party and the Democrat majorities of the chambers, with the rules of
+    control_codes(). The majorities may have leading axes, e.g. one row per
+    simulated draw of the seats.
+
+    Args:
+        pres_party (array_like): (T,) party of the president of each row
+        maj_dict (dict): majority column of cntrl_maj_dict -> (..., T)
+            boolean array of whether Democrats hold the majority
+        cntrl_list (list): control definitions, keys of cntrl_maj_dict
+
+    Returns:
+        code_arr (array_like): (len(cntrl_list), ..., T) int8 array of
+            control codes (0 = Rep., 1 = Dem., 2 = split, -1 = none)
+    """
+    pres_rep = pres_party == 'Republican'
+    pres_dem = pres_party == 'Democrat'
+    shape = np.broadcast_shapes(*[maj_arr.shape
+                                  for maj_arr in maj_dict.values()])
+    code_arr = np.full((len(cntrl_list),) + shape, -1, dtype=np.int8)
+    for k, cntrl in enumerate(cntrl_list):
+        maj_arr = np.stack(np.broadcast_arrays(
+            *[maj_dict[maj_var] for maj_var in cntrl_maj_dict[cntrl]]))
+        all_dem = maj_arr.all(axis=0)
+        all_rep = (~maj_arr).all(axis=0)
+        code_arr[k] = np.select(
+            [pres_rep & all_rep, pres_dem & all_dem,
+             (pres_rep & ~all_rep) | (pres_dem & ~all_dem)],
+            [0, 1, 2], default=-1)
+
+    return code_arr
+
+
+def control_masks(main_df, cntrl_list=cntrl_str_list):
+    """
+    This function returns boolean row masks for Republican, Democrat, and
+    split control under each definition.
+
+    Args:
+        main_df (DataFrame): data, e.g. the output of read_party_data()
+        cntrl_list (list): control definitions, keys of cntrl_maj_dict
+
+    Returns:
+        mask_arr (array_like): (len(cntrl_list), 3, len(main_df)) boolean
+            array, where the second axis is ordered as party_str_list
+    """
+    code_mat = control_codes(main_df, cntrl_list)
+    mask_arr = (code_mat[:, None, :] ==
+                np.arange(len(party_str_list))[None, :, None])
+
+    return mask_arr
@@ -0,0 +1,395 @@
+'''
+This module studies the budget in the years around the transitions of
+party control, e.g. the start of a Republican trifecta, under each
+definition of party control:
+
+* find_transitions(): every year whose party control differs from that of
+  the previous year, with the party before and after
+* EventStudy: the values of the variables around each transition, as
+  windows of -k to +k years relative to the transition year. The windows
+  are a strided view of the base arrays of party_scenarios.PartyBase, padded
+  once with missing values to the largest k, so a window of any k up to
+  that copies nothing. paths() averages the windows of each type of
+  transition and draws bootstrap confidence bands by resampling the
+  transitions.
+* gen_event_fig(): the average paths of one variable by type of
+  transition, one panel per definition of party control
+
+If a user runs this module as a script, it will print the transitions of
+1947-2020, time a sweep over k and the control definitions, and create the
+figures.
+'''
+
+# Import packages
+import os
+import time
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from bokeh.io import output_file
+from bokeh.plotting import figure, show
+from bokeh.models import HoverTool, ColumnDataSource, Span, Title
+from bokeh.models.widgets import Tabs, Panel
+import party_control as pc
+import party_scenarios as psc
+
+# Set paths to work across Mac/Windows/Linux platforms
+cur_path = os.path.split(os.path.abspath(__file__))[0]
+images_dir = os.path.join(cur_path, 'images')
+
+# Variables of the event study
+event_var_list = ['deficit_gdp', 'receipts_gdp', 'spend_nonint_gdp']
+
+
+def find_transitions(code_mat, year_vec, cntrl_list=pc.cntrl_str_list):
+    """
+    This function finds the transitions of party control: the years whose
+    control code differs from that of the previous year, where both years
+    have a party in control.
+
+    Args:
+        code_mat (array_like): (C, T) control codes of consecutive years,
+            output of party_control.control_codes()
+        year_vec (array_like): (T,) years
+        cntrl_list (list): control definitions of the rows of code_mat
+
+    Returns:
+        event_df (DataFrame): one row per transition with columns 'cntrl',
+            'year', 'pos' (position of the year in year_vec), 'from', and
+            'to' (party strings of party_control.party_str_list)
+    """
+    code_mat = np.asarray(code_mat)
+    change_mat = ((code_mat[:, 1:] != code_mat[:, :-1]) &
+                  (code_mat[:, 1:] >= 0) & (code_mat[:, :-1] >= 0))
+    cntrl_idx, pos_vec = np.nonzero(change_mat)
+    pos_vec = pos_vec + 1
+    party_arr = np.array(pc.party_str_list)
+    event_df = pd.DataFrame(
+        {'cntrl': np.array(cntrl_list)[cntrl_idx],
+         'year': np.asarray(year_vec)[pos_vec],
+         'pos': pos_vec,
+         'from': party_arr[code_mat[cntrl_idx, pos_vec - 1]],
+         'to': party_arr[code_mat[cntrl_idx, pos_vec]]})
+
+    return event_df
+
+
+def nan_quantiles(val_arr, q_list):
+    """
+    This function computes quantiles over the first axis leaving out
+    missing values, with the linear interpolation of numpy.nanquantile()
+    but from one partition of the whole array.
+
+    Args:
+        val_arr (array_like): (N, ...) values
+        q_list (list): quantiles between 0 and 1
+
+    Returns:
+        quant_arr (array_like): (len(q_list), ...) quantiles, NaN where all
+            values are missing
+    """
+    n_valid = (~np.isnan(val_arr)).sum(axis=0)
+    pos_list = [q * np.maximum(n_valid - 1, 0) for q in q_list]
+    # Only the order statistics at the quantiles are needed, so partition
+    # along the last, contiguous axis instead of sorting (missing values
+    # go last either way)
+    kth_vec = np.unique(np.concatenate(
+        [np.concatenate([np.floor(pos_arr).ravel(), np.ceil(pos_arr).ravel()])
+         for pos_arr in pos_list]).astype(np.int64))
+    part_arr = np.partition(
+        np.ascontiguousarray(np.moveaxis(val_arr, 0, -1)), kth_vec, axis=-1)
+    quant_list = []
+    for pos_arr in pos_list:
+        lo_arr = np.floor(pos_arr).astype(np.int64)
+        hi_arr = np.ceil(pos_arr).astype(np.int64)
+        lo_val = np.take_along_axis(part_arr, lo_arr[..., None], axis=-1)
+        hi_val = np.take_along_axis(part_arr, hi_arr[..., None], axis=-1)
+        lo_val = lo_val[..., 0]
+        hi_val = hi_val[..., 0]
+        quant_arr = lo_val + (pos_arr - lo_arr) * (hi_val - lo_val)
+        quant_list.append(np.where(n_valid > 0, quant_arr, np.nan))
+
+    return np.array(quant_list)
+
+
+class EventStudy:
+    """
+    This class holds the transitions of party control of a window of years
+    and the padded base arrays from which the windows around them are
+    strided views.
+
+    Args:
+        base (PartyBase): base arrays of the data
+        start_year (int): first year of the transitions
+        end_year (int): last year of the transitions (the values of years
+            outside the window still enter the paths)
+        k_max (int): largest number of years before and after a transition
+    """
+
+    def __init__(self, base, start_year=1947, end_year=2020, k_max=10):
+        self.base = base
+        self.k_max = k_max
+        lo, hi = base.window(start_year, end_year)
+        if np.any(np.diff(base.year_vec) != 1):
+            raise ValueError('the years of the data must be consecutive')
+        # Transitions need the control of the previous year, which may come
+        # from before the window
+        event_df = find_transitions(base.code_mat, base.year_vec,
+                                    base.cntrl_list)
+        self.event_df = event_df[(event_df['pos'] >= lo) &
+                                 (event_df['pos'] < hi)].reset_index(
+                                     drop=True)
+        n_v, n_t = base.val_mat.shape
+        self.pad_mat = np.full((n_v, n_t + 2 * k_max), np.nan)
+        self.pad_mat[:, k_max:k_max + n_t] = base.val_mat
+
+    def windows(self, k):
+        """
+        This method returns the windows of -k to +k years around every year
+        of the base arrays as a view of the padded arrays (no copy), with
+        missing values beyond the years of the data.
+
+        Args:
+            k (int): number of years before and after, at most k_max
+
+        Returns:
+            window_arr (array_like): (V, T, 2k + 1) read-only view, where
+                window_arr[v, t, k + j] is the value of variable v in year
+                t + j
+        """
+        if k < 0 or k > self.k_max:
+            raise ValueError('k must be between 0 and ' + str(self.k_max))
+        n_t = self.base.val_mat.shape[1]
+        pad_slice = self.pad_mat[:, self.k_max - k:self.k_max + n_t + k]
+
+        return sliding_window_view(pad_slice, 2 * k + 1, axis=1)
+
+    def paths(self, k=5, var_list=event_var_list, cntrl_list=None,
+              by='to', normalize=True, n_boot=2000, level=0.9, seed=25):
+        """
+        This method computes the average paths of some variables around the
+        transitions of each type, with percentile bootstrap confidence
+        bands from resampling the transitions of a type with replacement.
+        Missing values (years beyond the data) are left out of the averages
+        of their relative year.
+
+        Args:
+            k (int): number of years before and after a transition
+            var_list (list): names of the variables, in base.var_list
+            cntrl_list (list): control definitions, all of base if None
+            by (string): type of a transition, 'to' (party after), 'from'
+                (party before), or 'pair' (e.g. 'rep_dem')
+            normalize (bool): measure each window from its value in the
+                year before the transition
+            n_boot (int): number of bootstrap draws
+            level (float): coverage of the confidence bands
+            seed (int): seed of the bootstrap draws
+
+        Returns:
+            path_df (DataFrame): columns 'mean', 'lo', 'hi', and 'n_events'
+                indexed by ('cntrl', 'type', 'var', 'rel_year')
+        """
+        if cntrl_list is None:
+            cntrl_list = self.base.cntrl_list
+        var_idx = [self.base.var_pos_dict[var] for var in var_list]
+        window_arr = self.windows(k)
+        event_df = self.event_df[self.event_df['cntrl'].isin(cntrl_list)]
+        if by == 'pair':
+            type_vec = (event_df['from'] + '_' + event_df['to']).to_numpy()
+        else:
+            type_vec = event_df[by].to_numpy()
+        rng = np.random.default_rng(seed)
+        alpha = (1.0 - level) / 2
+        rel_vec = np.arange(-k, k + 1)
+        row_list = []
+        index_list = []
+        for cntrl in cntrl_list:
+            cntrl_mask = (event_df['cntrl'] == cntrl).to_numpy()
+            for type_str in pd.unique(type_vec[cntrl_mask]):
+                pos_vec = event_df['pos'].to_numpy()[
+                    cntrl_mask & (type_vec == type_str)]
+                # (E, V, L) windows of the transitions of this type
+                path_arr = window_arr[np.ix_(var_idx, pos_vec)].transpose(
+                    1, 0, 2)
+                if normalize and k > 0:
+                    path_arr = path_arr - path_arr[:, :, k - 1:k]
+                valid_arr = ~np.isnan(path_arr)
+                path_arr = np.where(valid_arr, path_arr, 0.0)
+                n_e = len(pos_vec)
+                # Bootstrap draws as counts of each transition, so that all
+                # draws are one matrix product
+                count_mat = rng.multinomial(n_e, np.full(n_e, 1.0 / n_e),
+                                            size=n_boot).astype(np.float64)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    mean_mat = path_arr.sum(axis=0) / valid_arr.sum(axis=0)
+                    boot_arr = (np.tensordot(count_mat, path_arr, axes=1) /
+                                np.tensordot(count_mat, valid_arr, axes=1))
+                band_arr = nan_quantiles(boot_arr, [alpha, 1.0 - alpha])
+                for v, var in enumerate(var_list):
+                    row_list.append(np.column_stack(
+                        [mean_mat[v], band_arr[0, v], band_arr[1, v],
+                         valid_arr[:, v].sum(axis=0)]))
+                    index_list.append((cntrl, type_str, var))
+        path_index = pd.MultiIndex.from_tuples(
+            [index + (rel,) for index in index_list for rel in rel_vec],
+            names=['cntrl', 'type', 'var', 'rel_year'])
+        path_df = pd.DataFrame(
+            np.concatenate(row_list) if row_list else np.zeros((0, 4)),
+            index=path_index, columns=['mean', 'lo', 'hi', 'n_events'])
+        path_df['n_events'] = path_df['n_events'].astype(np.int64)
+
+        return path_df
+
+
+def gen_event_fig(path_df, var_str, type_label_dict, type_color_dict,
+                  y_axis_label='', note_text_list=[], fig_title_str='',
+                  fig_path=''):
+    """
+    This function creates a figure of the average paths of one variable
+    around the transitions of party control, one line and confidence band
+    per type of transition and one panel per definition of party control,
+    in the styling of the time series of tseries_def_rev_spnd_gdp.py.
+
+    Args:
+        path_df (DataFrame): output of EventStudy.paths()
+        var_str (string): name of the variable
+        type_label_dict (dict): legend label of each type of transition
+        type_color_dict (dict): color of each type of transition
+        y_axis_label (string): label of the y-axis
+        note_text_list (list): notes below each panel
+        fig_title_str (string): title of the figure
+        fig_path (string): path of the HTML file
+
+    Returns:
+        tabs (Tabs): one panel per control definition of path_df
+    """
+    output_file(fig_path, title=fig_title_str)
+    var_df = path_df.xs(var_str, level='var')
+    min_val = var_df[['mean', 'lo']].min().min()
+    max_val = var_df[['mean', 'hi']].max().max()
+    val_buffer = 0.1 * (max_val - min_val)
+    rel_vec = var_df.index.get_level_values('rel_year')
+    tab_list = []
+    for c, cntrl in enumerate(pc.cntrl_str_list):
+        if cntrl not in var_df.index.get_level_values('cntrl'):
+            continue
+        fig = figure(title=fig_title_str,
+                     plot_height=650,
+                     plot_width=1100,
+                     x_axis_label='Years from transition of party control',
+                     x_range=(rel_vec.min() - 0.5, rel_vec.max() + 0.5),
+                     y_axis_label=y_axis_label,
+                     y_range=(min_val - val_buffer, max_val + val_buffer),
+                     toolbar_location=None)
+
+        # Set title font size and axes font sizes
+        fig.title.text_font_size = '15.5pt'
+        fig.xaxis.axis_label_text_font_size = '12pt'
+        fig.xaxis.major_label_text_font_size = '12pt'
+        fig.yaxis.axis_label_text_font_size = '12pt'
+        fig.yaxis.major_label_text_font_size = '12pt'
+
+        # Mark the transition year and the baseline
+        fig.add_layout(Span(location=0, dimension='height',
+                            line_color='black', line_dash='dashed',
+                            line_width=2))
+        fig.add_layout(Span(location=0, dimension='width',
+                            line_color='#423D3C', line_width=1))
+
+        # Plot the average path and band of each type of transition
+        cntrl_df = var_df.xs(cntrl, level='cntrl')
+        for type_str in cntrl_df.index.unique(level='type'):
+            type_df = cntrl_df.xs(type_str, level='type').reset_index()
+            type_df['label'] = type_label_dict[type_str]
+            cds = ColumnDataSource(type_df)
+            color = type_color_dict[type_str]
+            legend_label = (type_label_dict[type_str] + ' (' +
+                            str(type_df['n_events'].max()) + ')')
+            fig.varea(x='rel_year', y1='lo', y2='hi', source=cds,
+                      fill_color=color, fill_alpha=0.15,
+                      legend_label=legend_label, muted_alpha=0.05)
+            fig.line(x='rel_year', y='mean', source=cds, color=color,
+                     line_width=2, legend_label=legend_label,
+                     muted_alpha=0.2)
+            fig.circle(x='rel_year', y='mean', source=cds, size=8,
+                       line_width=1, line_color='black', fill_color=color,
+                       alpha=0.7, muted_alpha=0.2, legend_label=legend_label)
+
+        # Add information on hover
+        tooltips = [('Transition', '@label'), ('Year', '@rel_year'),
+                    ('Mean', '@mean{0.00}'),
+                    ('Band', '@lo{0.00} to @hi{0.00}'),
+                    ('Transitions', '@n_events')]
+        fig.add_tools(HoverTool(tooltips=tooltips))
+
+        # Turn off scrolling
+        fig.toolbar.active_drag = None
+
+        # Add legend
+        fig.legend.location = 'top_left'
+        fig.legend.border_line_width = 2
+        fig.legend.border_line_color = 'black'
+        fig.legend.border_line_alpha = 1
+        fig.legend.label_text_font_size = '4mm'
+
+        # Set legend muting click policy
+        fig.legend.click_policy = 'mute'
+
+        # Add notes below image
+        for note_text in note_text_list:
+            caption = Title(text=note_text, align='left',
+                            text_font_size='4mm', text_font_style='italic')
+            fig.add_layout(caption, 'below')
+
+        tab_list.append(Panel(child=fig, title=pc.panel_title_list[c]))
+
+    tabs = Tabs(tabs=tab_list)
+
+    return tabs
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    party_base = psc.PartyBase(pc.read_party_data())
+    event_study = EventStudy(party_base, 1947, 2020)
+    print('Transitions of party control, 1947-2020')
+    print(event_study.event_df.groupby(['cntrl', 'from', 'to']).size())
+
+    # Sweep k and the control definitions
+    start_time = time.perf_counter()
+    n_sweep = 0
+    for k in range(1, event_study.k_max + 1):
+        for cntrl in party_base.cntrl_list:
+            event_study.paths(k, cntrl_list=[cntrl])
+            n_sweep += 1
+    elapsed = time.perf_counter() - start_time
+    print('{:d} event studies (k = 1 to {:d} by control definition) in '
+          .format(n_sweep, event_study.k_max) +
+          '{:.3f} seconds'.format(elapsed))
+
+    k = 4
+    path_df = event_study.paths(k)
+    type_label_dict = {party: 'To ' + label.lower() for party, label in
+                       zip(pc.party_str_list, pc.party_label_list)}
+    type_color_dict = dict(zip(pc.party_str_list, pc.party_color_list))
+    label_dict = {'deficit_gdp': 'Deficit / GDP',
+                  'receipts_gdp': 'Receipts / GDP',
+                  'spend_nonint_gdp': 'NonInt Spend / GDP'}
+    note_text_list = \
+        ['Note: Change from the year before the transition, averaged over ' +
+         'the transitions of each type (number in parentheses), 1947-2020.',
+         'Shaded bands are 90 percent bootstrap confidence bands from ' +
+         'resampling the transitions.']
+    for var in event_var_list:
+        fig_path = os.path.join(images_dir, 'event_' + var + '.html')
+        event_tabs = gen_event_fig(
+            path_df, var, type_label_dict, type_color_dict,
+            y_axis_label=('Change in ' + label_dict[var] +
+                          ' (percentage points)'),
+            note_text_list=note_text_list,
+            fig_title_str=(label_dict[var] + ' around Transitions of Party ' +
+                           'Control, +/- ' + str(k) + ' Years'),
+            fig_path=fig_path)
+        show(event_tabs)
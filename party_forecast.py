@@ -0,0 +1,528 @@
+'''
+This module evaluates whether party control improves out-of-sample
+forecasts of deficit_gdp, receipts_gdp, and spend_nonint_gdp beyond simple
+baselines. Every model forecasts the value h years after each forecast
+origin (year) directly from what is known in the origin year:
+
+* 'rw': the random walk, the value of the origin year
+* 'ar<p>': OLS of the value h years ahead on a constant and the values of
+  the origin year and the p - 1 years before
+* 'ar<p>_rec': adds whether the origin year overlaps an NBER recession
+* 'ar<p>_cntrl': adds the Republican and Democrat control (White House and
+  Senate by default) of the origin year, split control being the baseline
+
+The models are fit at every origin on the years whose outcomes are known
+by then (expanding windows, or rolling windows of a fixed width). The
+cross-products of the regressors and outcomes are cumulated over the years
+once, so the sufficient statistics of every origin are the difference of
+two cumulative sums and all origins are solved as one batch. The
+(variable, model) tasks run in a process pool.
+
+* forecast_errors(): the forecasts and errors of every variable, model,
+  horizon, and origin
+* scoreboard(): the RMSE, MAE, and bias of each model, its RMSE relative to
+  the random walk, and the Diebold-Mariano test of its squared errors
+  against those of its nested baseline (the random walk for 'ar<p>', and
+  'ar<p>' for the models that add recessions or party control)
+* gen_forecast_fig(): the RMSE of each model by horizon and the cumulative
+  squared error differences from the random walk by origin
+
+If a user runs this module as a script, it will print the scoreboard of
+the origins 1970-2019, time it, and create the figures.
+'''
+
+# Import packages
+import argparse
+import concurrent.futures
+import os
+import numpy as np
+import pandas as pd
+from scipy.stats import t as tdist
+from bokeh.io import output_file
+from bokeh.plotting import figure, show
+from bokeh.models import ColumnDataSource, HoverTool, Title
+from bokeh.models.widgets import Tabs, Panel
+from bokeh.palettes import Category10
+import party_control as pc
+import party_masks as pm
+import party_stats as ps
+
+# Set paths to work across Mac/Windows/Linux platforms
+cur_path = os.path.split(os.path.abspath(__file__))[0]
+images_dir = os.path.join(cur_path, 'images')
+
+# Models as (number of lags p, recession dummy, party control dummies)
+model_dict = {'rw': (0, False, False),
+              'ar1': (1, False, False),
+              'ar2': (2, False, False),
+              'ar1_rec': (1, True, False),
+              'ar2_rec': (2, True, False),
+              'ar1_cntrl': (1, False, True),
+              'ar2_cntrl': (2, False, True),
+              'ar2_rec_cntrl': (2, True, True)}
+
+
+def baseline_model(model):
+    """
+    This function returns the nested baseline of a model in the
+    Diebold-Mariano tests of scoreboard(), None for the random walk.
+    """
+    lags, rec, cntrl = model_dict[model]
+    if lags == 0:
+        return None
+    elif rec or cntrl:
+        return 'ar' + str(lags)
+    else:
+        return 'rw'
+
+
+def design_matrix(y_vec, rec_vec, code_vec, lags, rec, cntrl):
+    """
+    This function returns the regressors of a forecasting model in each
+    origin year.
+
+    Args:
+        y_vec (array_like): (T,) variable forecast, one value per year
+        rec_vec (array_like): (T,) whether each year overlaps a recession
+        code_vec (array_like): (T,) control codes of the years
+        lags (int): number of values of the variable p
+        rec (bool): whether to add the recession dummy
+        cntrl (bool): whether to add the Republican and Democrat dummies
+
+    Returns:
+        z_mat (array_like): (T, k) constant, y_t, ..., y_{t - p + 1}, and
+            the dummies, NaN where a lag is before the first year
+    """
+    n_t = len(y_vec)
+    col_list = [np.ones(n_t)]
+    for lag in range(lags):
+        lag_vec = np.full(n_t, np.nan)
+        lag_vec[lag:] = y_vec[:n_t - lag]
+        col_list.append(lag_vec)
+    if rec:
+        col_list.append(rec_vec.astype(np.float64))
+    if cntrl:
+        col_list += [(code_vec == 0).astype(np.float64),
+                     (code_vec == 1).astype(np.float64)]
+
+    return np.column_stack(col_list)
+
+
+def direct_forecasts(y_vec, z_mat, horizon_list, window=None, min_obs=10):
+    """
+    This function fits the direct forecasting regressions of y_{t + h} on
+    the regressors z_t at every origin t, on the pairs whose outcome year is
+    at most t, and returns the forecasts of every origin. The cross-products
+    of the pairs are cumulated once per horizon, and the normal equations of
+    all origins are solved as one batch.
+
+    Args:
+        y_vec (array_like): (T,) variable forecast
+        z_mat (array_like): (T, k) regressors of each origin
+        horizon_list (list): forecast horizons h in years
+        window (int): number of pairs of the rolling windows, expanding
+            windows if None
+        min_obs (int): smallest number of pairs of a fit, at least k + 2
+
+    Returns:
+        fc_mat (array_like): (H, T) forecasts of y_{t + h} made at each
+            origin t (NaN where the model cannot be fit)
+    """
+    n_t, n_k = z_mat.shape
+    min_obs = max(min_obs, n_k + 2)
+    # Center on the means, which keeps the sums accurate and leaves the
+    # forecasts of a model with a constant unchanged
+    y_shift = np.nanmean(y_vec)
+    z_shift = np.nanmean(z_mat, axis=0)
+    z_shift[0] = 0.0
+    fc_mat = np.full((len(horizon_list), n_t), np.nan)
+    for i, h in enumerate(horizon_list):
+        # Pair s: regressors of year s and outcome of year s + h
+        z_pair = z_mat[:n_t - h] - z_shift
+        y_pair = y_vec[h:] - y_shift
+        valid = ~np.isnan(z_pair).any(axis=1) & ~np.isnan(y_pair)
+        z_pair = np.where(valid[:, None], z_pair, 0.0)
+        y_pair = np.where(valid, y_pair, 0.0)
+        cum_zz = np.zeros((n_t - h + 1, n_k, n_k))
+        cum_zy = np.zeros((n_t - h + 1, n_k))
+        cum_n = np.zeros(n_t - h + 1)
+        np.cumsum(z_pair[:, :, None] * z_pair[:, None, :], axis=0,
+                  out=cum_zz[1:])
+        np.cumsum(z_pair * y_pair[:, None], axis=0, out=cum_zy[1:])
+        np.cumsum(valid, out=cum_n[1:])
+        # At origin t the pairs s <= t - h are known
+        origin_vec = np.arange(h, n_t)
+        hi_vec = origin_vec - h + 1
+        if window is None:
+            lo_vec = np.zeros_like(hi_vec)
+        else:
+            lo_vec = np.maximum(hi_vec - window, 0)
+        zz_arr = cum_zz[hi_vec] - cum_zz[lo_vec]
+        zy_mat = cum_zy[hi_vec] - cum_zy[lo_vec]
+        n_vec = cum_n[hi_vec] - cum_n[lo_vec]
+        z_now = z_mat[origin_vec] - z_shift
+        fit = ((n_vec >= min_obs) & ~np.isnan(z_now).any(axis=1) &
+               (np.linalg.matrix_rank(zz_arr) == n_k))
+        beta_mat = np.linalg.solve(zz_arr[fit], zy_mat[fit][:, :, None])
+        fc_mat[i, origin_vec[fit]] = ((z_now[fit] * beta_mat[:, :, 0]).sum(
+            axis=1) + y_shift)
+
+    return fc_mat
+
+
+def forecast_task(var, model, y_vec, rec_vec, code_vec, horizon_list,
+                  window):
+    """
+    This function returns the forecasts of one variable and model at every
+    horizon and origin, a task of the process pool of forecast_errors().
+    """
+    lags, rec, cntrl = model_dict[model]
+    if lags == 0:
+        fc_mat = np.tile(y_vec, (len(horizon_list), 1))
+    else:
+        z_mat = design_matrix(y_vec, rec_vec, code_vec, lags, rec, cntrl)
+        fc_mat = direct_forecasts(y_vec, z_mat, horizon_list, window)
+
+    return var, model, fc_mat
+
+
+def forecast_errors(main_df, var_list=ps.var_str_list,
+                    model_list=list(model_dict),
+                    horizon_list=[1, 2, 3, 4, 5], first_origin=1970,
+                    last_origin=None, window=None, cntrl_str='whsen',
+                    n_workers=None):
+    """
+    This function computes the out-of-sample forecasts and errors of every
+    variable, model, and horizon at every origin year, one process pool task
+    per variable and model.
+
+    Args:
+        main_df (DataFrame): data, e.g. the output of read_party_data(),
+            one row per year
+        var_list (list): names of the variables forecast
+        model_list (list): keys of model_dict
+        horizon_list (list): forecast horizons in years
+        first_origin (int): first origin year evaluated
+        last_origin (int): last origin year evaluated, the last year with an
+            outcome if None
+        window (int): years of the rolling windows of the fits, expanding
+            windows if None
+        cntrl_str (string): definition of party control of the 'cntrl'
+            models
+        n_workers (int): number of worker processes, os.cpu_count() if
+            None, and no process pool if 1
+
+    Returns:
+        err_df (DataFrame): columns 'target_year', 'forecast', 'actual', and
+            'error' (actual minus forecast) indexed by (var, model, horizon,
+            origin), where the outcome is known
+    """
+    main_df = main_df.sort_values('year')
+    year_vec = main_df['year'].to_numpy()
+    rec_vec = pm.declared_masks(np.arange(year_vec[0], year_vec[-1] + 1))[
+        'recession'].align(year_vec)
+    code_vec = pc.control_codes(main_df, [cntrl_str])[0]
+    task_list = [(var, model, main_df[var].to_numpy(dtype=np.float64),
+                  rec_vec, code_vec, horizon_list, window)
+                 for var in var_list for model in model_list]
+    if n_workers == 1:
+        result_list = [forecast_task(*task) for task in task_list]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=n_workers) as executor:
+            result_list = list(executor.map(forecast_task, *zip(*task_list)))
+    fc_dict = {(var, model): fc_mat for var, model, fc_mat in result_list}
+
+    # Keep the origins in the evaluation years with a known outcome
+    if last_origin is None:
+        last_origin = year_vec[-1]
+    frame_list = []
+    for var in var_list:
+        y_vec = main_df[var].to_numpy(dtype=np.float64)
+        for model in model_list:
+            for i, h in enumerate(horizon_list):
+                origin_idx = np.flatnonzero(
+                    (year_vec >= first_origin) & (year_vec <= last_origin) &
+                    (np.arange(len(year_vec)) + h < len(year_vec)))
+                actual = y_vec[origin_idx + h]
+                forecast = fc_dict[(var, model)][i, origin_idx]
+                keep = ~np.isnan(actual)
+                frame_list.append(pd.DataFrame({
+                    'var': var, 'model': model, 'horizon': h,
+                    'origin': year_vec[origin_idx[keep]],
+                    'target_year': year_vec[origin_idx[keep] + h],
+                    'forecast': forecast[keep], 'actual': actual[keep],
+                    'error': actual[keep] - forecast[keep]}))
+    err_df = pd.concat(frame_list, ignore_index=True).set_index(
+        ['var', 'model', 'horizon', 'origin'])
+
+    return err_df
+
+
+def dm_test(loss_mat, horizon_vec):
+    """
+    This function computes the Diebold-Mariano tests of equal expected loss
+    with the small sample correction of Harvey, Leybourne, and Newbold
+    (1997), one test per row of loss differences.
+
+    Args:
+        loss_mat (array_like): (G, T) loss differences of G comparisons, NaN
+            where either forecast is missing
+        horizon_vec (array_like): (G,) forecast horizon of each comparison,
+            whose h - 1 autocovariances enter the variance of the mean
+
+    Returns:
+        dm_stat (array_like): (G,) test statistics, positive if the first
+            model has the larger loss
+        dm_p (array_like): (G,) two-sided p-values of the t distribution
+            with n - 1 degrees of freedom
+    """
+    valid_mat = ~np.isnan(loss_mat)
+    n_vec = valid_mat.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_vec = np.where(valid_mat, loss_mat, 0.0).sum(axis=1) / n_vec
+        dev_mat = np.where(valid_mat, loss_mat - mean_vec[:, None], 0.0)
+        lrv_vec = (dev_mat ** 2).sum(axis=1) / n_vec
+        for lag in range(1, int(np.max(horizon_vec))):
+            gamma = (dev_mat[:, lag:] * dev_mat[:, :-lag]).sum(axis=1) / n_vec
+            lrv_vec += np.where(horizon_vec > lag, 2.0 * gamma, 0.0)
+        # Fall back on the variance if the truncated sum is not positive
+        lrv_vec = np.where(lrv_vec > 0, lrv_vec,
+                           (dev_mat ** 2).sum(axis=1) / n_vec)
+        hln_vec = np.sqrt((n_vec + 1 - 2 * horizon_vec + horizon_vec *
+                           (horizon_vec - 1) / n_vec) / n_vec)
+        dm_stat = hln_vec * mean_vec / np.sqrt(lrv_vec / n_vec)
+        dm_p = 2.0 * tdist.sf(np.abs(dm_stat), n_vec - 1)
+
+    return dm_stat, dm_p
+
+
+def scoreboard(err_df):
+    """
+    This function scores the forecasts of forecast_errors() by variable,
+    horizon, and model.
+
+    Args:
+        err_df (DataFrame): output of forecast_errors()
+
+    Returns:
+        score_df (DataFrame): columns 'n', 'rmse', 'mae', 'bias' (mean
+            error), 'rel_rmse' (RMSE over that of the random walk on the
+            same origins), 'baseline', 'dm_stat', and 'dm_p' (Diebold-Mariano
+            test of the squared errors against the baseline on their common
+            origins, positive if the model is worse) indexed by (var,
+            horizon, model)
+    """
+    # (G, O) errors of each (var, model, horizon) by origin
+    err_mat = err_df['error'].unstack('origin')
+    key_df = err_mat.index.to_frame(index=False)
+    err_arr = err_mat.to_numpy(dtype=np.float64)
+    pos_dict = {key: g for g, key in enumerate(err_mat.index)}
+    with np.errstate(invalid='ignore'):
+        score_df = pd.DataFrame({
+            'n': (~np.isnan(err_arr)).sum(axis=1),
+            'rmse': np.sqrt(np.nanmean(err_arr ** 2, axis=1)),
+            'mae': np.nanmean(np.abs(err_arr), axis=1),
+            'bias': np.nanmean(err_arr, axis=1)}, index=err_mat.index)
+    rw_idx = np.array([pos_dict.get((var, 'rw', h), -1) for var, h in
+                       zip(key_df['var'], key_df['horizon'])])
+    base_list = [baseline_model(model) for model in key_df['model']]
+    base_idx = np.array([pos_dict.get((var, base, h), -1)
+                         for var, base, h in zip(key_df['var'], base_list,
+                                                 key_df['horizon'])])
+    nan_row = np.full((1, err_arr.shape[1]), np.nan)
+    err_pad = np.vstack([err_arr, nan_row])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # RMSE of the model and the random walk on their common origins
+        sq_model = err_arr ** 2 + 0.0 * err_pad[rw_idx]
+        sq_rw = err_pad[rw_idx] ** 2 + 0.0 * err_arr
+        score_df['rel_rmse'] = np.sqrt(np.nanmean(sq_model, axis=1) /
+                                       np.nanmean(sq_rw, axis=1))
+        loss_mat = err_arr ** 2 - err_pad[base_idx] ** 2
+    dm_stat, dm_p = dm_test(loss_mat, key_df['horizon'].to_numpy())
+    score_df['baseline'] = base_list
+    score_df['dm_stat'] = np.where(base_idx >= 0, dm_stat, np.nan)
+    score_df['dm_p'] = np.where(base_idx >= 0, dm_p, np.nan)
+    # Order as the variables, horizons, and models of err_df
+    score_df = score_df.reorder_levels(['var', 'horizon', 'model'])
+    score_df = score_df.reindex(pd.MultiIndex.from_product(
+        [err_df.index.unique(level=name)
+         for name in ['var', 'horizon', 'model']]))
+
+    return score_df
+
+
+def gen_forecast_fig(score_df, err_df, var_str, loss_horizon=1,
+                     note_text_list=[], fig_title_str='', fig_path=''):
+    """
+    This function creates a figure of the forecast errors of one variable
+    with two panels: the RMSE of each model by horizon, and the cumulative
+    sum over the origins of the squared errors of the random walk minus
+    those of each model at one horizon (rising where the model beats the
+    random walk).
+
+    Args:
+        score_df (DataFrame): output of scoreboard()
+        err_df (DataFrame): output of forecast_errors()
+        var_str (string): name of the variable
+        loss_horizon (int): horizon of the cumulative squared error panel
+        note_text_list (list): notes below each panel
+        fig_title_str (string): title of the figure
+        fig_path (string): path of the HTML file
+
+    Returns:
+        tabs (Tabs): the two panels
+    """
+    output_file(fig_path, title=fig_title_str)
+    var_score_df = score_df.xs(var_str, level='var')
+    model_list = list(var_score_df.index.unique(level='model'))
+    color_list = Category10[10]
+    rw_err = err_df.xs((var_str, 'rw', loss_horizon),
+                       level=('var', 'model', 'horizon'))['error']
+    fig_list = []
+    for panel in ['rmse', 'cssed']:
+        if panel == 'rmse':
+            fig = figure(title=fig_title_str,
+                         plot_height=650,
+                         plot_width=1100,
+                         x_axis_label='Forecast horizon (years)',
+                         y_axis_label='Root mean squared error (% of GDP)',
+                         toolbar_location=None)
+        else:
+            fig = figure(title=fig_title_str,
+                         plot_height=650,
+                         plot_width=1100,
+                         x_axis_label='Forecast origin (year)',
+                         y_axis_label=('Cumulative squared error of the ' +
+                                       'random walk minus the model'),
+                         toolbar_location=None)
+
+        # Set title font size and axes font sizes
+        fig.title.text_font_size = '15.5pt'
+        fig.xaxis.axis_label_text_font_size = '12pt'
+        fig.xaxis.major_label_text_font_size = '12pt'
+        fig.yaxis.axis_label_text_font_size = '12pt'
+        fig.yaxis.major_label_text_font_size = '12pt'
+
+        for m, model in enumerate(model_list):
+            if panel == 'rmse':
+                model_df = var_score_df.xs(model,
+                                           level='model').reset_index()
+                x_str, y_str = 'horizon', 'rmse'
+                tooltips = [('Model', '@model'), ('Horizon', '@horizon'),
+                            ('RMSE', '@rmse{0.000}'),
+                            ('RMSE / random walk', '@rel_rmse{0.000}'),
+                            ('Forecasts', '@n')]
+            else:
+                if model == 'rw':
+                    continue
+                model_err = err_df.xs((var_str, model, loss_horizon),
+                                      level=('var', 'model',
+                                             'horizon'))['error']
+                loss_sr = (rw_err ** 2 - model_err ** 2).dropna()
+                model_df = pd.DataFrame({
+                    'origin': loss_sr.index.to_numpy(),
+                    'cssed': loss_sr.cumsum().to_numpy()})
+                x_str, y_str = 'origin', 'cssed'
+                tooltips = [('Model', '@model'), ('Origin', '@origin'),
+                            ('Cumulative difference', '@cssed{0.00}')]
+            model_df['model'] = model
+            cds = ColumnDataSource(model_df)
+            line = fig.line(x=x_str, y=y_str, source=cds,
+                            color=color_list[m % 10], line_width=3,
+                            muted_alpha=0.2, legend_label=model)
+            fig.circle(x=x_str, y=y_str, source=cds, size=6,
+                       color=color_list[m % 10], muted_alpha=0.2,
+                       legend_label=model)
+            fig.add_tools(HoverTool(tooltips=tooltips, renderers=[line]))
+
+        # Turn off scrolling
+        fig.toolbar.active_drag = None
+
+        # Add legend
+        fig.legend.location = 'top_left'
+        fig.legend.border_line_width = 2
+        fig.legend.border_line_color = 'black'
+        fig.legend.border_line_alpha = 1
+        fig.legend.label_text_font_size = '4mm'
+
+        # Set legend muting click policy
+        fig.legend.click_policy = 'mute'
+
+        # Add notes below image
+        for note_text in note_text_list:
+            caption = Title(text=note_text, align='left',
+                            text_font_size='4mm', text_font_style='italic')
+            fig.add_layout(caption, 'below')
+        fig_list.append(fig)
+
+    tabs = Tabs(tabs=[
+        Panel(child=fig_list[0], title='RMSE by horizon'),
+        Panel(child=fig_list[1], title='Cumulative loss, ' +
+              str(loss_horizon) + '-year horizon')])
+
+    return tabs
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    import time
+    parser = argparse.ArgumentParser(
+        description='Evaluate rolling-origin forecasts of the budget.')
+    parser.add_argument('--window', type=int, default=None,
+                        help='years of rolling fit windows (default: ' +
+                        'expanding windows)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of worker processes (default: ' +
+                        'os.cpu_count())')
+    # site_export.py runs scripts with its own command line arguments
+    args = parser.parse_known_args()[0]
+    main_df = pc.read_party_data()
+
+    # Check the batched fits against a separate OLS fit of one origin
+    y_vec = main_df['deficit_gdp'].to_numpy(dtype=np.float64)
+    code_vec = pc.control_codes(main_df, ['whsen'])[0]
+    rec_vec = np.zeros(len(y_vec), dtype=bool)
+    z_mat = design_matrix(y_vec, rec_vec, code_vec, 2, False, True)
+    fc_mat = direct_forecasts(y_vec, z_mat, [3], args.window)
+    origin = int(np.flatnonzero(main_df['year'].to_numpy() == 1990)[0])
+    lo = 0 if args.window is None else max(origin - 2 - args.window, 0)
+    keep = ~np.isnan(z_mat[lo:origin - 2]).any(axis=1)
+    beta = np.linalg.lstsq(z_mat[lo:origin - 2][keep],
+                           y_vec[lo + 3:origin + 1][keep], rcond=None)[0]
+    print('Difference from a separate fit: ' +
+          '{:.2e}'.format(abs(fc_mat[0, origin] - z_mat[origin] @ beta)))
+
+    for n_workers in [1, args.workers]:
+        start_time = time.perf_counter()
+        err_df = forecast_errors(main_df, last_origin=2019,
+                                 window=args.window, n_workers=n_workers)
+        score_df = scoreboard(err_df)
+        print(str(len(err_df)) + ' forecasts of ' +
+              str(len(score_df)) + ' variable/model/horizon combinations ' +
+              'in ' + '{:.0f} ms'.format(
+                  1e3 * (time.perf_counter() - start_time)) + ' (' +
+              ('no process pool' if n_workers == 1 else 'process pool') +
+              ')')
+    with pd.option_context('display.width', 120, 'display.max_rows', 200):
+        print(score_df.xs(1, level='horizon').round(3))
+        print(score_df['rel_rmse'].unstack('horizon').round(3))
+
+    window_str = ('expanding windows' if args.window is None else
+                  'rolling ' + str(args.window) + '-year windows')
+    note_text_list = \
+        ['Note: Direct forecasts from each origin year 1970-2019, fit by ' +
+         'OLS on ' + window_str + ' of the outcomes known by the origin.',
+         '   rw: random walk; ar<p>: p lags; rec: NBER recession in the ' +
+         'origin year; cntrl: party control (White House and Senate).']
+    for var, title in [('deficit_gdp', 'Deficits'),
+                       ('receipts_gdp', 'Revenues'),
+                       ('spend_nonint_gdp', 'Non-interest Spending')]:
+        fcst_tabs = gen_forecast_fig(
+            score_df, err_df, var, note_text_list=note_text_list,
+            fig_title_str=('Out-of-sample Forecast Errors of U.S. Federal ' +
+                           title + ' as Percent of GDP'),
+            fig_path=os.path.join(images_dir, 'forecast_' + var + '.html'))
+        show(fcst_tabs)
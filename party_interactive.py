@@ -0,0 +1,499 @@
+'''
+This module creates interactive versions of the party-control time series
+and seat scatter figures. The full deficit_party_data.csv dataset ships once
+in the HTML file, and a RangeSlider of years and a control-definition
+selector filter the party-control markers, reset the axis ranges, and
+recompute the party summary table in the browser through CustomJS. No Python
+roundtrip or server is needed to explore different windows. If a user runs
+this module as a script, it will create the interactive deficit time series
+and deficit by Democrat Senate seats scatter plot.
+'''
+
+# Import packages
+import json
+import numpy as np
+import os
+from bokeh.io import output_file
+from bokeh.plotting import figure, show
+from bokeh.events import DocumentReady
+from bokeh.layouts import column, row
+from bokeh.models import (ColumnDataSource, CDSView, CustomJS, Div,
+                          HoverTool, IndexFilter, RangeSlider, Select, Title)
+from bokeh.models.tickers import SingleIntervalTicker
+import party_control as pc
+
+# Set paths to work across Mac/Windows/Linux platforms
+cur_path = os.path.split(os.path.abspath(__file__))[0]
+images_dir = os.path.join(cur_path, 'images')
+
+'''
+-------------------------------------------------------------------------------
+Create pandas DataFrames
+-------------------------------------------------------------------------------
+'''
+main_df = pc.read_party_data()
+recession_df = pc.read_recession_data()
+
+tool_str_dict = {'deficit_gdp': 'Deficit / GDP',
+                 'receipts_gdp': 'Receipts / GDP',
+                 'spend_nonint_gdp': 'NonInt Spend / GDP'}
+
+# Browser-side update of the markers, axis ranges, summary table, and notes.
+# The same function runs once when the document loads.
+update_js = '''
+const data = source.data;
+const year = data['year'];
+const xv = data[xvar];
+const yv = data[yvar];
+const k = cntrl_list.indexOf(select.value);
+const codes = data['cntrl_' + cntrl_list[k]];
+const [year0, year1] = slider.value;
+const idx = [[], [], []];
+const n = [0, 0, 0];
+const sum = [0, 0, 0];
+const sumsq = [0, 0, 0];
+let xmin = Infinity, xmax = -Infinity, ymin = Infinity, ymax = -Infinity;
+for (let i = 0; i < year.length; i++) {
+    if (year[i] < year0 || year[i] > year1) continue;
+    xmin = Math.min(xmin, xv[i]);
+    xmax = Math.max(xmax, xv[i]);
+    const c = codes[i];
+    if (c >= 0) idx[c].push(i);
+    if (isNaN(yv[i])) continue;
+    ymin = Math.min(ymin, yv[i]);
+    ymax = Math.max(ymax, yv[i]);
+    if (c >= 0) {
+        n[c] += 1;
+        sum[c] += yv[i];
+        sumsq[c] += yv[i] * yv[i];
+    }
+}
+for (let p = 0; p < 3; p++) {
+    filters[p].indices = idx[p];
+}
+source.change.emit();
+if (isFinite(xmin) && isFinite(ymin)) {
+    const x_pad = x_buffer_pct > 0 ? x_buffer_pct * (xmax - xmin) : 1;
+    const y_pad = y_buffer_pct > 0 ? y_buffer_pct * (ymax - ymin) : 3;
+    x_range.start = xmin - x_pad;
+    x_range.end = xmax + x_pad;
+    y_range.start = ymin - y_pad;
+    y_range.end = ymax + y_pad;
+}
+let html = '<table style="font-size:12pt"><tr><th></th>' +
+    '<th style="padding:0 1em">Mean</th>' +
+    '<th style="padding:0 1em">Std. dev.</th>' +
+    '<th style="padding:0 1em">N</th></tr>';
+for (let p = 0; p < 3; p++) {
+    const mean = n[p] > 0 ? sum[p] / n[p] : NaN;
+    const std = n[p] > 1 ?
+        Math.sqrt(Math.max(sumsq[p] - n[p] * mean * mean, 0) / (n[p] - 1)) :
+        NaN;
+    html += '<tr><td style="color:' + party_color_list[p] + '">' +
+        party_label_list[p] + '</td><td style="text-align:center">' +
+        (isNaN(mean) ? '-' : mean.toFixed(1) + '%') +
+        '</td><td style="text-align:center">' +
+        (isNaN(std) ? '-' : '(' + std.toFixed(1) + ')') +
+        '</td><td style="text-align:center">' + n[p] + '</td></tr>';
+}
+div.text = '<b>' + tool_str + ' by party control, ' + year0 + '-' + year1 +
+    '</b>' + html + '</table>';
+for (let j = 0; j < captions.length; j++) {
+    const note_list = note_text_list[k];
+    captions[j].text = j < note_list.length ? note_list[j] : '';
+}
+'''
+
+
+def gen_party_cds(main_df, xvar_str, yvar_str):
+    """
+    This function creates the one ColumnDataSource that backs an interactive
+    party-control figure. It holds only the columns the glyphs, tooltips,
+    and callbacks use, as compact binary-encodable types, plus one control
+    code column per definition (see party_control.control_codes()).
+
+    Args:
+        main_df (DataFrame): party data, e.g. party_control.read_party_data()
+        xvar_str (string): x-axis column, 'year' or a seats column
+        yvar_str (string): y-axis column
+
+    Returns:
+        main_cds (ColumnDataSource): data source of the figure
+    """
+    code_mat = pc.control_codes(main_df)
+    data_dict = {'year': main_df['year'].to_numpy(dtype=np.int16),
+                 yvar_str: main_df[yvar_str].to_numpy(dtype=np.float32),
+                 'president': main_df['president'].to_numpy(),
+                 'president_party': main_df['president_party'].to_numpy()}
+    for seat_var in ['rep_houseseats', 'dem_houseseats', 'rep_senateseats',
+                     'dem_senateseats']:
+        data_dict[seat_var] = main_df[seat_var].to_numpy(dtype=np.int16)
+    if xvar_str not in data_dict:
+        data_dict[xvar_str] = main_df[xvar_str].to_numpy(dtype=np.float32)
+    for k, cntrl in enumerate(pc.cntrl_str_list):
+        data_dict['cntrl_' + cntrl] = code_mat[k]
+    main_cds = ColumnDataSource(data_dict)
+
+    return main_cds
+
+
+def add_party_controls(fig, main_cds, main_df, xvar_str, yvar_str,
+                       start_year, cntrl_str, note_text_list, x_buffer_pct,
+                       y_buffer_pct):
+    """
+    This function adds the Republican, Democrat, and split control markers
+    to an interactive figure and creates the year slider, control-definition
+    selector, and summary table that drive them.
+
+    Args:
+        fig (Bokeh figure): figure to add the markers to
+        main_cds (ColumnDataSource): output of gen_party_cds()
+        main_df (DataFrame): party data behind main_cds
+        xvar_str (string): x-axis column
+        yvar_str (string): y-axis column
+        start_year (int): initial first year of the slider window
+        cntrl_str (string): initial control definition, 'all', 'whsen', or
+            'whhou'
+        note_text_list (list): one list of note lines per control definition
+        x_buffer_pct (float): x-axis padding as a share of the data range
+            (0 pads the year axis by one year)
+        y_buffer_pct (float): y-axis padding as a share of the data range
+            (0 pads the y-axis by 3 percentage points)
+
+    Returns:
+        layout (Bokeh layout): widgets, figure, and summary table
+    """
+    min_year = int(main_df['year'].min())
+    max_year = int(main_df['year'].max())
+    cntrl_k = pc.cntrl_str_list.index(cntrl_str)
+    in_window = main_df['year'].to_numpy() >= start_year
+    code_arr = pc.control_codes(main_df)[cntrl_k]
+
+    filter_list = []
+    for p, party in enumerate(pc.party_str_list):
+        idx_filter = IndexFilter(
+            indices=np.flatnonzero(in_window & (code_arr == p)).tolist())
+        filter_list.append(idx_filter)
+        fig.circle(x=xvar_str, y=yvar_str, source=main_cds,
+                   view=CDSView(source=main_cds, filters=[idx_filter]),
+                   size=10, line_width=1, line_color='black',
+                   fill_color=pc.party_color_list[p], alpha=0.7,
+                   muted_alpha=0.2, legend_label=pc.party_label_list[p])
+
+    # Add notes below image, one caption per line of the longest note
+    n_captions = max([len(note_list) for note_list in note_text_list] + [0])
+    caption_list = []
+    for j in range(n_captions):
+        note_list = note_text_list[cntrl_k]
+        caption = Title(text=note_list[j] if j < len(note_list) else '',
+                        align='left', text_font_size='4mm',
+                        text_font_style='italic')
+        fig.add_layout(caption, 'below')
+        caption_list.append(caption)
+
+    slider = RangeSlider(start=min_year, end=max_year, step=1,
+                         value=(start_year, max_year), title='Years',
+                         width=500)
+    select = Select(title='Party control definition', value=cntrl_str,
+                    options=list(zip(pc.cntrl_str_list,
+                                     pc.panel_title_list)),
+                    width=400)
+    div = Div(width=600)
+    callback = CustomJS(
+        args=dict(source=main_cds, filters=filter_list, slider=slider,
+                  select=select, x_range=fig.x_range, y_range=fig.y_range,
+                  div=div, captions=caption_list),
+        code=('const xvar = ' + json.dumps(xvar_str) + ';\n' +
+              'const yvar = ' + json.dumps(yvar_str) + ';\n' +
+              'const tool_str = ' + json.dumps(tool_str_dict[yvar_str]) +
+              ';\n' +
+              'const cntrl_list = ' + json.dumps(pc.cntrl_str_list) + ';\n' +
+              'const party_label_list = ' +
+              json.dumps(pc.party_label_list) + ';\n' +
+              'const party_color_list = ' +
+              json.dumps(pc.party_color_list) + ';\n' +
+              'const note_text_list = ' + json.dumps(note_text_list) +
+              ';\n' +
+              'const x_buffer_pct = ' + str(x_buffer_pct) + ';\n' +
+              'const y_buffer_pct = ' + str(y_buffer_pct) + ';\n' +
+              update_js))
+    slider.js_on_change('value', callback)
+    select.js_on_change('value', callback)
+    fig.js_on_event(DocumentReady, callback)
+
+    layout = column(row(select, slider), fig, div)
+
+    return layout
+
+
+def gen_tseries_interactive(yvar_str='deficit_gdp', start_year='min',
+                            main_df=main_df, recession_df=recession_df,
+                            cntrl_str='all', note_text_list=[[], [], []],
+                            fig_title_str='', fig_path=''):
+    """
+    This function creates an interactive time-series plot of a variable as a
+    percent of GDP by party control. Unlike gen_tseries() in
+    tseries_def_rev_spnd_gdp.py, the start year and the control definition
+    are chosen in the browser.
+
+    Args:
+        yvar_str (string): either 'deficit_gdp', 'receipts_gdp', or
+            'spend_nonint_gdp'
+        start_year (int or 'min'): initial first year of the window
+        main_df (DataFrame): party data
+        recession_df (DataFrame): recession peak and trough dates
+        cntrl_str (string): initial control definition
+        note_text_list (list): one list of note lines per control definition
+        fig_title_str (string): figure title
+        fig_path (string): path of the output HTML file
+
+    Returns:
+        layout (Bokeh layout): widgets, figure, and summary table
+    """
+    min_year = int(main_df['year'].min())
+    max_year = int(main_df['year'].max())
+    if start_year == 'min':
+        start_year = min_year
+    else:
+        start_year = int(start_year)
+    window_df = main_df[main_df['year'] >= start_year]
+    min_yvar = window_df[yvar_str].min()
+    max_yvar = window_df[yvar_str].max()
+    main_cds = gen_party_cds(main_df, 'year', yvar_str)
+
+    # Output to HTML file
+    fig_title = fig_title_str
+    output_file(fig_path, title=fig_title)
+
+    fig = figure(title=fig_title,
+                 plot_height=650,
+                 plot_width=1100,
+                 x_axis_label='Year',
+                 x_range=(start_year - 1, max_year + 1),
+                 y_axis_label='Percent of Gross Domestic Product',
+                 y_range=(min_yvar - 3, max_yvar + 3),
+                 toolbar_location=None)
+
+    # Set title font size and axes font sizes
+    fig.title.text_font_size = '15.5pt'
+    fig.xaxis.axis_label_text_font_size = '12pt'
+    fig.xaxis.major_label_text_font_size = '12pt'
+    fig.yaxis.axis_label_text_font_size = '12pt'
+    fig.yaxis.major_label_text_font_size = '12pt'
+
+    # Modify tick intervals for X-axis and Y-axis
+    fig.xaxis.ticker = SingleIntervalTicker(interval=10, num_minor_ticks=2)
+    fig.xgrid.ticker = SingleIntervalTicker(interval=10)
+    fig.yaxis.ticker = SingleIntervalTicker(interval=5, num_minor_ticks=5)
+    fig.ygrid.ticker = SingleIntervalTicker(interval=5)
+
+    # Create recession bars for every recession in the data years. A
+    # recession that starts and ends in the same year is one year wide.
+    peak_year = recession_df['Peak'].dt.year.to_numpy()
+    trough_year = recession_df['Trough'].dt.year.to_numpy()
+    in_data = trough_year >= min_year
+    recession_cds = ColumnDataSource(dict(
+        left=peak_year[in_data],
+        right=np.where(peak_year == trough_year, trough_year + 1,
+                       trough_year)[in_data]))
+    fig.quad(left='left', right='right', bottom=-100, top=100,
+             source=recession_cds, fill_color='gray', fill_alpha=0.4,
+             line_width=0, legend_label='Recession')
+
+    # Plotting the line over all years; the x-range shows the window
+    fig.line(x='year', y=yvar_str, source=main_cds, color='#423D3C',
+             line_width=2)
+
+    layout = add_party_controls(fig, main_cds, main_df, 'year', yvar_str,
+                                start_year, cntrl_str, note_text_list,
+                                x_buffer_pct=0, y_buffer_pct=0)
+
+    # Add information on hover
+    tooltips = [('Year', '@year'),
+                (tool_str_dict[yvar_str], '@' + yvar_str + '{0.0}' + '%'),
+                ('President', '@president'),
+                ('White House', '@president_party'),
+                ('Rep. House Seats', '@rep_houseseats'),
+                ('Dem. House Seats', '@dem_houseseats'),
+                ('Rep. Senate Seats', '@rep_senateseats'),
+                ('Dem. Senate Seats', '@dem_senateseats')]
+    fig.circle(x='year', y=yvar_str, source=main_cds, size=10, alpha=0,
+               hover_fill_color='gray', hover_alpha=0.5)
+    fig.add_tools(HoverTool(tooltips=tooltips))
+
+    # Turn off scrolling
+    fig.toolbar.active_drag = None
+
+    # Add legend
+    fig.legend.location = 'bottom_center'
+    fig.legend.border_line_width = 2
+    fig.legend.border_line_color = 'black'
+    fig.legend.border_line_alpha = 1
+    fig.legend.label_text_font_size = '4mm'
+
+    # Set legend muting click policy
+    fig.legend.click_policy = 'mute'
+
+    return layout
+
+
+def gen_scatter_interactive(yvar_str='deficit_gdp',
+                            xvar_str='dem_senateseats', start_year='min',
+                            main_df=main_df, cntrl_str='all',
+                            note_text_list=[[], [], []], fig_title_str='',
+                            fig_path=''):
+    """
+    This function creates an interactive scatter plot of a variable as a
+    percent of GDP by the number of Democrat Senate or House seats and party
+    control. Unlike gen_scatter() in scatter_def_rev_spnd_party.py, the
+    start year and the control definition are chosen in the browser.
+
+    Args:
+        yvar_str (string): either 'deficit_gdp', 'receipts_gdp', or
+            'spend_nonint_gdp'
+        xvar_str (string): either 'dem_senateseats' or 'dem_houseseats'
+        start_year (int or 'min'): initial first year of the window
+        main_df (DataFrame): party data
+        cntrl_str (string): initial control definition
+        note_text_list (list): one list of note lines per control definition
+        fig_title_str (string): figure title
+        fig_path (string): path of the output HTML file
+
+    Returns:
+        layout (Bokeh layout): widgets, figure, and summary table
+    """
+    if start_year == 'min':
+        start_year = int(main_df['year'].min())
+    else:
+        start_year = int(start_year)
+    window_df = main_df[main_df['year'] >= start_year]
+    buffer_pct = 0.075
+    min_yvar = window_df[yvar_str].min()
+    max_yvar = window_df[yvar_str].max()
+    y_buffer = (max_yvar - min_yvar) * buffer_pct
+    min_seats = window_df[xvar_str].min()
+    max_seats = window_df[xvar_str].max()
+    x_buffer = (max_seats - min_seats) * buffer_pct
+    main_cds = gen_party_cds(main_df, xvar_str, yvar_str)
+
+    # Create x and y interval tick marks and majority line for each plot
+    if xvar_str == 'dem_senateseats':
+        x_tick_interval = 2
+        mid_line = 50
+        seat_type = 'Senate'
+    elif xvar_str == 'dem_houseseats':
+        x_tick_interval = 10
+        mid_line = 217.5
+        seat_type = 'House'
+    if yvar_str == 'receipts_gdp':
+        y_tick_interval = 2
+    else:
+        y_tick_interval = 5
+
+    # Output to HTML file
+    fig_title = fig_title_str
+    output_file(fig_path, title=fig_title)
+
+    fig = figure(title=fig_title,
+                 plot_height=650,
+                 plot_width=1100,
+                 x_axis_label='Democrat ' + seat_type + ' seats',
+                 x_range=(min_seats - x_buffer, max_seats + x_buffer),
+                 y_axis_label='Percent of Gross Domestic Product',
+                 y_range=(min_yvar - y_buffer, max_yvar + y_buffer),
+                 toolbar_location=None)
+
+    # Set title font size and axes font sizes
+    fig.title.text_font_size = '15.5pt'
+    fig.xaxis.axis_label_text_font_size = '12pt'
+    fig.xaxis.major_label_text_font_size = '12pt'
+    fig.yaxis.axis_label_text_font_size = '12pt'
+    fig.yaxis.major_label_text_font_size = '12pt'
+
+    # Modify tick intervals for X-axis and Y-axis
+    fig.yaxis.ticker = \
+        SingleIntervalTicker(interval=y_tick_interval,
+                             num_minor_ticks=y_tick_interval)
+    fig.ygrid.ticker = SingleIntervalTicker(interval=y_tick_interval)
+    fig.xaxis.ticker = \
+        SingleIntervalTicker(interval=x_tick_interval, num_minor_ticks=2)
+    fig.xgrid.ticker = SingleIntervalTicker(interval=x_tick_interval)
+
+    layout = add_party_controls(fig, main_cds, main_df, xvar_str, yvar_str,
+                                start_year, cntrl_str, note_text_list,
+                                x_buffer_pct=buffer_pct,
+                                y_buffer_pct=buffer_pct)
+
+    fig.segment(x0=mid_line, y0=-40, x1=mid_line, y1=40, color='black',
+                line_dash='6 2', line_width=2)
+
+    # Add information on hover over the markers in the window
+    tooltips = [('Year', '@year'),
+                (tool_str_dict[yvar_str], '@' + yvar_str + '{0.0}' + '%'),
+                ('President', '@president'),
+                ('White House', '@president_party'),
+                ('Rep. House Seats', '@rep_houseseats'),
+                ('Dem. House Seats', '@dem_houseseats'),
+                ('Rep. Senate Seats', '@rep_senateseats'),
+                ('Dem. Senate Seats', '@dem_senateseats')]
+    fig.add_tools(HoverTool(tooltips=tooltips,
+                            renderers=[rend for rend in fig.renderers
+                                       if rend.data_source is main_cds]))
+
+    # Turn off scrolling
+    fig.toolbar.active_drag = None
+
+    # Add legend
+    if yvar_str == 'deficit_gdp':
+        fig.legend.location = 'bottom_right'
+    else:
+        fig.legend.location = 'top_right'
+    fig.legend.border_line_width = 2
+    fig.legend.border_line_color = 'black'
+    fig.legend.border_line_alpha = 1
+    fig.legend.label_text_font_size = '4mm'
+
+    # Set legend muting click policy
+    fig.legend.click_policy = 'mute'
+
+    return layout
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    source_note = \
+        [
+            ('Source: Federal Reserve Economic Data (FRED, ' +
+             'FYFSGDA188S, FYONDA188S, FYOIDA188S, FYFRGDA188S); United ' +
+             'States House of Representa-'),
+            ('   tives History, Art, & Archives, "Party Divisions of ' +
+             'the House of Representatives, 1789 to present"; United ' +
+             'States Senate, Art & History,'),
+            ('   Party Division; Richard W. Evans (@rickecon).')
+        ]
+    note_text_list = [source_note, source_note, source_note]
+
+    # Create interactive deficits-to-GDP time series by party control
+    fig_title = ('U.S. Federal Surplus (+) or Deficit (-) as Percent of ' +
+                 'Gross Domestic Product by Party Control')
+    fig_path = os.path.join(images_dir,
+                            'tseries_deficit_gdp_party_interactive.html')
+    tseries_deficit_gdp_interactive = \
+        gen_tseries_interactive(yvar_str='deficit_gdp', start_year=1947,
+                                note_text_list=note_text_list,
+                                fig_title_str=fig_title, fig_path=fig_path)
+    show(tseries_deficit_gdp_interactive)
+
+    # Create interactive deficits-to-GDP by Democrat Senate seats scatterplot
+    fig_title = ('U.S. Federal Deficits as Percent of GDP by Democrat ' +
+                 'Senate Seats')
+    fig_path = os.path.join(images_dir,
+                            'scatter_defgdp_senateseats_interactive.html')
+    scatter_defgdp_senateseats_interactive = \
+        gen_scatter_interactive(yvar_str='deficit_gdp',
+                                xvar_str='dem_senateseats', start_year=1947,
+                                note_text_list=note_text_list,
+                                fig_title_str=fig_title, fig_path=fig_path)
+    show(scatter_defgdp_senateseats_interactive)
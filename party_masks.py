@@ -0,0 +1,506 @@
+'''
+This module restricts the party-control statistics to subsets of years,
+e.g. excluding recession years, war years, or the pandemic years 2020-2021:
+
+* YearMask: a set of years stored as a bitset over a range of years, with
+  the operators & (AND), | (OR), and ~ (NOT)
+* episode_mask(): the years that overlap any of some dated episodes
+  (intervals of dates), from one vectorized comparison of every episode
+  with every year. declared_masks() builds the masks of the NBER recessions
+  of recession_data.csv and of the episodes in episode_dict.
+* exclusion_variants(): the masks of the years outside every combination of
+  some episodes
+* masked_cube() and masked_regressions(): the summary cube of
+  party_stats.party_cube() and the seat regressions of
+  party_stats.seat_regressions() of a Scenario under many masks at once.
+  The contributions of the rows to the sums are computed once, and all
+  masks are one matrix product with them, so dozens of variants cost
+  little more than one.
+* gen_mask_fig(): the party means of one variable under each mask
+
+If a user runs this module as a script, it will print the statistics of
+1947-2020 under every combination of excluding the recession, war, and
+pandemic years, check them against party_stats.py, and create the figures.
+'''
+
+# Import packages
+import itertools
+import os
+import numpy as np
+import pandas as pd
+from bokeh.io import output_file
+from bokeh.plotting import figure, show
+from bokeh.models import (ColumnDataSource, HoverTool, Title, Whisker,
+                          FactorRange)
+from bokeh.models.widgets import Tabs, Panel
+from bokeh.transform import dodge
+import party_control as pc
+import party_stats as ps
+
+# Set paths to work across Mac/Windows/Linux platforms
+cur_path = os.path.split(os.path.abspath(__file__))[0]
+images_dir = os.path.join(cur_path, 'images')
+
+# Declared episodes as (start date, end date) intervals: the U.S.
+# involvement in World War II, the Korean War, the Vietnam War (Gulf of
+# Tonkin Resolution to the withdrawal of U.S. troops), and the Gulf War; and
+# the COVID-19 pandemic years
+episode_dict = {
+    'war': [('1941-12-08', '1945-09-02'), ('1950-06-25', '1953-07-27'),
+            ('1964-08-07', '1973-03-29'), ('1990-08-02', '1991-02-28')],
+    'covid': [('2020-01-01', '2021-12-31')]}
+
+
+class YearMask:
+    """
+    This class holds a set of years within a range of consecutive years as
+    a bitset (numpy.packbits), one bit per year. Masks of the same range
+    combine with & (AND), | (OR), ^ (XOR), and ~ (NOT).
+
+    Args:
+        first_year (int): first year of the range
+        bool_vec (array_like): (T,) whether each year of the range is in the
+            set
+        label (string): name of the mask
+    """
+
+    def __init__(self, first_year, bool_vec, label=''):
+        bool_vec = np.asarray(bool_vec, dtype=bool)
+        self.first_year = int(first_year)
+        self.n_years = len(bool_vec)
+        self.bits = np.packbits(bool_vec)
+        self.label = label
+
+    def to_bool(self):
+        """
+        This method returns the mask as a boolean vector over its range of
+        years.
+        """
+        return np.unpackbits(self.bits, count=self.n_years).astype(bool)
+
+    def years(self):
+        """
+        This method returns the years in the set.
+        """
+        return self.first_year + np.flatnonzero(self.to_bool())
+
+    def align(self, year_vec):
+        """
+        This method returns whether each of some years is in the set (years
+        outside the range of the mask are not).
+        """
+        pos_vec = np.asarray(year_vec) - self.first_year
+        inside = (pos_vec >= 0) & (pos_vec < self.n_years)
+        bool_vec = np.zeros(len(pos_vec), dtype=bool)
+        bool_vec[inside] = self.to_bool()[pos_vec[inside]]
+
+        return bool_vec
+
+    def __len__(self):
+        return int(np.unpackbits(self.bits).sum())
+
+    def combine(self, other, bits, op_str):
+        """
+        This method returns the mask of the packed bits of an operation on
+        this mask and another mask of the same range of years.
+        """
+        if (other.first_year, other.n_years) != (self.first_year,
+                                                  self.n_years):
+            raise ValueError('masks of different ranges of years')
+        mask = YearMask(self.first_year, np.zeros(0, dtype=bool),
+                        '(' + self.label + op_str + other.label + ')')
+        mask.n_years = self.n_years
+        mask.bits = bits
+
+        return mask
+
+    def __and__(self, other):
+        return self.combine(other, self.bits & other.bits, ' & ')
+
+    def __or__(self, other):
+        return self.combine(other, self.bits | other.bits, ' | ')
+
+    def __xor__(self, other):
+        return self.combine(other, self.bits ^ other.bits, ' ^ ')
+
+    def __invert__(self):
+        # Inverting the packed bits would also set the padding bits of the
+        # last byte
+        return YearMask(self.first_year, ~self.to_bool(), '~' + self.label)
+
+    def __repr__(self):
+        return ('YearMask(' + self.label + ': ' + str(len(self)) + ' of ' +
+                str(self.n_years) + ' years from ' + str(self.first_year) +
+                ')')
+
+
+def episode_mask(start_list, end_list, year_vec, rule='any', label=''):
+    """
+    This function returns the mask of the years that overlap some dated
+    episodes.
+
+    Args:
+        start_list (list): start dates of the episodes (strings or
+            datetimes)
+        end_list (list): end dates of the episodes
+        year_vec (array_like): (T,) consecutive years of the mask
+        rule (string): 'any' (a year is in the mask if any of its days is in
+            an episode) or 'majority' (more than half of its days are)
+        label (string): name of the mask
+
+    Returns:
+        mask (YearMask): the years in the episodes
+    """
+    year_vec = np.asarray(year_vec, dtype=np.int64)
+    start_vec = pd.to_datetime(pd.Series(start_list)).to_numpy(
+        dtype='datetime64[D]')
+    # The end date is the last day of an episode
+    end_vec = (pd.to_datetime(pd.Series(end_list)).to_numpy(
+        dtype='datetime64[D]') + np.timedelta64(1, 'D'))
+    year_start = (year_vec - 1970).astype('datetime64[Y]').astype(
+        'datetime64[D]')
+    year_end = (year_vec - 1969).astype('datetime64[Y]').astype(
+        'datetime64[D]')
+    # (E, T) days of each episode within each year
+    overlap_mat = (np.minimum(end_vec[:, None], year_end[None, :]) -
+                   np.maximum(start_vec[:, None], year_start[None, :]))
+    overlap_mat = np.maximum(overlap_mat.astype(np.int64), 0)
+    if rule == 'any':
+        bool_vec = (overlap_mat > 0).any(axis=0)
+    elif rule == 'majority':
+        n_days = (year_end - year_start).astype(np.int64)
+        bool_vec = 2 * np.minimum(overlap_mat.sum(axis=0), n_days) > n_days
+    else:
+        raise ValueError('rule must be any or majority')
+
+    return YearMask(year_vec[0], bool_vec, label)
+
+
+def declared_masks(year_vec, rule='any', recession_df=None):
+    """
+    This function returns the masks of the NBER recessions and of the
+    episodes of episode_dict.
+
+    Args:
+        year_vec (array_like): (T,) consecutive years of the masks
+        rule (string): 'any' or 'majority', see episode_mask()
+        recession_df (DataFrame): NBER recessions, read_recession_data() if
+            None
+
+    Returns:
+        mask_dict (dict): 'recession' and the keys of episode_dict ->
+            YearMask
+    """
+    if recession_df is None:
+        recession_df = pc.read_recession_data()
+    mask_dict = {'recession': episode_mask(recession_df['Peak'],
+                                           recession_df['Trough'], year_vec,
+                                           rule, 'recession')}
+    for name, episode_list in episode_dict.items():
+        start_list, end_list = zip(*episode_list)
+        mask_dict[name] = episode_mask(start_list, end_list, year_vec, rule,
+                                       name)
+
+    return mask_dict
+
+
+def exclusion_variants(mask_dict, name_list=None):
+    """
+    This function returns the masks of the years outside every combination
+    of some episodes, e.g. 'ex recession+covid' for the years that are in
+    neither the recession nor the covid mask.
+
+    Args:
+        mask_dict (dict): name -> YearMask of the episodes, all of the same
+            range of years
+        name_list (list): names of the episodes to combine, all if None
+
+    Returns:
+        variant_dict (dict): label -> YearMask, starting with 'all years'
+            and then by number of excluded episodes
+    """
+    if name_list is None:
+        name_list = list(mask_dict)
+    first_mask = mask_dict[name_list[0]]
+    variant_dict = {'all years': YearMask(
+        first_mask.first_year, np.ones(first_mask.n_years, dtype=bool),
+        'all years')}
+    for n_ex in range(1, len(name_list) + 1):
+        for combo in itertools.combinations(name_list, n_ex):
+            excl_mask = mask_dict[combo[0]]
+            for name in combo[1:]:
+                excl_mask = excl_mask | mask_dict[name]
+            label = 'ex ' + '+'.join(combo)
+            variant_mask = ~excl_mask
+            variant_mask.label = label
+            variant_dict[label] = variant_mask
+
+    return variant_dict
+
+
+def mask_matrix(mask_dict, year_vec):
+    """
+    This function returns the masks as rows of a float matrix over some
+    years.
+
+    Args:
+        mask_dict (dict): label -> YearMask
+        year_vec (array_like): (R,) years
+
+    Returns:
+        mask_mat (array_like): (M, R) ones for the years in each mask
+    """
+    return np.array([mask.align(year_vec) for mask in mask_dict.values()],
+                    dtype=np.float64)
+
+
+def masked_cube(scen, mask_dict, var_list=ps.var_str_list, cntrl_list=None):
+    """
+    This function computes the summary cube of a Scenario under many masks
+    at once: the contributions of the rows of the window are computed once
+    and summed under every mask with one matrix product.
+
+    Args:
+        scen (Scenario): window of years and overlay of the party data
+        mask_dict (dict): label -> YearMask of the years kept
+        var_list (list): names of the variables to summarize
+        cntrl_list (list): control definitions, all of the base if None
+
+    Returns:
+        cube_df (DataFrame): columns 'n', 'mean', and 'std' indexed by
+            (mask, cntrl, party, var)
+    """
+    base = scen.base
+    if cntrl_list is None:
+        cntrl_list = base.cntrl_list
+    c_idx = [base.cntrl_list.index(cntrl) for cntrl in cntrl_list]
+    v_idx = [base.var_pos_dict[var] for var in var_list]
+    val_mat = np.stack([scen.values(var) for var in var_list])
+    code_mat = base.code_mat[c_idx, scen.lo:scen.hi]
+    # (3, C, P, V, R) contributions, summed under each mask: (M, 3, C, P, V)
+    sum_arr = base.contributions(val_mat, code_mat, v_idx)
+    mask_mat = mask_matrix(mask_dict, base.year_vec[scen.lo:scen.hi])
+    sum_arr = np.moveaxis(sum_arr @ mask_mat.T, -1, 0)
+    n_arr = np.rint(sum_arr[:, 0])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dev_mean = sum_arr[:, 1] / n_arr
+        mean_arr = dev_mean + base.shift_vec[v_idx]
+        std_arr = np.sqrt(np.maximum(sum_arr[:, 2] - n_arr * dev_mean ** 2,
+                                     0.0) / (n_arr - 1))
+    std_arr[n_arr < 2] = np.nan
+    index = base.index([list(mask_dict), cntrl_list, pc.party_str_list,
+                        var_list], ['mask', 'cntrl', 'party', 'var'])
+    cube_df = pd.DataFrame({'n': n_arr.ravel().astype(np.int64),
+                            'mean': mean_arr.ravel(),
+                            'std': std_arr.ravel()}, index=index)
+
+    return cube_df
+
+
+def masked_regressions(scen, mask_dict, yvar_list=ps.var_str_list,
+                       xvar_list=ps.seat_var_list, cntrl_str='whsen'):
+    """
+    This function computes the seat regressions of a Scenario (with
+    classical standard errors) under many masks at once.
+
+    Args:
+        scen (Scenario): window of years and overlay of the party data
+        mask_dict (dict): label -> YearMask of the years kept
+        yvar_list (list): names of the dependent variables
+        xvar_list (list): names of the seat regressors
+        cntrl_str (string): definition of party control
+
+    Returns:
+        reg_df (DataFrame): columns 'n', 'const', 'slope', 'se_const',
+            'se_slope', and 'r2' indexed by (mask, party, yvar, xvar)
+    """
+    base = scen.base
+    y_idx = [base.var_pos_dict[var] for var in yvar_list]
+    x_idx = [base.var_pos_dict[var] for var in xvar_list]
+    code_vec = base.code_mat[base.cntrl_list.index(cntrl_str),
+                             scen.lo:scen.hi]
+    # (6, 2, Y, X, R) contributions, summed under each mask
+    sum_arr = base.reg_contributions(
+        np.stack([scen.values(var) for var in yvar_list]),
+        np.stack([scen.values(var) for var in xvar_list]), code_vec,
+        base.shift_vec[y_idx], base.shift_vec[x_idx])
+    mask_mat = mask_matrix(mask_dict, base.year_vec[scen.lo:scen.hi])
+    sum_arr = np.moveaxis(sum_arr @ mask_mat.T, -1, 1)
+    n_arr = np.rint(sum_arr[0])
+    ols_dict = ps.simple_ols(
+        n_arr, sum_arr[1], sum_arr[2], sum_arr[3], sum_arr[4], sum_arr[5],
+        shift_x=base.shift_vec[x_idx][None, None, None, :],
+        shift_y=base.shift_vec[y_idx][None, None, :, None])
+    index = base.index([list(mask_dict), pc.party_str_list[:2], yvar_list,
+                        xvar_list], ['mask', 'party', 'yvar', 'xvar'])
+    col_dict = {'n': n_arr.ravel().astype(np.int64)}
+    for key in ['const', 'slope', 'se_const', 'se_slope', 'r2']:
+        col_dict[key] = ols_dict[key].ravel()
+    reg_df = pd.DataFrame(col_dict, index=index)
+
+    return reg_df
+
+
+def gen_mask_fig(cube_df, var_str, y_axis_label='', note_text_list=[],
+                 fig_title_str='', fig_path=''):
+    """
+    This function creates a figure of the mean of one variable by party
+    under each mask, with 95 percent confidence intervals of the means, one
+    panel per definition of party control, in the styling of the figures of
+    this repository.
+
+    Args:
+        cube_df (DataFrame): output of masked_cube()
+        var_str (string): name of the variable
+        y_axis_label (string): label of the y-axis
+        note_text_list (list): notes below each panel
+        fig_title_str (string): title of the figure
+        fig_path (string): path of the HTML file
+
+    Returns:
+        tabs (Tabs): one panel per control definition of cube_df
+    """
+    output_file(fig_path, title=fig_title_str)
+    var_df = cube_df.xs(var_str, level='var').copy()
+    with np.errstate(invalid='ignore'):
+        half_width = 1.96 * var_df['std'] / np.sqrt(var_df['n'])
+    var_df['lo'] = var_df['mean'] - half_width
+    var_df['hi'] = var_df['mean'] + half_width
+    mask_list = list(var_df.index.unique(level='mask'))
+    min_val = var_df['lo'].min()
+    max_val = var_df['hi'].max()
+    val_buffer = 0.1 * (max_val - min_val)
+    tab_list = []
+    for c, cntrl in enumerate(pc.cntrl_str_list):
+        if cntrl not in var_df.index.get_level_values('cntrl'):
+            continue
+        fig = figure(title=fig_title_str,
+                     plot_height=650,
+                     plot_width=1100,
+                     x_range=FactorRange(*mask_list),
+                     y_axis_label=y_axis_label,
+                     y_range=(min_val - val_buffer, max_val + val_buffer),
+                     toolbar_location=None)
+
+        # Set title font size and axes font sizes
+        fig.title.text_font_size = '15.5pt'
+        fig.xaxis.axis_label_text_font_size = '12pt'
+        fig.xaxis.major_label_text_font_size = '12pt'
+        fig.xaxis.major_label_orientation = 0.5
+        fig.yaxis.axis_label_text_font_size = '12pt'
+        fig.yaxis.major_label_text_font_size = '12pt'
+
+        # Plot the mean and confidence interval of each party
+        for p, party in enumerate(pc.party_str_list):
+            party_df = var_df.xs((cntrl, party),
+                                 level=('cntrl', 'party')).reset_index()
+            party_df['label'] = pc.party_label_list[p]
+            cds = ColumnDataSource(party_df)
+            x_dodge = dodge('mask', 0.25 * (p - 1), range=fig.x_range)
+            fig.add_layout(Whisker(source=cds, base=x_dodge, upper='hi',
+                                   lower='lo',
+                                   line_color=pc.party_color_list[p]))
+            fig.circle(x=x_dodge, y='mean', source=cds, size=10,
+                       line_width=1, line_color='black',
+                       fill_color=pc.party_color_list[p], alpha=0.7,
+                       muted_alpha=0.2, legend_label=pc.party_label_list[p])
+
+        # Add information on hover
+        tooltips = [('Years', '@mask'), ('Party', '@label'),
+                    ('Mean', '@mean{0.00}'),
+                    ('95% CI', '@lo{0.00} to @hi{0.00}'), ('Years', '@n')]
+        fig.add_tools(HoverTool(tooltips=tooltips))
+
+        # Turn off scrolling
+        fig.toolbar.active_drag = None
+
+        # Add legend
+        fig.legend.location = 'top_left'
+        fig.legend.border_line_width = 2
+        fig.legend.border_line_color = 'black'
+        fig.legend.border_line_alpha = 1
+        fig.legend.label_text_font_size = '4mm'
+
+        # Set legend muting click policy
+        fig.legend.click_policy = 'mute'
+
+        # Add notes below image
+        for note_text in note_text_list:
+            caption = Title(text=note_text, align='left',
+                            text_font_size='4mm', text_font_style='italic')
+            fig.add_layout(caption, 'below')
+
+        tab_list.append(Panel(child=fig, title=pc.panel_title_list[c]))
+
+    tabs = Tabs(tabs=tab_list)
+
+    return tabs
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    import time
+    import party_scenarios as psc
+    main_df = pc.read_party_data()
+    party_base = psc.PartyBase(main_df)
+    scen = psc.Scenario(party_base, 1947, 2020)
+    mask_dict = declared_masks(party_base.year_vec)
+    for mask in mask_dict.values():
+        print(mask, mask.years().tolist())
+    variant_dict = exclusion_variants(mask_dict)
+    cube_df = masked_cube(scen, variant_dict)
+    reg_df = masked_regressions(scen, variant_dict)
+    with pd.option_context('display.width', 120, 'display.max_rows', 100):
+        print(cube_df.xs('whsen', level='cntrl')['mean'].unstack(
+            ['party']).round(2))
+        print(reg_df.xs('dem_senateseats', level='xvar')[
+            ['n', 'slope', 'se_slope']].round(3))
+
+    # Check against party_stats.py on the rows of each variant
+    max_diff = 0.0
+    window_df = ps.year_window(main_df, 1947, 2020)
+    for label, mask in variant_dict.items():
+        sub_df = window_df[mask.align(window_df['year'])]
+        check_df = ps.party_cube(sub_df)
+        max_diff = max(max_diff, np.nanmax(np.abs(
+            cube_df.loc[label].to_numpy() - check_df.to_numpy())))
+        check_df = ps.seat_regressions(sub_df)
+        max_diff = max(max_diff, np.nanmax(np.abs(
+            reg_df.loc[label, check_df.columns].to_numpy() -
+            check_df.to_numpy())))
+    print('Max. abs. difference from party_stats.py: ' +
+          '{:.2e}'.format(max_diff))
+
+    # Time many variants against one
+    many_dict = dict(variant_dict)
+    for rule in ['any', 'majority']:
+        rule_dict = declared_masks(party_base.year_vec, rule)
+        for label, mask in exclusion_variants(rule_dict).items():
+            many_dict[label + ' (' + rule + ')'] = mask
+    for label, var_dict in [('1 mask', {'all years':
+                                        variant_dict['all years']}),
+                            (str(len(many_dict)) + ' masks', many_dict)]:
+        start_time = time.perf_counter()
+        for _ in range(100):
+            masked_cube(scen, var_dict)
+            masked_regressions(scen, var_dict)
+        print('Cube and regressions under ' + label + ': ' +
+              '{:.2f} ms'.format(10 * (time.perf_counter() - start_time)))
+
+    note_text_list = \
+        ['Note: Means and 95 percent confidence intervals of the years of ' +
+         'each party control, 1947-2020, excluding the years that overlap',
+         '   NBER recessions, U.S. wars (WWII, Korea, Vietnam, Gulf War), ' +
+         'or the COVID-19 pandemic (2020-2021).']
+    for var, title in [('deficit_gdp', 'Deficits'),
+                       ('spend_nonint_gdp', 'Non-interest Spending'),
+                       ('receipts_gdp', 'Revenues')]:
+        mask_tabs = gen_mask_fig(
+            cube_df, var, y_axis_label='Percent of GDP',
+            note_text_list=note_text_list,
+            fig_title_str=('U.S. Federal ' + title + ' as Percent of GDP ' +
+                           'by Party Control and Excluded Years'),
+            fig_path=os.path.join(images_dir, 'mask_' + var + '.html'))
+        show(mask_tabs)
@@ -0,0 +1,355 @@
+'''
+This module runs the party-control analysis on a panel of jurisdictions
+(e.g., the 50 U.S. states or OECD countries) instead of the one national
+time series of deficit_party_data.csv. A panel has the columns of
+deficit_party_data.csv for every jurisdiction and year plus a jurisdiction
+key column. For a state, the executive party column holds the party of the
+governor and the Senate and House columns hold the two state legislative
+chambers.
+
+The rows are sorted by jurisdiction once, and every statistic is a
+vectorized reduction over the sorted group offsets (numpy.add.reduceat), so
+the summary cube and the seat regressions of all jurisdictions, control
+definitions, parties, and variables cost a few array passes:
+
+* panel_cube(): party_stats.party_cube() for every jurisdiction
+* panel_regressions(): party_stats.seat_regressions() for every
+  jurisdiction
+* panel_figures(): the gen_tseries() or gen_scatter() figure of every
+  jurisdiction, built and saved in parallel by a process pool
+
+If a user runs this module as a script, it will run the analysis on a
+synthetic panel of 50 jurisdictions from synth_party_data.py.
+'''
+
+# Import packages
+import argparse
+import concurrent.futures
+import os
+import time
+import numpy as np
+import pandas as pd
+import party_control as pc
+import party_stats as ps
+
+# Set paths to work across Mac/Windows/Linux platforms
+cur_path = os.path.split(os.path.abspath(__file__))[0]
+images_dir = os.path.join(cur_path, 'images')
+panel_images_dir = os.path.join(images_dir, 'panel')
+
+default_key_var = 'jurisdiction'
+default_exec_var = 'president_party'
+
+
+class PanelGroups(object):
+    """
+    Rows of a panel sorted by jurisdiction, with the offsets at which the
+    rows of each jurisdiction start. Arrays are sorted once with take() and
+    reduced per jurisdiction with reduce().
+    """
+    def __init__(self, panel_df, key_var=default_key_var):
+        keys = panel_df[key_var].to_numpy()
+        if keys.size > 1 and np.any(keys[1:] < keys[:-1]):
+            self.order = np.argsort(keys, kind='stable')
+            keys = keys[self.order]
+        else:
+            self.order = None
+        start = np.r_[True, keys[1:] != keys[:-1]] if keys.size else \
+            np.zeros(0, dtype=bool)
+        self.offsets = np.flatnonzero(start)
+        self.keys = keys[self.offsets]
+        self.key_var = key_var
+        self.sizes = np.diff(np.r_[self.offsets, keys.size])
+
+    def take(self, arr, axis=-1):
+        """
+        This method returns an array in jurisdiction order along an axis.
+        """
+        if self.order is None:
+            return np.asarray(arr)
+        return np.take(arr, self.order, axis=axis)
+
+    def reduce(self, arr, axis=-1):
+        """
+        This method sums a sorted array over the rows of each jurisdiction
+        along an axis.
+        """
+        if self.offsets.size == 0:
+            shape = list(np.shape(arr))
+            shape[axis] = 0
+            return np.zeros(shape)
+        return np.add.reduceat(arr, self.offsets, axis=axis)
+
+    def frame(self, panel_df):
+        """
+        This method returns the DataFrame of each jurisdiction as views of
+        the panel in jurisdiction order.
+        """
+        if self.order is not None:
+            panel_df = panel_df.iloc[self.order]
+        bound_list = np.r_[self.offsets, len(panel_df)]
+        frame_dict = {}
+        for k, key in enumerate(self.keys):
+            frame_dict[key] = panel_df.iloc[bound_list[k]:bound_list[k + 1]]
+        return frame_dict
+
+
+def panel_window(panel_df, start_year=1947, end_year=2020):
+    """
+    This function returns the rows of a panel in a range of years, or the
+    panel itself if all of its rows are in the range.
+    """
+    year = panel_df['year'].to_numpy()
+    keep = (year >= start_year) & (year <= end_year)
+    if keep.all():
+        return panel_df
+    return panel_df[keep]
+
+
+def panel_cube(panel_df, key_var=default_key_var, var_list=ps.var_str_list,
+               cntrl_list=pc.cntrl_str_list, start_year=1947, end_year=2020,
+               exec_var=default_exec_var):
+    """
+    This function computes the summary statistics of party_cube() for every
+    jurisdiction of a panel.
+
+    Args:
+        panel_df (DataFrame): panel with the columns of deficit_party_data.csv
+            and a jurisdiction key column
+        key_var (string): name of the jurisdiction key column
+        var_list (list): names of the variables to summarize
+        cntrl_list (list): control definitions, keys of cntrl_maj_dict
+        start_year (int): first year of the sample
+        end_year (int): last year of the sample
+        exec_var (string): name of the executive (president or governor)
+            party column
+
+    Returns:
+        cube_df (DataFrame): columns 'n', 'mean', and 'std' indexed by
+            (key_var, cntrl, party, var)
+    """
+    window_df = panel_window(panel_df, start_year, end_year)
+    groups = PanelGroups(window_df, key_var)
+    code_mat = groups.take(pc.control_codes(window_df, cntrl_list, exec_var))
+    val_mat = groups.take(window_df[var_list].to_numpy(dtype=np.float64),
+                          axis=0)
+    valid_mat = ~np.isnan(val_mat)
+    val_mat = np.where(valid_mat, val_mat, 0.0)
+    n_party = len(pc.party_str_list)
+    # (cntrl, party, row) masks against (row, var) values: the sums of each
+    # jurisdiction are one reduceat over the row axis
+    mask_arr = (code_mat[:, None, :] ==
+                np.arange(n_party)[None, :, None])[..., None]
+    n_arr = groups.reduce(mask_arr & valid_mat, axis=2).astype(np.float64)
+    sum_arr = groups.reduce(np.where(mask_arr, val_mat, 0.0), axis=2)
+    sq_arr = groups.reduce(np.where(mask_arr, val_mat ** 2, 0.0), axis=2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_arr = sum_arr / n_arr
+        dev_arr = sq_arr - n_arr * mean_arr ** 2
+        std_arr = np.sqrt(np.maximum(dev_arr, 0.0) / (n_arr - 1))
+    std_arr[n_arr < 2] = np.nan
+    # (cntrl, party, jurisdiction, var) to (jurisdiction, cntrl, party, var)
+    index = pd.MultiIndex.from_product(
+        [groups.keys, cntrl_list, pc.party_str_list, var_list],
+        names=[key_var, 'cntrl', 'party', 'var'])
+    cube_df = pd.DataFrame(
+        {'n': n_arr.transpose(2, 0, 1, 3).ravel().astype(np.int64),
+         'mean': mean_arr.transpose(2, 0, 1, 3).ravel(),
+         'std': std_arr.transpose(2, 0, 1, 3).ravel()}, index=index)
+
+    return cube_df
+
+
+def panel_regressions(panel_df, key_var=default_key_var,
+                      yvar_list=ps.var_str_list, xvar_list=ps.seat_var_list,
+                      cntrl_str='whsen', start_year=1947, end_year=2020,
+                      exec_var=default_exec_var):
+    """
+    This function runs the seat regressions of seat_regressions() for every
+    jurisdiction of a panel from the sums of each jurisdiction, party, and
+    variable pair with party_stats.simple_ols(). The variables are centered
+    on their panel means before they are summed.
+
+    Args:
+        panel_df (DataFrame): panel with the columns of deficit_party_data.csv
+            and a jurisdiction key column
+        key_var (string): name of the jurisdiction key column
+        yvar_list (list): names of the dependent variables
+        xvar_list (list): names of the seat regressors
+        cntrl_str (string): definition of party control, either 'all',
+            'whsen', or 'whhou'
+        start_year (int): first year of the sample
+        end_year (int): last year of the sample
+        exec_var (string): name of the executive party column
+
+    Returns:
+        reg_df (DataFrame): columns 'n', 'const', 'slope', 'se_const',
+            'se_slope', and 'r2' indexed by (key_var, party, yvar, xvar)
+    """
+    window_df = panel_window(panel_df, start_year, end_year)
+    groups = PanelGroups(window_df, key_var)
+    code_vec = groups.take(
+        pc.control_codes(window_df, [cntrl_str], exec_var)[0])
+    party_list = pc.party_str_list[:2]
+    # (party, row, 1) masks against (row, var) values
+    mask_arr = (code_vec[None, :] ==
+                np.arange(len(party_list))[:, None])[..., None]
+    y_mat = groups.take(window_df[yvar_list].to_numpy(dtype=np.float64),
+                        axis=0)
+    x_mat = groups.take(window_df[xvar_list].to_numpy(dtype=np.float64),
+                        axis=0)
+    y_shift = np.nanmean(y_mat, axis=0) if len(y_mat) else 0.0
+    x_shift = np.nanmean(x_mat, axis=0) if len(x_mat) else 0.0
+    y_mat = y_mat - y_shift
+    x_mat = x_mat - x_shift
+    res_list = []
+    for j, xvar in enumerate(xvar_list):
+        # Rows with both y and x observed, for all y variables at once
+        x_vec = x_mat[:, j:j + 1]
+        use = mask_arr & ~np.isnan(y_mat) & ~np.isnan(x_vec)
+        y_use = np.where(use, y_mat, 0.0)
+        x_use = np.where(use, x_vec, 0.0)
+        sum_dict = {'n': groups.reduce(use, axis=1),
+                    'sum_x': groups.reduce(x_use, axis=1),
+                    'sum_y': groups.reduce(y_use, axis=1),
+                    'sum_xx': groups.reduce(x_use ** 2, axis=1),
+                    'sum_xy': groups.reduce(x_use * y_use, axis=1),
+                    'sum_yy': groups.reduce(y_use ** 2, axis=1)}
+        ols_dict = ps.simple_ols(shift_x=x_shift[j], shift_y=y_shift,
+                                 **sum_dict)
+        ols_dict['n'] = sum_dict['n']
+        res_list.append(ols_dict)
+    # Arrays of res_list[j][col] are (party, jurisdiction, yvar)
+    col_list = ['n', 'const', 'slope', 'se_const', 'se_slope', 'r2']
+    col_dict = {}
+    for col in col_list:
+        col_arr = np.stack([res_dict[col] for res_dict in res_list], axis=-1)
+        col_dict[col] = col_arr.transpose(1, 0, 2, 3).ravel()
+    col_dict['n'] = col_dict['n'].astype(np.int64)
+    index = pd.MultiIndex.from_product(
+        [groups.keys, party_list, yvar_list, xvar_list],
+        names=[key_var, 'party', 'yvar', 'xvar'])
+    reg_df = pd.DataFrame(col_dict, index=index)[col_list]
+
+    return reg_df
+
+
+def render_jurisdiction(kind, key, sub_df, yvar_str, xvar_str, start_year,
+                        fig_path):
+    """
+    This function builds and saves the figure of one jurisdiction. It runs
+    in a worker process, so it imports the builders itself.
+
+    Args:
+        kind (string): either 'tseries' or 'scatter'
+        key (scalar): jurisdiction key
+        sub_df (DataFrame): rows of the jurisdiction
+        yvar_str (string): variable on the y-axis
+        xvar_str (string): seat variable on the x-axis ('scatter' only)
+        start_year (int): first year of the figure
+        fig_path (string): path of the HTML file to write
+
+    Returns:
+        fig_path (string): path of the written HTML file
+    """
+    from bokeh.io import save
+    from bokeh.resources import CDN
+    fig_title = str(key) + ': ' + yvar_str + ' by party control'
+    note_text_list = [[], [], []]
+    if kind == 'tseries':
+        from tseries_def_rev_spnd_gdp import gen_tseries
+        fig = gen_tseries(yvar_str=yvar_str, start_year=start_year,
+                          main_df=sub_df, note_text_list=note_text_list,
+                          fig_title_str=fig_title, fig_path=fig_path)
+    else:
+        from scatter_def_rev_spnd_party import gen_scatter
+        fig = gen_scatter(yvar_str=yvar_str, xvar_str=xvar_str,
+                          start_year=start_year, main_df=sub_df,
+                          note_text_list=note_text_list,
+                          fig_title_str=fig_title, fig_path=fig_path)
+    save(fig, filename=fig_path, resources=CDN, title=fig_title)
+
+    return fig_path
+
+
+def panel_figures(panel_df, kind='tseries', key_var=default_key_var,
+                  yvar_str='deficit_gdp', xvar_str='dem_senateseats',
+                  start_year=1947, out_dir=panel_images_dir, n_workers=None):
+    """
+    This function builds and saves the gen_tseries() or gen_scatter() figure
+    of every jurisdiction of a panel in parallel in a process pool. The
+    figures are written to out_dir as <kind>_<yvar>_<key>.html.
+
+    Args:
+        panel_df (DataFrame): panel with the columns of deficit_party_data.csv
+            and a jurisdiction key column
+        kind (string): either 'tseries' or 'scatter'
+        key_var (string): name of the jurisdiction key column
+        yvar_str (string): variable on the y-axis
+        xvar_str (string): seat variable on the x-axis ('scatter' only)
+        start_year (int): first year of the figures
+        out_dir (string): folder that the figures are written to
+        n_workers (int): number of worker processes, os.cpu_count() if None
+
+    Returns:
+        path_dict (dict): path of the figure of each jurisdiction
+    """
+    if kind not in ['tseries', 'scatter']:
+        raise ValueError('kind must be either "tseries" or "scatter"')
+    os.makedirs(out_dir, exist_ok=True)
+    frame_dict = PanelGroups(panel_df, key_var).frame(panel_df)
+    path_dict = {}
+    with concurrent.futures.ProcessPoolExecutor(max_workers=n_workers) as \
+            executor:
+        future_dict = {}
+        for key, sub_df in frame_dict.items():
+            fig_path = os.path.join(out_dir, kind + '_' + yvar_str + '_' +
+                                    str(key) + '.html')
+            future = executor.submit(render_jurisdiction, kind, key, sub_df,
+                                     yvar_str, xvar_str, start_year,
+                                     fig_path)
+            future_dict[future] = key
+        for future in concurrent.futures.as_completed(future_dict):
+            path_dict[future_dict[future]] = future.result()
+
+    return path_dict
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    import synth_party_data as spd
+
+    parser = argparse.ArgumentParser(
+        description='Run the party-control analysis on a synthetic panel.')
+    parser.add_argument('--jurisdictions', type=int, default=50,
+                        help='number of jurisdictions (default: 50)')
+    parser.add_argument('--figures', action='store_true',
+                        help='also write the time series figure of every ' +
+                        'jurisdiction to images/panel/')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of worker processes for the figures')
+    args = parser.parse_args()
+
+    base_df = pc.read_party_data()
+    panel_df = spd.synth_party_data(args.jurisdictions * len(base_df),
+                                    base_df=base_df)
+    start = time.perf_counter()
+    cube_df = panel_cube(panel_df)
+    reg_df = panel_regressions(panel_df)
+    elapsed = time.perf_counter() - start
+    print('Summary cube and seat regressions of ' +
+          str(args.jurisdictions) + ' jurisdictions: ' +
+          '{:.3f}'.format(elapsed) + ' seconds')
+    with pd.option_context('display.width', 120,
+                           'display.max_columns', 10):
+        print(cube_df.xs('whsen', level='cntrl').xs(
+            'deficit_gdp', level='var').head(9).round(3))
+        print(reg_df.xs('deficit_gdp', level='yvar').head(8).round(4))
+    if args.figures:
+        start = time.perf_counter()
+        path_dict = panel_figures(panel_df, n_workers=args.workers)
+        print('Wrote ' + str(len(path_dict)) + ' figures to ' +
+              panel_images_dir + ' in ' +
+              '{:.1f}'.format(time.perf_counter() - start) + ' seconds')
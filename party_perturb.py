@@ -0,0 +1,249 @@
+'''
+This module checks how robust the party-control results are to the close
+calls in the control flags of deficit_party_data.csv: Senates decided by the
+tie-breaking vote of the vice president, independents (other_senateseats,
+other_houseseats) caucusing with a party, and members switching parties
+within a Congress. It simulates many perturbations of the seats of every
+year at once:
+
+* caucus: each independent caucuses with the other party than in the data
+  with probability p_caucus (in the data, independents caucus with the
+  majority party of the majority flags, which reproduces every flag)
+* swing: swing_seats of each chamber are at stake, and the Democrat seats
+  change by Binomial(2 * swing_seats, 1/2) - swing_seats, a seat moving
+  from one party to the other
+* tie: a tied Senate goes to the party of the vice president (the
+  president's party), except with probability p_tie (e.g. a power-sharing
+  agreement or a defection); a tied House goes either way with probability
+  1/2
+
+The majorities of all draws are reclassified into control codes with
+party_control.majority_codes(), and the summary cube of every draw is
+computed in chunks of draws by matrix products with the party masks, with no
+DataFrame per draw. survival_table() reports how often each headline
+result, the sign and the significance of each Welch test of
+party_tests.py, survives the perturbations.
+
+If a user runs this module as a script, it will simulate 100,000 draws of
+1947-2020 and print the survival of the headline results and the years
+whose control flips most often.
+'''
+
+# Import packages
+import numpy as np
+import pandas as pd
+import party_control as pc
+import party_scenarios as psc
+import party_tests as pt
+
+# Seat columns of each chamber: Democrat, Republican, and other seats, and
+# the Democrat majority flag
+chamber_dict = {'senate': ('dem_senateseats', 'rep_senateseats',
+                           'other_senateseats', 'dem_senate_maj'),
+                'house': ('dem_houseseats', 'rep_houseseats',
+                          'other_houseseats', 'dem_house_maj')}
+
+# Default perturbations of each chamber
+default_swing_dict = {'senate': 1, 'house': 3}
+
+
+def majority_draws(seat_df, n_draw, rng, swing_dict=default_swing_dict,
+                   p_caucus=0.25, p_tie=0.25):
+    """
+    This function draws perturbations of the seats of every row and chamber
+    and returns the Democrat majorities of every draw.
+
+    Args:
+        seat_df (DataFrame): rows with the columns of chamber_dict and
+            'president_party'
+        n_draw (int): number of draws D
+        rng (Generator): numpy random number generator
+        swing_dict (dict): chamber -> number of seats at stake
+        p_caucus (float): probability that an independent caucuses with the
+            other party than in the data
+        p_tie (float): probability that a tied Senate goes to the other
+            party than the vice president's
+
+    Returns:
+        maj_dict (dict): majority column of chamber_dict -> (D, T) boolean
+            array of whether Democrats hold the majority
+    """
+    pres_dem = (seat_df['president_party'] == 'Democrat').to_numpy()
+    n_t = len(seat_df)
+    maj_dict = {}
+    for chamber, (dem_var, rep_var, other_var, maj_var) in \
+            chamber_dict.items():
+        dem_vec = seat_df[dem_var].to_numpy(dtype=np.int64)
+        rep_vec = seat_df[rep_var].to_numpy(dtype=np.int64)
+        other_vec = seat_df[other_var].to_numpy(dtype=np.int64)
+        flag_vec = seat_df[maj_var].to_numpy() == 1
+        # Independents caucus with the majority party of the data
+        caucus_dem = np.where(flag_vec, other_vec, 0)
+        # Only the rows with independents are drawn
+        n_flip = np.zeros((n_draw, n_t), dtype=np.int64)
+        other_idx = np.flatnonzero(other_vec > 0)
+        n_flip[:, other_idx] = rng.binomial(
+            other_vec[other_idx], p_caucus, size=(n_draw, len(other_idx)))
+        caucus_dem = np.where(flag_vec, caucus_dem - n_flip, n_flip)
+        swing = swing_dict.get(chamber, 0)
+        delta = rng.binomial(2 * swing, 0.5, size=(n_draw, n_t)) - swing
+        margin = (2 * (dem_vec + caucus_dem + delta) -
+                  (dem_vec + rep_vec + other_vec))
+        if chamber == 'senate':
+            tie_dem = pres_dem ^ (rng.random((n_draw, n_t)) < p_tie)
+        else:
+            tie_dem = rng.random((n_draw, n_t)) < 0.5
+        maj_dict[maj_var] = (margin > 0) | ((margin == 0) & tie_dem)
+
+    return maj_dict
+
+
+def draw_cubes(scen, n_draw=100000, var_list=psc.ps.var_str_list,
+               cntrl_list=pc.cntrl_str_list, chunk_size=10000, seed=50,
+               **kwargs):
+    """
+    This function computes the summary cube of a Scenario under many
+    perturbations of the seats, chunk_size draws at a time.
+
+    Args:
+        scen (Scenario): window of years and overlay of the party data
+        n_draw (int): number of draws D
+        var_list (list): names of the variables
+        cntrl_list (list): control definitions
+        chunk_size (int): number of draws per chunk
+        seed (int): seed of the draws
+        **kwargs: perturbations of majority_draws()
+
+    Returns:
+        stat_arr (array_like): (3, D, C, P, V) n, mean, and std of every
+            draw, ordered as the summary cube
+        flip_arr (array_like): (C, T) share of the draws in which the
+            control code of each year of the window differs from the data
+    """
+    base = scen.base
+    seat_df = base.df.iloc[scen.lo:scen.hi]
+    pres_party = seat_df['president_party'].to_numpy()
+    code_mat = pc.control_codes(seat_df, cntrl_list)
+    # (V, T) values centered on their means, which keeps the sums accurate
+    val_mat = np.stack([scen.values(var) for var in var_list])
+    valid_mat = ~np.isnan(val_mat)
+    shift_vec = np.nanmean(val_mat, axis=1)
+    dev_mat = np.where(valid_mat, val_mat - shift_vec[:, None], 0.0)
+    # (T, 3 V) columns of the counts, sums, and sums of squares
+    col_mat = np.concatenate([valid_mat, dev_mat, dev_mat ** 2]).T
+    n_c, n_p, n_v = len(cntrl_list), len(pc.party_str_list), len(var_list)
+    sum_arr = np.zeros((n_draw, n_c, n_p, 3 * n_v))
+    flip_arr = np.zeros(code_mat.shape)
+    rng = np.random.default_rng(seed)
+    for lo in range(0, n_draw, chunk_size):
+        hi = min(lo + chunk_size, n_draw)
+        maj_dict = majority_draws(seat_df, hi - lo, rng, **kwargs)
+        # (C, D, T) control codes of the draws
+        code_arr = pc.majority_codes(pres_party, maj_dict, cntrl_list)
+        flip_arr += (code_arr != code_mat[:, None, :]).sum(axis=1)
+        mask_arr = (code_arr[:, :, None, :] ==
+                    np.arange(n_p)[None, None, :, None])
+        sum_arr[lo:hi] = np.moveaxis(mask_arr @ col_mat, 0, 1)
+    n_arr = np.rint(sum_arr[..., :n_v])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dev_mean = sum_arr[..., n_v:2 * n_v] / n_arr
+        std_arr = np.sqrt(np.maximum(sum_arr[..., 2 * n_v:] -
+                                     n_arr * dev_mean ** 2, 0.0) /
+                          (n_arr - 1))
+    std_arr[n_arr < 2] = np.nan
+    stat_arr = np.stack([n_arr, dev_mean + shift_vec, std_arr])
+
+    return stat_arr, flip_arr / n_draw
+
+
+def survival_table(scen, n_draw=100000, var_list=psc.ps.var_str_list,
+                   cntrl_list=pc.cntrl_str_list, alpha=0.05, level=0.9,
+                   **kwargs):
+    """
+    This function reports how often the headline results of a Scenario, the
+    sign and the significance of the Welch test of each pair of parties,
+    control definition, and variable, survive perturbations of the seats.
+
+    Args:
+        scen (Scenario): window of years and overlay of the party data
+        n_draw (int): number of draws
+        var_list (list): names of the variables
+        cntrl_list (list): control definitions
+        alpha (float): significance level of the tests
+        level (float): coverage of the intervals of the differences
+        **kwargs: arguments of draw_cubes() and majority_draws()
+
+    Returns:
+        surv_df (DataFrame): columns 'diff' and 'p' (the data), 'sig'
+            (whether the data test is significant), 'same_sign' (share of
+            draws with the sign of the data difference), 'survives' (share
+            of draws with the same sign and, if the data test is
+            significant, a significant test), 'diff_lo' and 'diff_hi'
+            (percentiles of the differences of the draws) indexed by
+            (cntrl, var, pair)
+        flip_df (DataFrame): share of the draws in which the control of
+            each year differs from the data, columns cntrl_list indexed by
+            year
+    """
+    stat_arr, flip_arr = draw_cubes(scen, n_draw, var_list, cntrl_list,
+                                    **kwargs)
+    data_arr = pt.cube_stats({'': scen.cube(var_list, cntrl_list)})[0][:, 0]
+    # (3, 1 + D, C, P, V) statistics of the data and of the draws
+    all_arr = np.concatenate([data_arr[:, None], stat_arr], axis=1)
+    a_idx = [pc.party_str_list.index(pair[0]) for pair in pt.pair_list]
+    b_idx = [pc.party_str_list.index(pair[1]) for pair in pt.pair_list]
+    # (1 + D, C, pair, V) differences and p-values
+    diff, _, _, _, pval = pt.welch_arrays(
+        all_arr[0][:, :, a_idx], all_arr[1][:, :, a_idx],
+        all_arr[2][:, :, a_idx], all_arr[0][:, :, b_idx],
+        all_arr[1][:, :, b_idx], all_arr[2][:, :, b_idx])
+    sig = pval[0] < alpha
+    same_sign = np.sign(diff[1:]) == np.sign(diff[0])
+    survives = same_sign & (~sig | (pval[1:] < alpha))
+    with np.errstate(invalid='ignore'):
+        lo_arr, hi_arr = np.nanquantile(
+            diff[1:], [(1.0 - level) / 2.0, (1.0 + level) / 2.0], axis=0)
+    # Order the rows as (cntrl, var, pair)
+    surv_df = pd.DataFrame({
+        'diff': diff[0].transpose(0, 2, 1).ravel(),
+        'p': pval[0].transpose(0, 2, 1).ravel(),
+        'sig': sig.transpose(0, 2, 1).ravel(),
+        'same_sign': same_sign.mean(axis=0).transpose(0, 2, 1).ravel(),
+        'survives': survives.mean(axis=0).transpose(0, 2, 1).ravel(),
+        'diff_lo': lo_arr.transpose(0, 2, 1).ravel(),
+        'diff_hi': hi_arr.transpose(0, 2, 1).ravel()},
+        index=pd.MultiIndex.from_product(
+            [cntrl_list, var_list, pt.pair_str_list],
+            names=['cntrl', 'var', 'pair']))
+    flip_df = pd.DataFrame(flip_arr.T, columns=cntrl_list,
+                           index=pd.Index(scen.base.year_vec[
+                               scen.lo:scen.hi], name='year'))
+
+    return surv_df, flip_df
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    import time
+    party_base = psc.PartyBase(pc.read_party_data())
+    scen = psc.Scenario(party_base, 1947, 2020)
+
+    # Without perturbations every draw is the data
+    stat_arr, flip_arr = draw_cubes(
+        scen, 100, swing_dict={'senate': 0, 'house': 0}, p_caucus=0.0,
+        p_tie=0.0)
+    data_arr = pt.cube_stats({'': scen.cube()})[0][:, 0]
+    print('Max. abs. difference of unperturbed draws from the cube: ' +
+          '{:.2e}'.format(np.nanmax(np.abs(stat_arr - data_arr[:, None]))) +
+          ', flipped years: ' + str(int((flip_arr > 0).sum())))
+
+    start_time = time.perf_counter()
+    surv_df, flip_df = survival_table(scen)
+    print('100,000 perturbations of 1947-2020: ' +
+          '{:.1f} s'.format(time.perf_counter() - start_time))
+    with pd.option_context('display.width', 120, 'display.max_rows', 100):
+        print(surv_df.round(3))
+        flip_share = flip_df.max(axis=1)
+        print(flip_df[flip_share > 0.01].round(3))
@@ -0,0 +1,452 @@
+'''
+This module estimates the seat regressions of table_def_gdp_party.py on
+rolling and expanding windows of years, e.g. how the slope of deficit_gdp on
+Democrat Senate seats under Republican control evolves through time:
+
+* lag_cumsum(): cumulative sums over the years of the cross-products of the
+  terms (1, x, y, x ** 2, x * y) of every regression with themselves lagged
+  0, ..., maxlags years. The sums of any window are the differences of two
+  columns, so moving a window by one year adds one year and drops one in
+  constant time, whatever its width.
+* window_bounds(): the first and last rows of rolling windows of many
+  widths and of expanding windows
+* window_ols(): the OLS estimates with classical or Newey-West (HAC)
+  standard errors of all regressions on all windows at once from the
+  cumulative sums. The HAC residual cross-products are quadratic forms of
+  the lagged sums in the window estimates, so the residuals are never
+  formed.
+* rolling_regressions(): all of the above for a Scenario
+* gen_rolling_fig(): the coefficient path of one regression with its 95
+  percent confidence band
+
+If a user runs this module as a script, it will check the windows against
+party_stats.seat_regressions(), time every width from 10 years to the full
+sample, and create the figures.
+'''
+
+# Import packages
+import os
+import numpy as np
+import pandas as pd
+from bokeh.io import output_file
+from bokeh.plotting import figure, show
+from bokeh.models import ColumnDataSource, HoverTool, Title
+from bokeh.models.widgets import Tabs, Panel
+import party_control as pc
+import party_stats as ps
+
+# Set paths to work across Mac/Windows/Linux platforms
+cur_path = os.path.split(os.path.abspath(__file__))[0]
+images_dir = os.path.join(cur_path, 'images')
+
+# Number of terms (1, x, y, x ** 2, x * y) of the lagged cross-products
+n_terms = 5
+
+
+def lag_cumsum(y_mat, x_mat, valid_mat, maxlags=0):
+    """
+    This function returns the cumulative sums over the periods of the
+    cross-products of the terms (1, x, y, x ** 2, x * y) of many simple
+    regressions with the terms lagged 0, ..., maxlags periods. Observations
+    outside a regression's sample (valid_mat False or missing) are zero.
+
+    Args:
+        y_mat (array_like): (..., T) dependent variables
+        x_mat (array_like): (..., T) regressors
+        valid_mat (array_like): (..., T) boolean sample of each regression
+        maxlags (int): largest lag of the cross-products
+
+    Returns:
+        cum_arr (array_like): (maxlags + 1, ..., 5, 5, T + 1) array of which
+            cum_arr[l, ..., i, j, t] is the sum over periods s < t of term i
+            in period s times term j in period s - l
+    """
+    y_mat, x_mat, valid_mat = np.broadcast_arrays(y_mat, x_mat, valid_mat)
+    valid_mat = valid_mat & ~np.isnan(y_mat) & ~np.isnan(x_mat)
+    x_mat = np.where(valid_mat, x_mat, 0.0)
+    y_mat = np.where(valid_mat, y_mat, 0.0)
+    term_arr = np.stack([valid_mat.astype(np.float64), x_mat, y_mat,
+                         x_mat ** 2, x_mat * y_mat], axis=-2)
+    n_t = term_arr.shape[-1]
+    cum_arr = np.zeros((maxlags + 1,) + term_arr.shape[:-2] +
+                       (n_terms, n_terms, n_t + 1))
+    for lag in range(min(maxlags, n_t - 1) + 1):
+        np.cumsum(term_arr[..., :, None, lag:] *
+                  term_arr[..., None, :, :n_t - lag], axis=-1,
+                  out=cum_arr[lag, ..., lag + 1:])
+
+    return cum_arr
+
+
+def window_bounds(n_t, width_list=[], expanding=False, min_width=10):
+    """
+    This function returns the rows of rolling windows of some widths over
+    T periods, and optionally of the expanding windows from the first
+    period.
+
+    Args:
+        n_t (int): number of periods T
+        width_list (list): widths of the rolling windows in periods
+        expanding (bool): whether to add the expanding windows
+        min_width (int): width of the first expanding window
+
+    Returns:
+        bound_df (DataFrame): columns 'window' (label of the width), 'lo'
+            (first row), and 'hi' (one past the last row), one row per
+            window
+    """
+    label_list, lo_list, hi_list = [], [], []
+    for width in width_list:
+        hi_vec = np.arange(width, n_t + 1)
+        label_list += [str(width) + '-year'] * len(hi_vec)
+        lo_list.append(hi_vec - width)
+        hi_list.append(hi_vec)
+    if expanding:
+        hi_vec = np.arange(min_width, n_t + 1)
+        label_list += ['expanding'] * len(hi_vec)
+        lo_list.append(np.zeros(len(hi_vec), dtype=np.int64))
+        hi_list.append(hi_vec)
+    bound_df = pd.DataFrame({
+        'window': label_list,
+        'lo': np.concatenate(lo_list).astype(np.int64),
+        'hi': np.concatenate(hi_list).astype(np.int64)})
+
+    return bound_df
+
+
+def window_ols(cum_arr, lo_vec, hi_vec, cov_type='nonrobust',
+               maxlags=None, shift_x=0.0, shift_y=0.0, use_correction=None):
+    """
+    This function computes the OLS estimates of y = const + slope * x of
+    many regressions on many windows of periods from the cumulative sums of
+    lag_cumsum(), with the standard errors of party_stats.batch_ols() on
+    the observations of each window.
+
+    Args:
+        cum_arr (array_like): (L + 1, ..., 5, 5, T + 1) output of
+            lag_cumsum()
+        lo_vec (array_like): (W,) first row of each window
+        hi_vec (array_like): (W,) one past the last row of each window
+        cov_type (string): 'nonrobust' or 'HAC'
+        maxlags (int or array_like): lags of the HAC covariance of each
+            window, at most L, party_stats.newey_west_lags() of the width of
+            each window if None
+        shift_x (array_like): value subtracted from x before the sums,
+            broadcast against (...)
+        shift_y (array_like): value subtracted from y before the sums
+        use_correction (bool): whether to apply the small sample correction
+            n / (n - 2) of statsmodels to the HAC covariance
+
+    Returns:
+        ols_dict (dict): arrays 'n', 'const', 'slope', 'se_const',
+            'se_slope', and 'r2' of shape (..., W)
+    """
+    lo_vec = np.asarray(lo_vec, dtype=np.int64)
+    hi_vec = np.asarray(hi_vec, dtype=np.int64)
+    # (..., 5, 5, W) sums of each window without lags
+    sum_arr = (np.take(cum_arr[0], hi_vec, axis=-1) -
+               np.take(cum_arr[0], lo_vec, axis=-1))
+    n = sum_arr[..., 0, 0, :]
+    sum_x = sum_arr[..., 0, 1, :]
+    sum_y = sum_arr[..., 0, 2, :]
+    sum_xx = sum_arr[..., 1, 1, :]
+    sum_xy = sum_arr[..., 1, 2, :]
+    sum_yy = sum_arr[..., 2, 2, :]
+    shift_x = np.asarray(shift_x, dtype=np.float64)[..., None]
+    shift_y = np.asarray(shift_y, dtype=np.float64)[..., None]
+    ols_dict = ps.simple_ols(np.rint(n), sum_x, sum_y, sum_xx, sum_xy,
+                             sum_yy, shift_x, shift_y)
+    ols_dict = {'n': np.rint(n).astype(np.int64), **ols_dict}
+    if cov_type == 'nonrobust':
+        return ols_dict
+    elif cov_type != 'HAC':
+        raise ValueError('unknown cov_type ' + str(cov_type))
+
+    max_lag = cum_arr.shape[0] - 1
+    if maxlags is None:
+        lag_vec = np.array([ps.newey_west_lags(width)
+                            for width in hi_vec - lo_vec])
+    else:
+        lag_vec = np.broadcast_to(np.asarray(maxlags, dtype=np.int64),
+                                  lo_vec.shape)
+    if (lag_vec > max_lag).any():
+        raise ValueError('maxlags exceeds the lags of cum_arr')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Estimates of the shifted data, y - shift_y = a + slope * (x -
+        # shift_x), whose residuals u are a linear combination of the terms
+        mean_x = sum_x / n
+        mean_y = sum_y / n
+        cxx = sum_xx - n * mean_x ** 2
+        slope = (sum_xy - n * mean_x * mean_y) / cxx
+        a = mean_y - slope * mean_x
+        # (2, 5, ..., W) coefficients of the scores u and u * x on the terms
+        zero = np.zeros_like(a)
+        coef_arr = np.stack([
+            np.stack([-a, -slope, np.ones_like(a), zero, zero]),
+            np.stack([zero, -a, zero, -slope, np.ones_like(a)])])
+        coef_arr = np.moveaxis(coef_arr, (0, 1), (-3, -2))
+        # Lag-weighted sums of the cross-products of the terms, (..., 5, 5,
+        # W), with Bartlett weights
+        meat_terms = np.zeros(sum_arr.shape)
+        meat_terms += sum_arr
+        for lag in range(1, max_lag + 1):
+            weight_vec = np.where(lag_vec >= lag,
+                                  1.0 - lag / (lag_vec + 1.0), 0.0)
+            lag_lo = np.minimum(lo_vec + lag, hi_vec)
+            cross_arr = (np.take(cum_arr[lag], hi_vec, axis=-1) -
+                         np.take(cum_arr[lag], lag_lo, axis=-1))
+            meat_terms += weight_vec * (cross_arr +
+                                        np.swapaxes(cross_arr, -3, -2))
+        # (..., 2, 2, W) meat of the scores (u, u * x)
+        meat_arr = np.einsum('...iaw,...abw,...jbw->...ijw', coef_arr,
+                             meat_terms, coef_arr)
+        if use_correction:
+            meat_arr *= n / (n - 2)
+        # Sandwich with the inverse of [[n, sum_x], [sum_x, sum_xx]]
+        det = n * cxx
+        bread_arr = np.stack([np.stack([sum_xx, -sum_x]),
+                              np.stack([-sum_x, n])]) / det
+        bread_arr = np.moveaxis(bread_arr, (0, 1), (-3, -2))
+        cov_arr = np.einsum('...iaw,...abw,...bjw->...ijw', bread_arr,
+                            meat_arr, bread_arr)
+        var_slope = cov_arr[..., 1, 1, :]
+        var_const = (cov_arr[..., 0, 0, :] -
+                     2.0 * shift_x * cov_arr[..., 0, 1, :] +
+                     shift_x ** 2 * var_slope)
+        se_const = np.sqrt(np.maximum(var_const, 0.0))
+        se_slope = np.sqrt(np.maximum(var_slope, 0.0))
+    bad = np.isnan(ols_dict['slope'])
+    ols_dict['se_const'] = np.where(bad, np.nan, se_const)
+    ols_dict['se_slope'] = np.where(bad, np.nan, se_slope)
+
+    return ols_dict
+
+
+def rolling_regressions(scen, width_list=[20], expanding=True,
+                        yvar_list=ps.var_str_list,
+                        xvar_list=ps.seat_var_list, cntrl_str='whsen',
+                        cov_type='nonrobust', maxlags=None, min_width=10):
+    """
+    This function estimates the seat regressions of a Scenario on the
+    rolling windows of some widths and on the expanding windows within the
+    years of the scenario, all responses, regressors, and windows at once.
+
+    Args:
+        scen (Scenario): years and overlay of the party data
+        width_list (list): widths of the rolling windows in years
+        expanding (bool): whether to add the expanding windows from the
+            first year of the scenario
+        yvar_list (list): names of the dependent variables
+        xvar_list (list): names of the seat regressors
+        cntrl_str (string): definition of party control
+        cov_type (string): 'nonrobust' or 'HAC'
+        maxlags (int): lags of the HAC covariance,
+            party_stats.newey_west_lags() of the width of each window if
+            None
+        min_width (int): width of the first expanding window
+
+    Returns:
+        roll_df (DataFrame): columns 'start_year', 'n', 'const', 'slope',
+            'se_const', 'se_slope', and 'r2' indexed by (window, party,
+            yvar, xvar, end_year)
+    """
+    base = scen.base
+    n_t = scen.hi - scen.lo
+    bound_df = window_bounds(n_t, width_list, expanding, min_width)
+    if maxlags is None and cov_type == 'HAC':
+        max_lag = ps.newey_west_lags(int((bound_df['hi'] -
+                                          bound_df['lo']).max()))
+    else:
+        max_lag = 0 if cov_type == 'nonrobust' else maxlags
+    y_idx = [base.var_pos_dict[var] for var in yvar_list]
+    x_idx = [base.var_pos_dict[var] for var in xvar_list]
+    y_shift = base.shift_vec[y_idx]
+    x_shift = base.shift_vec[x_idx]
+    # (Y, 1, T) and (1, X, T) shifted values and (2, 1, 1, T) party years
+    y_mat = (np.stack([scen.values(var) for var in yvar_list]) -
+             y_shift[:, None])[:, None, :]
+    x_mat = (np.stack([scen.values(var) for var in xvar_list]) -
+             x_shift[:, None])[None, :, :]
+    code_vec = base.code_mat[base.cntrl_list.index(cntrl_str),
+                             scen.lo:scen.hi]
+    party_mat = (code_vec[None, :] == np.arange(2)[:, None])
+    cum_arr = lag_cumsum(y_mat[None], x_mat[None],
+                         party_mat[:, None, None, :], max_lag)
+    ols_dict = window_ols(cum_arr, bound_df['lo'], bound_df['hi'], cov_type,
+                          maxlags, x_shift[None, None, :],
+                          y_shift[None, :, None])
+    year_vec = base.year_vec[scen.lo:scen.hi]
+    n_w = len(bound_df)
+    index = pd.MultiIndex.from_arrays(
+        [np.tile(bound_df['window'].to_numpy(), 2 * len(y_idx) * len(x_idx)),
+         np.repeat(pc.party_str_list[:2], len(y_idx) * len(x_idx) * n_w),
+         np.tile(np.repeat(yvar_list, len(x_idx) * n_w), 2),
+         np.tile(np.repeat(xvar_list, n_w), 2 * len(y_idx)),
+         np.tile(year_vec[bound_df['hi'] - 1], 2 * len(y_idx) * len(x_idx))],
+        names=['window', 'party', 'yvar', 'xvar', 'end_year'])
+    col_dict = {'start_year': np.tile(year_vec[bound_df['lo']],
+                                      2 * len(y_idx) * len(x_idx))}
+    for key in ['n', 'const', 'slope', 'se_const', 'se_slope', 'r2']:
+        col_dict[key] = ols_dict[key].ravel()
+    roll_df = pd.DataFrame(col_dict, index=index)
+
+    return roll_df
+
+
+def gen_rolling_fig(roll_df, yvar, xvar, coef='slope', y_axis_label='',
+                    note_text_list=[], fig_title_str='', fig_path=''):
+    """
+    This function creates a time series figure of the path of one
+    coefficient of the rolling regressions of one response on one regressor
+    under Republican and Democrat control, with 95 percent confidence bands,
+    one panel per window width.
+
+    Args:
+        roll_df (DataFrame): output of rolling_regressions()
+        yvar (string): name of the dependent variable
+        xvar (string): name of the seat regressor
+        coef (string): 'slope' or 'const'
+        y_axis_label (string): label of the y-axis
+        note_text_list (list): notes below each panel
+        fig_title_str (string): title of the figure
+        fig_path (string): path of the HTML file
+
+    Returns:
+        tabs (Tabs): one panel per window width of roll_df
+    """
+    output_file(fig_path, title=fig_title_str)
+    reg_df = roll_df.xs((yvar, xvar), level=('yvar', 'xvar')).copy()
+    reg_df['lo'] = reg_df[coef] - 1.96 * reg_df['se_' + coef]
+    reg_df['hi'] = reg_df[coef] + 1.96 * reg_df['se_' + coef]
+    min_val = reg_df['lo'].quantile(0.02)
+    max_val = reg_df['hi'].quantile(0.98)
+    val_buffer = 0.1 * (max_val - min_val)
+    tab_list = []
+    for window in reg_df.index.unique(level='window'):
+        fig = figure(title=fig_title_str,
+                     plot_height=650,
+                     plot_width=1100,
+                     x_axis_label='Last year of the window',
+                     y_axis_label=y_axis_label,
+                     y_range=(min_val - val_buffer, max_val + val_buffer),
+                     toolbar_location=None)
+
+        # Set title font size and axes font sizes
+        fig.title.text_font_size = '15.5pt'
+        fig.xaxis.axis_label_text_font_size = '12pt'
+        fig.xaxis.major_label_text_font_size = '12pt'
+        fig.yaxis.axis_label_text_font_size = '12pt'
+        fig.yaxis.major_label_text_font_size = '12pt'
+
+        # Plot the path and band of each party
+        for p, party in enumerate(pc.party_str_list[:2]):
+            party_df = reg_df.xs((window, party),
+                                 level=('window', 'party')).reset_index()
+            party_df['label'] = pc.party_label_list[p]
+            cds = ColumnDataSource(party_df)
+            fig.varea(x='end_year', y1='lo', y2='hi', source=cds,
+                      color=pc.party_color_list[p], alpha=0.15,
+                      muted_alpha=0.05, legend_label=pc.party_label_list[p])
+            fig.line(x='end_year', y=coef, source=cds,
+                     color=pc.party_color_list[p], line_width=3,
+                     muted_alpha=0.2, legend_label=pc.party_label_list[p])
+
+        # Add zero line
+        fig.line(x=[reg_df.index.get_level_values('end_year').min(),
+                    reg_df.index.get_level_values('end_year').max()],
+                 y=[0, 0], color='black', line_dash='3 3', line_width=1)
+
+        # Add information on hover
+        tooltips = [('Party', '@label'),
+                    ('Years', '@start_year-@end_year'),
+                    ('Estimate', '@' + coef + '{0.000}'),
+                    ('95% CI', '@lo{0.000} to @hi{0.000}'),
+                    ('Observations', '@n')]
+        fig.add_tools(HoverTool(tooltips=tooltips))
+
+        # Turn off scrolling
+        fig.toolbar.active_drag = None
+
+        # Add legend
+        fig.legend.location = 'top_left'
+        fig.legend.border_line_width = 2
+        fig.legend.border_line_color = 'black'
+        fig.legend.border_line_alpha = 1
+        fig.legend.label_text_font_size = '4mm'
+
+        # Set legend muting click policy
+        fig.legend.click_policy = 'mute'
+
+        # Add notes below image
+        for note_text in note_text_list:
+            caption = Title(text=note_text, align='left',
+                            text_font_size='4mm', text_font_style='italic')
+            fig.add_layout(caption, 'below')
+
+        tab_list.append(Panel(child=fig, title=window + ' windows'))
+
+    tabs = Tabs(tabs=tab_list)
+
+    return tabs
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    import time
+    import party_scenarios as psc
+    main_df = pc.read_party_data()
+    party_base = psc.PartyBase(main_df)
+    scen = psc.Scenario(party_base, 1947, 2020)
+
+    # Check windows against party_stats.seat_regressions()
+    max_diff = 0.0
+    for cov_type in ['nonrobust', 'HAC']:
+        roll_df = rolling_regressions(scen, [20, 30], True,
+                                      cov_type=cov_type)
+        for window, end_year in [('20-year', 1980), ('30-year', 2020),
+                                 ('expanding', 1990), ('expanding', 2020)]:
+            win_df = roll_df.xs((window, end_year),
+                                level=('window', 'end_year'))
+            check_df = ps.seat_regressions(
+                main_df, start_year=win_df['start_year'].iloc[0],
+                end_year=end_year, cov_type=cov_type)
+            max_diff = max(max_diff, np.nanmax(np.abs(
+                win_df[check_df.columns].to_numpy(dtype=np.float64) -
+                check_df.to_numpy(dtype=np.float64))))
+    print('Max. abs. difference from party_stats.py: ' +
+          '{:.2e}'.format(max_diff))
+
+    # Time every width from 10 years to the full sample
+    width_list = list(range(10, scen.hi - scen.lo + 1))
+    for cov_type in ['nonrobust', 'HAC']:
+        start_time = time.perf_counter()
+        all_df = rolling_regressions(scen, width_list, True,
+                                     cov_type=cov_type)
+        print(cov_type + ': ' + str(len(all_df)) + ' regressions of ' +
+              str(len(width_list)) + ' widths in ' +
+              '{:.1f} ms'.format(1e3 * (time.perf_counter() - start_time)))
+
+    roll_df = rolling_regressions(scen, [20, 30], True, cov_type='HAC')
+    with pd.option_context('display.width', 120):
+        print(roll_df.xs(('20-year', 'deficit_gdp', 'dem_senateseats'),
+                         level=('window', 'yvar', 'xvar'))[
+            ['start_year', 'n', 'slope', 'se_slope']].unstack(
+                'party').iloc[::5].round(3))
+    note_text_list = \
+        ['Note: OLS slopes within the Republican and Democrat control ' +
+         'years (White House and Senate) of each window of 1947-2020,',
+         '   with 95 percent confidence bands from Newey-West (HAC) ' +
+         'standard errors.']
+    for xvar, x_label in [('dem_senateseats', 'Senate'),
+                          ('dem_houseseats', 'House')]:
+        roll_tabs = gen_rolling_fig(
+            roll_df, 'deficit_gdp', xvar,
+            y_axis_label='Slope on Democrat ' + x_label + ' seats',
+            note_text_list=note_text_list,
+            fig_title_str=('Rolling Slope of Deficits (% of GDP) on ' +
+                           'Democrat ' + x_label + ' Seats by Party Control'),
+            fig_path=os.path.join(images_dir, 'tseries_rolling_deficit_' +
+                                  xvar + '.html'))
+        show(roll_tabs)
@@ -0,0 +1,522 @@
+'''
+This module evaluates the party-control statistics of party_stats.py for
+many sample windows and projection or override scenarios without copying
+the data:
+
+* PartyBase: the base arrays of the data (one row per year, sorted by
+  year), the control codes of every year, and cumulative sums of the
+  statistics over the years, computed once
+* Overlay: values that replace specific (year, variable) cells, e.g. the
+  CBO July 2021 projections of 2021. The derived variables of
+  derived_vars.party_formulas (spend_nonint_gdp) are recomputed in the
+  overridden years from the overlaid inputs unless they are overridden
+  themselves.
+* Scenario: a window of years, an index range of the base arrays, together
+  with an overlay. Its summary cube and seat regressions are the
+  differences of the cumulative sums at the ends of the window plus the
+  changes of the overridden cells, so they cost the same for any window
+  and copy nothing. frame() materializes the rows of a scenario as a
+  DataFrame only where a script needs one (e.g., for statsmodels
+  summaries).
+
+If a user runs this module as a script, it will check the statistics of
+the 1947-2020 and the 1947-2021 (with the CBO July 2021 projections)
+samples against party_stats.py and time many scenarios.
+'''
+
+# Import packages
+import time
+import numpy as np
+import pandas as pd
+import derived_vars as dv
+import party_control as pc
+import party_stats as ps
+
+# Variables of the base arrays
+base_var_list = ['deficit_gdp', 'receipts_gdp', 'spend_int_gdp',
+                 'spend_nonint_gdp', 'spend_tot_gdp', 'dem_senateseats',
+                 'dem_houseseats']
+
+# CBO July 2021 "Additional Information About the Updated Budget and Economic
+# Outlook: 2021 to 2031" projections of 2021 (spend_nonint_gdp = 21.703 +
+# 7.377 follows from the formula of derived_vars.py)
+cbo_2021_dict = {(2021, 'deficit_gdp'): -13.406,
+                 (2021, 'receipts_gdp'): 17.15,
+                 (2021, 'spend_int_gdp'): 1.477,
+                 (2021, 'spend_tot_gdp'): 1.477 + 21.703 + 7.377}
+
+
+class PartyBase:
+    """
+    This class holds the base arrays of the party data and their
+    cumulative sums. The cumulative sums are of the values minus the mean
+    of each variable, which keeps the sums of squares accurate.
+
+    Args:
+        main_df (DataFrame): data, e.g. the output of read_party_data()
+        var_list (list): names of the numeric variables kept
+        cntrl_list (list): control definitions, keys of cntrl_maj_dict
+    """
+
+    def __init__(self, main_df, var_list=base_var_list,
+                 cntrl_list=pc.cntrl_str_list):
+        order = np.argsort(main_df['year'].to_numpy(), kind='stable')
+        self.df = main_df.iloc[order] if np.any(np.diff(order) != 1) \
+            else main_df
+        self.year_vec = self.df['year'].to_numpy(dtype=np.int64)
+        self.var_list = list(var_list)
+        self.var_pos_dict = {var: v for v, var in enumerate(self.var_list)}
+        self.cntrl_list = list(cntrl_list)
+        self.val_mat = np.ascontiguousarray(
+            self.df[self.var_list].to_numpy(dtype=np.float64).T)
+        self.code_mat = pc.control_codes(self.df, self.cntrl_list)
+        with np.errstate(invalid='ignore'):
+            self.shift_vec = np.nan_to_num(np.nanmean(self.val_mat, axis=1))
+        self.cum_dict = {}
+        self.index_dict = {}
+
+    def index(self, level_list, name_list):
+        """
+        This method returns (and caches) the MultiIndex of the product of
+        some lists, which the results of all scenarios share.
+        """
+        key = tuple([tuple(level) for level in level_list])
+        if key not in self.index_dict:
+            self.index_dict[key] = pd.MultiIndex.from_product(
+                level_list, names=name_list)
+
+        return self.index_dict[key]
+
+    def window(self, start_year, end_year):
+        """
+        This method returns the index range of the rows of a window of
+        years.
+
+        Args:
+            start_year (int): first year of the window
+            end_year (int): last year of the window
+
+        Returns:
+            lo (int): first row of the window
+            hi (int): row after the last row of the window
+        """
+        lo = int(np.searchsorted(self.year_vec, start_year, side='left'))
+        hi = int(np.searchsorted(self.year_vec, end_year, side='right'))
+
+        return lo, hi
+
+    def row(self, year):
+        """
+        This method returns the row of a year, or raises a KeyError.
+        """
+        pos = int(np.searchsorted(self.year_vec, year))
+        if pos == len(self.year_vec) or self.year_vec[pos] != year:
+            raise KeyError('year ' + str(year) + ' is not in the data')
+
+        return pos
+
+    def contributions(self, val_mat, code_mat, var_idx):
+        """
+        This method returns the contributions of rows to the sums of the
+        summary cube: the number of observations, the sum, and the sum of
+        squares of the shifted values of each control definition, party,
+        and variable.
+
+        Args:
+            val_mat (array_like): (len(var_idx), R) values of R rows
+            code_mat (array_like): (C, R) control codes of the rows
+            var_idx (array_like): positions of the variables in var_list
+
+        Returns:
+            sum_arr (array_like): (3, C, P, V, R) array of the counts, sums,
+                and sums of squares of each row
+        """
+        dev_mat = val_mat - self.shift_vec[var_idx][:, None]
+        valid_mat = ~np.isnan(dev_mat)
+        dev_mat = np.where(valid_mat, dev_mat, 0.0)
+        mask_arr = (code_mat[:, None, :] ==
+                    np.arange(len(pc.party_str_list))[None, :, None])
+        mask_arr = mask_arr[:, :, None, :]
+        sum_arr = np.stack([mask_arr * valid_mat[None, None],
+                            mask_arr * dev_mat[None, None],
+                            mask_arr * (dev_mat ** 2)[None, None]])
+
+        return sum_arr
+
+    def cube_cumsum(self):
+        """
+        This method returns (and caches) the cumulative sums over the rows
+        of the contributions to the summary cube of all variables.
+        """
+        if 'cube' not in self.cum_dict:
+            sum_arr = self.contributions(self.val_mat, self.code_mat,
+                                         np.arange(len(self.var_list)))
+            cum_arr = np.zeros(sum_arr.shape[:-1] + (sum_arr.shape[-1] + 1,))
+            np.cumsum(sum_arr, axis=-1, out=cum_arr[..., 1:])
+            self.cum_dict['cube'] = cum_arr
+
+        return self.cum_dict['cube']
+
+    def reg_contributions(self, y_mat, x_mat, code_vec, y_shift, x_shift):
+        """
+        This method returns the contributions of rows to the sums of the
+        seat regressions within Republican and Democrat control.
+
+        Args:
+            y_mat (array_like): (Y, R) dependent variables of R rows
+            x_mat (array_like): (X, R) regressors of the rows
+            code_vec (array_like): (R,) control codes of the rows
+            y_shift (array_like): (Y,) values subtracted from y_mat
+            x_shift (array_like): (X,) values subtracted from x_mat
+
+        Returns:
+            sum_arr (array_like): (6, 2, Y, X, R) array of the counts and the
+                sums of x, y, x ** 2, x * y, and y ** 2
+        """
+        y_dev = y_mat - y_shift[:, None]
+        x_dev = x_mat - x_shift[:, None]
+        party_mat = (code_vec[None, :] == np.arange(2)[:, None])
+        valid_arr = (party_mat[:, None, None, :] &
+                     ~np.isnan(y_dev)[None, :, None, :] &
+                     ~np.isnan(x_dev)[None, None, :, :])
+        y_arr = np.where(valid_arr, y_dev[None, :, None, :], 0.0)
+        x_arr = np.where(valid_arr, x_dev[None, None, :, :], 0.0)
+        sum_arr = np.stack([valid_arr.astype(np.float64), x_arr, y_arr,
+                            x_arr ** 2, x_arr * y_arr, y_arr ** 2])
+
+        return sum_arr
+
+    def reg_cumsum(self, yvar_list, xvar_list, cntrl_str):
+        """
+        This method returns (and caches) the cumulative sums over the rows
+        of the contributions to the seat regressions of one definition of
+        party control.
+        """
+        key = ('reg', tuple(yvar_list), tuple(xvar_list), cntrl_str)
+        if key not in self.cum_dict:
+            y_idx = [self.var_pos_dict[var] for var in yvar_list]
+            x_idx = [self.var_pos_dict[var] for var in xvar_list]
+            code_vec = self.code_mat[self.cntrl_list.index(cntrl_str)]
+            sum_arr = self.reg_contributions(
+                self.val_mat[y_idx], self.val_mat[x_idx], code_vec,
+                self.shift_vec[y_idx], self.shift_vec[x_idx])
+            cum_arr = np.zeros(sum_arr.shape[:-1] + (sum_arr.shape[-1] + 1,))
+            np.cumsum(sum_arr, axis=-1, out=cum_arr[..., 1:])
+            self.cum_dict[key] = cum_arr
+
+        return self.cum_dict[key]
+
+
+class Overlay:
+    """
+    This class holds values that replace (year, variable) cells of the
+    data.
+
+    Args:
+        cell_dict (dict): (year, var) -> value
+        formulas (FormulaSet): formulas of the derived variables
+            recomputed from overridden inputs
+    """
+
+    def __init__(self, cell_dict=None, formulas=dv.party_formulas):
+        self.cell_dict = dict(cell_dict or {})
+        self.formulas = formulas
+
+    def __len__(self):
+        return len(self.cell_dict)
+
+    def set(self, year, var, value):
+        """
+        This method overrides one cell.
+        """
+        self.cell_dict[(int(year), var)] = float(value)
+
+    def resolve(self, base):
+        """
+        This method returns the overridden cells as arrays of positions in
+        the base arrays, adding the derived variables of the base whose
+        inputs are overridden in a year (and which are not overridden
+        themselves).
+
+        Args:
+            base (PartyBase): base arrays
+
+        Returns:
+            row_vec (array_like): rows of the cells, sorted
+            var_vec (array_like): positions of the variables of the cells
+            value_vec (array_like): values of the cells
+        """
+        year_dict = {}
+        for (year, var), value in self.cell_dict.items():
+            if var not in base.var_pos_dict:
+                raise KeyError(var + ' is not a variable of the base')
+            year_dict.setdefault(year, {})[var] = value
+        cell_list = []
+        for year, var_dict in year_dict.items():
+            row = base.row(year)
+            dep_set = self.formulas.dependents(list(var_dict))
+            for name in self.formulas.order():
+                if (name in dep_set and name in base.var_pos_dict and
+                        name not in var_dict):
+                    input_list = [
+                        var_dict[var] if var in var_dict else
+                        base.val_mat[base.var_pos_dict[var], row]
+                        for var in self.formulas.inputs(name)]
+                    var_dict[name] = \
+                        float(self.formulas.formula_dict[name][1](
+                            *input_list))
+            for var, value in var_dict.items():
+                cell_list.append((row, base.var_pos_dict[var], value))
+        cell_list.sort()
+        row_vec = np.array([cell[0] for cell in cell_list], dtype=np.int64)
+        var_vec = np.array([cell[1] for cell in cell_list], dtype=np.int64)
+        value_vec = np.array([cell[2] for cell in cell_list],
+                             dtype=np.float64)
+
+        return row_vec, var_vec, value_vec
+
+
+class Scenario:
+    """
+    This class is a window of years of the base arrays with an optional
+    overlay.
+
+    Args:
+        base (PartyBase): base arrays
+        start_year (int): first year of the window
+        end_year (int): last year of the window
+        overlay (Overlay): overridden cells, None for none
+    """
+
+    def __init__(self, base, start_year=1947, end_year=2020, overlay=None):
+        self.base = base
+        self.start_year = start_year
+        self.end_year = end_year
+        self.lo, self.hi = base.window(start_year, end_year)
+        if overlay is None or len(overlay) == 0:
+            self.row_vec = np.zeros(0, dtype=np.int64)
+            self.var_vec = np.zeros(0, dtype=np.int64)
+            self.value_vec = np.zeros(0)
+        else:
+            row_vec, var_vec, value_vec = overlay.resolve(base)
+            keep = (row_vec >= self.lo) & (row_vec < self.hi)
+            self.row_vec = row_vec[keep]
+            self.var_vec = var_vec[keep]
+            self.value_vec = value_vec[keep]
+
+    def values(self, var):
+        """
+        This method returns the values of a variable in the window: a view
+        of the base array, or a copy with the overridden cells if the
+        variable has any in the window.
+        """
+        v = self.base.var_pos_dict[var]
+        val_vec = self.base.val_mat[v, self.lo:self.hi]
+        cell = self.var_vec == v
+        if cell.any():
+            val_vec = val_vec.copy()
+            val_vec[self.row_vec[cell] - self.lo] = self.value_vec[cell]
+
+        return val_vec
+
+    def overlay_rows(self, var_idx):
+        """
+        This method returns the overridden rows among some variables with
+        their old and new values.
+
+        Args:
+            var_idx (array_like): positions of the variables in var_list
+
+        Returns:
+            row_vec (array_like): (R,) rows with an overridden cell
+            old_mat (array_like): (len(var_idx), R) base values
+            new_mat (array_like): (len(var_idx), R) values with the overlay
+        """
+        var_idx = np.asarray(var_idx)
+        in_vars = np.isin(self.var_vec, var_idx)
+        row_vec = np.unique(self.row_vec[in_vars])
+        old_mat = self.base.val_mat[np.ix_(var_idx, row_vec)]
+        new_mat = old_mat.copy()
+        pos_dict = {v: k for k, v in enumerate(var_idx)}
+        for row, v, value in zip(self.row_vec[in_vars],
+                                 self.var_vec[in_vars],
+                                 self.value_vec[in_vars]):
+            new_mat[pos_dict[v], np.searchsorted(row_vec, row)] = value
+
+        return row_vec, old_mat, new_mat
+
+    def cube(self, var_list=ps.var_str_list, cntrl_list=None):
+        """
+        This method computes the summary cube of party_stats.party_cube()
+        for the scenario.
+
+        Args:
+            var_list (list): names of the variables to summarize
+            cntrl_list (list): control definitions, all of the base if None
+
+        Returns:
+            cube_df (DataFrame): columns 'n', 'mean', and 'std' indexed by
+                (cntrl, party, var)
+        """
+        base = self.base
+        if cntrl_list is None:
+            cntrl_list = base.cntrl_list
+        c_idx = [base.cntrl_list.index(cntrl) for cntrl in cntrl_list]
+        v_idx = [base.var_pos_dict[var] for var in var_list]
+        cum_arr = base.cube_cumsum()
+        sum_arr = (cum_arr[..., self.hi] - cum_arr[..., self.lo])
+        sum_arr = sum_arr[:, c_idx][:, :, :, v_idx]
+        row_vec, old_mat, new_mat = self.overlay_rows(v_idx)
+        if len(row_vec) > 0:
+            code_mat = base.code_mat[np.ix_(c_idx, row_vec)]
+            sum_arr = (sum_arr +
+                       base.contributions(new_mat, code_mat,
+                                          v_idx).sum(axis=-1) -
+                       base.contributions(old_mat, code_mat,
+                                          v_idx).sum(axis=-1))
+        n_arr = np.rint(sum_arr[0])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dev_mean = sum_arr[1] / n_arr
+            mean_arr = dev_mean + base.shift_vec[v_idx]
+            std_arr = np.sqrt(np.maximum(sum_arr[2] - n_arr * dev_mean ** 2,
+                                         0.0) / (n_arr - 1))
+        std_arr[n_arr < 2] = np.nan
+        index = base.index([cntrl_list, pc.party_str_list, var_list],
+                           ['cntrl', 'party', 'var'])
+        cube_df = pd.DataFrame({'n': n_arr.ravel().astype(np.int64),
+                                'mean': mean_arr.ravel(),
+                                'std': std_arr.ravel()}, index=index)
+
+        return cube_df
+
+    def regressions(self, yvar_list=ps.var_str_list,
+                    xvar_list=ps.seat_var_list, cntrl_str='whsen',
+                    cov_type='nonrobust', maxlags=None,
+                    group_var='congress_number'):
+        """
+        This method computes the seat regressions of
+        party_stats.seat_regressions() for the scenario. Classical standard
+        errors come from the cumulative sums; robust ones from
+        party_stats.batch_ols() on the window values with the overlay.
+
+        Args:
+            yvar_list (list): names of the dependent variables
+            xvar_list (list): names of the seat regressors
+            cntrl_str (string): definition of party control
+            cov_type (string): 'nonrobust', 'HAC', or 'cluster'
+            maxlags (int): lags of the HAC covariance
+            group_var (string): name of the cluster column of cov_type
+                'cluster'
+
+        Returns:
+            reg_df (DataFrame): columns 'n', 'const', 'slope', 'se_const',
+                'se_slope', and 'r2' indexed by (party, yvar, xvar)
+        """
+        base = self.base
+        index = base.index([pc.party_str_list[:2], yvar_list, xvar_list],
+                           ['party', 'yvar', 'xvar'])
+        if cov_type != 'nonrobust':
+            n_t = self.hi - self.lo
+            shape = (2, len(yvar_list), len(xvar_list), n_t)
+            y_mat = np.stack([self.values(var) for var in yvar_list])
+            x_mat = np.stack([self.values(var) for var in xvar_list])
+            code_vec = base.code_mat[base.cntrl_list.index(cntrl_str),
+                                     self.lo:self.hi]
+            party_mat = code_vec[None, :] == np.arange(2)[:, None]
+            group_vec = None
+            if cov_type == 'cluster':
+                group_vec = \
+                    base.df[group_var].to_numpy()[self.lo:self.hi]
+            ols_dict = ps.batch_ols(
+                np.broadcast_to(y_mat[None, :, None], shape).reshape(-1, n_t),
+                np.broadcast_to(x_mat[None, None], shape).reshape(-1, n_t),
+                np.broadcast_to(party_mat[:, None, None],
+                                shape).reshape(-1, n_t),
+                cov_type=cov_type, maxlags=maxlags, group_vec=group_vec)
+            return pd.DataFrame(ols_dict, index=index)
+        y_idx = [base.var_pos_dict[var] for var in yvar_list]
+        x_idx = [base.var_pos_dict[var] for var in xvar_list]
+        cum_arr = base.reg_cumsum(yvar_list, xvar_list, cntrl_str)
+        sum_arr = cum_arr[..., self.hi] - cum_arr[..., self.lo]
+        row_vec, old_mat, new_mat = self.overlay_rows(y_idx + x_idx)
+        if len(row_vec) > 0:
+            code_vec = base.code_mat[base.cntrl_list.index(cntrl_str),
+                                     row_vec]
+            n_y = len(y_idx)
+            for sign, val_mat in [(1.0, new_mat), (-1.0, old_mat)]:
+                sum_arr = sum_arr + sign * base.reg_contributions(
+                    val_mat[:n_y], val_mat[n_y:], code_vec,
+                    base.shift_vec[y_idx],
+                    base.shift_vec[x_idx]).sum(axis=-1)
+        n_arr = np.rint(sum_arr[0])
+        ols_dict = ps.simple_ols(
+            n_arr, sum_arr[1], sum_arr[2], sum_arr[3], sum_arr[4],
+            sum_arr[5], shift_x=base.shift_vec[x_idx][None, None, :],
+            shift_y=base.shift_vec[y_idx][None, :, None])
+        col_dict = {'n': n_arr.ravel().astype(np.int64)}
+        for key in ['const', 'slope', 'se_const', 'se_slope', 'r2']:
+            col_dict[key] = ols_dict[key].ravel()
+        reg_df = pd.DataFrame(col_dict, index=index)
+
+        return reg_df
+
+    def frame(self, cntrl_str=None, party=None):
+        """
+        This method returns the rows of the scenario as a new DataFrame with
+        the overridden cells, optionally only the years of one party under
+        one definition of party control.
+
+        Args:
+            cntrl_str (string): definition of party control, None for all
+                rows
+            party (string): party of party_str_list
+
+        Returns:
+            scen_df (DataFrame): rows of the scenario
+        """
+        row_vec = np.arange(self.lo, self.hi)
+        if cntrl_str is not None:
+            code_vec = self.base.code_mat[
+                self.base.cntrl_list.index(cntrl_str), self.lo:self.hi]
+            row_vec = row_vec[code_vec == pc.party_str_list.index(party)]
+        scen_df = self.base.df.iloc[row_vec].copy()
+        for row, v, value in zip(self.row_vec, self.var_vec,
+                                 self.value_vec):
+            pos = np.searchsorted(row_vec, row)
+            if pos < len(row_vec) and row_vec[pos] == row:
+                scen_df.iat[pos, scen_df.columns.get_loc(
+                    self.base.var_list[v])] = value
+
+        return scen_df
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    main_df = pc.read_party_data()
+    party_base = PartyBase(main_df)
+    overlay = Overlay(cbo_2021_dict)
+    for end_year, scen_overlay in [(2020, None), (2021, overlay)]:
+        scen = Scenario(party_base, 1947, end_year, scen_overlay)
+        scen_df = scen.frame()
+        cube_diff = (scen.cube() - ps.party_cube(scen_df, end_year=end_year))
+        reg_diff = (scen.regressions() -
+                    ps.seat_regressions(scen_df, end_year=end_year))
+        print('1947-' + str(end_year) + ': max abs. difference from ' +
+              'party_stats, cube ' +
+              '{:.1e}'.format(np.nanmax(np.abs(cube_diff.to_numpy()))) +
+              ', regressions ' +
+              '{:.1e}'.format(np.nanmax(np.abs(reg_diff.to_numpy()))))
+    start = time.perf_counter()
+    n_scen = 0
+    for start_year in range(1930, 1970):
+        for end_year in range(2000, 2022):
+            for scen_overlay in [None, overlay]:
+                scen = Scenario(party_base, start_year, end_year,
+                                scen_overlay)
+                scen.cube()
+                scen.regressions()
+                n_scen += 1
+    print(str(n_scen) + ' scenarios in ' +
+          '{:.2f}'.format(time.perf_counter() - start) + ' s')
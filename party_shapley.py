@@ -0,0 +1,383 @@
+'''
+This module decomposes the gap between Republican and Democrat control of
+the budget variables across the White House, the Senate, and the House. The
+three definitions of party control of table_def_gdp_party.py overlap
+(Republican control of 'all' is Republican control of both 'whsen' and
+'whhou'), so the gaps of the definitions do not say how much of the gap is
+due to each institution. The Shapley values do:
+
+* Every year has a pattern of three bits, whether the White House, the
+  Senate, and the House are Republican (8 patterns).
+* The gap of a coalition S of the institutions is the mean of the years in
+  which all institutions of S are Republican minus the mean of the years in
+  which all of them are Democrat (0 for the empty coalition). The gap of the
+  White House and Senate coalition is the gap of 'whsen', and the gap of all
+  three is the gap of 'all'.
+* The Shapley value of an institution is its average marginal contribution
+  to the gap over the orders in which the institutions join, and the three
+  Shapley values sum to the gap of all three.
+
+The counts and sums of the 8 patterns are one grouped reduction (a matrix
+product with the one-hot patterns) for all variables, windows, and
+bootstrap draws of the years at once, and the gaps of the 8 coalitions and
+the Shapley values are linear in them.
+
+If a user runs this module as a script, it will print the decomposition of
+the 1947-2020 and 1947-2021 (with the CBO July 2021 projections) samples
+with bootstrap confidence intervals and create the figure.
+'''
+
+# Import packages
+import os
+import numpy as np
+import pandas as pd
+from bokeh.io import output_file
+from bokeh.plotting import figure, show
+from bokeh.models import (ColumnDataSource, HoverTool, Title, Whisker,
+                          FactorRange)
+from bokeh.models.widgets import Tabs, Panel
+from bokeh.transform import dodge
+import party_events as pe
+import party_scenarios as psc
+
+# Set paths to work across Mac/Windows/Linux platforms
+cur_path = os.path.split(os.path.abspath(__file__))[0]
+images_dir = os.path.join(cur_path, 'images')
+
+# Institutions (players) in the order of the bits of the patterns
+inst_str_list = ['wh', 'sen', 'hou']
+inst_label_list = ['White House', 'Senate', 'House']
+inst_color_list = ['#9467bd', '#ff7f0e', '#8c564b']
+n_inst = len(inst_str_list)
+n_pattern = 2 ** n_inst
+
+# Coalitions as bitmasks 0, ..., 7 of the institutions
+coal_str_list = ['+'.join([inst for i, inst in enumerate(inst_str_list)
+                           if (coal >> i) & 1]) or 'none'
+                 for coal in range(n_pattern)]
+
+
+def pattern_codes(main_df, pres_party_var='president_party'):
+    """
+    This function returns the pattern of every row of a DataFrame: bit 0 if
+    the president is Republican, bit 1 if Democrats do not hold the Senate
+    majority, and bit 2 if they do not hold the House majority, as in
+    party_control.control_codes().
+
+    Args:
+        main_df (DataFrame): data, e.g. the output of read_party_data()
+        pres_party_var (string): name of the president party column
+
+    Returns:
+        pattern_vec (array_like): (T,) patterns 0, ..., 7, -1 if the
+            president is of neither party
+    """
+    pres_party = main_df[pres_party_var].to_numpy()
+    pattern_vec = ((pres_party == 'Republican').astype(np.int64) +
+                   2 * (main_df['dem_senate_maj'].to_numpy() != 1) +
+                   4 * (main_df['dem_house_maj'].to_numpy() != 1))
+    pattern_vec[(pres_party != 'Republican') &
+                (pres_party != 'Democrat')] = -1
+
+    return pattern_vec
+
+
+def coalition_matrices():
+    """
+    This function returns the matrices that map the counts and sums of the 8
+    patterns to the Republican and Democrat years of each coalition, and the
+    Shapley weights of the gaps of the coalitions.
+
+    Returns:
+        rep_mat (array_like): (8, 8) 1 if every institution of coalition
+            (row) is Republican in pattern (column)
+        dem_mat (array_like): (8, 8) 1 if every institution of the
+            coalition is Democrat in the pattern
+        shap_mat (array_like): (3, 8) weights of the gaps of the coalitions
+            in the Shapley value of each institution
+    """
+    coal_vec = np.arange(n_pattern)
+    rep_mat = ((coal_vec[None, :] & coal_vec[:, None]) ==
+               coal_vec[:, None]).astype(np.float64)
+    dem_mat = ((coal_vec[None, :] & coal_vec[:, None]) == 0).astype(
+        np.float64)
+    size_vec = np.array([bin(coal).count('1') for coal in coal_vec])
+    fact = np.array([1, 1, 2, 6])
+    shap_mat = np.zeros((n_inst, n_pattern))
+    for i in range(n_inst):
+        for coal in coal_vec[(coal_vec >> i) & 1 == 0]:
+            weight = (fact[size_vec[coal]] *
+                      fact[n_inst - size_vec[coal] - 1] / fact[n_inst])
+            shap_mat[i, coal | (1 << i)] += weight
+            shap_mat[i, coal] -= weight
+
+    return rep_mat, dem_mat, shap_mat
+
+
+def coalition_gaps(count_arr, sum_arr):
+    """
+    This function computes the gaps of the 8 coalitions and the Shapley
+    values of the institutions from the counts and sums of the patterns.
+
+    Args:
+        count_arr (array_like): (..., 8) number of observations of each
+            pattern
+        sum_arr (array_like): (..., 8) sum of the observations of each
+            pattern
+
+    Returns:
+        gap_arr (array_like): (..., 8) Republican minus Democrat mean of each
+            coalition (0 for the empty coalition, NaN where either mean is
+            undefined)
+        shap_arr (array_like): (..., 3) Shapley value of each institution
+    """
+    rep_mat, dem_mat, shap_mat = coalition_matrices()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gap_arr = (sum_arr @ rep_mat.T / (count_arr @ rep_mat.T) -
+                   sum_arr @ dem_mat.T / (count_arr @ dem_mat.T))
+    # The empty coalition keeps every year in both groups
+    gap_arr[..., 0] = np.where(np.isnan(gap_arr[..., 0]), np.nan, 0.0)
+    shap_arr = gap_arr @ shap_mat.T
+
+    return gap_arr, shap_arr
+
+
+def shapley_gaps(base, window_list, overlay_dict=None,
+                 var_list=psc.ps.var_str_list, n_boot=2000, level=0.9,
+                 seed=49):
+    """
+    This function computes the Shapley decomposition of the Republican minus
+    Democrat gap of each variable and window of years, with percentile
+    bootstrap confidence intervals from resampling the years of each window.
+    The counts and sums of the patterns of all windows, draws, and variables
+    are one matrix product of the draw weights with the one-hot patterns.
+
+    Args:
+        base (PartyBase): base arrays of the data
+        window_list (list): (start year, end year) of each window
+        overlay_dict (dict): (start year, end year) -> Overlay of the
+            windows with overridden cells, e.g. projections
+        var_list (list): names of the variables
+        n_boot (int): number of bootstrap draws, none if 0
+        level (float): coverage of the confidence intervals
+        seed (int): seed of the bootstrap draws
+
+    Returns:
+        shap_df (DataFrame): columns 'estimate', 'lo', and 'hi' indexed by
+            (window, var, term), where term is an institution of
+            inst_str_list or a coalition gap 'gap_<coalition>' of
+            coal_str_list ('gap_wh+sen+hou' is the total gap)
+    """
+    overlay_dict = overlay_dict or {}
+    pattern_vec = pattern_codes(base.df)
+    onehot_mat = (pattern_vec[:, None] ==
+                  np.arange(n_pattern)[None, :]).astype(np.float64)
+    n_t, n_w, n_v = len(pattern_vec), len(window_list), len(var_list)
+    # (W, V, T) values of each window, NaN outside it
+    val_arr = np.full((n_w, n_v, n_t), np.nan)
+    # (W, B + 1, T) weights of the years, the point estimate first
+    rng = np.random.default_rng(seed)
+    weight_arr = np.zeros((n_w, n_boot + 1, n_t))
+    for w, (start_year, end_year) in enumerate(window_list):
+        scen = psc.Scenario(base, start_year, end_year,
+                            overlay_dict.get((start_year, end_year)))
+        val_arr[w, :, scen.lo:scen.hi] = np.stack(
+            [scen.values(var) for var in var_list])
+        n_y = scen.hi - scen.lo
+        weight_arr[w, 0, scen.lo:scen.hi] = 1.0
+        weight_arr[w, 1:, scen.lo:scen.hi] = rng.multinomial(
+            n_y, np.full(n_y, 1.0 / n_y), size=n_boot)
+    valid_arr = ~np.isnan(val_arr)
+    # (W, V, T, 8) one-hot patterns of the valid values and their values
+    count_onehot = valid_arr[..., None] * onehot_mat
+    sum_onehot = np.where(valid_arr, val_arr, 0.0)[..., None] * onehot_mat
+    # (W, B + 1, V, 8) counts and sums of the patterns
+    count_arr = np.einsum('wbt,wvtp->wbvp', weight_arr, count_onehot,
+                          optimize=True)
+    sum_arr = np.einsum('wbt,wvtp->wbvp', weight_arr, sum_onehot,
+                        optimize=True)
+    gap_arr, shap_arr = coalition_gaps(count_arr, sum_arr)
+    # (W, B + 1, V, 3 + 8) Shapley values and coalition gaps
+    term_arr = np.concatenate([shap_arr, gap_arr], axis=-1)
+    est_arr = term_arr[:, 0]
+    if n_boot > 0:
+        lo_arr, hi_arr = pe.nan_quantiles(
+            np.moveaxis(term_arr[:, 1:], 1, 0),
+            [(1.0 - level) / 2.0, (1.0 + level) / 2.0])
+    else:
+        lo_arr = hi_arr = np.full(est_arr.shape, np.nan)
+    label_list = [str(start_year) + '-' + str(end_year)
+                  for start_year, end_year in window_list]
+    term_list = inst_str_list + ['gap_' + coal for coal in coal_str_list]
+    index = pd.MultiIndex.from_product([label_list, var_list, term_list],
+                                       names=['window', 'var', 'term'])
+    shap_df = pd.DataFrame({'estimate': est_arr.ravel(),
+                            'lo': lo_arr.ravel(), 'hi': hi_arr.ravel()},
+                           index=index)
+
+    return shap_df
+
+
+def gen_shapley_fig(shap_df, var_list, var_label_list, y_axis_label='',
+                    note_text_list=[], fig_title_str='', fig_path=''):
+    """
+    This function creates a stacked bar figure of the Shapley values of the
+    institutions of each window, with the total gap and its confidence
+    interval, one panel per variable. The positive values stack up from 0 and
+    the negative values down from 0.
+
+    Args:
+        shap_df (DataFrame): output of shapley_gaps()
+        var_list (list): names of the variables of the panels
+        var_label_list (list): titles of the panels
+        y_axis_label (string): label of the y-axis
+        note_text_list (list): notes below each panel
+        fig_title_str (string): title of the figure
+        fig_path (string): path of the HTML file
+
+    Returns:
+        tabs (Tabs): one panel per variable
+    """
+    output_file(fig_path, title=fig_title_str)
+    window_list = list(shap_df.index.unique(level='window'))
+    tab_list = []
+    for var, var_label in zip(var_list, var_label_list):
+        var_df = shap_df.xs(var, level='var')
+        est_mat = var_df['estimate'].unstack('term').loc[window_list]
+        total_df = var_df.xs('gap_wh+sen+hou', level='term').loc[
+            window_list].reset_index()
+        min_val = min(np.nanmin(np.minimum(
+            est_mat[inst_str_list].clip(upper=0).sum(axis=1).to_numpy(),
+            total_df['lo'].to_numpy())), 0.0)
+        max_val = max(np.nanmax(np.maximum(
+            est_mat[inst_str_list].clip(lower=0).sum(axis=1).to_numpy(),
+            total_df['hi'].to_numpy())), 0.0)
+        val_buffer = 0.1 * (max_val - min_val)
+        fig = figure(title=fig_title_str + ': ' + var_label,
+                     plot_height=650,
+                     plot_width=1100,
+                     x_range=FactorRange(*window_list),
+                     x_axis_label='Sample years',
+                     y_axis_label=y_axis_label,
+                     y_range=(min_val - val_buffer, max_val + val_buffer),
+                     toolbar_location=None)
+
+        # Set title font size and axes font sizes
+        fig.title.text_font_size = '15.5pt'
+        fig.xaxis.axis_label_text_font_size = '12pt'
+        fig.xaxis.major_label_text_font_size = '12pt'
+        fig.yaxis.axis_label_text_font_size = '12pt'
+        fig.yaxis.major_label_text_font_size = '12pt'
+
+        # Stack the positive and the negative Shapley values separately
+        pos_base = np.zeros(len(window_list))
+        neg_base = np.zeros(len(window_list))
+        for i, inst in enumerate(inst_str_list):
+            inst_df = var_df.xs(inst, level='term').loc[
+                window_list].reset_index()
+            val_vec = inst_df['estimate'].fillna(0.0).to_numpy()
+            bottom_vec = np.where(val_vec >= 0, pos_base, neg_base)
+            inst_df['bottom'] = bottom_vec
+            inst_df['top'] = bottom_vec + val_vec
+            inst_df['label'] = inst_label_list[i]
+            pos_base = pos_base + np.maximum(val_vec, 0.0)
+            neg_base = neg_base + np.minimum(val_vec, 0.0)
+            fig.vbar(x=dodge('window', -0.1, range=fig.x_range), width=0.4,
+                     bottom='bottom', top='top',
+                     source=ColumnDataSource(inst_df),
+                     color=inst_color_list[i], alpha=0.8, muted_alpha=0.2,
+                     legend_label=inst_label_list[i])
+
+        # Plot the total gap and its confidence interval beside the bars
+        total_df['label'] = 'Total gap (all three)'
+        total_cds = ColumnDataSource(total_df)
+        x_total = dodge('window', 0.25, range=fig.x_range)
+        fig.add_layout(Whisker(source=total_cds, base=x_total, upper='hi',
+                               lower='lo', line_color='black'))
+        fig.circle(x=x_total, y='estimate', source=total_cds, size=12,
+                   line_color='black', fill_color='white', line_width=2,
+                   legend_label='Total gap (all three)')
+
+        # Add zero line
+        fig.line(x=[window_list[0], window_list[-1]], y=[0, 0],
+                 color='black', line_width=1)
+
+        # Add information on hover
+        tooltips = [('Term', '@label'), ('Years', '@window'),
+                    ('Estimate', '@estimate{0.00}'),
+                    ('CI', '@lo{0.00} to @hi{0.00}')]
+        fig.add_tools(HoverTool(tooltips=tooltips))
+
+        # Turn off scrolling
+        fig.toolbar.active_drag = None
+
+        # Add legend
+        fig.legend.location = 'top_left'
+        fig.legend.border_line_width = 2
+        fig.legend.border_line_color = 'black'
+        fig.legend.border_line_alpha = 1
+        fig.legend.label_text_font_size = '4mm'
+
+        # Set legend muting click policy
+        fig.legend.click_policy = 'mute'
+
+        # Add notes below image
+        for note_text in note_text_list:
+            caption = Title(text=note_text, align='left',
+                            text_font_size='4mm', text_font_style='italic')
+            fig.add_layout(caption, 'below')
+
+        tab_list.append(Panel(child=fig, title=var_label))
+
+    tabs = Tabs(tabs=tab_list)
+
+    return tabs
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    import time
+    import party_control as pc
+    main_df = pc.read_party_data()
+    party_base = psc.PartyBase(main_df)
+    window_list = [(1947, 2020), (1947, 2021), (1947, 1980), (1981, 2020)]
+    overlay_dict = {(1947, 2021): psc.Overlay(psc.cbo_2021_dict)}
+    start_time = time.perf_counter()
+    shap_df = shapley_gaps(party_base, window_list, overlay_dict)
+    print('Shapley values of ' + str(len(window_list)) + ' windows with ' +
+          '2,000 bootstrap draws: ' + '{:.0f} ms'.format(
+              1e3 * (time.perf_counter() - start_time)))
+    with pd.option_context('display.width', 120, 'display.max_rows', 200):
+        print(shap_df.loc[['1947-2020', '1947-2021']].round(3))
+
+    # The gaps of the coalitions of two and three institutions are the gaps
+    # of the definitions of party control
+    cube_df = psc.Scenario(party_base, 1947, 2020).cube()
+    max_diff = 0.0
+    for cntrl, coal in [('whsen', 'wh+sen'), ('whhou', 'wh+hou'),
+                        ('all', 'wh+sen+hou')]:
+        mean_df = cube_df.xs(cntrl, level='cntrl')['mean'].unstack('party')
+        gap_sr = shap_df.xs(('1947-2020', 'gap_' + coal),
+                            level=('window', 'term'))['estimate']
+        max_diff = max(max_diff, np.abs(
+            (mean_df['rep'] - mean_df['dem']).loc[gap_sr.index] -
+            gap_sr).max())
+    print('Max. abs. difference of the coalition gaps from the cube: ' +
+          '{:.2e}'.format(max_diff))
+
+    note_text_list = \
+        ['Note: Shapley values of the Republican minus Democrat mean over ' +
+         'the 8 coalitions of the White House, Senate, and House; they sum',
+         '   to the gap of full control. Whiskers are 90 percent bootstrap ' +
+         'intervals of the total gap. 2021 uses the CBO July 2021 ' +
+         'projections.']
+    shap_tabs = gen_shapley_fig(
+        shap_df, psc.ps.var_str_list,
+        ['Deficits', 'Non-interest Spending', 'Revenues'],
+        y_axis_label='Republican minus Democrat (% of GDP)',
+        note_text_list=note_text_list,
+        fig_title_str='Shapley Decomposition of the Party Gap',
+        fig_path=os.path.join(images_dir, 'shapley_party_gap.html'))
+    show(shap_tabs)
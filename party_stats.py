@@ -0,0 +1,357 @@
+'''
+This module computes the party-control statistics of table_def_gdp_party.py
+as functions of a DataFrame, so that they can be reused by other scripts and
+benchmarked on data other than deficit_party_data.csv:
+
+* party_cube(): the mean, standard deviation, and number of observations of
+  each variable under Republican, Democrat, and split control for each of
+  the three definitions of party control (the summary table)
+* seat_regressions(): the OLS regressions of each variable on Democrat held
+  Senate and House seats within the Republican and Democrat control years of
+  a definition of party control (the seat regressions)
+* simple_ols(): the estimates and standard errors of many simple
+  regressions at once from their sums of observations
+* batch_ols(): the estimates of many simple regressions at once from their
+  observations, with classical, heteroskedasticity and autocorrelation
+  consistent (HAC, Newey-West), or cluster-robust (e.g., by Congress)
+  standard errors
+
+If a user runs this module as a script, it will print both for 1947-2020
+and check the robust standard errors against statsmodels.
+'''
+
+# Import packages
+import numpy as np
+import pandas as pd
+import party_control as pc
+
+# Variables and seat regressors of the tables in table_def_gdp_party.py
+var_str_list = ['deficit_gdp', 'spend_nonint_gdp', 'receipts_gdp']
+seat_var_list = ['dem_senateseats', 'dem_houseseats']
+
+
+def year_window(main_df, start_year=1947, end_year=2020):
+    """
+    This function returns the rows of a DataFrame in a range of years.
+
+    Args:
+        main_df (DataFrame): data with a 'year' column
+        start_year (int): first year of the window
+        end_year (int): last year of the window
+
+    Returns:
+        window_df (DataFrame): rows with start_year <= year <= end_year
+    """
+    year = main_df['year'].to_numpy()
+    window_df = main_df[(year >= start_year) & (year <= end_year)]
+
+    return window_df
+
+
+def party_cube(main_df, var_list=var_str_list, cntrl_list=pc.cntrl_str_list,
+               start_year=1947, end_year=2020):
+    """
+    This function computes the summary statistics of the party-control table
+    for every definition of party control, party, and variable at once from
+    the control masks of party_control.control_masks(). Missing values are
+    skipped, as in pandas.
+
+    Args:
+        main_df (DataFrame): data, e.g. the output of read_party_data()
+        var_list (list): names of the variables to summarize
+        cntrl_list (list): control definitions, keys of cntrl_maj_dict
+        start_year (int): first year of the sample
+        end_year (int): last year of the sample
+
+    Returns:
+        cube_df (DataFrame): columns 'n', 'mean', and 'std' indexed by
+            (cntrl, party, var), where party is ordered as party_str_list
+    """
+    window_df = year_window(main_df, start_year, end_year)
+    mask_arr = pc.control_masks(window_df, cntrl_list).astype(np.float64)
+    val_mat = window_df[var_list].to_numpy(dtype=np.float64)
+    valid_mat = ~np.isnan(val_mat)
+    val_mat = np.where(valid_mat, val_mat, 0.0)
+    n_arr = mask_arr @ valid_mat
+    sum_arr = mask_arr @ val_mat
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_arr = sum_arr / n_arr
+        dev_mat = mask_arr @ (val_mat ** 2) - n_arr * mean_arr ** 2
+        std_arr = np.sqrt(np.maximum(dev_mat, 0.0) / (n_arr - 1))
+    std_arr[n_arr < 2] = np.nan
+    index = pd.MultiIndex.from_product(
+        [cntrl_list, pc.party_str_list, var_list],
+        names=['cntrl', 'party', 'var'])
+    cube_df = pd.DataFrame({'n': n_arr.ravel().astype(np.int64),
+                            'mean': mean_arr.ravel(),
+                            'std': std_arr.ravel()}, index=index)
+
+    return cube_df
+
+
+def simple_ols(n, sum_x, sum_y, sum_xx, sum_xy, sum_yy, shift_x=0.0,
+               shift_y=0.0):
+    """
+    This function computes the OLS estimates of y = const + slope * x and
+    their classical standard errors from the sums of the observations, so
+    that any number of regressions (arrays of sums of the same shape) are
+    estimated at once. The results equal those of statsmodels OLS. The sums
+    may be of x - shift_x and y - shift_y (e.g., data centered on its means,
+    which keeps the sums accurate), and the intercept is returned for the
+    uncentered data.
+
+    Args:
+        n (array_like): number of observations
+        sum_x (array_like): sums of x
+        sum_y (array_like): sums of y
+        sum_xx (array_like): sums of x ** 2
+        sum_xy (array_like): sums of x * y
+        sum_yy (array_like): sums of y ** 2
+        shift_x (array_like): value subtracted from x before the sums
+        shift_y (array_like): value subtracted from y before the sums
+
+    Returns:
+        ols_dict (dict): arrays 'const', 'slope', 'se_const', 'se_slope', and
+            'r2' of the shape of n (NaN where there are fewer than three
+            observations or x does not vary)
+    """
+    n = np.asarray(n, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_x = sum_x / n
+        mean_y = sum_y / n
+        cxx = sum_xx - n * mean_x ** 2
+        cxy = sum_xy - n * mean_x * mean_y
+        cyy = sum_yy - n * mean_y ** 2
+        slope = cxy / cxx
+        const = mean_y + shift_y - slope * (mean_x + shift_x)
+        ssr = np.maximum(cyy - slope * cxy, 0.0)
+        sigma2 = ssr / (n - 2)
+        se_slope = np.sqrt(sigma2 / cxx)
+        se_const = np.sqrt(sigma2 * (1.0 / n + (mean_x + shift_x) ** 2 /
+                                     cxx))
+        r2 = 1.0 - ssr / cyy
+    bad = (n < 3) | ~(cxx > 0)
+    ols_dict = {}
+    for key, val in [('const', const), ('slope', slope),
+                     ('se_const', se_const), ('se_slope', se_slope),
+                     ('r2', r2)]:
+        ols_dict[key] = np.where(bad, np.nan, val)
+
+    return ols_dict
+
+
+def newey_west_lags(n_obs):
+    """
+    This function returns the Newey-West (1994) rule of thumb for the
+    number of lags of a HAC covariance, floor(4 * (n_obs / 100) ** (2 / 9)).
+    """
+    return int(np.floor(4.0 * (n_obs / 100.0) ** (2.0 / 9.0)))
+
+
+def batch_ols(y_mat, x_mat, valid_mat=None, cov_type='nonrobust',
+              maxlags=None, group_vec=None, use_correction=None):
+    """
+    This function estimates many simple regressions y = const + slope * x at
+    once, one per row of the arrays of observations, with the standard
+    errors of one covariance type:
+
+    * 'nonrobust': classical standard errors, as statsmodels OLS
+    * 'HAC': Newey-West standard errors with Bartlett weights 1 - l /
+      (maxlags + 1) on lags l = 1, ..., maxlags, as statsmodels
+      cov_type='HAC'. The columns of the arrays are consecutive periods and
+      lags are in periods, so observations outside a regression's sample
+      (e.g., the years of the other party) do not become neighbors.
+    * 'cluster': standard errors robust to correlation within the groups of
+      group_vec (e.g., Congresses), as statsmodels cov_type='cluster'
+
+    The residual cross-products and lag weights of all regressions are
+    computed as array operations.
+
+    Args:
+        y_mat (array_like): (S, T) dependent variables of S regressions
+        x_mat (array_like): (S, T) or (T,) regressors
+        valid_mat (array_like): (S, T) or (T,) boolean sample of each
+            regression, all observations if None (missing values are always
+            dropped)
+        cov_type (string): 'nonrobust', 'HAC', or 'cluster'
+        maxlags (int): lags of the HAC covariance, newey_west_lags(T) if
+            None
+        group_vec (array_like): (T,) group of each observation, required
+            for 'cluster'
+        use_correction (bool): whether to apply the small sample
+            corrections of statsmodels, n / (n - 2) for 'HAC' and G / (G -
+            1) * (n - 1) / (n - 2) for 'cluster' with G groups, the
+            defaults of statsmodels (only for 'cluster') if None
+
+    Returns:
+        ols_dict (dict): arrays 'n', 'const', 'slope', 'se_const',
+            'se_slope', and 'r2' of length S (NaN where there are fewer
+            than three observations or x does not vary)
+    """
+    y_mat = np.atleast_2d(np.asarray(y_mat, dtype=np.float64))
+    x_mat = np.asarray(x_mat, dtype=np.float64)
+    y_mat, x_mat = np.broadcast_arrays(y_mat, x_mat)
+    sample_mat = ~np.isnan(y_mat) & ~np.isnan(x_mat)
+    if valid_mat is not None:
+        sample_mat = sample_mat & np.asarray(valid_mat, dtype=bool)
+    weight_mat = sample_mat.astype(np.float64)
+    n_vec = weight_mat.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Estimate y = a + slope * (x - mean_x), of which the cross-product
+        # matrix is diagonal, and transform a to const at the end
+        mean_x = np.where(sample_mat, x_mat, 0.0).sum(axis=1) / n_vec
+        mean_y = np.where(sample_mat, y_mat, 0.0).sum(axis=1) / n_vec
+        xd_mat = np.where(sample_mat, x_mat - mean_x[:, None], 0.0)
+        yd_mat = np.where(sample_mat, y_mat - mean_y[:, None], 0.0)
+        cxx = (xd_mat ** 2).sum(axis=1)
+        cxy = (xd_mat * yd_mat).sum(axis=1)
+        cyy = (yd_mat ** 2).sum(axis=1)
+        slope = cxy / cxx
+        const = mean_y - slope * mean_x
+        resid_mat = yd_mat - slope[:, None] * xd_mat
+        ssr = (resid_mat ** 2).sum(axis=1)
+        r2 = 1.0 - ssr / cyy
+        # Scores of a and slope, zero outside each sample
+        score_arr = np.stack([resid_mat, resid_mat * xd_mat])
+        if cov_type == 'nonrobust':
+            sigma2 = ssr / (n_vec - 2)
+            meat_arr = np.zeros((2, 2, len(n_vec)))
+            meat_arr[0, 0] = sigma2 * n_vec
+            meat_arr[1, 1] = sigma2 * cxx
+        elif cov_type == 'HAC':
+            if maxlags is None:
+                maxlags = newey_west_lags(y_mat.shape[1])
+            meat_arr = np.einsum('ist,jst->ijs', score_arr, score_arr)
+            for lag in range(1, maxlags + 1):
+                cross_arr = np.einsum('ist,jst->ijs', score_arr[:, :, lag:],
+                                      score_arr[:, :, :-lag])
+                meat_arr += ((1.0 - lag / (maxlags + 1.0)) *
+                             (cross_arr + cross_arr.transpose(1, 0, 2)))
+            if use_correction:
+                meat_arr *= n_vec / (n_vec - 2)
+        elif cov_type == 'cluster':
+            if group_vec is None:
+                raise ValueError('cov_type cluster requires group_vec')
+            _, group_idx = np.unique(np.asarray(group_vec),
+                                     return_inverse=True)
+            onehot_mat = np.zeros((len(group_idx), group_idx.max() + 1))
+            onehot_mat[np.arange(len(group_idx)), group_idx] = 1.0
+            group_arr = score_arr @ onehot_mat
+            meat_arr = np.einsum('isg,jsg->ijs', group_arr, group_arr)
+            if use_correction or use_correction is None:
+                n_group = ((weight_mat @ onehot_mat) > 0).sum(axis=1)
+                meat_arr *= (n_group / (n_group - 1) *
+                             (n_vec - 1) / (n_vec - 2))
+        else:
+            raise ValueError('unknown cov_type ' + str(cov_type))
+        # Sandwich with the diagonal bread diag(1 / n, 1 / cxx)
+        var_a = meat_arr[0, 0] / n_vec ** 2
+        cov_ab = meat_arr[0, 1] / (n_vec * cxx)
+        var_slope = meat_arr[1, 1] / cxx ** 2
+        var_const = var_a - 2.0 * mean_x * cov_ab + mean_x ** 2 * var_slope
+        se_const = np.sqrt(np.maximum(var_const, 0.0))
+        se_slope = np.sqrt(np.maximum(var_slope, 0.0))
+    bad = (n_vec < 3) | ~(cxx > 0)
+    ols_dict = {'n': n_vec.astype(np.int64)}
+    for key, val in [('const', const), ('slope', slope),
+                     ('se_const', se_const), ('se_slope', se_slope),
+                     ('r2', r2)]:
+        ols_dict[key] = np.where(bad, np.nan, val)
+
+    return ols_dict
+
+
+def seat_regressions(main_df, yvar_list=var_str_list, xvar_list=seat_var_list,
+                     cntrl_str='whsen', start_year=1947, end_year=2020,
+                     cov_type='nonrobust', maxlags=None,
+                     group_var='congress_number'):
+    """
+    This function runs the OLS regressions of table_def_gdp_party.py of each
+    variable in yvar_list on a constant and each seat variable in xvar_list,
+    separately for the Republican and Democrat control years of one
+    definition of party control. All regressions are estimated at once by
+    batch_ols().
+
+    Args:
+        main_df (DataFrame): data, e.g. the output of read_party_data(),
+            one row per year in order of the years for cov_type 'HAC'
+        yvar_list (list): names of the dependent variables
+        xvar_list (list): names of the seat regressors
+        cntrl_str (string): definition of party control, either 'all',
+            'whsen', or 'whhou'
+        start_year (int): first year of the sample
+        end_year (int): last year of the sample
+        cov_type (string): 'nonrobust', 'HAC', or 'cluster'
+        maxlags (int): lags of the HAC covariance, newey_west_lags() of the
+            number of years if None
+        group_var (string): name of the cluster column of cov_type
+            'cluster'
+
+    Returns:
+        reg_df (DataFrame): columns 'n', 'const', 'slope', 'se_const',
+            'se_slope', and 'r2' indexed by (party, yvar, xvar)
+    """
+    window_df = year_window(main_df, start_year, end_year)
+    code_vec = pc.control_codes(window_df, [cntrl_str])[0]
+    y_mat = window_df[yvar_list].to_numpy(dtype=np.float64).T
+    x_mat = window_df[xvar_list].to_numpy(dtype=np.float64).T
+    party_mat = code_vec[None, :] == np.arange(2)[:, None]
+    # Specifications ordered as (party, yvar, xvar)
+    shape = (2, len(yvar_list), len(xvar_list), len(window_df))
+    group_vec = None
+    if cov_type == 'cluster':
+        group_vec = window_df[group_var].to_numpy()
+    ols_dict = batch_ols(
+        np.broadcast_to(y_mat[None, :, None, :], shape).reshape(
+            -1, len(window_df)),
+        np.broadcast_to(x_mat[None, None, :, :], shape).reshape(
+            -1, len(window_df)),
+        np.broadcast_to(party_mat[:, None, None, :], shape).reshape(
+            -1, len(window_df)),
+        cov_type=cov_type, maxlags=maxlags, group_vec=group_vec)
+    reg_df = pd.DataFrame(
+        ols_dict, index=pd.MultiIndex.from_product(
+            [pc.party_str_list[:2], yvar_list, xvar_list],
+            names=['party', 'yvar', 'xvar']))
+
+    return reg_df
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    main_df = pc.read_party_data()
+    with pd.option_context('display.width', 120,
+                           'display.max_columns', 10):
+        print(party_cube(main_df).round(3))
+        print('')
+        print(seat_regressions(main_df).round(4))
+    # Check the batched standard errors against statsmodels, fit on the
+    # sample of each regression (for HAC the full sample, which has no gaps)
+    import statsmodels.api as sm
+    window_df = year_window(main_df)
+    code_vec = pc.control_codes(window_df, ['whsen'])[0]
+    x_vec = window_df['dem_senateseats'].to_numpy(dtype=np.float64)
+    y_mat = window_df[var_str_list].to_numpy(dtype=np.float64).T
+    group_vec = window_df['congress_number'].to_numpy()
+    for cov_type, sample_list in [('nonrobust', [code_vec == 0,
+                                                 code_vec == 1]),
+                                  ('HAC', [np.ones(len(x_vec), dtype=bool)]),
+                                  ('cluster', [code_vec == 0,
+                                               code_vec == 1])]:
+        max_diff = 0.0
+        for sample in sample_list:
+            ols_dict = batch_ols(y_mat, x_vec, sample, cov_type, maxlags=3,
+                                 group_vec=group_vec)
+            for k in range(len(var_str_list)):
+                keep = sample & ~np.isnan(y_mat[k])
+                cov_kwds = {'nonrobust': None, 'HAC': {'maxlags': 3},
+                            'cluster': {'groups': group_vec[keep]}}[cov_type]
+                res = sm.OLS(y_mat[k][keep], sm.add_constant(
+                    x_vec[keep])).fit(cov_type=cov_type, cov_kwds=cov_kwds)
+                max_diff = max(max_diff,
+                               abs(res.bse[0] - ols_dict['se_const'][k]),
+                               abs(res.bse[1] - ols_dict['se_slope'][k]))
+        print(cov_type + ' standard errors, max abs. difference from ' +
+              'statsmodels: ' + '{:.1e}'.format(max_diff))
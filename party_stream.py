@@ -0,0 +1,328 @@
+'''
+This module computes the party-control summary cube and seat regressions of
+party_stats.py from fiscal records that are too large to load into memory
+(e.g., county- or agency-level records). The records are read in chunks of
+a fixed number of rows. Each chunk is joined by year to the party control
+codes and seat counts of deficit_party_data.csv and folded into partial
+aggregates:
+
+* for the summary cube: the count, sum, and sum of squares of every
+  variable in every (control definition, party) cell
+* for the seat regressions: the count and the sums, sums of squares, and
+  cross-products of every (variable, seat regressor) pair in the Republican
+  and Democrat control years
+
+The partial aggregates are sums, so the aggregates of separate files,
+chunks, or worker processes merge by addition, and memory is bounded by the
+chunk size. The results equal those of party_stats.party_cube() and
+party_stats.seat_regressions() on the joined records up to floating point
+rounding. If a user runs this module as a script, it will stream a
+synthetic record file and compare the results with the in-memory path.
+'''
+
+# Import packages
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import party_control as pc
+import party_stats as ps
+
+
+def control_table(main_df=None, cntrl_list=pc.cntrl_str_list,
+                  seat_list=ps.seat_var_list):
+    """
+    This function returns the year to party control mapping that the
+    records are joined to: the control code of every definition and the
+    seat counts of every year.
+
+    Args:
+        main_df (DataFrame): one row per year, the output of
+            read_party_data() if None
+        cntrl_list (list): control definitions, keys of cntrl_maj_dict
+        seat_list (list): names of the seat columns
+
+    Returns:
+        cntrl_df (DataFrame): int8 code column for every control definition
+            and the seat columns, indexed by sorted year
+    """
+    if main_df is None:
+        main_df = pc.read_party_data()
+    code_mat = pc.control_codes(main_df, cntrl_list)
+    cntrl_df = pd.DataFrame(dict(zip(cntrl_list, code_mat)),
+                            index=main_df['year'].to_numpy())
+    for seat_var in seat_list:
+        cntrl_df[seat_var] = main_df[seat_var].to_numpy(dtype=np.float64)
+    cntrl_df.index.name = 'year'
+    cntrl_df = cntrl_df.sort_index()
+    if not cntrl_df.index.is_unique:
+        raise ValueError('The control table must have one row per year.')
+
+    return cntrl_df
+
+
+class PartyAggregate(object):
+    """
+    Mergeable partial aggregates of the summary cube and the seat
+    regressions. Chunks of records are folded in with add_chunk(), and two
+    aggregates over different records merge with merge() or +=.
+    """
+    def __init__(self, cntrl_df, var_list=ps.var_str_list,
+                 cntrl_list=pc.cntrl_str_list, xvar_list=ps.seat_var_list,
+                 reg_cntrl='whsen', start_year=1947, end_year=2020):
+        self.cntrl_df = cntrl_df
+        self.var_list = list(var_list)
+        self.cntrl_list = list(cntrl_list)
+        self.xvar_list = list(xvar_list)
+        self.reg_cntrl = reg_cntrl
+        self.start_year = start_year
+        self.end_year = end_year
+        self.years = cntrl_df.index.to_numpy()
+        n_party = len(pc.party_str_list)
+        n_var = len(self.var_list)
+        shape = (len(self.cntrl_list), n_party, n_var)
+        self.n_arr = np.zeros(shape)
+        self.sum_arr = np.zeros(shape)
+        self.sq_arr = np.zeros(shape)
+        # (party, yvar, xvar) sums of the Republican and Democrat years
+        reg_shape = (2, n_var, len(self.xvar_list))
+        self.reg_dict = {key: np.zeros(reg_shape) for key in
+                         ['n', 'sum_x', 'sum_y', 'sum_xx', 'sum_xy',
+                          'sum_yy']}
+        self.n_records = 0
+
+    def join(self, year):
+        """
+        This method returns the row of the control table of every record
+        (-1 for years outside the table or the sample window).
+        """
+        pos = np.searchsorted(self.years, year)
+        pos = np.minimum(pos, self.years.size - 1)
+        found = ((self.years[pos] == year) & (year >= self.start_year) &
+                 (year <= self.end_year))
+        return np.where(found, pos, -1)
+
+    def add_chunk(self, chunk_df):
+        """
+        This method folds a chunk of records (a DataFrame with a 'year'
+        column and the variables of var_list) into the aggregates.
+        """
+        year = chunk_df['year'].to_numpy()
+        row = self.join(year)
+        keep = row >= 0
+        row = row[keep]
+        val_mat = chunk_df[self.var_list].to_numpy(dtype=np.float64)[keep]
+        valid_mat = ~np.isnan(val_mat)
+        val_mat = np.where(valid_mat, val_mat, 0.0)
+        n_party = len(pc.party_str_list)
+        for c, cntrl in enumerate(self.cntrl_list):
+            code = self.cntrl_df[cntrl].to_numpy()[row]
+            in_party = code >= 0
+            code = code[in_party]
+            for v in range(len(self.var_list)):
+                valid = valid_mat[in_party, v]
+                vals = val_mat[in_party, v]
+                self.n_arr[c, :, v] += np.bincount(
+                    code, weights=valid, minlength=n_party)
+                self.sum_arr[c, :, v] += np.bincount(
+                    code, weights=vals, minlength=n_party)
+                self.sq_arr[c, :, v] += np.bincount(
+                    code, weights=vals ** 2, minlength=n_party)
+        code = self.cntrl_df[self.reg_cntrl].to_numpy()[row]
+        in_party = (code == 0) | (code == 1)
+        code = code[in_party]
+        for j, xvar in enumerate(self.xvar_list):
+            x_vec = self.cntrl_df[xvar].to_numpy()[row][in_party]
+            x_valid = ~np.isnan(x_vec)
+            for v in range(len(self.var_list)):
+                use = valid_mat[in_party, v] & x_valid
+                y_use = np.where(use, val_mat[in_party, v], 0.0)
+                x_use = np.where(use, x_vec, 0.0)
+                for key, weights in [('n', use), ('sum_x', x_use),
+                                     ('sum_y', y_use),
+                                     ('sum_xx', x_use ** 2),
+                                     ('sum_xy', x_use * y_use),
+                                     ('sum_yy', y_use ** 2)]:
+                    self.reg_dict[key][:, v, j] += np.bincount(
+                        code, weights=weights, minlength=2)
+        self.n_records += len(chunk_df)
+
+    def merge(self, other):
+        """
+        This method adds the aggregates of another PartyAggregate with the
+        same variables and control definitions.
+        """
+        if (other.var_list != self.var_list or
+                other.cntrl_list != self.cntrl_list or
+                other.xvar_list != self.xvar_list or
+                other.reg_cntrl != self.reg_cntrl):
+            raise ValueError('Only aggregates of the same variables and ' +
+                             'control definitions can be merged.')
+        self.n_arr += other.n_arr
+        self.sum_arr += other.sum_arr
+        self.sq_arr += other.sq_arr
+        for key in self.reg_dict:
+            self.reg_dict[key] += other.reg_dict[key]
+        self.n_records += other.n_records
+        return self
+
+    def __iadd__(self, other):
+        return self.merge(other)
+
+    def cube(self):
+        """
+        This method returns the summary cube in the layout of
+        party_stats.party_cube().
+        """
+        n_arr = self.n_arr
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_arr = self.sum_arr / n_arr
+            dev_arr = self.sq_arr - n_arr * mean_arr ** 2
+            std_arr = np.sqrt(np.maximum(dev_arr, 0.0) / (n_arr - 1))
+        std_arr[n_arr < 2] = np.nan
+        index = pd.MultiIndex.from_product(
+            [self.cntrl_list, pc.party_str_list, self.var_list],
+            names=['cntrl', 'party', 'var'])
+        cube_df = pd.DataFrame({'n': n_arr.ravel().astype(np.int64),
+                                'mean': mean_arr.ravel(),
+                                'std': std_arr.ravel()}, index=index)
+        return cube_df
+
+    def regressions(self):
+        """
+        This method returns the seat regressions in the layout of
+        party_stats.seat_regressions().
+        """
+        ols_dict = ps.simple_ols(**self.reg_dict)
+        col_list = ['n', 'const', 'slope', 'se_const', 'se_slope', 'r2']
+        col_dict = {col: ols_dict[col].ravel() for col in col_list[1:]}
+        col_dict['n'] = self.reg_dict['n'].ravel().astype(np.int64)
+        index = pd.MultiIndex.from_product(
+            [pc.party_str_list[:2], self.var_list, self.xvar_list],
+            names=['party', 'yvar', 'xvar'])
+        reg_df = pd.DataFrame(col_dict, index=index)[col_list]
+        return reg_df
+
+
+def read_chunks(file_path, var_list=ps.var_str_list, chunksize=10 ** 6,
+                **csv_kwargs):
+    """
+    This function reads the year and variable columns of a CSV file of
+    records in chunks.
+
+    Args:
+        file_path (string): path of the CSV file
+        var_list (list): names of the variables to read
+        chunksize (int): number of rows per chunk
+        csv_kwargs (dict): other arguments of pandas.read_csv, e.g.
+            skiprows
+
+    Returns:
+        chunk_iter (iterator): DataFrames of at most chunksize rows
+    """
+    dtype_dict = {var: np.float64 for var in var_list}
+    dtype_dict['year'] = np.int64
+    chunk_iter = pd.read_csv(file_path, usecols=['year'] + list(var_list),
+                             dtype=dtype_dict, chunksize=chunksize,
+                             **csv_kwargs)
+
+    return chunk_iter
+
+
+def stream_aggregate(chunk_iter, cntrl_df=None, var_list=ps.var_str_list,
+                     cntrl_list=pc.cntrl_str_list,
+                     xvar_list=ps.seat_var_list, reg_cntrl='whsen',
+                     start_year=1947, end_year=2020):
+    """
+    This function folds an iterable of record chunks into a PartyAggregate.
+
+    Args:
+        chunk_iter (iterable): DataFrames with a 'year' column and the
+            variables of var_list, e.g. the output of read_chunks()
+        cntrl_df (DataFrame): output of control_table(), computed from
+            deficit_party_data.csv if None
+        var_list (list): names of the variables to summarize
+        cntrl_list (list): control definitions, keys of cntrl_maj_dict
+        xvar_list (list): names of the seat regressors
+        reg_cntrl (string): control definition of the seat regressions
+        start_year (int): first year of the sample
+        end_year (int): last year of the sample
+
+    Returns:
+        agg (PartyAggregate): aggregates of all of the records
+    """
+    if cntrl_df is None:
+        cntrl_df = control_table(cntrl_list=cntrl_list, seat_list=xvar_list)
+    agg = PartyAggregate(cntrl_df, var_list, cntrl_list, xvar_list,
+                         reg_cntrl, start_year, end_year)
+    for chunk_df in chunk_iter:
+        agg.add_chunk(chunk_df)
+
+    return agg
+
+
+def join_controls(records_df, main_df, var_list=ps.var_str_list):
+    """
+    This function joins records in memory to the party control columns of
+    deficit_party_data.csv by year, which gives the input of the in-memory
+    path (party_cube() and seat_regressions()) that the streaming path
+    reproduces.
+
+    Args:
+        records_df (DataFrame): records with a 'year' column and the
+            variables of var_list
+        main_df (DataFrame): one row per year, e.g. the output of
+            read_party_data()
+        var_list (list): names of the record variables
+
+    Returns:
+        joined_df (DataFrame): records with the columns of main_df other
+            than var_list
+    """
+    cntrl_col_list = [col for col in main_df.columns if col not in var_list]
+    joined_df = records_df[['year'] + list(var_list)].merge(
+        main_df[cntrl_col_list], on='year', how='inner', sort=False)
+
+    return joined_df
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    parser = argparse.ArgumentParser(
+        description='Stream a synthetic record file through the chunked ' +
+        'party-control aggregation.')
+    parser.add_argument('--records', type=int, default=2 * 10 ** 6,
+                        help='number of records (default: 2000000)')
+    parser.add_argument('--chunksize', type=int, default=250000,
+                        help='rows per chunk (default: 250000)')
+    args = parser.parse_args()
+
+    main_df = pc.read_party_data()
+    rng = np.random.default_rng(0)
+    year_vec = rng.choice(main_df['year'].to_numpy(), args.records)
+    base_df = main_df.set_index('year').loc[year_vec, ps.var_str_list]
+    noise_mat = rng.standard_normal((args.records, len(ps.var_str_list)))
+    records_df = pd.DataFrame(base_df.to_numpy() + noise_mat,
+                              columns=ps.var_str_list)
+    records_df.insert(0, 'year', year_vec)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, 'records.csv')
+        records_df.to_csv(file_path, index=False)
+        start = time.perf_counter()
+        agg = stream_aggregate(read_chunks(file_path,
+                                           chunksize=args.chunksize),
+                               control_table(main_df))
+        elapsed = time.perf_counter() - start
+    print('Streamed ' + '{:,}'.format(agg.n_records) + ' records in ' +
+          '{:.2f}'.format(elapsed) + ' seconds')
+    joined_df = join_controls(records_df, main_df)
+    cube_diff = (agg.cube() - ps.party_cube(joined_df)).abs().max().max()
+    reg_diff = (agg.regressions() -
+                ps.seat_regressions(joined_df)).abs().max().max()
+    print('Largest difference from the in-memory path: cube ' +
+          '{:.2e}'.format(cube_diff) + ', regressions ' +
+          '{:.2e}'.format(reg_diff))
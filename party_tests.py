@@ -0,0 +1,392 @@
+'''
+This module tests the differences of the party-control table: Welch
+(unequal variance) t-tests of every pairwise comparison of Republican,
+Democrat, and split control for every definition of party control,
+variable, and sample window, computed directly from the n, mean, and std of
+the summary cubes of party_stats.party_cube() or
+party_scenarios.Scenario.cube(). The t-statistics, Welch-Satterthwaite
+degrees of freedom, and p-values of all tests are array operations, with
+one call to the CDF of the t distribution of scipy. The p-values are
+adjusted for multiple testing with the Holm (family-wise error rate) and
+Benjamini-Hochberg (false discovery rate) procedures.
+
+tdist.py draws the t distribution and p-value of any one of the tests. If a
+user runs this module as a script, it will print the tests of the 1947-2020
+and 1947-2021 (with the CBO July 2021 projections) samples, check them
+against scipy.stats.ttest_ind_from_stats, and time many windows.
+'''
+
+# Import packages
+import time
+import numpy as np
+import pandas as pd
+from scipy.stats import t as tdist
+import party_control as pc
+import party_scenarios as psc
+
+# Pairwise comparisons of parties as (party a, party b), tested as the mean
+# of a minus the mean of b
+pair_list = [('rep', 'dem'), ('rep', 'spl'), ('dem', 'spl')]
+pair_str_list = [party_a + '_' + party_b for party_a, party_b in pair_list]
+alternative_list = ['two-sided', 'greater', 'less']
+
+
+def sort_valid(pval_arr):
+    """
+    This function sorts p-values along the last axis with the missing
+    p-values last, for the step-wise adjustments.
+
+    Args:
+        pval_arr (array_like): (..., M) p-values
+
+    Returns:
+        order (array_like): (..., M) sorting positions
+        sort_arr (array_like): (..., M) sorted p-values
+        n_valid (array_like): (..., 1) numbers of p-values that are not
+            missing
+    """
+    pval_arr = np.asarray(pval_arr, dtype=np.float64)
+    order = np.argsort(pval_arr, axis=-1, kind='stable')
+    sort_arr = np.take_along_axis(pval_arr, order, axis=-1)
+    n_valid = (~np.isnan(pval_arr)).sum(axis=-1, keepdims=True)
+
+    return order, sort_arr, n_valid
+
+
+def holm_adjust(pval_arr):
+    """
+    This function returns the Holm step-down adjusted p-values of families
+    of tests, which control the family-wise error rate. Missing p-values
+    stay missing and do not count as tests.
+
+    Args:
+        pval_arr (array_like): (..., M) p-values, one family of M tests
+            along the last axis
+
+    Returns:
+        adj_arr (array_like): (..., M) adjusted p-values
+    """
+    order, sort_arr, n_valid = sort_valid(pval_arr)
+    step_arr = (n_valid - np.arange(sort_arr.shape[-1])) * sort_arr
+    adj_sort = np.minimum(np.fmax.accumulate(step_arr, axis=-1), 1.0)
+    adj_arr = np.empty_like(adj_sort)
+    np.put_along_axis(adj_arr, order,
+                      np.where(np.isnan(sort_arr), np.nan, adj_sort),
+                      axis=-1)
+
+    return adj_arr
+
+
+def bh_adjust(pval_arr):
+    """
+    This function returns the Benjamini-Hochberg step-up adjusted p-values
+    (q-values) of families of tests, which control the false discovery rate
+    of independent or positively dependent tests. Missing p-values stay
+    missing and do not count as tests.
+
+    Args:
+        pval_arr (array_like): (..., M) p-values, one family of M tests
+            along the last axis
+
+    Returns:
+        adj_arr (array_like): (..., M) adjusted p-values
+    """
+    order, sort_arr, n_valid = sort_valid(pval_arr)
+    step_arr = n_valid / np.arange(1, sort_arr.shape[-1] + 1) * sort_arr
+    adj_sort = np.minimum(np.fmin.accumulate(step_arr[..., ::-1],
+                                             axis=-1)[..., ::-1], 1.0)
+    adj_arr = np.empty_like(adj_sort)
+    np.put_along_axis(adj_arr, order,
+                      np.where(np.isnan(sort_arr), np.nan, adj_sort),
+                      axis=-1)
+
+    return adj_arr
+
+
+def family_adjust(pval_arr, family_axes, adjust_func):
+    """
+    This function adjusts the p-values of an array of tests within the
+    families of tests that share their positions on some axes.
+
+    Args:
+        pval_arr (array_like): p-values
+        family_axes (list): axes that define the families, e.g. [0] adjusts
+            the tests of each position of the first axis together; all
+            tests are one family if empty
+        adjust_func (function): holm_adjust or bh_adjust
+
+    Returns:
+        adj_arr (array_like): adjusted p-values, same shape as pval_arr
+    """
+    test_axes = [ax for ax in range(pval_arr.ndim) if ax not in family_axes]
+    perm = list(family_axes) + test_axes
+    perm_arr = pval_arr.transpose(perm)
+    n_f = int(np.prod([pval_arr.shape[ax] for ax in family_axes]))
+    adj_arr = adjust_func(perm_arr.reshape(n_f, -1)).reshape(perm_arr.shape)
+
+    return adj_arr.transpose(np.argsort(perm))
+
+
+def welch_arrays(n_a, mean_a, std_a, n_b, mean_b, std_b,
+                 alternative='two-sided'):
+    """
+    This function computes Welch t-tests of the difference of two means
+    from summary statistics, element by element over arrays of any shape.
+
+    Args:
+        n_a (array_like): numbers of observations of the first samples
+        mean_a (array_like): means of the first samples
+        std_a (array_like): sample standard deviations of the first samples
+        n_b (array_like): numbers of observations of the second samples
+        mean_b (array_like): means of the second samples
+        std_b (array_like): sample standard deviations of the second samples
+        alternative (string): 'two-sided', 'greater' (mean a > mean b), or
+            'less'
+
+    Returns:
+        diff (array_like): differences of the means, a minus b
+        se (array_like): standard errors of the differences
+        t_stat (array_like): t-statistics
+        deg_fr (array_like): Welch-Satterthwaite degrees of freedom
+        pval (array_like): p-values, NaN where a sample has fewer than two
+            observations
+    """
+    if alternative not in alternative_list:
+        raise ValueError('alternative must be one of ' +
+                         ', '.join(alternative_list))
+    n_a = np.asarray(n_a, dtype=np.float64)
+    n_b = np.asarray(n_b, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        var_a = np.asarray(std_a, dtype=np.float64) ** 2 / n_a
+        var_b = np.asarray(std_b, dtype=np.float64) ** 2 / n_b
+        diff = np.asarray(mean_a) - np.asarray(mean_b)
+        se = np.sqrt(var_a + var_b)
+        t_stat = diff / se
+        deg_fr = ((var_a + var_b) ** 2 /
+                  (var_a ** 2 / (n_a - 1) + var_b ** 2 / (n_b - 1)))
+    valid = (n_a >= 2) & (n_b >= 2) & (se > 0)
+    t_stat = np.where(valid, t_stat, np.nan)
+    deg_fr = np.where(valid, deg_fr, np.nan)
+    if alternative == 'two-sided':
+        pval = 2 * tdist.sf(np.abs(t_stat), deg_fr)
+    elif alternative == 'greater':
+        pval = tdist.sf(t_stat, deg_fr)
+    else:
+        pval = tdist.cdf(t_stat, deg_fr)
+
+    return diff, se, t_stat, deg_fr, pval
+
+
+def cube_stats(cube_dict):
+    """
+    This function stacks summary cubes into one array.
+
+    Args:
+        cube_dict (dict): window label -> summary cube (columns 'n',
+            'mean', and 'std' indexed by (cntrl, party, var)), e.g. the
+            output of party_stats.party_cube() or Scenario.cube(); all
+            cubes have the same definitions and variables
+
+    Returns:
+        stat_arr (array_like): (3, W, C, P, V) n, mean, and std
+        window_list (list): labels of the windows
+        cntrl_list (list): control definitions
+        var_list (list): names of the variables
+    """
+    window_list = list(cube_dict)
+    first_df = cube_dict[window_list[0]]
+    cntrl_list = list(first_df.index.unique(level='cntrl'))
+    var_list = list(first_df.index.unique(level='var'))
+    index = pd.MultiIndex.from_product([cntrl_list, pc.party_str_list,
+                                        var_list])
+    stat_arr = np.stack([
+        cube_dict[window].reindex(index)[['n', 'mean', 'std']].to_numpy(
+            dtype=np.float64).T.reshape(3, len(cntrl_list),
+                                        len(pc.party_str_list),
+                                        len(var_list))
+        for window in window_list], axis=1)
+
+    return stat_arr, window_list, cntrl_list, var_list
+
+
+def window_stats(base, window_list, var_list=psc.ps.var_str_list,
+                 cntrl_list=None):
+    """
+    This function computes the n, mean, and std of the summary cubes of
+    many windows of years at once from the cumulative sums of a PartyBase,
+    as Scenario.cube() does for one window without an overlay.
+
+    Args:
+        base (PartyBase): base arrays of the data
+        window_list (list): (start year, end year) of each window
+        var_list (list): names of the variables
+        cntrl_list (list): control definitions, all of the base if None
+
+    Returns:
+        stat_arr (array_like): (3, W, C, P, V) n, mean, and std
+    """
+    if cntrl_list is None:
+        cntrl_list = base.cntrl_list
+    c_idx = [base.cntrl_list.index(cntrl) for cntrl in cntrl_list]
+    v_idx = [base.var_pos_dict[var] for var in var_list]
+    lo_hi = np.array([base.window(start_year, end_year)
+                      for start_year, end_year in window_list])
+    cum_arr = base.cube_cumsum()[:, c_idx][:, :, :, v_idx]
+    # (3, W, C, P, V) sums of each window
+    sum_arr = np.moveaxis(cum_arr[..., lo_hi[:, 1]] -
+                          cum_arr[..., lo_hi[:, 0]], -1, 1)
+    n_arr = np.rint(sum_arr[0])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dev_mean = sum_arr[1] / n_arr
+        mean_arr = dev_mean + base.shift_vec[v_idx]
+        std_arr = np.sqrt(np.maximum(sum_arr[2] - n_arr * dev_mean ** 2,
+                                     0.0) / (n_arr - 1))
+    std_arr[n_arr < 2] = np.nan
+
+    return np.stack([n_arr, mean_arr, std_arr])
+
+
+def welch_matrix(stat_arr, window_list, cntrl_list, var_list,
+                 alternative='two-sided', family_list=None, alpha=0.05):
+    """
+    This function tests every pairwise comparison of parties for every
+    window, definition of party control, and variable of an array of
+    summary statistics, and adjusts the p-values for multiple testing.
+
+    Args:
+        stat_arr (array_like): (3, W, C, P, V) n, mean, and std, output of
+            cube_stats() or window_stats()
+        window_list (list): labels of the windows
+        cntrl_list (list): control definitions
+        var_list (list): names of the variables
+        alternative (string): 'two-sided', 'greater' (mean of the first
+            party of a pair is larger), or 'less'
+        family_list (list): index levels ('window', 'cntrl', 'var',
+            'pair') that define the families of tests adjusted together;
+            all tests are one family if None
+        alpha (float): level of the rejection columns
+
+    Returns:
+        test_df (DataFrame): columns 'n_a', 'mean_a', 'n_b', 'mean_b',
+            'diff', 'se', 't', 'df', 'p', 'p_holm', 'p_bh', 'reject_holm',
+            and 'reject_bh' indexed by ('window', 'cntrl', 'var', 'pair')
+    """
+    level_list = ['window', 'cntrl', 'var', 'pair']
+    party_pos_dict = {party: p for p, party in enumerate(pc.party_str_list)}
+    a_idx = [party_pos_dict[party_a] for party_a, _ in pair_list]
+    b_idx = [party_pos_dict[party_b] for _, party_b in pair_list]
+    # (3, W, C, V, pair) arrays of the two parties of each pair
+    stat_a = stat_arr[:, :, :, a_idx].transpose(0, 1, 2, 4, 3)
+    stat_b = stat_arr[:, :, :, b_idx].transpose(0, 1, 2, 4, 3)
+    diff, se, t_stat, deg_fr, pval = welch_arrays(
+        stat_a[0], stat_a[1], stat_a[2], stat_b[0], stat_b[1], stat_b[2],
+        alternative)
+    family_axes = [level_list.index(level) for level in family_list or []]
+    p_holm = family_adjust(pval, family_axes, holm_adjust)
+    p_bh = family_adjust(pval, family_axes, bh_adjust)
+    index = pd.MultiIndex.from_product(
+        [window_list, cntrl_list, var_list, pair_str_list],
+        names=level_list)
+    test_df = pd.DataFrame({'n_a': stat_a[0].ravel().astype(np.int64),
+                            'mean_a': stat_a[1].ravel(),
+                            'n_b': stat_b[0].ravel().astype(np.int64),
+                            'mean_b': stat_b[1].ravel(),
+                            'diff': diff.ravel(), 'se': se.ravel(),
+                            't': t_stat.ravel(), 'df': deg_fr.ravel(),
+                            'p': pval.ravel(), 'p_holm': p_holm.ravel(),
+                            'p_bh': p_bh.ravel(),
+                            'reject_holm': p_holm.ravel() < alpha,
+                            'reject_bh': p_bh.ravel() < alpha},
+                           index=index)
+
+    return test_df
+
+
+def welch_tests(cube_dict, **kwargs):
+    """
+    This function tests every pairwise comparison of parties of some
+    summary cubes.
+
+    Args:
+        cube_dict (dict): window label -> summary cube, see cube_stats()
+        **kwargs: arguments of welch_matrix()
+
+    Returns:
+        test_df (DataFrame): output of welch_matrix()
+    """
+    return welch_matrix(*cube_stats(cube_dict), **kwargs)
+
+
+def scenario_tests(base, window_list, overlay_dict=None,
+                   var_list=psc.ps.var_str_list, **kwargs):
+    """
+    This function tests the pairwise comparisons of parties for many
+    windows of years of the party data. The windows without an overlay
+    come from the cumulative sums of the base all at once.
+
+    Args:
+        base (PartyBase): base arrays of the data
+        window_list (list): (start year, end year) of each window
+        overlay_dict (dict): (start year, end year) -> Overlay of the
+            windows with overridden cells, e.g. projections
+        var_list (list): names of the variables
+        **kwargs: arguments of welch_matrix()
+
+    Returns:
+        test_df (DataFrame): output of welch_matrix(), with window labels
+            'start-end'
+    """
+    overlay_dict = overlay_dict or {}
+    stat_arr = window_stats(base, window_list, var_list)
+    for w, (start_year, end_year) in enumerate(window_list):
+        if (start_year, end_year) in overlay_dict:
+            scen = psc.Scenario(base, start_year, end_year,
+                                overlay_dict[(start_year, end_year)])
+            stat_arr[:, w] = cube_stats({'': scen.cube(var_list)})[0][:, 0]
+    label_list = [str(start_year) + '-' + str(end_year)
+                  for start_year, end_year in window_list]
+
+    return welch_matrix(stat_arr, label_list, base.cntrl_list, var_list,
+                        **kwargs)
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    from scipy.stats import ttest_ind_from_stats
+    party_base = psc.PartyBase(pc.read_party_data())
+    test_df = scenario_tests(
+        party_base, [(1947, 2020), (1947, 2021)],
+        {(1947, 2021): psc.Overlay(psc.cbo_2021_dict)})
+    with pd.option_context('display.width', 120, 'display.max_columns', 14,
+                           'display.max_rows', 200):
+        print('Welch t-tests of the pairwise party differences (Holm and ' +
+              'BH adjusted over all tests)')
+        print(test_df.round(3))
+
+    # Check the tests of 1947-2020 against scipy
+    cube_20 = psc.Scenario(party_base, 1947, 2020).cube()
+    max_diff = 0.0
+    for (cntrl, var, pair), row in test_df.loc['1947-2020'].iterrows():
+        party_a, party_b = pair.split('_')
+        stat_a = cube_20.loc[(cntrl, party_a, var)]
+        stat_b = cube_20.loc[(cntrl, party_b, var)]
+        t_check, p_check = ttest_ind_from_stats(
+            stat_a['mean'], stat_a['std'], stat_a['n'], stat_b['mean'],
+            stat_b['std'], stat_b['n'], equal_var=False)
+        max_diff = max(max_diff, abs(t_check - row['t']),
+                       abs(p_check - row['p']))
+    print('Max. abs. difference from scipy.stats.ttest_ind_from_stats: ' +
+          '{:.2e}'.format(max_diff))
+
+    # Time the tests of many windows
+    window_list = [(start_year, end_year)
+                   for start_year in range(1947, 1991)
+                   for end_year in range(start_year + 30, 2021)]
+    start_time = time.perf_counter()
+    many_df = scenario_tests(party_base, window_list,
+                             family_list=['window'])
+    elapsed = time.perf_counter() - start_time
+    print('{:d} tests of {:d} windows in {:.3f} seconds'.format(
+        len(many_df), len(window_list), elapsed))
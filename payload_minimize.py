@@ -0,0 +1,325 @@
+'''
+This module shrinks the data payload that Bokeh serializes into each figure.
+The builders pass whole DataFrames into ColumnDataSource objects, so every
+figure carries all 21 columns of deficit_party_data.csv (plus the pandas
+index) at full float64 precision. The minimize_payload() function:
+
+* drops every column that no glyph, hover tooltip, legend item, or filter
+  references,
+* casts float64 columns to float32 and int64 columns to the smallest integer
+  type that holds them, so that Bokeh sends them as base64 binary typed
+  arrays instead of JSON lists, and
+* dictionary-encodes repeated strings that are only shown in tooltips (e.g.
+  `president`) as small integer codes that a CustomJSHover maps back to the
+  strings in the browser.
+
+Data sources that are passed to CustomJS callbacks are left untouched,
+because the callback code may read any of their columns. If a user runs this
+module as a script, it will print the before and after payload sizes of the
+party-control time series and scatter figures.
+'''
+
+# Import packages
+import json
+import re
+import numpy as np
+from bokeh.embed import json_item
+from bokeh.models import (ColumnDataSource, CustomJSHover, GlyphRenderer,
+                          GroupFilter, HoverTool, LegendItem, Plot)
+
+# Matches @col and @{col name} fields in hover tooltips
+tooltip_field_patt = re.compile(r'@\{([^}]+)\}|@(\w+)')
+
+
+def payload_bytes(model):
+    """
+    This function returns the number of bytes of the JSON that Bokeh
+    serializes for a model and all the models it references, which is what
+    gets embedded in an HTML page.
+
+    Args:
+        model (Bokeh Model): figure, layout, or Tabs object
+
+    Returns:
+        n_bytes (int): length of the serialized JSON in bytes
+    """
+    n_bytes = len(json.dumps(json_item(model)).encode('utf-8'))
+
+    return n_bytes
+
+
+def dataspec_fields(model):
+    """
+    This function returns the data source column names that the data specs
+    of a glyph (or legend item) refer to as fields, e.g. x='year'.
+
+    Args:
+        model (Bokeh Model): glyph or other model with data specs
+
+    Returns:
+        field_set (set): names of the referenced columns
+    """
+    field_set = set()
+    for spec_name in model.dataspecs():
+        spec_val = model.lookup(spec_name).property.to_serializable(
+            model, spec_name, getattr(model, spec_name))
+        if isinstance(spec_val, dict) and 'field' in spec_val:
+            field_set.add(spec_val['field'])
+
+    return field_set
+
+
+def tooltip_fields(tooltips):
+    """
+    This function returns the column names that a HoverTool tooltips
+    specification refers to with @col or @{col} fields.
+
+    Args:
+        tooltips (string or list): tooltips property of a HoverTool
+
+    Returns:
+        field_set (set): names of the referenced columns
+    """
+    if tooltips is None:
+        return set()
+    if isinstance(tooltips, str):
+        tooltip_str_list = [tooltips]
+    else:
+        tooltip_str_list = [value for label, value in tooltips]
+    field_set = set()
+    for tooltip_str in tooltip_str_list:
+        for brace_name, word_name in tooltip_field_patt.findall(tooltip_str):
+            field_set.add(brace_name or word_name)
+
+    return field_set
+
+
+def hover_renderers(model):
+    """
+    This function maps each HoverTool in a model to the glyph renderers it
+    inspects. A HoverTool with renderers='auto' inspects every glyph
+    renderer of the plot it belongs to.
+
+    Args:
+        model (Bokeh Model): figure, layout, or Tabs object
+
+    Returns:
+        hover_dict (dict): HoverTool -> list of GlyphRenderer objects
+    """
+    hover_dict = {}
+    for plot in model.select({'type': Plot}):
+        plot_rend_list = [rend for rend in plot.renderers
+                          if isinstance(rend, GlyphRenderer)]
+        for tool in plot.toolbar.tools:
+            if isinstance(tool, HoverTool):
+                if tool.renderers == 'auto':
+                    hover_dict[tool] = plot_rend_list
+                else:
+                    hover_dict[tool] = list(tool.renderers)
+
+    return hover_dict
+
+
+def smallest_int_dtype(array):
+    """
+    This function returns the smallest binary-encodable integer type that
+    holds all values of an integer array.
+
+    Args:
+        array (array_like): integer array
+
+    Returns:
+        dtype (NumPy dtype): int8, int16, or int32 (or the original dtype if
+            the values do not fit in int32)
+    """
+    if array.size == 0:
+        return np.dtype(np.int8)
+    min_val = array.min()
+    max_val = array.max()
+    for int_type in [np.int8, np.int16, np.int32]:
+        int_info = np.iinfo(int_type)
+        if min_val >= int_info.min and max_val <= int_info.max:
+            return np.dtype(int_type)
+
+    return array.dtype
+
+
+def minimize_payload(model, float_type=np.float32, encode_strings=True):
+    """
+    This function prunes, casts, and dictionary-encodes the columns of every
+    ColumnDataSource in a model in place and reports the payload size before
+    and after.
+
+    Args:
+        model (Bokeh Model): figure, layout, or Tabs object, e.g. the output
+            of gen_tseries() or gen_scatter()
+        float_type (NumPy type): type that float64 columns are cast to
+        encode_strings (bool): =True dictionary-encodes repeated string
+            columns that are only referenced by hover tooltips
+
+    Returns:
+        report_dict (dict): 'before_bytes' and 'after_bytes' of the
+            serialized model and, for each source, the lists of dropped,
+            cast, and encoded columns under 'source_list'
+    """
+    before_bytes = payload_bytes(model)
+
+    # Find the columns each data source needs
+    src_list = list(model.select({'type': ColumnDataSource}))
+    need_dict = {src: set() for src in src_list}
+    field_src_dict = {}
+    for rend in model.select({'type': GlyphRenderer}):
+        src = rend.data_source
+        if src not in need_dict:
+            continue
+        for glyph in [rend.glyph, rend.selection_glyph,
+                      rend.nonselection_glyph, rend.hover_glyph,
+                      rend.muted_glyph]:
+            if glyph is not None and glyph != 'auto':
+                need_dict[src] |= dataspec_fields(glyph)
+        for filt in rend.view.filters:
+            if isinstance(filt, GroupFilter):
+                need_dict[src].add(filt.column_name)
+        for col in need_dict[src]:
+            field_src_dict.setdefault(col, set()).add(src)
+    for item in model.select({'type': LegendItem}):
+        label_field = dataspec_fields(item)
+        for rend in item.renderers:
+            need_dict[rend.data_source] |= label_field
+            for col in label_field:
+                field_src_dict.setdefault(col, set()).add(rend.data_source)
+
+    tip_dict = {}
+    hover_dict = hover_renderers(model)
+    for hover, rend_list in hover_dict.items():
+        for col in tooltip_fields(hover.tooltips):
+            for rend in rend_list:
+                need_dict[rend.data_source].add(col)
+                tip_dict.setdefault(col, set()).add(rend.data_source)
+
+    # Sources passed to CustomJS callbacks may be read by column in the
+    # browser, so they keep all their columns and types
+    js_src_set = set()
+    for js_model in model.references():
+        js_args = getattr(js_model, 'args', None)
+        if isinstance(js_args, dict):
+            for arg_val in js_args.values():
+                if isinstance(arg_val, ColumnDataSource):
+                    js_src_set.add(arg_val)
+
+    # Choose the string columns to dictionary-encode. A column qualifies if
+    # only tooltips refer to it and none of the sources it appears in is
+    # read by a CustomJS callback.
+    code_dict = {}
+    if encode_strings:
+        for col, tip_src_set in tip_dict.items():
+            col_src_list = [src for src in src_list if col in src.data]
+            if (col in field_src_dict or
+                    any(src in js_src_set for src in col_src_list)):
+                continue
+            val_list = [np.asarray(src.data[col]) for src in col_src_list]
+            if (len(val_list) == 0 or
+                    any(vals.dtype != object for vals in val_list)):
+                continue
+            all_vals = np.concatenate(val_list)
+            if not all(isinstance(val, str) for val in all_vals):
+                continue
+            cat_list = sorted(set(all_vals))
+            if len(cat_list) < all_vals.size:
+                code_dict[col] = cat_list
+
+    # Prune, cast, and encode each source
+    source_list = []
+    for src in src_list:
+        if src in js_src_set:
+            continue
+        src_report = {'source': src.id, 'dropped': [], 'cast': [],
+                      'encoded': []}
+        new_data = {}
+        for col, vals in src.data.items():
+            if col not in need_dict[src]:
+                src_report['dropped'].append(col)
+                continue
+            vals = np.asarray(vals)
+            if col in code_dict:
+                cat_arr = np.asarray(code_dict[col], dtype=object)
+                codes = np.searchsorted(cat_arr, vals)
+                vals = codes.astype(smallest_int_dtype(codes))
+                src_report['encoded'].append(col)
+            elif vals.dtype.kind == 'f' and vals.dtype != float_type:
+                vals = vals.astype(float_type)
+                src_report['cast'].append(col)
+            elif vals.dtype.kind in 'iu':
+                int_dtype = smallest_int_dtype(vals)
+                if int_dtype != vals.dtype:
+                    vals = vals.astype(int_dtype)
+                    src_report['cast'].append(col)
+            new_data[col] = vals
+        src.data = new_data
+        source_list.append(src_report)
+
+    # Map the encoded columns back to strings in the hover tooltips
+    for hover in hover_dict:
+        if hover.tooltips is None or isinstance(hover.tooltips, str):
+            continue
+        formatters = dict(hover.formatters)
+        new_tooltips = []
+        for label, value in hover.tooltips:
+            for col, cat_list in code_dict.items():
+                for col_ref in ['@{' + col + '}', '@' + col]:
+                    if col_ref in value and col_ref + '{' not in value:
+                        value = re.sub(re.escape(col_ref) + r'(?![\w{])',
+                                       col_ref + '{custom}', value)
+                        formatters[col_ref] = CustomJSHover(
+                            code=('const labels = ' + json.dumps(cat_list) +
+                                  '; return labels[value]'))
+                        break
+            new_tooltips.append((label, value))
+        hover.tooltips = new_tooltips
+        hover.formatters = formatters
+
+    after_bytes = payload_bytes(model)
+    report_dict = {'before_bytes': before_bytes, 'after_bytes': after_bytes,
+                   'source_list': source_list}
+
+    return report_dict
+
+
+def print_report(report_dict, name=''):
+    """
+    This function prints the before and after payload sizes of a
+    minimize_payload() report.
+
+    Args:
+        report_dict (dict): output of minimize_payload()
+        name (string): name of the figure to print with the sizes
+
+    Returns:
+        None
+    """
+    before_bytes = report_dict['before_bytes']
+    after_bytes = report_dict['after_bytes']
+    print(name + ': ' + '{:,}'.format(before_bytes) + ' -> ' +
+          '{:,}'.format(after_bytes) + ' bytes (' +
+          '{:.1f}'.format(100 * (1 - after_bytes / before_bytes)) +
+          '% smaller)')
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    from tseries_def_rev_spnd_gdp import gen_tseries
+    from scatter_def_rev_spnd_party import gen_scatter
+
+    note_text_list = [[], [], []]
+    for yvar in ['deficit_gdp', 'receipts_gdp', 'spend_nonint_gdp']:
+        tseries = gen_tseries(yvar_str=yvar, start_year=1947,
+                              note_text_list=note_text_list)
+        print_report(minimize_payload(tseries), 'gen_tseries ' + yvar)
+        for xvar in ['dem_senateseats', 'dem_houseseats']:
+            scatter = gen_scatter(yvar_str=yvar, xvar_str=xvar,
+                                  start_year=1947,
+                                  note_text_list=note_text_list)
+            print_report(minimize_payload(scatter),
+                         'gen_scatter ' + yvar + ' ' + xvar)
@@ -16,6 +16,7 @@ import numpy as np
 import pandas as pd
 import datetime as dt
 import os
+import party_smooth
 from bokeh.io import output_file, save
 from bokeh.plotting import figure, show
 from bokeh.models import (ColumnDataSource, CDSView, GroupFilter, Title,
@@ -62,7 +63,7 @@ main_df = pd.read_csv(party_data_path,
 
 def gen_scatter(yvar_str='deficit_gdp', xvar_str='dem_senateseats',
                 start_year='min', main_df=main_df, note_text_list=[],
-                fig_title_str='', fig_path=''):
+                fig_title_str='', fig_path='', smooth=None, n_boot=200):
     """
     Generates one of six different plot types of U.S. deficit/GDP by year, by
     Democrat held Senate seats or House seats, and by three different measures
@@ -73,6 +74,9 @@ def gen_scatter(yvar_str='deficit_gdp', xvar_str='dem_senateseats',
         seat_type (string): either "house" or "senate"
         df (DataFrame): input data
         show (boolean): =True shows figure by opening browser page
+        smooth (string): None, or 'kernel' or 'lowess' to draw the fitted
+            curve of each party subset with party_smooth.smooth_bands()
+        n_boot (int): number of bootstrap draws of the curve bands
 
     Returns:
         Y (array_like): aggregate output
@@ -200,6 +204,10 @@ def gen_scatter(yvar_str='deficit_gdp', xvar_str='dem_senateseats',
                 (main_df['dem_house_maj'] == 0))]
     cntrl_whhou_split_cds = ColumnDataSource(cntrl_whhou_split_df)
 
+    cntrl_df_list = \
+        [[cntrl_all_rep_df, cntrl_all_dem_df, cntrl_all_split_df],
+         [cntrl_whsen_rep_df, cntrl_whsen_dem_df, cntrl_whsen_split_df],
+         [cntrl_whhou_rep_df, cntrl_whhou_dem_df, cntrl_whhou_split_df]]
     cntrl_cds_list = \
         [[cntrl_all_rep_cds, cntrl_all_dem_cds, cntrl_all_split_cds],
          [cntrl_whsen_rep_cds, cntrl_whsen_dem_cds, cntrl_whsen_split_cds],
@@ -263,6 +271,23 @@ def gen_scatter(yvar_str='deficit_gdp', xvar_str='dem_senateseats',
                                  num_minor_ticks=x_num_minor_ticks)
         fig.xgrid.ticker = SingleIntervalTicker(interval=x_grid_interval)
 
+        # Plotting the fitted curve and bootstrap band of each party subset
+        if smooth is not None:
+            for cntrl_df, color, label in zip(
+                    cntrl_df_list[k], ['red', 'blue', 'green'],
+                    ['Republican control', 'Democrat control',
+                     'Split control']):
+                if cntrl_df[xvar_str].nunique() < 5:
+                    continue
+                curve_cds = ColumnDataSource(party_smooth.smooth_bands(
+                    cntrl_df[xvar_str], cntrl_df[yvar_str], smooth,
+                    n_boot=n_boot))
+                fig.varea(x='x', y1='lo', y2='hi', source=curve_cds,
+                          fill_color=color, fill_alpha=0.15,
+                          muted_alpha=0.05, legend_label=label)
+                fig.line(x='x', y='fit', source=curve_cds, color=color,
+                         line_width=3, muted_alpha=0.2, legend_label=label)
+
         # Plotting the scatter point circles
         fig.circle(x=xvar_str, y=yvar_str, source=cntrl_cds_list[k][0],
                    size=10, line_width=1, line_color='black', fill_color='red',
@@ -316,7 +341,14 @@ def gen_scatter(yvar_str='deficit_gdp', xvar_str='dem_senateseats',
         fig.legend.click_policy = 'mute'
 
         # Add notes below image
-        for note_text in note_text_list[k]:
+        smooth_note_list = []
+        if smooth is not None:
+            smooth_note_list = [
+                ('Lines: ' + {'kernel': 'local linear kernel regression ' +
+                              '(bandwidth by leave-one-out cross-validation)',
+                              'lowess': 'LOWESS'}[smooth] +
+                 ' of each party subset with 90 percent bootstrap bands.')]
+        for note_text in note_text_list[k] + smooth_note_list:
             caption = Title(text=note_text, align='left', text_font_size='4mm',
                             text_font_style='italic')
             fig.add_layout(caption, 'below')
@@ -419,7 +451,7 @@ if __name__ == "__main__":
         gen_scatter(yvar_str='deficit_gdp', xvar_str='dem_senateseats',
                     start_year=1947, note_text_list=note_text_list,
                     fig_title_str=fig_title_deficit,
-                    fig_path=fig_path_deficit)
+                    fig_path=fig_path_deficit, smooth='kernel')
     show(scatter_defgdp_senateseats)
 
     # Create deficits-to-GDP by Democrat House seats scatterplot
@@ -431,7 +463,7 @@ if __name__ == "__main__":
         gen_scatter(yvar_str='deficit_gdp', xvar_str='dem_houseseats',
                     start_year=1947, note_text_list=note_text_list,
                     fig_title_str=fig_title_deficit,
-                    fig_path=fig_path_deficit)
+                    fig_path=fig_path_deficit, smooth='kernel')
     show(scatter_defgdp_houseseats)
 
     # Create non-interest spending-to-GDP by Democrat Senate seats scatterplot
@@ -443,7 +475,7 @@ if __name__ == "__main__":
         gen_scatter(yvar_str='spend_nonint_gdp', xvar_str='dem_senateseats',
                     start_year=1947, note_text_list=note_text_list,
                     fig_title_str=fig_title_deficit,
-                    fig_path=fig_path_deficit)
+                    fig_path=fig_path_deficit, smooth='kernel')
     show(scatter_spendgdp_senateseats)
 
     # Create non-interest spending-to-GDP by Democrat House seats scatterplot
@@ -455,7 +487,7 @@ if __name__ == "__main__":
         gen_scatter(yvar_str='spend_nonint_gdp', xvar_str='dem_houseseats',
                     start_year=1947, note_text_list=note_text_list,
                     fig_title_str=fig_title_deficit,
-                    fig_path=fig_path_deficit)
+                    fig_path=fig_path_deficit, smooth='kernel')
     show(scatter_spendgdp_houseseats)
 
     # Create revenues-to-GDP by Democrat Senate seats scatterplot
@@ -467,7 +499,7 @@ if __name__ == "__main__":
         gen_scatter(yvar_str='receipts_gdp', xvar_str='dem_senateseats',
                     start_year=1947, note_text_list=note_text_list,
                     fig_title_str=fig_title_deficit,
-                    fig_path=fig_path_deficit)
+                    fig_path=fig_path_deficit, smooth='kernel')
     show(scatter_revgdp_senateseats)
 
     # Create revenues-to-GDP by Democrat House seats scatterplot
@@ -479,5 +511,5 @@ if __name__ == "__main__":
         gen_scatter(yvar_str='receipts_gdp', xvar_str='dem_houseseats',
                     start_year=1947, note_text_list=note_text_list,
                     fig_title_str=fig_title_deficit,
-                    fig_path=fig_path_deficit)
+                    fig_path=fig_path_deficit, smooth='kernel')
     show(scatter_revgdp_houseseats)
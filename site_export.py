@@ -0,0 +1,319 @@
+'''
+This module exports the dynamic visualizations in this repository as a static
+website. Every page is written against one local copy of the BokehJS bundle
+with content-hashed filenames, so a browser downloads the bundle once and
+repeat visits only download the figure JSON of each page. Precompressed .gz
+and .br variants are written next to every page and bundle file, and an
+index.html page links all of the figures. If a user runs this module as a
+script, it will build every figure in the repository and write the site.
+'''
+
+# Import packages
+import gzip
+import hashlib
+import os
+import re
+import runpy
+import shutil
+import bokeh
+import bokeh.io
+import bokeh.plotting
+from bokeh.core.templates import get_env
+from bokeh.embed import file_html
+from bokeh.embed.bundle import bundle_for_objs_and_resources
+from bokeh.io.state import curstate
+from bokeh.models import Tabs
+from bokeh.resources import Resources
+from bokeh.util.paths import bokehjsdir
+from lazy_tabs import lazy_tabs
+from payload_minimize import minimize_payload
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Set paths to work across Mac/Windows/Linux platforms
+cur_path = os.path.split(os.path.abspath(__file__))[0]
+site_dir = os.path.join(cur_path, 'site')
+
+# Scripts whose figures make up the site, in the order of the index page
+script_list = ['tseries_def_rev_spnd_gdp.py', 'scatter_def_rev_spnd_party.py',
+               'tseries_outlays.py', 'tseries_pubdebt_gdp_frcsts.py',
+               'OGplots.py', 'tseries_def_int_gdp.py', 'tseries_pubdebt_gdp.py',
+               'tdist.py']
+
+# BokehJS components that a page can reference, in load order
+bokehjs_comp_list = ['bokeh', 'bokeh-gl', 'bokeh-widgets', 'bokeh-tables',
+                     'bokeh-mathjax']
+
+# Page template: the default Bokeh file template with the inline/CDN resource
+# tags replaced by script tags pointing to the shared local bundle
+page_template = get_env().from_string('''
+{% extends "file.html" %}
+{% block js_resources %}
+{%- for js_url in site_js_urls %}
+    <script type="text/javascript" src="{{ js_url }}"></script>
+{%- endfor %}
+{% endblock %}
+''')
+
+index_template = get_env().from_string('''<!DOCTYPE html>
+<html lang="en">
+  <head>
+    <meta charset="utf-8">
+    <title>{{ title | e }}</title>
+  </head>
+  <body>
+    <h1>{{ title | e }}</h1>
+    <ul>
+    {%- for page in page_list %}
+      <li><a href="{{ page.file_name }}">{{ (page.title or page.file_name) | e }}</a>
+        ({{ "{:,}".format(page.html_bytes) }} bytes)</li>
+    {%- endfor %}
+    </ul>
+  </body>
+</html>
+''')
+
+
+def compress_file(file_path):
+    """
+    This function writes precompressed gzip (.gz) and, if the brotli package
+    is installed, brotli (.br) variants of a file next to it. The gzip
+    header time stamp is set to zero so that unchanged content produces
+    byte-identical output across builds.
+
+    Args:
+        file_path (string): path of the file to compress
+
+    Returns:
+        size_dict (dict): number of bytes of the raw, gzip, and brotli files
+            (brotli is None if the brotli package is not installed)
+    """
+    with open(file_path, 'rb') as file:
+        raw_bytes = file.read()
+    gz_bytes = gzip.compress(raw_bytes, compresslevel=9, mtime=0)
+    with open(file_path + '.gz', 'wb') as file:
+        file.write(gz_bytes)
+    size_dict = {'raw': len(raw_bytes), 'gz': len(gz_bytes), 'br': None}
+    if brotli is not None:
+        br_bytes = brotli.compress(raw_bytes, quality=11)
+        with open(file_path + '.br', 'wb') as file:
+            file.write(br_bytes)
+        size_dict['br'] = len(br_bytes)
+
+    return size_dict
+
+
+def copy_bokehjs(site_dir=site_dir):
+    """
+    This function copies the minified BokehJS bundle files into the static/
+    folder of the site. Each file name carries the Bokeh version and the
+    first 12 hex digits of the SHA-256 hash of its contents, so the files can
+    be served with far-future cache headers.
+
+    Args:
+        site_dir (string): root folder of the exported site
+
+    Returns:
+        js_url_dict (dict): BokehJS component name -> relative url of the
+            content-hashed file
+    """
+    static_dir = os.path.join(site_dir, 'static')
+    os.makedirs(static_dir, exist_ok=True)
+    js_url_dict = {}
+    for comp in bokehjs_comp_list:
+        src_path = os.path.join(bokehjsdir(), 'js', comp + '.min.js')
+        with open(src_path, 'rb') as file:
+            js_hash = hashlib.sha256(file.read()).hexdigest()[:12]
+        js_name = (comp + '-' + bokeh.__version__ + '.' + js_hash +
+                   '.min.js')
+        js_path = os.path.join(static_dir, js_name)
+        if not os.path.exists(js_path):
+            shutil.copyfile(src_path, js_path)
+            compress_file(js_path)
+        js_url_dict[comp] = 'static/' + js_name
+
+    return js_url_dict
+
+
+def page_js_urls(model, js_url_dict):
+    """
+    This function returns the local BokehJS urls that a figure needs. Bokeh
+    decides which components (widgets, tables, WebGL, MathJax) the models
+    use, and the CDN file names it picks are mapped to the local copies.
+
+    Args:
+        model (Bokeh Model): figure, layout, or Tabs object of the page
+        js_url_dict (dict): output of copy_bokehjs()
+
+    Returns:
+        js_url_list (list): relative urls of the BokehJS files in load order
+    """
+    bundle = bundle_for_objs_and_resources([model], Resources(mode='cdn'))
+    comp_patt = re.compile(r'(bokeh(?:-[a-z]+)?)-' +
+                           re.escape(bokeh.__version__) + r'\.min\.js$')
+    js_url_list = []
+    for cdn_url in bundle.js_urls:
+        comp_match = comp_patt.search(cdn_url)
+        if comp_match is None:
+            raise ValueError('No local BokehJS file for ' + cdn_url)
+        js_url_list.append(js_url_dict[comp_match.group(1)])
+
+    return js_url_list
+
+
+def write_page(model, file_name, title, js_url_dict, site_dir=site_dir):
+    """
+    This function writes one figure as an HTML page of the site that loads
+    BokehJS from the shared local bundle, and writes its compressed
+    variants.
+
+    Args:
+        model (Bokeh Model): figure, layout, or Tabs object of the page
+        file_name (string): name of the HTML file, e.g. 'tdist.html'
+        title (string): title of the HTML page
+        js_url_dict (dict): output of copy_bokehjs()
+        site_dir (string): root folder of the exported site
+
+    Returns:
+        page_dict (dict): file name, title, and byte sizes of the page
+    """
+    page_html = file_html(model, resources=None, title=title,
+                          template=page_template,
+                          template_variables={
+                              'site_js_urls': page_js_urls(model,
+                                                           js_url_dict)})
+    page_path = os.path.join(site_dir, file_name)
+    with open(page_path, 'w', encoding='utf-8') as file:
+        file.write(page_html)
+    size_dict = compress_file(page_path)
+    page_dict = {'file_name': file_name, 'title': title,
+                 'html_bytes': size_dict['raw'], 'gz_bytes': size_dict['gz'],
+                 'br_bytes': size_dict['br']}
+
+    return page_dict
+
+
+def write_index(page_list, site_dir=site_dir,
+                title='DeficitParty dynamic visualizations'):
+    """
+    This function writes the index.html page of the site, which links every
+    exported figure page, and writes its compressed variants.
+
+    Args:
+        page_list (list): list of page_dict outputs of write_page()
+        site_dir (string): root folder of the exported site
+        title (string): title of the index page
+
+    Returns:
+        index_path (string): path of the index.html file
+    """
+    index_path = os.path.join(site_dir, 'index.html')
+    with open(index_path, 'w', encoding='utf-8') as file:
+        file.write(index_template.render(title=title, page_list=page_list))
+    compress_file(index_path)
+
+    return index_path
+
+
+def collect_figures(script_list=script_list):
+    """
+    This function runs each figure script of the repository as if it were
+    called from the command line and collects the figures it shows instead
+    of opening them in a browser. The HTML file name and page title of each
+    figure are taken from the script's output_file() call. Scripts whose
+    input data are not in the data/ folder are skipped with a message.
+
+    Args:
+        script_list (list): script file names relative to the repository
+
+    Returns:
+        fig_list (list): list of (model, file_name, title) tuples
+    """
+    fig_list = []
+
+    def collect_show(obj, *args, **kwargs):
+        file_config = curstate().file
+        fig_list.append((obj, os.path.basename(file_config.filename),
+                         file_config.title))
+
+    orig_show_list = [bokeh.io.show, bokeh.plotting.show]
+    bokeh.io.show = bokeh.plotting.show = collect_show
+    try:
+        for script in script_list:
+            try:
+                runpy.run_path(os.path.join(cur_path, script),
+                               run_name='__main__')
+            except (FileNotFoundError, OSError) as err:
+                print('Skipping ' + script + ': ' + str(err))
+    finally:
+        bokeh.io.show, bokeh.plotting.show = orig_show_list
+
+    return fig_list
+
+
+def export_site(site_dir=site_dir, script_list=script_list, minimize=True,
+                tabs_mode=None):
+    """
+    This function builds every figure of the listed scripts and writes the
+    static site: the content-hashed BokehJS bundle in static/, one HTML page
+    per figure, an index.html page, and .gz/.br variants of all of them.
+
+    Args:
+        site_dir (string): root folder of the exported site
+        script_list (list): script file names relative to the repository
+        minimize (bool): =True shrinks the data payload of each figure with
+            payload_minimize.minimize_payload() before it is written
+        tabs_mode (string or None): 'shared' or 'fetch' writes the pages of
+            Tabs documents with lazy_tabs.lazy_tabs() in that mode, with the
+            'fetch' panel files in the panels/ folder; None keeps all panels
+
+    Returns:
+        page_list (list): list of page_dict outputs of write_page()
+    """
+    os.makedirs(site_dir, exist_ok=True)
+    js_url_dict = copy_bokehjs(site_dir)
+    page_list = []
+    for model, file_name, title in collect_figures(script_list):
+        if tabs_mode is not None and isinstance(model, Tabs):
+            model = lazy_tabs(model, tabs_mode,
+                              os.path.splitext(file_name)[0],
+                              os.path.join(site_dir, 'panels'), 'panels/',
+                              minimize)
+        elif minimize:
+            minimize_payload(model)
+        page_list.append(write_page(model, file_name, title, js_url_dict,
+                                    site_dir))
+    panel_dir = os.path.join(site_dir, 'panels')
+    if tabs_mode == 'fetch' and os.path.isdir(panel_dir):
+        for panel_file in os.listdir(panel_dir):
+            if panel_file.endswith('.json'):
+                compress_file(os.path.join(panel_dir, panel_file))
+    write_index(page_list, site_dir)
+
+    return page_list
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    import argparse
+    parser = argparse.ArgumentParser(
+        description='Export the DeficitParty figures as a static site.')
+    parser.add_argument('--tabs-mode', choices=['shared', 'fetch'],
+                        default=None,
+                        help='load the party-control tab panels lazily')
+    args = parser.parse_args()
+    page_list = export_site(tabs_mode=args.tabs_mode)
+    print('')
+    print('Site written to ' + site_dir)
+    for page in page_list:
+        br_str = ('' if page['br_bytes'] is None else
+                  ', br ' + '{:,}'.format(page['br_bytes']))
+        print(page['file_name'] + ': html ' +
+              '{:,}'.format(page['html_bytes']) + ', gz ' +
+              '{:,}'.format(page['gz_bytes']) + br_str + ' bytes')
+    if brotli is None:
+        print('Package brotli is not installed; no .br files were written.')
@@ -0,0 +1,375 @@
+'''
+This module generates synthetic data with the schema of the repository's
+data files at any scale, for benchmarks and scaling tests:
+
+* synth_party_data(): a panel of n_rows rows with the columns of
+  deficit_party_data.csv plus a 'jurisdiction' column. Every jurisdiction
+  (e.g., a state or a country) covers the years of deficit_party_data.csv.
+  Jurisdiction 0 is the national data itself; every other jurisdiction
+  perturbs the fiscal ratios with persistent noise, perturbs the seat counts
+  (recomputing the majority flags), and switches the party of randomly
+  chosen presidencies, so that all three party-control definitions stay
+  populated.
+* synth_frcst_data(): the CBO debt forecasts of cbo_debt_forecasts.csv with
+  n_vintages forecast vintages instead of 16. Every synthetic vintage is one
+  of the actual vintages scaled by a random drift.
+* synth_mts_data(): monthly receipts and outlays by line item in the layout
+  of mts_monthly.py, with a nominal GDP series, whose fiscal-year totals as
+  percents of GDP equal the ratios of deficit_party_data.csv.
+
+The write_party_csv() and write_party_excel() functions write a synthetic
+panel in the file layout of deficit_party_data.csv (three source rows above
+the column names), so that it can be read with
+party_control.read_party_data(). If a user runs this module as a script, it
+will write a synthetic panel CSV file, e.g.
+
+    python synth_party_data.py --rows 1000000 --out synth_party_data.csv
+'''
+
+# Import packages
+import argparse
+import os
+import numpy as np
+import pandas as pd
+import party_control as pc
+
+# Set paths to work across Mac/Windows/Linux platforms
+cur_path = os.path.split(os.path.abspath(__file__))[0]
+data_dir = os.path.join(cur_path, 'data')
+frcst_data_path = os.path.join(data_dir, 'cbo_debt_forecasts.csv')
+
+# Fiscal ratio columns that are perturbed, with the identity that ties
+# total spending to its components
+ratio_var_list = ['deficit_gdp', 'receipts_gdp', 'spend_int_gdp',
+                  'spend_nonint_gdp', 'spend_tot_gdp']
+chamber_list = [('senate', 'dem_senate_maj'), ('house', 'dem_house_maj')]
+
+
+def read_frcst_data(data_path=frcst_data_path):
+    """
+    This function reads the CBO debt forecasts of cbo_debt_forecasts.csv.
+
+    Args:
+        data_path (string): path of the cbo_debt_forecasts.csv file
+
+    Returns:
+        frcst_df (DataFrame): 'year' column and a level column and a
+            '<vintage>_frcst' indicator column for each forecast vintage
+    """
+    frcst_df = pd.read_csv(data_path, header=5)
+    frcst_df['year'] = frcst_df['year'].astype(pd.Int64Dtype())
+    for col in frcst_df.columns:
+        if col.endswith('_frcst'):
+            frcst_df[col] = frcst_df[col].astype(pd.Int64Dtype())
+
+    return frcst_df
+
+
+def frcst_vintage_list(frcst_df):
+    """
+    This function returns the forecast vintage names (the level columns) of
+    a CBO debt forecast DataFrame in column order.
+
+    Args:
+        frcst_df (DataFrame): e.g. the output of read_frcst_data()
+
+    Returns:
+        vintage_list (list): vintage names, e.g. ['jun_2009', ...]
+    """
+    vintage_list = [col for col in frcst_df.columns
+                    if col + '_frcst' in frcst_df.columns]
+
+    return vintage_list
+
+
+def synth_party_data(n_rows, base_df=None, seed=0, noise_scale=0.3,
+                     flip_prob=0.3):
+    """
+    This function generates a synthetic panel with the schema of
+    deficit_party_data.csv and n_rows rows (the last jurisdiction is cut off
+    at n_rows).
+
+    Args:
+        n_rows (int): number of rows of the panel
+        base_df (DataFrame): national data that the panel is generated from,
+            the output of read_party_data() if None
+        seed (int): seed of the random number generator
+        noise_scale (float): standard deviation of the noise in the fiscal
+            ratios as a fraction of each ratio's standard deviation
+        flip_prob (float): probability that a presidency of a synthetic
+            jurisdiction switches party
+
+    Returns:
+        synth_df (DataFrame): n_rows rows with the columns of base_df plus
+            an int32 'jurisdiction' column
+    """
+    if base_df is None:
+        base_df = pc.read_party_data()
+    rng = np.random.default_rng(seed)
+    n_years = len(base_df)
+    n_juris = max(1, -(-n_rows // n_years))
+    juris_vec = np.repeat(np.arange(n_juris, dtype=np.int32), n_years)
+    synth_df = base_df.iloc[np.tile(np.arange(n_years), n_juris)]
+    synth_df = synth_df.reset_index(drop=True)
+    synth_df['jurisdiction'] = juris_vec
+    perturb = juris_vec > 0
+
+    # Persistent (AR(1)) noise in the ratios of every synthetic jurisdiction
+    shock_mat = rng.standard_normal((n_juris, n_years, 3))
+    shock_mat[0] = 0.0
+    noise_mat = np.empty_like(shock_mat)
+    noise_mat[:, 0] = shock_mat[:, 0]
+    for t in range(1, n_years):
+        noise_mat[:, t] = 0.7 * noise_mat[:, t - 1] + shock_mat[:, t]
+    noise_mat = noise_mat.reshape(n_juris * n_years, 3) * noise_scale
+    ratio_std = base_df[ratio_var_list].std().to_numpy()
+    receipts = (synth_df['receipts_gdp'].to_numpy() +
+                ratio_std[1] * noise_mat[:, 0])
+    spend_int = (synth_df['spend_int_gdp'].to_numpy() +
+                 0.1 * ratio_std[2] * noise_mat[:, 1])
+    spend_nonint = (synth_df['spend_nonint_gdp'].to_numpy() +
+                    ratio_std[3] * noise_mat[:, 2])
+    spend_tot = (synth_df['spend_tot_gdp'].to_numpy() +
+                 0.1 * ratio_std[2] * noise_mat[:, 1] +
+                 ratio_std[3] * noise_mat[:, 2])
+    synth_df['receipts_gdp'] = receipts
+    synth_df['spend_int_gdp'] = spend_int
+    synth_df['spend_nonint_gdp'] = spend_nonint
+    synth_df['spend_tot_gdp'] = spend_tot
+    synth_df['deficit_gdp'] = np.where(perturb, receipts - spend_tot,
+                                       synth_df['deficit_gdp'].to_numpy())
+
+    # Seat counts shift by a persistent swing per Congress, and the majority
+    # flags follow the seats (ties keep the actual flag)
+    congress = synth_df['congress_number'].to_numpy()
+    congress_code = np.unique(congress, return_inverse=True)[1]
+    n_congress = congress_code.max() + 1
+    for chamber, maj_var in chamber_list:
+        total = synth_df['total_' + chamber + 'seats'].to_numpy()
+        other = synth_df['other_' + chamber + 'seats'].to_numpy()
+        swing_mat = rng.normal(0.0, 0.04, (n_juris, n_congress))
+        swing_mat[0] = 0.0
+        swing = swing_mat[juris_vec, congress_code] * total
+        dem = np.clip(np.rint(synth_df['dem_' + chamber + 'seats']
+                              .to_numpy() + swing), 0, total - other)
+        dem = dem.astype(np.int64)
+        rep = total - other - dem
+        dem_caucus = dem + other
+        synth_df['dem_' + chamber + 'seats'] = dem
+        synth_df['rep_' + chamber + 'seats'] = rep
+        synth_df[maj_var] = np.where(
+            dem_caucus == rep, synth_df[maj_var].to_numpy(),
+            (dem_caucus > rep).astype(np.int64))
+
+    # Switch the party of randomly chosen presidencies
+    president = synth_df['president'].to_numpy()
+    term_start = np.r_[True, president[1:] != president[:-1]] | \
+        np.r_[True, juris_vec[1:] != juris_vec[:-1]]
+    term_id = np.cumsum(term_start) - 1
+    flip = (rng.random(term_id[-1] + 1) < flip_prob)[term_id] & perturb
+    party = synth_df['president_party'].to_numpy()
+    flip_party = np.where(party == 'Republican', 'Democrat',
+                          np.where(party == 'Democrat', 'Republican', party))
+    synth_df['president_party'] = np.where(flip, flip_party, party)
+    synth_df['dem_whitehouse'] = \
+        (synth_df['president_party'].to_numpy() == 'Democrat').astype(
+            np.int64)
+    synth_df = synth_df.iloc[:n_rows].copy()
+
+    return synth_df
+
+
+def synth_frcst_data(n_vintages, frcst_df=None, seed=0, drift_scale=0.05):
+    """
+    This function generates CBO debt forecast data with the layout of
+    cbo_debt_forecasts.csv and n_vintages forecast vintages named
+    'v0000', 'v0001', and so on.
+
+    Args:
+        n_vintages (int): number of forecast vintages
+        frcst_df (DataFrame): actual forecasts that the vintages are drawn
+            from, the output of read_frcst_data() if None
+        seed (int): seed of the random number generator
+        drift_scale (float): standard deviation of the proportional drift
+            of a synthetic vintage away from its actual vintage
+
+    Returns:
+        synth_df (DataFrame): 'year' column and a level column and an
+            indicator column for each of the n_vintages vintages
+        vintage_list (list): names of the synthetic vintages
+        label_list (list): legend labels of the synthetic vintages
+    """
+    if frcst_df is None:
+        frcst_df = read_frcst_data()
+    rng = np.random.default_rng(seed)
+    base_list = frcst_vintage_list(frcst_df)
+    year = frcst_df['year'].to_numpy(dtype=np.float64)
+    col_dict = {'year': frcst_df['year']}
+    vintage_list = []
+    label_list = []
+    for k in range(n_vintages):
+        base = base_list[k % len(base_list)]
+        vintage = 'v' + str(k).zfill(4)
+        level = frcst_df[base].to_numpy(dtype=np.float64)
+        frcst = frcst_df[base + '_frcst']
+        first_frcst = year[(frcst == 1).to_numpy(dtype=bool,
+                                                  na_value=False)].min()
+        horizon = np.maximum(year - first_frcst, 0.0)
+        if k >= len(base_list):
+            drift = rng.normal(0.0, drift_scale)
+            level = level * (1.0 + drift * horizon / 10.0)
+        col_dict[vintage] = level
+        col_dict[vintage + '_frcst'] = frcst
+        vintage_list.append(vintage)
+        label_list.append(base + ' #' + str(k // len(base_list)))
+    synth_df = pd.DataFrame(col_dict)
+
+    return synth_df, vintage_list, label_list
+
+
+def synth_mts_data(n_items=300, base_df=None, start_fy=1930, end_fy=2020,
+                   seed=0):
+    """
+    This function generates monthly receipts and outlays by line item in the
+    long layout that mts_monthly.read_mts() reads. Every fiscal year's
+    receipts, outlays, and interest outlays (line item
+    mts_monthly.interest_item) divided by the fiscal year's synthetic GDP
+    equal receipts_gdp, spend_tot_gdp, and spend_int_gdp of base_df. The
+    amounts of a fiscal year are spread over its months with a seasonal
+    pattern and over the line items with slowly drifting shares, and the
+    transition quarter gets a quarter of fiscal year 1976.
+
+    Args:
+        n_items (int): number of line items (a third of them receipts)
+        base_df (DataFrame): annual ratios, the output of read_party_data()
+            if None
+        start_fy (int): first fiscal year
+        end_fy (int): last fiscal year
+        seed (int): seed of the random number generator
+
+    Returns:
+        mts_df (DataFrame): columns 'record_date', 'category', 'line_item',
+            and 'amount' (millions of dollars)
+        gdp (Series): nominal GDP in millions of dollars by fiscal year
+    """
+    import mts_monthly as mm
+
+    if base_df is None:
+        base_df = pc.read_party_data()
+    rng = np.random.default_rng(seed)
+    fy_vec = np.arange(start_fy, end_fy + 1)
+    ratio_df = base_df.set_index('year').reindex(fy_vec)[
+        ['receipts_gdp', 'spend_tot_gdp', 'spend_int_gdp']]
+    ratio_df = ratio_df.interpolate(limit_direction='both')
+    gdp = pd.Series(1e5 * np.exp(0.06 * (fy_vec - 1930)), index=fy_vec,
+                    name='gdp')
+    receipts = ratio_df['receipts_gdp'].to_numpy() * gdp.to_numpy() / 100
+    outlays = ratio_df['spend_tot_gdp'].to_numpy() * gdp.to_numpy() / 100
+    spend_int = ratio_df['spend_int_gdp'].to_numpy() * gdp.to_numpy() / 100
+
+    # Months of the fiscal years (and the transition quarter)
+    first_month = mm.month_number(str(start_fy - 1) + '-07')
+    months = np.arange(first_month, mm.month_number(str(end_fy) + '-10'))
+    fy = mm.fiscal_year(months)
+    months = months[(fy == 0) | ((fy >= start_fy) & (fy <= end_fy))]
+    fy = mm.fiscal_year(months)
+    if start_fy > 1976:
+        months = months[fy != 0]
+        fy = fy[fy != 0]
+    fy_pos = np.searchsorted(fy_vec, np.where(fy == 0, 1976, fy))
+    month_of_year = np.mod(months, 12)
+    season_mat = 1.0 + 0.3 * rng.random((3, 12))
+    season = season_mat[:, month_of_year]
+    month_weight = season / np.bincount(fy, weights=season[0])[fy]
+    for k in range(1, 3):
+        month_weight[k] = season[k] / np.bincount(fy, weights=season[k])[fy]
+    tq = fy == 0
+    month_weight[:, tq] = 0.25 * season[:, tq] / season[:, tq].sum(
+        axis=1, keepdims=True)
+
+    # Line item shares drift as random walks in logs
+    n_rec = max(1, n_items // 3)
+    n_out = max(1, n_items - n_rec - 1)
+    share_list = []
+    for n_cat in [n_rec, n_out]:
+        log_share = (rng.normal(0.0, 1.0, (n_cat, 1)) +
+                     np.cumsum(rng.normal(0.0, 0.05,
+                                          (n_cat, fy_vec.size)), axis=1))
+        share = np.exp(log_share)
+        share_list.append(share / share.sum(axis=0))
+    rec_mat = (share_list[0][:, fy_pos] * receipts[fy_pos] *
+               month_weight[0])
+    int_mat = (spend_int[fy_pos] * month_weight[2])[None, :]
+    out_mat = (share_list[1][:, fy_pos] * (outlays - spend_int)[fy_pos] *
+               month_weight[1])
+    amount_mat = np.vstack([rec_mat, int_mat, out_mat])
+    item_list = (['Receipts item ' + str(k).zfill(3) for k in range(n_rec)] +
+                 [mm.interest_item] +
+                 ['Outlays item ' + str(k).zfill(3) for k in range(n_out)])
+    category_list = ['receipts'] * n_rec + ['outlays'] * (n_out + 1)
+    record_date = ((months + 1).astype('datetime64[M]').astype(
+        'datetime64[D]') - 1).astype('str')
+    mts_df = pd.DataFrame(
+        {'record_date': np.tile(record_date, len(item_list)),
+         'category': np.repeat(category_list, months.size),
+         'line_item': np.repeat(item_list, months.size),
+         'amount': amount_mat.ravel()})
+
+    return mts_df, gdp
+
+
+def write_party_csv(synth_df, file_path, base_path=pc.party_data_path):
+    """
+    This function writes a DataFrame in the file layout of
+    deficit_party_data.csv, with the three source rows of the actual file
+    above the column names.
+
+    Args:
+        synth_df (DataFrame): e.g. the output of synth_party_data()
+        file_path (string): path of the CSV file to write
+        base_path (string): path of deficit_party_data.csv
+
+    Returns:
+        None
+    """
+    with open(base_path, 'r', encoding='utf-8-sig') as file:
+        head_list = [next(file) for k in range(3)]
+    with open(file_path, 'w', encoding='utf-8', newline='') as file:
+        file.writelines(head_list)
+        synth_df.to_csv(file, index=False, lineterminator='\n')
+
+
+def write_party_excel(synth_df, file_path):
+    """
+    This function writes a DataFrame to an Excel file with three empty rows
+    above the column names, the layout that read_party_data() skips.
+
+    Args:
+        synth_df (DataFrame): e.g. the output of synth_party_data()
+        file_path (string): path of the .xlsx file to write
+
+    Returns:
+        None
+    """
+    synth_df.to_excel(file_path, index=False, startrow=3)
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    parser = argparse.ArgumentParser(
+        description='Write a synthetic panel with the schema of ' +
+        'deficit_party_data.csv.')
+    parser.add_argument('--rows', type=int, default=10 ** 6,
+                        help='number of rows (default: 1000000)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed of the random number generator')
+    parser.add_argument('--out', default='synth_party_data.csv',
+                        help='path of the CSV file to write')
+    args = parser.parse_args()
+    synth_df = synth_party_data(args.rows, seed=args.seed)
+    write_party_csv(synth_df, args.out)
+    print('Wrote ' + '{:,}'.format(len(synth_df)) + ' rows (' +
+          str(synth_df['jurisdiction'].nunique()) + ' jurisdictions) to ' +
+          args.out)
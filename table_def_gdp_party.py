@@ -9,6 +9,9 @@ import pandas as pd
 import os
 from scipy.stats import t as tdist
 import statsmodels.api as sm
+import instrument
+import party_scenarios
+import party_tests
 
 # Set paths to work across Mac/Windows/Linux platforms
 cur_path = os.path.split(os.path.abspath(__file__))[0]
@@ -21,8 +24,9 @@ Create pandas DataFrames and Column Data Source data objects
 -------------------------------------------------------------------------------
 '''
 
-# Reading data from CVS (deficit_party_data.csv) and create two DataFrames for
-# each time period
+# Reading data from CVS (deficit_party_data.csv) and create the samples of each
+# time period
+instrument.checkpoint('table: read data')
 main_df = pd.read_csv(party_data_path,
                       dtype={'year': np.int64,
                              'deficit_gdp': np.float64,
@@ -46,353 +50,307 @@ main_df = pd.read_csv(party_data_path,
                              'dem_house_maj': np.int64,
                              'total_houseseats': np.int64},
                       skiprows=3)
-df_20 = main_df[(main_df['year'] >= 1947) & (main_df['year'] <= 2020)]
-df_21 = main_df[(main_df['year'] >= 1947) & (main_df['year'] <= 2021)]
-
-# Add 2021 forecast data to df_21 (from CBO July 2021 "Additional Information
-# About the Updated Budget and Economic Outlook: 2021 to 2031")
-df_21['deficit_gdp'].iloc[-1] = -13.406
-df_21['receipts_gdp'].iloc[-1] = 17.15
-df_21['spend_int_gdp'].iloc[-1] = 1.477
-df_21['spend_nonint_gdp'].iloc[-1] = 21.703 + 7.377
-df_21['spend_tot_gdp'].iloc[-1] = 1.477 + 21.703 + 7.377
+# The 1947-2020 and 1947-2021 samples are windows over the rows of main_df.
+# The 1947-2021 sample layers the CBO July 2021 projections of 2021
+# ("Additional Information About the Updated Budget and Economic Outlook: 2021
+# to 2031") over the data without copying it
+party_base = party_scenarios.PartyBase(main_df)
+scen_20 = party_scenarios.Scenario(party_base, 1947, 2020)
+scen_21 = party_scenarios.Scenario(
+    party_base, 1947, 2021,
+    party_scenarios.Overlay(party_scenarios.cbo_2021_dict))
 
 '''
 -------------------------------------------------------------------------------
 Generate the table output from the dataframes
 -------------------------------------------------------------------------------
 '''
-# Create Full control (WH + Sen + HouseRep) Republican control df for 1947-2020
-cntrl_all_rep_20_df = \
-    df_20[(df_20['president_party'] == 'Republican') &
-          (df_20['dem_senate_maj'] == 0) &
-          (df_20['dem_house_maj'] == 0)]
-
-avg_def_gdp_all_rep_20 = cntrl_all_rep_20_df['deficit_gdp'].mean()
-std_def_gdp_all_rep_20 = cntrl_all_rep_20_df['deficit_gdp'].std()
-n_def_gdp_all_rep_20 = cntrl_all_rep_20_df['deficit_gdp'].count()
-
-avg_nis_gdp_all_rep_20 = cntrl_all_rep_20_df['spend_nonint_gdp'].mean()
-std_nis_gdp_all_rep_20 = cntrl_all_rep_20_df['spend_nonint_gdp'].std()
-n_nis_gdp_all_rep_20 = cntrl_all_rep_20_df['spend_nonint_gdp'].count()
-
-avg_rev_gdp_all_rep_20 = cntrl_all_rep_20_df['receipts_gdp'].mean()
-std_rev_gdp_all_rep_20 = cntrl_all_rep_20_df['receipts_gdp'].std()
-n_rev_gdp_all_rep_20 = cntrl_all_rep_20_df['receipts_gdp'].count()
-
-# Create Full control (WH + Sen + HouseRep) Republican control df for 1947-2021
-cntrl_all_rep_21_df = \
-    df_21[(df_21['president_party'] == 'Republican') &
-          (df_21['dem_senate_maj'] == 0) &
-          (df_21['dem_house_maj'] == 0)]
-
-avg_def_gdp_all_rep_21 = cntrl_all_rep_21_df['deficit_gdp'].mean()
-std_def_gdp_all_rep_21 = cntrl_all_rep_21_df['deficit_gdp'].std()
-n_def_gdp_all_rep_21 = cntrl_all_rep_21_df['deficit_gdp'].count()
-
-avg_nis_gdp_all_rep_21 = cntrl_all_rep_21_df['spend_nonint_gdp'].mean()
-std_nis_gdp_all_rep_21 = cntrl_all_rep_21_df['spend_nonint_gdp'].std()
-n_nis_gdp_all_rep_21 = cntrl_all_rep_21_df['spend_nonint_gdp'].count()
-
-avg_rev_gdp_all_rep_21 = cntrl_all_rep_21_df['receipts_gdp'].mean()
-std_rev_gdp_all_rep_21 = cntrl_all_rep_21_df['receipts_gdp'].std()
-n_rev_gdp_all_rep_21 = cntrl_all_rep_21_df['receipts_gdp'].count()
-
-# Create Full control (WH + Sen + HouseRep) Democrat control df for 1947-2020
-cntrl_all_dem_20_df = \
-    df_20[(df_20['president_party'] == 'Democrat') &
-          (df_20['dem_senate_maj'] == 1) &
-          (df_20['dem_house_maj'] == 1)]
-
-avg_def_gdp_all_dem_20 = cntrl_all_dem_20_df['deficit_gdp'].mean()
-std_def_gdp_all_dem_20 = cntrl_all_dem_20_df['deficit_gdp'].std()
-n_def_gdp_all_dem_20 = cntrl_all_dem_20_df['deficit_gdp'].count()
-
-avg_nis_gdp_all_dem_20 = cntrl_all_dem_20_df['spend_nonint_gdp'].mean()
-std_nis_gdp_all_dem_20 = cntrl_all_dem_20_df['spend_nonint_gdp'].std()
-n_nis_gdp_all_dem_20 = cntrl_all_dem_20_df['spend_nonint_gdp'].count()
-
-avg_rev_gdp_all_dem_20 = cntrl_all_dem_20_df['receipts_gdp'].mean()
-std_rev_gdp_all_dem_20 = cntrl_all_dem_20_df['receipts_gdp'].std()
-n_rev_gdp_all_dem_20 = cntrl_all_dem_20_df['receipts_gdp'].count()
-
-# Create Full control (WH + Sen + HouseRep) Democrat control df for 1947-2021
-cntrl_all_dem_21_df = \
-    df_21[(df_21['president_party'] == 'Democrat') &
-          (df_21['dem_senate_maj'] == 1) &
-          (df_21['dem_house_maj'] == 1)]
-
-avg_def_gdp_all_dem_21 = cntrl_all_dem_21_df['deficit_gdp'].mean()
-std_def_gdp_all_dem_21 = cntrl_all_dem_21_df['deficit_gdp'].std()
-n_def_gdp_all_dem_21 = cntrl_all_dem_21_df['deficit_gdp'].count()
-
-avg_nis_gdp_all_dem_21 = cntrl_all_dem_21_df['spend_nonint_gdp'].mean()
-std_nis_gdp_all_dem_21 = cntrl_all_dem_21_df['spend_nonint_gdp'].std()
-n_nis_gdp_all_dem_21 = cntrl_all_dem_21_df['spend_nonint_gdp'].count()
-
-avg_rev_gdp_all_dem_21 = cntrl_all_dem_21_df['receipts_gdp'].mean()
-std_rev_gdp_all_dem_21 = cntrl_all_dem_21_df['receipts_gdp'].std()
-n_rev_gdp_all_dem_21 = cntrl_all_dem_21_df['receipts_gdp'].count()
-
-# Create Full control (WH + Sen + HouseRep) split control df for 1947-2020
-cntrl_all_spl_20_df = \
-    df_20[((df_20['president_party'] == 'Republican') &
-           ((df_20['dem_senate_maj'] == 1) |
-            (df_20['dem_house_maj'] == 1))) |
-           ((df_20['president_party'] == 'Democrat') &
-            ((df_20['dem_senate_maj'] == 0) |
-             (df_20['dem_house_maj'] == 0)))]
-
-avg_def_gdp_all_spl_20 = cntrl_all_spl_20_df['deficit_gdp'].mean()
-std_def_gdp_all_spl_20 = cntrl_all_spl_20_df['deficit_gdp'].std()
-n_def_gdp_all_spl_20 = cntrl_all_spl_20_df['deficit_gdp'].count()
-
-avg_nis_gdp_all_spl_20 = cntrl_all_spl_20_df['spend_nonint_gdp'].mean()
-std_nis_gdp_all_spl_20 = cntrl_all_spl_20_df['spend_nonint_gdp'].std()
-n_nis_gdp_all_spl_20 = cntrl_all_spl_20_df['spend_nonint_gdp'].count()
-
-avg_rev_gdp_all_spl_20 = cntrl_all_spl_20_df['receipts_gdp'].mean()
-std_rev_gdp_all_spl_20 = cntrl_all_spl_20_df['receipts_gdp'].std()
-n_rev_gdp_all_spl_20 = cntrl_all_spl_20_df['receipts_gdp'].count()
-
-# Create Full control (WH + Sen + HouseRep) split control df for 1947-2021
-cntrl_all_spl_21_df = \
-    df_21[((df_21['president_party'] == 'Republican') &
-           ((df_21['dem_senate_maj'] == 1) |
-            (df_21['dem_house_maj'] == 1))) |
-           ((df_21['president_party'] == 'Democrat') &
-            ((df_21['dem_senate_maj'] == 0) |
-             (df_21['dem_house_maj'] == 0)))]
-
-avg_def_gdp_all_spl_21 = cntrl_all_spl_21_df['deficit_gdp'].mean()
-std_def_gdp_all_spl_21 = cntrl_all_spl_21_df['deficit_gdp'].std()
-n_def_gdp_all_spl_21 = cntrl_all_spl_21_df['deficit_gdp'].count()
-
-avg_nis_gdp_all_spl_21 = cntrl_all_spl_21_df['spend_nonint_gdp'].mean()
-std_nis_gdp_all_spl_21 = cntrl_all_spl_21_df['spend_nonint_gdp'].std()
-n_nis_gdp_all_spl_21 = cntrl_all_spl_21_df['spend_nonint_gdp'].count()
-
-avg_rev_gdp_all_spl_21 = cntrl_all_spl_21_df['receipts_gdp'].mean()
-std_rev_gdp_all_spl_21 = cntrl_all_spl_21_df['receipts_gdp'].std()
-n_rev_gdp_all_spl_21 = cntrl_all_spl_21_df['receipts_gdp'].count()
-
-# Create Senate control (WH + Sen) Republican control df for 1947-2020
-cntrl_whsen_rep_20_df = \
-    df_20[(df_20['president_party'] == 'Republican') &
-          (df_20['dem_senate_maj'] == 0)]
-
-avg_def_gdp_whsen_rep_20 = cntrl_whsen_rep_20_df['deficit_gdp'].mean()
-std_def_gdp_whsen_rep_20 = cntrl_whsen_rep_20_df['deficit_gdp'].std()
-n_def_gdp_whsen_rep_20 = cntrl_whsen_rep_20_df['deficit_gdp'].count()
-
-avg_nis_gdp_whsen_rep_20 = cntrl_whsen_rep_20_df['spend_nonint_gdp'].mean()
-std_nis_gdp_whsen_rep_20 = cntrl_whsen_rep_20_df['spend_nonint_gdp'].std()
-n_nis_gdp_whsen_rep_20 = cntrl_whsen_rep_20_df['spend_nonint_gdp'].count()
-
-avg_rev_gdp_whsen_rep_20 = cntrl_whsen_rep_20_df['receipts_gdp'].mean()
-std_rev_gdp_whsen_rep_20 = cntrl_whsen_rep_20_df['receipts_gdp'].std()
-n_rev_gdp_whsen_rep_20 = cntrl_whsen_rep_20_df['receipts_gdp'].count()
-
-# Create Senate control (WH + Sen) Republican control df for 1947-2021
-cntrl_whsen_rep_21_df = \
-    df_21[(df_21['president_party'] == 'Republican') &
-          (df_21['dem_senate_maj'] == 0)]
-
-avg_def_gdp_whsen_rep_21 = cntrl_whsen_rep_21_df['deficit_gdp'].mean()
-std_def_gdp_whsen_rep_21 = cntrl_whsen_rep_21_df['deficit_gdp'].std()
-n_def_gdp_whsen_rep_21 = cntrl_whsen_rep_21_df['deficit_gdp'].count()
-
-avg_nis_gdp_whsen_rep_21 = cntrl_whsen_rep_21_df['spend_nonint_gdp'].mean()
-std_nis_gdp_whsen_rep_21 = cntrl_whsen_rep_21_df['spend_nonint_gdp'].std()
-n_nis_gdp_whsen_rep_21 = cntrl_whsen_rep_21_df['spend_nonint_gdp'].count()
-
-avg_rev_gdp_whsen_rep_21 = cntrl_whsen_rep_21_df['receipts_gdp'].mean()
-std_rev_gdp_whsen_rep_21 = cntrl_whsen_rep_21_df['receipts_gdp'].std()
-n_rev_gdp_whsen_rep_21 = cntrl_whsen_rep_21_df['receipts_gdp'].count()
-
-# Create Senate control (WH + Sen) Democrat control df for 1947-2020
-cntrl_whsen_dem_20_df = \
-    df_20[(df_20['president_party'] == 'Democrat') &
-          (df_20['dem_senate_maj'] == 1)]
-
-avg_def_gdp_whsen_dem_20 = cntrl_whsen_dem_20_df['deficit_gdp'].mean()
-std_def_gdp_whsen_dem_20 = cntrl_whsen_dem_20_df['deficit_gdp'].std()
-n_def_gdp_whsen_dem_20 = cntrl_whsen_dem_20_df['deficit_gdp'].count()
-
-avg_nis_gdp_whsen_dem_20 = cntrl_whsen_dem_20_df['spend_nonint_gdp'].mean()
-std_nis_gdp_whsen_dem_20 = cntrl_whsen_dem_20_df['spend_nonint_gdp'].std()
-n_nis_gdp_whsen_dem_20 = cntrl_whsen_dem_20_df['spend_nonint_gdp'].count()
-
-avg_rev_gdp_whsen_dem_20 = cntrl_whsen_dem_20_df['receipts_gdp'].mean()
-std_rev_gdp_whsen_dem_20 = cntrl_whsen_dem_20_df['receipts_gdp'].std()
-n_rev_gdp_whsen_dem_20 = cntrl_whsen_dem_20_df['receipts_gdp'].count()
-
-# Create Senate control (WH + Sen) Democrat control df for 1947-2021
-cntrl_whsen_dem_21_df = \
-    df_21[(df_21['president_party'] == 'Democrat') &
-          (df_21['dem_senate_maj'] == 1)]
-
-avg_def_gdp_whsen_dem_21 = cntrl_whsen_dem_21_df['deficit_gdp'].mean()
-std_def_gdp_whsen_dem_21 = cntrl_whsen_dem_21_df['deficit_gdp'].std()
-n_def_gdp_whsen_dem_21 = cntrl_whsen_dem_21_df['deficit_gdp'].count()
-
-avg_nis_gdp_whsen_dem_21 = cntrl_whsen_dem_21_df['spend_nonint_gdp'].mean()
-std_nis_gdp_whsen_dem_21 = cntrl_whsen_dem_21_df['spend_nonint_gdp'].std()
-n_nis_gdp_whsen_dem_21 = cntrl_whsen_dem_21_df['spend_nonint_gdp'].count()
-
-avg_rev_gdp_whsen_dem_21 = cntrl_whsen_dem_21_df['receipts_gdp'].mean()
-std_rev_gdp_whsen_dem_21 = cntrl_whsen_dem_21_df['receipts_gdp'].std()
-n_rev_gdp_whsen_dem_21 = cntrl_whsen_dem_21_df['receipts_gdp'].count()
-
-# Create Senate control (WH + Sen) split control df for 1947-2020
-cntrl_whsen_spl_20_df = \
-    df_20[((df_20['president_party'] == 'Republican') &
-           (df_20['dem_senate_maj'] == 1)) |
-          ((df_20['president_party'] == 'Democrat') &
-           (df_20['dem_senate_maj'] == 0))]
-
-avg_def_gdp_whsen_spl_20 = cntrl_whsen_spl_20_df['deficit_gdp'].mean()
-std_def_gdp_whsen_spl_20 = cntrl_whsen_spl_20_df['deficit_gdp'].std()
-n_def_gdp_whsen_spl_20 = cntrl_whsen_spl_20_df['deficit_gdp'].count()
-
-avg_nis_gdp_whsen_spl_20 = cntrl_whsen_spl_20_df['spend_nonint_gdp'].mean()
-std_nis_gdp_whsen_spl_20 = cntrl_whsen_spl_20_df['spend_nonint_gdp'].std()
-n_nis_gdp_whsen_spl_20 = cntrl_whsen_spl_20_df['spend_nonint_gdp'].count()
-
-avg_rev_gdp_whsen_spl_20 = cntrl_whsen_spl_20_df['receipts_gdp'].mean()
-std_rev_gdp_whsen_spl_20 = cntrl_whsen_spl_20_df['receipts_gdp'].std()
-n_rev_gdp_whsen_spl_20 = cntrl_whsen_spl_20_df['receipts_gdp'].count()
-
-# Create Senate control (WH + Sen) split control df for 1947-2021
-cntrl_whsen_spl_21_df = \
-    df_21[((df_21['president_party'] == 'Republican') &
-           (df_21['dem_senate_maj'] == 1)) |
-          ((df_21['president_party'] == 'Democrat') &
-           (df_21['dem_senate_maj'] == 0))]
-
-avg_def_gdp_whsen_spl_21 = cntrl_whsen_spl_21_df['deficit_gdp'].mean()
-std_def_gdp_whsen_spl_21 = cntrl_whsen_spl_21_df['deficit_gdp'].std()
-n_def_gdp_whsen_spl_21 = cntrl_whsen_spl_21_df['deficit_gdp'].count()
-
-avg_nis_gdp_whsen_spl_21 = cntrl_whsen_spl_21_df['spend_nonint_gdp'].mean()
-std_nis_gdp_whsen_spl_21 = cntrl_whsen_spl_21_df['spend_nonint_gdp'].std()
-n_nis_gdp_whsen_spl_21 = cntrl_whsen_spl_21_df['spend_nonint_gdp'].count()
-
-avg_rev_gdp_whsen_spl_21 = cntrl_whsen_spl_21_df['receipts_gdp'].mean()
-std_rev_gdp_whsen_spl_21 = cntrl_whsen_spl_21_df['receipts_gdp'].std()
-n_rev_gdp_whsen_spl_21 = cntrl_whsen_spl_21_df['receipts_gdp'].count()
-
-# Create House control (WH + HouseRep) Republican control df for 1947-2020
-cntrl_whhou_rep_20_df = \
-    df_20[(df_20['president_party'] == 'Republican') &
-          (df_20['dem_house_maj'] == 0)]
-
-avg_def_gdp_whhou_rep_20 = cntrl_whhou_rep_20_df['deficit_gdp'].mean()
-std_def_gdp_whhou_rep_20 = cntrl_whhou_rep_20_df['deficit_gdp'].std()
-n_def_gdp_whhou_rep_20 = cntrl_whhou_rep_20_df['deficit_gdp'].count()
-
-avg_nis_gdp_whhou_rep_20 = cntrl_whhou_rep_20_df['spend_nonint_gdp'].mean()
-std_nis_gdp_whhou_rep_20 = cntrl_whhou_rep_20_df['spend_nonint_gdp'].std()
-n_nis_gdp_whhou_rep_20 = cntrl_whhou_rep_20_df['spend_nonint_gdp'].count()
-
-avg_rev_gdp_whhou_rep_20 = cntrl_whhou_rep_20_df['receipts_gdp'].mean()
-std_rev_gdp_whhou_rep_20 = cntrl_whhou_rep_20_df['receipts_gdp'].std()
-n_rev_gdp_whhou_rep_20 = cntrl_whhou_rep_20_df['receipts_gdp'].count()
-
-# Create House control (WH + HouseRep) Republican control df for 1947-2021
-cntrl_whhou_rep_21_df = \
-    df_21[(df_21['president_party'] == 'Republican') &
-          (df_21['dem_house_maj'] == 0)]
-
-avg_def_gdp_whhou_rep_21 = cntrl_whhou_rep_21_df['deficit_gdp'].mean()
-std_def_gdp_whhou_rep_21 = cntrl_whhou_rep_21_df['deficit_gdp'].std()
-n_def_gdp_whhou_rep_21 = cntrl_whhou_rep_21_df['deficit_gdp'].count()
-
-avg_nis_gdp_whhou_rep_21 = cntrl_whhou_rep_21_df['spend_nonint_gdp'].mean()
-std_nis_gdp_whhou_rep_21 = cntrl_whhou_rep_21_df['spend_nonint_gdp'].std()
-n_nis_gdp_whhou_rep_21 = cntrl_whhou_rep_21_df['spend_nonint_gdp'].count()
-
-avg_rev_gdp_whhou_rep_21 = cntrl_whhou_rep_21_df['receipts_gdp'].mean()
-std_rev_gdp_whhou_rep_21 = cntrl_whhou_rep_21_df['receipts_gdp'].std()
-n_rev_gdp_whhou_rep_21 = cntrl_whhou_rep_21_df['receipts_gdp'].count()
-
-# Create House control (WH + HouseRep) Democrat control df for 1947-2020
-cntrl_whhou_dem_20_df = \
-    df_20[(df_20['president_party'] == 'Democrat') &
-          (df_20['dem_house_maj'] == 1)]
-
-avg_def_gdp_whhou_dem_20 = cntrl_whhou_dem_20_df['deficit_gdp'].mean()
-std_def_gdp_whhou_dem_20 = cntrl_whhou_dem_20_df['deficit_gdp'].std()
-n_def_gdp_whhou_dem_20 = cntrl_whhou_dem_20_df['deficit_gdp'].count()
-
-avg_nis_gdp_whhou_dem_20 = cntrl_whhou_dem_20_df['spend_nonint_gdp'].mean()
-std_nis_gdp_whhou_dem_20 = cntrl_whhou_dem_20_df['spend_nonint_gdp'].std()
-n_nis_gdp_whhou_dem_20 = cntrl_whhou_dem_20_df['spend_nonint_gdp'].count()
-
-avg_rev_gdp_whhou_dem_20 = cntrl_whhou_dem_20_df['receipts_gdp'].mean()
-std_rev_gdp_whhou_dem_20 = cntrl_whhou_dem_20_df['receipts_gdp'].std()
-n_rev_gdp_whhou_dem_20 = cntrl_whhou_dem_20_df['receipts_gdp'].count()
-
-# Create House control (WH + HouseRep) Democrat control df for 1947-2021
-cntrl_whhou_dem_21_df = \
-    df_21[(df_21['president_party'] == 'Democrat') &
-          (df_21['dem_house_maj'] == 1)]
-
-avg_def_gdp_whhou_dem_21 = cntrl_whhou_dem_21_df['deficit_gdp'].mean()
-std_def_gdp_whhou_dem_21 = cntrl_whhou_dem_21_df['deficit_gdp'].std()
-n_def_gdp_whhou_dem_21 = cntrl_whhou_dem_21_df['deficit_gdp'].count()
-
-avg_nis_gdp_whhou_dem_21 = cntrl_whhou_dem_21_df['spend_nonint_gdp'].mean()
-std_nis_gdp_whhou_dem_21 = cntrl_whhou_dem_21_df['spend_nonint_gdp'].std()
-n_nis_gdp_whhou_dem_21 = cntrl_whhou_dem_21_df['spend_nonint_gdp'].count()
-
-avg_rev_gdp_whhou_dem_21 = cntrl_whhou_dem_21_df['receipts_gdp'].mean()
-std_rev_gdp_whhou_dem_21 = cntrl_whhou_dem_21_df['receipts_gdp'].std()
-n_rev_gdp_whhou_dem_21 = cntrl_whhou_dem_21_df['receipts_gdp'].count()
-
-# Create House control (WH + HouseRep) split control df for 1947-2020
-cntrl_whhou_spl_20_df = \
-    df_20[((df_20['president_party'] == 'Republican') &
-           (df_20['dem_house_maj'] == 1)) |
-          ((df_20['president_party'] == 'Democrat') &
-           (df_20['dem_house_maj'] == 0))]
-
-avg_def_gdp_whhou_spl_20 = cntrl_whhou_spl_20_df['deficit_gdp'].mean()
-std_def_gdp_whhou_spl_20 = cntrl_whhou_spl_20_df['deficit_gdp'].std()
-n_def_gdp_whhou_spl_20 = cntrl_whhou_spl_20_df['deficit_gdp'].count()
-
-avg_nis_gdp_whhou_spl_20 = cntrl_whhou_spl_20_df['spend_nonint_gdp'].mean()
-std_nis_gdp_whhou_spl_20 = cntrl_whhou_spl_20_df['spend_nonint_gdp'].std()
-n_nis_gdp_whhou_spl_20 = cntrl_whhou_spl_20_df['spend_nonint_gdp'].count()
-
-avg_rev_gdp_whhou_spl_20 = cntrl_whhou_spl_20_df['receipts_gdp'].mean()
-std_rev_gdp_whhou_spl_20 = cntrl_whhou_spl_20_df['receipts_gdp'].std()
-n_rev_gdp_whhou_spl_20 = cntrl_whhou_spl_20_df['receipts_gdp'].count()
-
-# Create House control (WH + HouseRep) split control df for 1947-2021
-cntrl_whhou_spl_21_df = \
-    df_21[((df_21['president_party'] == 'Republican') &
-           (df_21['dem_house_maj'] == 1)) |
-          ((df_21['president_party'] == 'Democrat') &
-           (df_21['dem_house_maj'] == 0))]
-
-avg_def_gdp_whhou_spl_21 = cntrl_whhou_spl_21_df['deficit_gdp'].mean()
-std_def_gdp_whhou_spl_21 = cntrl_whhou_spl_21_df['deficit_gdp'].std()
-n_def_gdp_whhou_spl_21 = cntrl_whhou_spl_21_df['deficit_gdp'].count()
-
-avg_nis_gdp_whhou_spl_21 = cntrl_whhou_spl_21_df['spend_nonint_gdp'].mean()
-std_nis_gdp_whhou_spl_21 = cntrl_whhou_spl_21_df['spend_nonint_gdp'].std()
-n_nis_gdp_whhou_spl_21 = cntrl_whhou_spl_21_df['spend_nonint_gdp'].count()
-
-avg_rev_gdp_whhou_spl_21 = cntrl_whhou_spl_21_df['receipts_gdp'].mean()
-std_rev_gdp_whhou_spl_21 = cntrl_whhou_spl_21_df['receipts_gdp'].std()
-n_rev_gdp_whhou_spl_21 = cntrl_whhou_spl_21_df['receipts_gdp'].count()
+instrument.checkpoint('table: masks and statistics')
+cube_20 = scen_20.cube()
+cube_21 = scen_21.cube()
+
+# Full control (WH + Sen + HouseRep) Republican control for 1947-2020
+avg_def_gdp_all_rep_20 = cube_20.loc[('all', 'rep', 'deficit_gdp'), 'mean']
+std_def_gdp_all_rep_20 = cube_20.loc[('all', 'rep', 'deficit_gdp'), 'std']
+n_def_gdp_all_rep_20 = cube_20.loc[('all', 'rep', 'deficit_gdp'), 'n']
+
+avg_nis_gdp_all_rep_20 = \
+    cube_20.loc[('all', 'rep', 'spend_nonint_gdp'), 'mean']
+std_nis_gdp_all_rep_20 = cube_20.loc[('all', 'rep', 'spend_nonint_gdp'), 'std']
+n_nis_gdp_all_rep_20 = cube_20.loc[('all', 'rep', 'spend_nonint_gdp'), 'n']
+
+avg_rev_gdp_all_rep_20 = cube_20.loc[('all', 'rep', 'receipts_gdp'), 'mean']
+std_rev_gdp_all_rep_20 = cube_20.loc[('all', 'rep', 'receipts_gdp'), 'std']
+n_rev_gdp_all_rep_20 = cube_20.loc[('all', 'rep', 'receipts_gdp'), 'n']
+
+# Full control (WH + Sen + HouseRep) Republican control for 1947-2021
+avg_def_gdp_all_rep_21 = cube_21.loc[('all', 'rep', 'deficit_gdp'), 'mean']
+std_def_gdp_all_rep_21 = cube_21.loc[('all', 'rep', 'deficit_gdp'), 'std']
+n_def_gdp_all_rep_21 = cube_21.loc[('all', 'rep', 'deficit_gdp'), 'n']
+
+avg_nis_gdp_all_rep_21 = \
+    cube_21.loc[('all', 'rep', 'spend_nonint_gdp'), 'mean']
+std_nis_gdp_all_rep_21 = cube_21.loc[('all', 'rep', 'spend_nonint_gdp'), 'std']
+n_nis_gdp_all_rep_21 = cube_21.loc[('all', 'rep', 'spend_nonint_gdp'), 'n']
+
+avg_rev_gdp_all_rep_21 = cube_21.loc[('all', 'rep', 'receipts_gdp'), 'mean']
+std_rev_gdp_all_rep_21 = cube_21.loc[('all', 'rep', 'receipts_gdp'), 'std']
+n_rev_gdp_all_rep_21 = cube_21.loc[('all', 'rep', 'receipts_gdp'), 'n']
+
+# Full control (WH + Sen + HouseRep) Democrat control for 1947-2020
+avg_def_gdp_all_dem_20 = cube_20.loc[('all', 'dem', 'deficit_gdp'), 'mean']
+std_def_gdp_all_dem_20 = cube_20.loc[('all', 'dem', 'deficit_gdp'), 'std']
+n_def_gdp_all_dem_20 = cube_20.loc[('all', 'dem', 'deficit_gdp'), 'n']
+
+avg_nis_gdp_all_dem_20 = \
+    cube_20.loc[('all', 'dem', 'spend_nonint_gdp'), 'mean']
+std_nis_gdp_all_dem_20 = cube_20.loc[('all', 'dem', 'spend_nonint_gdp'), 'std']
+n_nis_gdp_all_dem_20 = cube_20.loc[('all', 'dem', 'spend_nonint_gdp'), 'n']
+
+avg_rev_gdp_all_dem_20 = cube_20.loc[('all', 'dem', 'receipts_gdp'), 'mean']
+std_rev_gdp_all_dem_20 = cube_20.loc[('all', 'dem', 'receipts_gdp'), 'std']
+n_rev_gdp_all_dem_20 = cube_20.loc[('all', 'dem', 'receipts_gdp'), 'n']
+
+# Full control (WH + Sen + HouseRep) Democrat control for 1947-2021
+avg_def_gdp_all_dem_21 = cube_21.loc[('all', 'dem', 'deficit_gdp'), 'mean']
+std_def_gdp_all_dem_21 = cube_21.loc[('all', 'dem', 'deficit_gdp'), 'std']
+n_def_gdp_all_dem_21 = cube_21.loc[('all', 'dem', 'deficit_gdp'), 'n']
+
+avg_nis_gdp_all_dem_21 = \
+    cube_21.loc[('all', 'dem', 'spend_nonint_gdp'), 'mean']
+std_nis_gdp_all_dem_21 = cube_21.loc[('all', 'dem', 'spend_nonint_gdp'), 'std']
+n_nis_gdp_all_dem_21 = cube_21.loc[('all', 'dem', 'spend_nonint_gdp'), 'n']
+
+avg_rev_gdp_all_dem_21 = cube_21.loc[('all', 'dem', 'receipts_gdp'), 'mean']
+std_rev_gdp_all_dem_21 = cube_21.loc[('all', 'dem', 'receipts_gdp'), 'std']
+n_rev_gdp_all_dem_21 = cube_21.loc[('all', 'dem', 'receipts_gdp'), 'n']
+
+# Full control (WH + Sen + HouseRep) split control for 1947-2020
+avg_def_gdp_all_spl_20 = cube_20.loc[('all', 'spl', 'deficit_gdp'), 'mean']
+std_def_gdp_all_spl_20 = cube_20.loc[('all', 'spl', 'deficit_gdp'), 'std']
+n_def_gdp_all_spl_20 = cube_20.loc[('all', 'spl', 'deficit_gdp'), 'n']
+
+avg_nis_gdp_all_spl_20 = \
+    cube_20.loc[('all', 'spl', 'spend_nonint_gdp'), 'mean']
+std_nis_gdp_all_spl_20 = cube_20.loc[('all', 'spl', 'spend_nonint_gdp'), 'std']
+n_nis_gdp_all_spl_20 = cube_20.loc[('all', 'spl', 'spend_nonint_gdp'), 'n']
+
+avg_rev_gdp_all_spl_20 = cube_20.loc[('all', 'spl', 'receipts_gdp'), 'mean']
+std_rev_gdp_all_spl_20 = cube_20.loc[('all', 'spl', 'receipts_gdp'), 'std']
+n_rev_gdp_all_spl_20 = cube_20.loc[('all', 'spl', 'receipts_gdp'), 'n']
+
+# Full control (WH + Sen + HouseRep) split control for 1947-2021
+avg_def_gdp_all_spl_21 = cube_21.loc[('all', 'spl', 'deficit_gdp'), 'mean']
+std_def_gdp_all_spl_21 = cube_21.loc[('all', 'spl', 'deficit_gdp'), 'std']
+n_def_gdp_all_spl_21 = cube_21.loc[('all', 'spl', 'deficit_gdp'), 'n']
+
+avg_nis_gdp_all_spl_21 = \
+    cube_21.loc[('all', 'spl', 'spend_nonint_gdp'), 'mean']
+std_nis_gdp_all_spl_21 = cube_21.loc[('all', 'spl', 'spend_nonint_gdp'), 'std']
+n_nis_gdp_all_spl_21 = cube_21.loc[('all', 'spl', 'spend_nonint_gdp'), 'n']
+
+avg_rev_gdp_all_spl_21 = cube_21.loc[('all', 'spl', 'receipts_gdp'), 'mean']
+std_rev_gdp_all_spl_21 = cube_21.loc[('all', 'spl', 'receipts_gdp'), 'std']
+n_rev_gdp_all_spl_21 = cube_21.loc[('all', 'spl', 'receipts_gdp'), 'n']
+
+# Senate control (WH + Sen) Republican control for 1947-2020
+avg_def_gdp_whsen_rep_20 = cube_20.loc[('whsen', 'rep', 'deficit_gdp'), 'mean']
+std_def_gdp_whsen_rep_20 = cube_20.loc[('whsen', 'rep', 'deficit_gdp'), 'std']
+n_def_gdp_whsen_rep_20 = cube_20.loc[('whsen', 'rep', 'deficit_gdp'), 'n']
+
+avg_nis_gdp_whsen_rep_20 = \
+    cube_20.loc[('whsen', 'rep', 'spend_nonint_gdp'), 'mean']
+std_nis_gdp_whsen_rep_20 = \
+    cube_20.loc[('whsen', 'rep', 'spend_nonint_gdp'), 'std']
+n_nis_gdp_whsen_rep_20 = cube_20.loc[('whsen', 'rep', 'spend_nonint_gdp'), 'n']
+
+avg_rev_gdp_whsen_rep_20 = \
+    cube_20.loc[('whsen', 'rep', 'receipts_gdp'), 'mean']
+std_rev_gdp_whsen_rep_20 = cube_20.loc[('whsen', 'rep', 'receipts_gdp'), 'std']
+n_rev_gdp_whsen_rep_20 = cube_20.loc[('whsen', 'rep', 'receipts_gdp'), 'n']
+
+# Senate control (WH + Sen) Republican control for 1947-2021
+avg_def_gdp_whsen_rep_21 = cube_21.loc[('whsen', 'rep', 'deficit_gdp'), 'mean']
+std_def_gdp_whsen_rep_21 = cube_21.loc[('whsen', 'rep', 'deficit_gdp'), 'std']
+n_def_gdp_whsen_rep_21 = cube_21.loc[('whsen', 'rep', 'deficit_gdp'), 'n']
+
+avg_nis_gdp_whsen_rep_21 = \
+    cube_21.loc[('whsen', 'rep', 'spend_nonint_gdp'), 'mean']
+std_nis_gdp_whsen_rep_21 = \
+    cube_21.loc[('whsen', 'rep', 'spend_nonint_gdp'), 'std']
+n_nis_gdp_whsen_rep_21 = cube_21.loc[('whsen', 'rep', 'spend_nonint_gdp'), 'n']
+
+avg_rev_gdp_whsen_rep_21 = \
+    cube_21.loc[('whsen', 'rep', 'receipts_gdp'), 'mean']
+std_rev_gdp_whsen_rep_21 = cube_21.loc[('whsen', 'rep', 'receipts_gdp'), 'std']
+n_rev_gdp_whsen_rep_21 = cube_21.loc[('whsen', 'rep', 'receipts_gdp'), 'n']
+
+# Senate control (WH + Sen) Democrat control for 1947-2020
+avg_def_gdp_whsen_dem_20 = cube_20.loc[('whsen', 'dem', 'deficit_gdp'), 'mean']
+std_def_gdp_whsen_dem_20 = cube_20.loc[('whsen', 'dem', 'deficit_gdp'), 'std']
+n_def_gdp_whsen_dem_20 = cube_20.loc[('whsen', 'dem', 'deficit_gdp'), 'n']
+
+avg_nis_gdp_whsen_dem_20 = \
+    cube_20.loc[('whsen', 'dem', 'spend_nonint_gdp'), 'mean']
+std_nis_gdp_whsen_dem_20 = \
+    cube_20.loc[('whsen', 'dem', 'spend_nonint_gdp'), 'std']
+n_nis_gdp_whsen_dem_20 = cube_20.loc[('whsen', 'dem', 'spend_nonint_gdp'), 'n']
+
+avg_rev_gdp_whsen_dem_20 = \
+    cube_20.loc[('whsen', 'dem', 'receipts_gdp'), 'mean']
+std_rev_gdp_whsen_dem_20 = cube_20.loc[('whsen', 'dem', 'receipts_gdp'), 'std']
+n_rev_gdp_whsen_dem_20 = cube_20.loc[('whsen', 'dem', 'receipts_gdp'), 'n']
+
+# Senate control (WH + Sen) Democrat control for 1947-2021
+avg_def_gdp_whsen_dem_21 = cube_21.loc[('whsen', 'dem', 'deficit_gdp'), 'mean']
+std_def_gdp_whsen_dem_21 = cube_21.loc[('whsen', 'dem', 'deficit_gdp'), 'std']
+n_def_gdp_whsen_dem_21 = cube_21.loc[('whsen', 'dem', 'deficit_gdp'), 'n']
+
+avg_nis_gdp_whsen_dem_21 = \
+    cube_21.loc[('whsen', 'dem', 'spend_nonint_gdp'), 'mean']
+std_nis_gdp_whsen_dem_21 = \
+    cube_21.loc[('whsen', 'dem', 'spend_nonint_gdp'), 'std']
+n_nis_gdp_whsen_dem_21 = cube_21.loc[('whsen', 'dem', 'spend_nonint_gdp'), 'n']
+
+avg_rev_gdp_whsen_dem_21 = \
+    cube_21.loc[('whsen', 'dem', 'receipts_gdp'), 'mean']
+std_rev_gdp_whsen_dem_21 = cube_21.loc[('whsen', 'dem', 'receipts_gdp'), 'std']
+n_rev_gdp_whsen_dem_21 = cube_21.loc[('whsen', 'dem', 'receipts_gdp'), 'n']
+
+# Senate control (WH + Sen) split control for 1947-2020
+avg_def_gdp_whsen_spl_20 = cube_20.loc[('whsen', 'spl', 'deficit_gdp'), 'mean']
+std_def_gdp_whsen_spl_20 = cube_20.loc[('whsen', 'spl', 'deficit_gdp'), 'std']
+n_def_gdp_whsen_spl_20 = cube_20.loc[('whsen', 'spl', 'deficit_gdp'), 'n']
+
+avg_nis_gdp_whsen_spl_20 = \
+    cube_20.loc[('whsen', 'spl', 'spend_nonint_gdp'), 'mean']
+std_nis_gdp_whsen_spl_20 = \
+    cube_20.loc[('whsen', 'spl', 'spend_nonint_gdp'), 'std']
+n_nis_gdp_whsen_spl_20 = cube_20.loc[('whsen', 'spl', 'spend_nonint_gdp'), 'n']
+
+avg_rev_gdp_whsen_spl_20 = \
+    cube_20.loc[('whsen', 'spl', 'receipts_gdp'), 'mean']
+std_rev_gdp_whsen_spl_20 = cube_20.loc[('whsen', 'spl', 'receipts_gdp'), 'std']
+n_rev_gdp_whsen_spl_20 = cube_20.loc[('whsen', 'spl', 'receipts_gdp'), 'n']
+
+# Senate control (WH + Sen) split control for 1947-2021
+avg_def_gdp_whsen_spl_21 = cube_21.loc[('whsen', 'spl', 'deficit_gdp'), 'mean']
+std_def_gdp_whsen_spl_21 = cube_21.loc[('whsen', 'spl', 'deficit_gdp'), 'std']
+n_def_gdp_whsen_spl_21 = cube_21.loc[('whsen', 'spl', 'deficit_gdp'), 'n']
+
+avg_nis_gdp_whsen_spl_21 = \
+    cube_21.loc[('whsen', 'spl', 'spend_nonint_gdp'), 'mean']
+std_nis_gdp_whsen_spl_21 = \
+    cube_21.loc[('whsen', 'spl', 'spend_nonint_gdp'), 'std']
+n_nis_gdp_whsen_spl_21 = cube_21.loc[('whsen', 'spl', 'spend_nonint_gdp'), 'n']
+
+avg_rev_gdp_whsen_spl_21 = \
+    cube_21.loc[('whsen', 'spl', 'receipts_gdp'), 'mean']
+std_rev_gdp_whsen_spl_21 = cube_21.loc[('whsen', 'spl', 'receipts_gdp'), 'std']
+n_rev_gdp_whsen_spl_21 = cube_21.loc[('whsen', 'spl', 'receipts_gdp'), 'n']
+
+# House control (WH + HouseRep) Republican control for 1947-2020
+avg_def_gdp_whhou_rep_20 = cube_20.loc[('whhou', 'rep', 'deficit_gdp'), 'mean']
+std_def_gdp_whhou_rep_20 = cube_20.loc[('whhou', 'rep', 'deficit_gdp'), 'std']
+n_def_gdp_whhou_rep_20 = cube_20.loc[('whhou', 'rep', 'deficit_gdp'), 'n']
+
+avg_nis_gdp_whhou_rep_20 = \
+    cube_20.loc[('whhou', 'rep', 'spend_nonint_gdp'), 'mean']
+std_nis_gdp_whhou_rep_20 = \
+    cube_20.loc[('whhou', 'rep', 'spend_nonint_gdp'), 'std']
+n_nis_gdp_whhou_rep_20 = cube_20.loc[('whhou', 'rep', 'spend_nonint_gdp'), 'n']
+
+avg_rev_gdp_whhou_rep_20 = \
+    cube_20.loc[('whhou', 'rep', 'receipts_gdp'), 'mean']
+std_rev_gdp_whhou_rep_20 = cube_20.loc[('whhou', 'rep', 'receipts_gdp'), 'std']
+n_rev_gdp_whhou_rep_20 = cube_20.loc[('whhou', 'rep', 'receipts_gdp'), 'n']
+
+# House control (WH + HouseRep) Republican control for 1947-2021
+avg_def_gdp_whhou_rep_21 = cube_21.loc[('whhou', 'rep', 'deficit_gdp'), 'mean']
+std_def_gdp_whhou_rep_21 = cube_21.loc[('whhou', 'rep', 'deficit_gdp'), 'std']
+n_def_gdp_whhou_rep_21 = cube_21.loc[('whhou', 'rep', 'deficit_gdp'), 'n']
+
+avg_nis_gdp_whhou_rep_21 = \
+    cube_21.loc[('whhou', 'rep', 'spend_nonint_gdp'), 'mean']
+std_nis_gdp_whhou_rep_21 = \
+    cube_21.loc[('whhou', 'rep', 'spend_nonint_gdp'), 'std']
+n_nis_gdp_whhou_rep_21 = cube_21.loc[('whhou', 'rep', 'spend_nonint_gdp'), 'n']
+
+avg_rev_gdp_whhou_rep_21 = \
+    cube_21.loc[('whhou', 'rep', 'receipts_gdp'), 'mean']
+std_rev_gdp_whhou_rep_21 = cube_21.loc[('whhou', 'rep', 'receipts_gdp'), 'std']
+n_rev_gdp_whhou_rep_21 = cube_21.loc[('whhou', 'rep', 'receipts_gdp'), 'n']
+
+# House control (WH + HouseRep) Democrat control for 1947-2020
+avg_def_gdp_whhou_dem_20 = cube_20.loc[('whhou', 'dem', 'deficit_gdp'), 'mean']
+std_def_gdp_whhou_dem_20 = cube_20.loc[('whhou', 'dem', 'deficit_gdp'), 'std']
+n_def_gdp_whhou_dem_20 = cube_20.loc[('whhou', 'dem', 'deficit_gdp'), 'n']
+
+avg_nis_gdp_whhou_dem_20 = \
+    cube_20.loc[('whhou', 'dem', 'spend_nonint_gdp'), 'mean']
+std_nis_gdp_whhou_dem_20 = \
+    cube_20.loc[('whhou', 'dem', 'spend_nonint_gdp'), 'std']
+n_nis_gdp_whhou_dem_20 = cube_20.loc[('whhou', 'dem', 'spend_nonint_gdp'), 'n']
+
+avg_rev_gdp_whhou_dem_20 = \
+    cube_20.loc[('whhou', 'dem', 'receipts_gdp'), 'mean']
+std_rev_gdp_whhou_dem_20 = cube_20.loc[('whhou', 'dem', 'receipts_gdp'), 'std']
+n_rev_gdp_whhou_dem_20 = cube_20.loc[('whhou', 'dem', 'receipts_gdp'), 'n']
+
+# House control (WH + HouseRep) Democrat control for 1947-2021
+avg_def_gdp_whhou_dem_21 = cube_21.loc[('whhou', 'dem', 'deficit_gdp'), 'mean']
+std_def_gdp_whhou_dem_21 = cube_21.loc[('whhou', 'dem', 'deficit_gdp'), 'std']
+n_def_gdp_whhou_dem_21 = cube_21.loc[('whhou', 'dem', 'deficit_gdp'), 'n']
+
+avg_nis_gdp_whhou_dem_21 = \
+    cube_21.loc[('whhou', 'dem', 'spend_nonint_gdp'), 'mean']
+std_nis_gdp_whhou_dem_21 = \
+    cube_21.loc[('whhou', 'dem', 'spend_nonint_gdp'), 'std']
+n_nis_gdp_whhou_dem_21 = cube_21.loc[('whhou', 'dem', 'spend_nonint_gdp'), 'n']
+
+avg_rev_gdp_whhou_dem_21 = \
+    cube_21.loc[('whhou', 'dem', 'receipts_gdp'), 'mean']
+std_rev_gdp_whhou_dem_21 = cube_21.loc[('whhou', 'dem', 'receipts_gdp'), 'std']
+n_rev_gdp_whhou_dem_21 = cube_21.loc[('whhou', 'dem', 'receipts_gdp'), 'n']
+
+# House control (WH + HouseRep) split control for 1947-2020
+avg_def_gdp_whhou_spl_20 = cube_20.loc[('whhou', 'spl', 'deficit_gdp'), 'mean']
+std_def_gdp_whhou_spl_20 = cube_20.loc[('whhou', 'spl', 'deficit_gdp'), 'std']
+n_def_gdp_whhou_spl_20 = cube_20.loc[('whhou', 'spl', 'deficit_gdp'), 'n']
+
+avg_nis_gdp_whhou_spl_20 = \
+    cube_20.loc[('whhou', 'spl', 'spend_nonint_gdp'), 'mean']
+std_nis_gdp_whhou_spl_20 = \
+    cube_20.loc[('whhou', 'spl', 'spend_nonint_gdp'), 'std']
+n_nis_gdp_whhou_spl_20 = cube_20.loc[('whhou', 'spl', 'spend_nonint_gdp'), 'n']
+
+avg_rev_gdp_whhou_spl_20 = \
+    cube_20.loc[('whhou', 'spl', 'receipts_gdp'), 'mean']
+std_rev_gdp_whhou_spl_20 = cube_20.loc[('whhou', 'spl', 'receipts_gdp'), 'std']
+n_rev_gdp_whhou_spl_20 = cube_20.loc[('whhou', 'spl', 'receipts_gdp'), 'n']
+
+# House control (WH + HouseRep) split control for 1947-2021
+avg_def_gdp_whhou_spl_21 = cube_21.loc[('whhou', 'spl', 'deficit_gdp'), 'mean']
+std_def_gdp_whhou_spl_21 = cube_21.loc[('whhou', 'spl', 'deficit_gdp'), 'std']
+n_def_gdp_whhou_spl_21 = cube_21.loc[('whhou', 'spl', 'deficit_gdp'), 'n']
+
+avg_nis_gdp_whhou_spl_21 = \
+    cube_21.loc[('whhou', 'spl', 'spend_nonint_gdp'), 'mean']
+std_nis_gdp_whhou_spl_21 = \
+    cube_21.loc[('whhou', 'spl', 'spend_nonint_gdp'), 'std']
+n_nis_gdp_whhou_spl_21 = cube_21.loc[('whhou', 'spl', 'spend_nonint_gdp'), 'n']
+
+avg_rev_gdp_whhou_spl_21 = \
+    cube_21.loc[('whhou', 'spl', 'receipts_gdp'), 'mean']
+std_rev_gdp_whhou_spl_21 = cube_21.loc[('whhou', 'spl', 'receipts_gdp'), 'std']
+n_rev_gdp_whhou_spl_21 = cube_21.loc[('whhou', 'spl', 'receipts_gdp'), 'n']
 
 '''
 -------------------------------------------------------------------------------
 Print the table output
 -------------------------------------------------------------------------------
 '''
+instrument.checkpoint('table: table output')
 
 print('Avg. deficits-to-GDP by party control table output: 1947-2020 and ' +
       '1947-2021')
@@ -563,6 +521,7 @@ print('            & $N$=' + str(n_rev_gdp_all_spl_20) + ' & $N$=' +
 Print p-values from t-tests
 -------------------------------------------------------------------------------
 '''
+instrument.checkpoint('table: t-tests')
 print('')
 print('Deficit: Column 5 (WH + Sen with forecast): Pr: split control = ' +
       'Rep control (using split control)')
@@ -703,7 +662,8 @@ print('One-sided p-value of t-stat with df = ' + str(df12) + ':',
 Run regressions on Republican and Democrat control scatter data
 -------------------------------------------------------------------------------
 '''
-df1 = cntrl_whsen_rep_20_df
+instrument.checkpoint('table: regressions')
+df1 = scen_20.frame('whsen', 'rep')
 df1['const'] = 1
 reg1a = sm.OLS(endog=df1['deficit_gdp'], exog=df1[['const', 'dem_senateseats']],
               missing='drop')
@@ -749,7 +709,7 @@ print('Regression results for rev/GDP by Dem House seats, ' +
 print(res1f.summary())
 
 
-df2 = cntrl_whsen_dem_20_df
+df2 = scen_20.frame('whsen', 'dem')
 df2['const'] = 1
 reg2a = sm.OLS(endog=df2['deficit_gdp'], exog=df2[['const', 'dem_senateseats']],
               missing='drop')
@@ -794,7 +754,7 @@ print('Regression results for rev/GDP by Dem House seats, ' +
       'Democrat Control (WH + Sen) 1947-2020')
 print(res2f.summary())
 
-df3 = cntrl_whsen_dem_21_df
+df3 = scen_21.frame('whsen', 'dem')
 df3['const'] = 1
 reg3a = sm.OLS(endog=df3['deficit_gdp'], exog=df3[['const', 'dem_senateseats']],
               missing='drop')
@@ -838,3 +798,35 @@ print('')
 print('Regression results for rev/GDP by Dem House seats, ' +
       'Democrat Control (WH + Sen) 1947-2021')
 print(res3f.summary())
+
+'''
+-------------------------------------------------------------------------------
+Robust standard errors of the seat regressions (the annual series are
+autocorrelated, so the classical standard errors above are too small)
+-------------------------------------------------------------------------------
+'''
+instrument.checkpoint('table: robust standard errors')
+for cov_type, cov_label in [('HAC', 'Newey-West (HAC)'),
+                            ('cluster', 'Congress-clustered')]:
+    for scen, period in [(scen_20, '1947-2020'), (scen_21, '1947-2021')]:
+        print('')
+        print('Seat regressions (WH + Sen) with ' + cov_label +
+              ' standard errors, ' + period)
+        print(scen.regressions(cov_type=cov_type).round(4).to_string())
+
+'''
+-------------------------------------------------------------------------------
+Welch t-tests of every pairwise party comparison of the table, with Holm and
+Benjamini-Hochberg adjusted p-values over the tests of each sample
+-------------------------------------------------------------------------------
+'''
+instrument.checkpoint('table: Welch tests')
+welch_df = party_tests.welch_tests({'1947-2020': cube_20,
+                                    '1947-2021': cube_21},
+                                   family_list=['window'])
+for period in ['1947-2020', '1947-2021']:
+    print('')
+    print('Welch t-tests of the party differences, ' + period)
+    print(welch_df.loc[period, ['diff', 't', 'df', 'p', 'p_holm',
+                                'p_bh']].round(3).to_string())
+instrument.checkpoint(None)
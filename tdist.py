@@ -1,102 +1,200 @@
+'''
+This module draws the t distribution and the p-value of a t-test as the
+shaded area under the density beyond the test statistic. By default it draws
+the textbook figure of a one-sided test with 20 degrees of freedom at the 5
+percent level. With the --var, --cntrl, --pair, and --window options it
+draws the Welch t-test of party_tests.py of that comparison, e.g.
+
+    python tdist.py --var deficit_gdp --cntrl whsen --pair rep_spl \
+        --window 1947-2021
+'''
+
 # Import packages
-from bokeh.core.property.numeric import Interval
-from bokeh.models.annotations import Label, LabelSet
-from bokeh.models.glyphs import VArea
+import argparse
+from bokeh.models.annotations import Label
 from bokeh.models.tickers import SingleIntervalTicker
 import numpy as np
 import pandas as pd
 from scipy.stats import t as tdist
-import datetime as dt
 import os
 from bokeh.io import output_file
 from bokeh.plotting import figure, show
-from bokeh.models import (ColumnDataSource, Title, Legend, HoverTool,
-                          NumeralTickFormatter)
-from bokeh.models.widgets import Tabs, Panel
+from bokeh.models import ColumnDataSource, Title
 
 # Set paths to work across Mac/Windows/Linux platforms
 cur_path = os.path.split(os.path.abspath(__file__))[0]
 images_dir = os.path.join(cur_path, 'images')
 
-'''
--------------------------------------------------------------------------------
-Create pandas DataFrame and Column Data Source data object
--------------------------------------------------------------------------------
-'''
-N = 1000
-deg_fr = 20
-x_min = -4.0
-x_max = 4.0
-y_min = 0.0
-y_max = 1.1 * tdist.pdf(0, deg_fr)
-t_stat_vals = np.linspace(x_min, x_max, N)
-t_dist_vals = tdist.pdf(t_stat_vals, deg_fr)
-t_i = tdist.ppf(0.95, deg_fr)  # test statistic value
-
-t_df = pd.DataFrame(data=np.hstack((t_stat_vals.reshape((N, 1)),
-                                    t_dist_vals.reshape((N, 1)))),
-                    columns=['t_stat_vals', 't_dist_vals'])
-shade_df = t_df[t_df['t_stat_vals'] >= t_i]
-t_cds = ColumnDataSource(t_df)
-shade_cds = ColumnDataSource(shade_df)
 
-'''
--------------------------------------------------------------------------------
-Create figure
--------------------------------------------------------------------------------
-'''
+def gen_tdist_fig(t_i, deg_fr, alternative='greater', p_value=None,
+                  note_text_list=[], fig_title='t Distribution and p-value',
+                  fig_path=os.path.join(images_dir, 'tdist.html')):
+    """
+    This function creates the figure of the density of the t distribution
+    with the p-value of a test statistic shaded.
+
+    Args:
+        t_i (float): test statistic
+        deg_fr (float): degrees of freedom
+        alternative (string): 'greater' (right tail), 'less' (left tail), or
+            'two-sided' (both tails beyond abs(t_i))
+        p_value (float): p-value printed on the figure, none if None
+        note_text_list (list): notes below the figure
+        fig_title (string): title of the figure
+        fig_path (string): path of the HTML file
+
+    Returns:
+        fig (Figure): the figure
+    """
+    # Create pandas DataFrame and Column Data Source data object
+    N = 1000
+    x_max = max(4.0, np.ceil(abs(t_i)) + 1.0)
+    x_min = -x_max
+    y_min = 0.0
+    y_max = 1.1 * tdist.pdf(0, deg_fr)
+    t_stat_vals = np.linspace(x_min, x_max, N)
+    t_dist_vals = tdist.pdf(t_stat_vals, deg_fr)
+
+    t_df = pd.DataFrame(data=np.hstack((t_stat_vals.reshape((N, 1)),
+                                        t_dist_vals.reshape((N, 1)))),
+                        columns=['t_stat_vals', 't_dist_vals'])
+    if alternative == 'greater':
+        shade_df_list = [t_df[t_df['t_stat_vals'] >= t_i]]
+        line_list = [t_i]
+        label_text = ('p-value = P[t > abs(t_i)]' if t_i >= 0 else
+                      'p-value = P[t > t_i]')
+    elif alternative == 'less':
+        shade_df_list = [t_df[t_df['t_stat_vals'] <= t_i]]
+        line_list = [t_i]
+        label_text = 'p-value = P[t < t_i]'
+    else:
+        shade_df_list = [t_df[t_df['t_stat_vals'] >= abs(t_i)],
+                         t_df[t_df['t_stat_vals'] <= -abs(t_i)]]
+        line_list = [abs(t_i), -abs(t_i)]
+        label_text = 'p-value = 2 P[t > abs(t_i)]'
+    if p_value is not None:
+        label_text += ' = ' + '{:.3f}'.format(p_value)
+    t_cds = ColumnDataSource(t_df)
+
+    # Create figure
+    fig = figure(title=fig_title,
+                 plot_height=600,
+                 plot_width=1000,
+                 x_axis_label='t-statistic',
+                 x_range=(x_min, x_max),
+                 y_axis_label='pdf f(t|df)',
+                 y_range=(y_min, y_max),
+                 toolbar_location=None)
+
+    # Output to HTML file
+    output_file(fig_path, title=fig_title)
+
+    # Set title font size and axes font sizes
+    fig.title.text_font_size = '15.5pt'
+    fig.xaxis.axis_label_text_font_size = '12pt'
+    fig.xaxis.major_label_text_font_size = '12pt'
+    fig.yaxis.axis_label_text_font_size = '12pt'
+    fig.yaxis.major_label_text_font_size = '12pt'
+
+    # Modify tick intervals for X-axis and Y-axis
+    fig.xaxis.ticker = SingleIntervalTicker(interval=10, num_minor_ticks=1)
+    fig.yaxis.ticker = SingleIntervalTicker(interval=0.1, num_minor_ticks=2)
+    fig.ygrid.ticker = SingleIntervalTicker(interval=10)
+
+    # Plotting the line
+    fig.line(x='t_stat_vals', y='t_dist_vals', source=t_cds, color='black',
+             line_width=3)
+
+    # Create vertical dotted line at 0
+    fig.segment(x0=0, y0=0, x1=0, y1=tdist.pdf(0, deg_fr), color='black',
+                line_dash='3 3', line_width=1)
+
+    # Create vertical dotted lines at the test statistic
+    for t_line in line_list:
+        fig.segment(x0=t_line, y0=0, x1=t_line, y1=tdist.pdf(t_line, deg_fr),
+                    color='black', line_dash='6 2', line_width=3)
+
+    # Shade in the area under the curve beyond the test statistic
+    for shade_df in shade_df_list:
+        fig.varea(x='t_stat_vals', y1='t_dist_vals', y2=0,
+                  source=ColumnDataSource(shade_df), color='#C584DB')
+
+    # Create describing the p-value
+    label_x = min(abs(t_i) + 0.5, x_max - 3.5)
+    label_pv = Label(x=label_x, y=0.07, x_units='data', y_units='data',
+                     text=label_text)
+    fig.add_layout(label_pv)
+
+    # Turn off scrolling
+    fig.toolbar.active_drag = None
+
+    # Add notes below image
+    for note_text in note_text_list:
+        caption = Title(text=note_text, align='left', text_font_size='4mm',
+                        text_font_style='italic')
+        fig.add_layout(caption, 'below')
+
+    return fig
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    parser = argparse.ArgumentParser(
+        description='Draw the t distribution and p-value of a t-test')
+    parser.add_argument('--var', default=None,
+                        help='variable of a Welch test of party_tests.py, ' +
+                        'e.g. deficit_gdp (textbook figure if not given)')
+    parser.add_argument('--cntrl', default='whsen',
+                        help='control definition: all, whsen, or whhou')
+    parser.add_argument('--pair', default='rep_spl',
+                        help='comparison: rep_dem, rep_spl, or dem_spl')
+    parser.add_argument('--window', default='1947-2020',
+                        help='sample window start-end; windows ending in ' +
+                        '2021 use the CBO July 2021 projections')
+    parser.add_argument('--alternative', default='two-sided',
+                        help='two-sided, greater, or less')
+    # site_export.py runs this script with its own command line arguments
+    args = parser.parse_known_args()[0]
+    if args.var is None:
+        deg_fr = 20
+        t_i = tdist.ppf(0.95, deg_fr)  # test statistic value
+        fig = gen_tdist_fig(t_i, deg_fr)
+    else:
+        import party_control as pc
+        import party_scenarios as psc
+        import party_tests as pt
+        start_year, end_year = [int(year)
+                                for year in args.window.split('-')]
+        overlay_dict = {}
+        if end_year == 2021:
+            overlay_dict[(start_year, end_year)] = \
+                psc.Overlay(psc.cbo_2021_dict)
+        test_df = pt.scenario_tests(
+            psc.PartyBase(pc.read_party_data()), [(start_year, end_year)],
+            overlay_dict, alternative=args.alternative)
+        test = test_df.loc[(args.window, args.cntrl, args.var, args.pair)]
+        party_a, party_b = args.pair.split('_')
+        fig = gen_tdist_fig(
+            test['t'], test['df'], args.alternative, test['p'],
+            note_text_list=[
+                'Note: Welch t-test of ' + args.var + ', ' + party_a +
+                ' minus ' + party_b + ' control (' + args.cntrl + '), ' +
+                args.window + ': difference = ' +
+                '{:.3f}'.format(test['diff']) + ', t = ' +
+                '{:.3f}'.format(test['t']) + ', df = ' +
+                '{:.1f}'.format(test['df']) + '.',
+                'Holm adjusted p-value = ' +
+                '{:.3f}'.format(test['p_holm']) + ', BH adjusted p-value ' +
+                '= ' + '{:.3f}'.format(test['p_bh']) + ' (over the ' +
+                str(len(test_df)) + ' tests of the window).'],
+            fig_title=('t Distribution and p-value: ' + args.var + ', ' +
+                       party_a + ' - ' + party_b + ' (' + args.cntrl +
+                       '), ' + args.window),
+            fig_path=os.path.join(images_dir, 'tdist_' + args.var + '_' +
+                                  args.cntrl + '_' + args.pair + '_' +
+                                  args.window + '.html'))
 
-fig_title = 't Distribution and p-value'
-fig_path = os.path.join(images_dir, 'tdist.html')
-fig = figure(title=fig_title,
-             plot_height=600,
-             plot_width=1000,
-             x_axis_label='t-statistic',
-             x_range=(x_min, x_max),
-             y_axis_label='pdf f(t|df)',
-             y_range=(y_min, y_max),
-             toolbar_location=None)
-
-# Output to HTML file
-output_file(fig_path, title=fig_title)
-
-# Set title font size and axes font sizes
-fig.title.text_font_size = '15.5pt'
-fig.xaxis.axis_label_text_font_size = '12pt'
-fig.xaxis.major_label_text_font_size = '12pt'
-fig.yaxis.axis_label_text_font_size = '12pt'
-fig.yaxis.major_label_text_font_size = '12pt'
-
-# Modify tick intervals for X-axis and Y-axis
-fig.xaxis.ticker = SingleIntervalTicker(interval=10, num_minor_ticks=1)
-# fig.xgrid.ticker = SingleIntervalTicker(interval=10)
-# fig.xaxis.major_label_overrides = dict(zip([0, t_i], ['0', '|t_i|']))
-fig.yaxis.ticker = SingleIntervalTicker(interval=0.1, num_minor_ticks=2)
-fig.ygrid.ticker = SingleIntervalTicker(interval=10)
-
-# Plotting the line
-fig.line(x='t_stat_vals', y='t_dist_vals', source=t_cds, color='black',
-            line_width=3)
-
-# Create vertical dotted line at 0
-fig.segment(x0=0, y0=0, x1=0, y1=tdist.pdf(0, deg_fr), color='black',
-            line_dash='3 3', line_width=1)
-
-# Create vertical dotted line at |t_i| such that 1-F(t_i|deg_fr) = 0.05
-fig.segment(x0=t_i, y0=0, x1=t_i, y1=tdist.pdf(t_i, deg_fr), color='black',
-            line_dash='6 2', line_width=3)
-
-# Shade in the area under the curve to the right of the test statistic
-fig.varea(x='t_stat_vals', y1='t_dist_vals', y2=0, source=shade_cds,
-          color='#C584DB')
-
-# Create describing the p-value
-label_pv = Label(x=t_i + 0.5, y=0.07, x_units='data', y_units='data',
-                 text='p-value = P[t > abs(t_i)]')
-fig.add_layout(label_pv)
-
-# Turn off scrolling
-fig.toolbar.active_drag = None
-
-# Display the generated figure
-show(fig)
+    # Display the generated figure
+    show(fig)
@@ -0,0 +1,508 @@
+'''
+This module adds a level-of-detail (LOD) layer to the time series figures of
+this repository (gen_tseries, gen_one_tseries, gen_tseries_dy,
+gen_tseries_frcst, or any Bokeh figure of line and marker glyphs), so that
+figures of long or high-frequency series (e.g., monthly Treasury data or
+daily-resolution forecast vintages) with millions of points stay responsive.
+
+For every large data source of a figure, the enable_lod() function:
+
+* precomputes a pyramid of downsampled levels of the series, from a coarse
+  level of a few thousand points to the full data, using the
+  Largest-Triangle-Three-Buckets (LTTB) algorithm for the coarse levels and
+  bucket minimums and maximums for the fine levels,
+* keeps only the coarse level in the figure, so that the page loads fast,
+* writes the finer levels as chunks of binary data files, and
+* attaches a callback to the x-axis range that, after the user zooms or
+  pans, fetches the chunks of the finest level that fits the visible range
+  and swaps them into the figure.
+
+Figures with more points than a threshold are switched to the WebGL output
+backend. The chunk files are fetched by the browser, so the page and its
+chunk folder must be served over HTTP (e.g., `python -m http.server`) rather
+than opened as local files. If a user runs this module as a script, it will
+build a demonstration figure of a synthetic daily series.
+'''
+
+# Import packages
+import os
+import numpy as np
+from bokeh.models import (BooleanFilter, ColumnDataSource, CustomJS,
+                          GlyphRenderer, IndexFilter, Plot)
+from payload_minimize import dataspec_fields, hover_renderers, tooltip_fields
+
+# Set paths to work across Mac/Windows/Linux platforms
+cur_path = os.path.split(os.path.abspath(__file__))[0]
+lod_dir = os.path.join(cur_path, 'site', 'lod')
+
+# Default LOD settings
+coarse_points = 2000  # points of the coarse level shipped with the figure
+level_factor = 8  # ratio of the numbers of points of consecutive levels
+lttb_max_points = 20000  # larger levels are downsampled with min-max buckets
+chunk_points = 50000  # points per binary chunk file
+target_points = 6000  # maximum points of a fine level in the visible range
+webgl_threshold = 10000  # figures with more points use the WebGL backend
+
+update_js = '''
+const state_all = window._deficitparty_lod = window._deficitparty_lod || {};
+const delay = 150;
+for (let s = 0; s < sources.length; s++) {
+    const source = sources[s];
+    const manifest = manifests[s];
+    let state = state_all[source.id];
+    if (state === undefined) {
+        state = state_all[source.id] = {coarse: source.data, chunks: {},
+                                        token: 0, timer: null};
+    }
+    clearTimeout(state.timer);
+    state.timer = setTimeout(function () {
+        const x0 = x_range.start;
+        const x1 = x_range.end;
+        const token = ++state.token;
+        const span = manifest.x_max - manifest.x_min;
+        const frac = span > 0 ? Math.min(1, Math.max(0, (x1 - x0) / span)) : 1;
+        let level = -1;
+        for (let k = manifest.levels.length - 1; k >= 0; k--) {
+            if (manifest.levels[k].n * frac <= target) {
+                level = k;
+                break;
+            }
+        }
+        if (level < 0) {
+            if (source.data !== state.coarse) {
+                source.data = state.coarse;
+            }
+            return;
+        }
+        const lev = manifest.levels[level];
+        const chunk_list = [];
+        for (let j = 0; j < lev.x_first.length; j++) {
+            if (lev.x_last[j] >= x0 && lev.x_first[j] <= x1) {
+                chunk_list.push(j);
+            }
+        }
+        if (chunk_list.length == 0) {
+            return;
+        }
+        const load = function (j) {
+            const url = manifest.url + '.L' + (level + 1) + '.C' + j + '.bin';
+            if (state.chunks[url] === undefined) {
+                state.chunks[url] = fetch(url).then(function (response) {
+                    if (!response.ok) {
+                        throw new Error(url + ': ' + response.status);
+                    }
+                    return response.arrayBuffer();
+                }).then(function (buffer) {
+                    const n = lev.count[j];
+                    const chunk = {};
+                    manifest.columns.forEach(function (col, c) {
+                        chunk[col] = new Float64Array(buffer, 8 * n * c, n);
+                    });
+                    return chunk;
+                });
+                state.chunks[url].catch(function () {
+                    delete state.chunks[url];
+                });
+            }
+            return state.chunks[url];
+        };
+        Promise.all(chunk_list.map(load)).then(function (chunk_data) {
+            if (token !== state.token) {
+                return;
+            }
+            const x_lo = lev.x_first[chunk_list[0]];
+            const x_hi = lev.x_last[chunk_list[chunk_list.length - 1]];
+            const coarse_x = state.coarse[manifest.x_field];
+            let n_head = 0;
+            while (n_head < coarse_x.length && coarse_x[n_head] < x_lo) {
+                n_head++;
+            }
+            let n_tail = coarse_x.length;
+            while (n_tail > n_head && coarse_x[n_tail - 1] > x_hi) {
+                n_tail--;
+            }
+            const new_data = {};
+            manifest.columns.forEach(function (col) {
+                const part_list = [state.coarse[col].slice(0, n_head)];
+                chunk_data.forEach(function (chunk) {
+                    part_list.push(chunk[col]);
+                });
+                part_list.push(state.coarse[col].slice(n_tail));
+                let n_new = 0;
+                part_list.forEach(function (part) {
+                    n_new += part.length;
+                });
+                const new_col = new Float64Array(n_new);
+                let offset = 0;
+                part_list.forEach(function (part) {
+                    new_col.set(part, offset);
+                    offset += part.length;
+                });
+                new_data[col] = new_col;
+            });
+            source.data = new_data;
+        }).catch(function (err) {
+            console.warn('LOD chunks not loaded: ' + err);
+        });
+    }, delay);
+}
+'''
+
+
+def lttb_indices(x, y, n_out):
+    """
+    This function selects the points of a series with the
+    Largest-Triangle-Three-Buckets (LTTB) algorithm (Steinarsson, 2013). The
+    first and last points are kept, and the other points are split into
+    n_out - 2 buckets of equal numbers of points. From each bucket, the
+    point is kept that forms the largest triangle with the point kept from
+    the previous bucket and the average point of the next bucket, which
+    preserves the visual shape of the series.
+
+    Args:
+        x (array_like): (n,) sorted x values
+        y (array_like): (n,) y values
+        n_out (int): number of points to keep, at least 3
+
+    Returns:
+        idx (array_like): (min(n, n_out),) sorted indices of the kept points
+    """
+    n = x.size
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    edges[-1] = n - 1
+    # Average point of every bucket and of the last point
+    counts = np.diff(edges)
+    avg_x = np.append(np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts,
+                      x[-1])
+    avg_y = np.append(np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts,
+                      y[-1])
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0] = 0
+    idx[-1] = n - 1
+    prev = 0
+    for b in range(n_out - 2):
+        lo = edges[b]
+        hi = edges[b + 1]
+        ax = x[prev]
+        ay = y[prev]
+        area = np.abs((ax - avg_x[b + 1]) * (y[lo:hi] - ay) -
+                      (ax - x[lo:hi]) * (avg_y[b + 1] - ay))
+        prev = lo + int(np.argmax(area))
+        idx[b + 1] = prev
+
+    return idx
+
+
+def minmax_indices(y, n_out):
+    """
+    This function selects the points of a series by splitting it into
+    n_out // 2 buckets of equal numbers of points and keeping the minimum and
+    maximum point of every bucket, which preserves the envelope of the
+    series, including single-period spikes.
+
+    Args:
+        y (array_like): (n,) y values
+        n_out (int): number of points to keep
+
+    Returns:
+        idx (array_like): sorted unique indices of the kept points
+    """
+    n = y.size
+    n_bucket = max(n_out // 2, 1)
+    if n_out >= n:
+        return np.arange(n)
+    bucket_size = -(-n // n_bucket)
+    n_pad = n_bucket * bucket_size - n
+    y_mat = np.concatenate([y, np.full(n_pad, y[-1])]).reshape(n_bucket,
+                                                               bucket_size)
+    offsets = np.arange(n_bucket) * bucket_size
+    idx = np.concatenate([offsets + np.argmin(y_mat, axis=1),
+                          offsets + np.argmax(y_mat, axis=1), [0, n - 1]])
+    idx = np.unique(np.minimum(idx, n - 1))
+
+    return idx
+
+
+def downsample_indices(x, y_list, n_out, lttb_max=lttb_max_points):
+    """
+    This function selects about n_out points of one or more series that share
+    the same x values, with LTTB if n_out is at most lttb_max and with
+    min-max buckets otherwise. With several series, the points kept for any
+    of them are kept.
+
+    Args:
+        x (array_like): (n,) sorted x values
+        y_list (list): list of (n,) y value arrays
+        n_out (int): number of points to keep per series
+        lttb_max (int): largest n_out downsampled with LTTB
+
+    Returns:
+        idx (array_like): sorted unique indices of the kept points
+    """
+    idx_list = []
+    for y in y_list:
+        if n_out <= lttb_max:
+            idx_list.append(lttb_indices(x, y, n_out))
+        else:
+            idx_list.append(minmax_indices(y, n_out))
+    idx = np.unique(np.concatenate(idx_list))
+
+    return idx
+
+
+def lod_pyramid(x, y_list, n_coarse=coarse_points, factor=level_factor,
+                lttb_max=lttb_max_points):
+    """
+    This function computes the levels of detail of one or more series, from
+    a coarse level of about n_coarse points per series, multiplying the
+    number of points by factor at each level, to the full data. Every level
+    is downsampled from the full data.
+
+    Args:
+        x (array_like): (n,) sorted x values
+        y_list (list): list of (n,) y value arrays
+        n_coarse (int): points per series of the coarse level
+        factor (int): ratio of the numbers of points of consecutive levels
+        lttb_max (int): largest level downsampled with LTTB
+
+    Returns:
+        idx_list (list): sorted row indices of each level, coarse first
+    """
+    n = x.size
+    idx_list = []
+    n_out = n_coarse
+    while n_out < n:
+        idx_list.append(downsample_indices(x, y_list, n_out, lttb_max))
+        n_out *= factor
+    idx_list.append(np.arange(n))
+
+    return idx_list
+
+
+def write_lod_chunks(data_dict, idx_list, name, out_dir=lod_dir,
+                     chunk_size=chunk_points):
+    """
+    This function writes the fine levels of a pyramid (every level after the
+    coarse one) as binary chunk files named <name>.L<level>.C<chunk>.bin.
+    A chunk file holds chunk_size consecutive points of a level as the
+    little-endian float64 arrays of the columns, one after the other.
+
+    Args:
+        data_dict (dict): column name -> (n,) numeric array, x column first
+        idx_list (list): output of lod_pyramid()
+        name (string): file name prefix of the chunks
+        out_dir (string): folder of the chunk files
+        chunk_size (int): points per chunk file
+
+    Returns:
+        level_list (list): for each fine level, a dictionary of its number
+            of points 'n' and the point counts and first and last x values
+            of its chunks
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    x_col = list(data_dict)[0]
+    level_list = []
+    for level, idx in enumerate(idx_list[1:], start=1):
+        lev_dict = {'n': int(idx.size), 'count': [], 'x_first': [],
+                    'x_last': []}
+        for j, start in enumerate(range(0, idx.size, chunk_size)):
+            chunk_idx = idx[start:start + chunk_size]
+            chunk_mat = np.vstack([np.asarray(col, dtype='<f8')[chunk_idx]
+                                   for col in data_dict.values()])
+            chunk_path = os.path.join(out_dir, name + '.L' + str(level) +
+                                      '.C' + str(j) + '.bin')
+            with open(chunk_path, 'wb') as file:
+                file.write(chunk_mat.tobytes())
+            x_chunk = chunk_mat[0]
+            lev_dict['count'].append(int(chunk_idx.size))
+            lev_dict['x_first'].append(float(x_chunk[0]))
+            lev_dict['x_last'].append(float(x_chunk[-1]))
+        level_list.append(lev_dict)
+
+    return level_list
+
+
+def numeric_column(vals):
+    """
+    This function returns a column as a float64 array, converting dates to
+    milliseconds since the epoch as Bokeh does, or None if the column is not
+    numeric.
+    """
+    vals = np.asarray(vals)
+    if vals.dtype.kind == 'M':
+        return vals.astype('datetime64[ms]').astype(np.int64).astype(
+            np.float64)
+    if vals.dtype.kind in 'iuf':
+        return vals.astype(np.float64)
+
+    return None
+
+
+def enable_lod(model, name, out_dir=lod_dir, url_prefix='lod/',
+               threshold=webgl_threshold, n_coarse=coarse_points,
+               factor=level_factor, chunk_size=chunk_points,
+               target=target_points):
+    """
+    This function adds the level-of-detail layer to every figure of a model
+    in place. Each data source with more than n_coarse rows that is drawn in
+    a single figure is replaced by its coarse level, its finer levels are
+    written to out_dir, and a callback on the x-axis range of the figure
+    swaps in the finest level with at most target points in view. Sources
+    that are filtered by row index, read by CustomJS callbacks, or that have
+    non-numeric referenced columns are left unchanged. Figures with more
+    than threshold points (before downsampling) use the WebGL backend.
+
+    Args:
+        model (Bokeh Model): figure, layout, or Tabs object, e.g. the output
+            of gen_tseries_frcst()
+        name (string): file name prefix of the chunk files of this model
+        out_dir (string): folder that the chunk files are written to
+        url_prefix (string): url of out_dir relative to the HTML page
+        threshold (int): points above which a figure uses WebGL
+        n_coarse (int): points per series of the coarse level
+        factor (int): ratio of the numbers of points of consecutive levels
+        chunk_size (int): points per chunk file
+        target (int): maximum points of a fine level in the visible range
+
+    Returns:
+        report_dict (dict): number of figures switched to WebGL and, for
+            each downsampled source, its rows and the points of its levels
+    """
+    # Sources read by CustomJS callbacks or drawn in several figures keep
+    # their data
+    skip_src_set = set()
+    for js_model in model.references():
+        js_args = getattr(js_model, 'args', None)
+        if isinstance(js_args, dict):
+            for arg_val in js_args.values():
+                if isinstance(arg_val, ColumnDataSource):
+                    skip_src_set.add(arg_val)
+    src_plot_dict = {}
+    for plot in model.select({'type': Plot}):
+        for rend in plot.renderers:
+            if isinstance(rend, GlyphRenderer):
+                src_plot_dict.setdefault(rend.data_source, set()).add(plot)
+    skip_src_set |= {src for src, plot_set in src_plot_dict.items()
+                     if len(plot_set) > 1}
+
+    hover_dict = hover_renderers(model)
+    report_dict = {'webgl_figures': 0, 'source_list': []}
+    for p, plot in enumerate(model.select({'type': Plot})):
+        n_points = 0
+        field_dict = {}
+        for rend in plot.renderers:
+            if not isinstance(rend, GlyphRenderer):
+                continue
+            src = rend.data_source
+            if not isinstance(src, ColumnDataSource):
+                continue
+            n_points += len(next(iter(src.data.values()), []))
+            if any(isinstance(filt, (IndexFilter, BooleanFilter))
+                   for filt in rend.view.filters):
+                skip_src_set.add(src)
+            field_set = field_dict.setdefault(src, set())
+            field_set |= dataspec_fields(rend.glyph)
+            for hover, rend_list in hover_dict.items():
+                if rend in rend_list:
+                    field_set |= tooltip_fields(hover.tooltips)
+            for filt in rend.view.filters:
+                if hasattr(filt, 'column_name'):
+                    field_set.add(filt.column_name)
+        if n_points > threshold:
+            plot.output_backend = 'webgl'
+            report_dict['webgl_figures'] += 1
+
+        # The x field is the first field of the first glyph on the source
+        source_list = []
+        manifest_list = []
+        for s, (src, field_set) in enumerate(field_dict.items()):
+            n_rows = len(next(iter(src.data.values()), []))
+            if src in skip_src_set or n_rows <= n_coarse:
+                continue
+            rend = [rend for rend in plot.renderers
+                    if isinstance(rend, GlyphRenderer) and
+                    rend.data_source is src][0]
+            x_field = getattr(rend.glyph, 'x', None)
+            if isinstance(x_field, dict):
+                x_field = x_field.get('field')
+            if x_field not in field_set:
+                continue
+            col_list = [x_field] + sorted(field_set - {x_field})
+            data_dict = {}
+            for col in col_list:
+                if col not in src.data:
+                    break
+                vals = numeric_column(src.data[col])
+                if vals is None:
+                    break
+                data_dict[col] = vals
+            else:
+                x = data_dict[x_field]
+                order = np.argsort(x, kind='stable')
+                data_dict = {col: vals[order]
+                             for col, vals in data_dict.items()}
+                y_list = [vals for col, vals in data_dict.items()
+                          if col != x_field]
+                idx_list = lod_pyramid(data_dict[x_field], y_list, n_coarse,
+                                       factor)
+                src_name = name + '.' + str(p) + '.' + str(s)
+                level_list = write_lod_chunks(data_dict, idx_list, src_name,
+                                              out_dir, chunk_size)
+                src.data = {col: vals[idx_list[0]]
+                            for col, vals in data_dict.items()}
+                source_list.append(src)
+                manifest_list.append({'url': url_prefix + src_name,
+                                      'x_field': x_field,
+                                      'columns': col_list,
+                                      'x_min': float(data_dict[x_field][0]),
+                                      'x_max': float(data_dict[x_field][-1]),
+                                      'levels': level_list})
+                report_dict['source_list'].append(
+                    {'source': src.id, 'rows': n_rows,
+                     'level_points': [idx.size for idx in idx_list]})
+        if source_list:
+            callback = CustomJS(args={'sources': source_list,
+                                      'manifests': manifest_list,
+                                      'x_range': plot.x_range,
+                                      'target': target},
+                                code=update_js)
+            plot.x_range.js_on_change('start', callback)
+            plot.x_range.js_on_change('end', callback)
+
+    return report_dict
+
+
+if __name__ == "__main__":
+    """
+    Script that runs if the module is called and executed directly
+    """
+    import time
+    import pandas as pd
+    from bokeh.io import output_file, save
+    from bokeh.plotting import figure
+    from payload_minimize import payload_bytes
+
+    # Synthetic daily series (a random walk), used only to demonstrate the
+    # LOD layer on a long high-frequency series
+    rng = np.random.default_rng(seed=1790)
+    dates = pd.date_range('1790-01-01', '2051-12-31', freq='D')
+    demo_df = pd.DataFrame({'date': dates,
+                            'value': np.cumsum(rng.normal(size=dates.size))})
+    fig_path = os.path.join(cur_path, 'site', 'tseries_lod_demo.html')
+    os.makedirs(os.path.dirname(fig_path), exist_ok=True)
+    output_file(fig_path, title='Level-of-detail demonstration')
+    fig = figure(title='Synthetic daily series, 1790-2051', plot_height=600,
+                 plot_width=1100, x_axis_type='datetime',
+                 tools=['xpan', 'xwheel_zoom', 'box_zoom', 'reset'])
+    fig.line(x='date', y='value', source=ColumnDataSource(demo_df))
+    start_time = time.time()
+    report_dict = enable_lod(fig, 'tseries_lod_demo')
+    print('Rows: ' + '{:,}'.format(demo_df.shape[0]) + '; level points: ' +
+          str(report_dict['source_list'][0]['level_points']) + '; built in ' +
+          '{:.2f}'.format(time.time() - start_time) + ' seconds; payload ' +
+          '{:,}'.format(payload_bytes(fig)) + ' bytes')
+    save(fig)
+    print('Serve the site/ folder over HTTP and open ' +
+          'tseries_lod_demo.html, e.g. python -m http.server -d site')
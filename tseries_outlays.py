@@ -11,6 +11,7 @@ from bokeh.models.annotations import Label, LabelSet
 from bokeh.models.tickers import SingleIntervalTicker
 from bokeh.core.property.numeric import Interval
 from bokeh.palettes import Reds
+import derived_vars as dv
 
 # Set paths to work across Mac/Windows/Linux platforms
 cur_path = os.path.split(os.path.abspath(__file__))[0]
@@ -35,15 +36,21 @@ main_df = pd.read_csv(data_path,
                              'tot_outlays_gdp': np.float64},
                       skiprows=12)
 main_df = main_df.drop(['Unnamed: 8'], axis=1)
+# The percent-of-total ratios are computed on demand from the outlay levels
+# with the formulas in derived_vars.py
+outlays_frame = dv.DerivedFrame(main_df, dv.outlays_formulas)
 
 
-def gen_one_tseries(tseries_var, hover_descr='yvar', df=main_df,
+def gen_one_tseries(tseries_var, hover_descr='yvar', df=outlays_frame,
                     start_year='min', end_year='max', note_text_list=[],
                     fig_title_str='', fig_path='', line_color='blue'):
     """
     This function creates a plot of a single time series from the set of
-    variables from the outlays.csv dataset.
+    variables from the outlays.csv dataset. The data df is a DataFrame or a
+    DerivedFrame, of which only the year and tseries_var are used.
     """
+    if isinstance(df, dv.DerivedFrame):
+        df = df.frame(['year', tseries_var])
     # Create Variables for min and max values
     if start_year == 'min':
         min_year = df['year'].min()